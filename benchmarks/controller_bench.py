@@ -0,0 +1,408 @@
+"""
+制御クラスのマイクロベンチマーク: 1周期の計算コストを全制御クラスで比べる
+
+StateController.update (state_machine_fast / state_machine)、HybridController.update、
+PotentialController.update、DrivingController.compute_control、MLPredictor.predict に
+同じセンサー列（合成したもの・記録したログ）を与え、1回あたりの時間 (ns) のパーセンタイル、
+1回あたりのメモリ確保（tracemalloc のピーク増分と、戻ってきても残るブロック数）、
+import とインスタンス生成の時間（毎回新しいプロセスで測る）を JSON に保存する。
+--compare で前の JSON と比べれば、コミット間の劣化がわかる。
+
+board / adafruit_* がない環境では擬似ハードウェア (common/fake_hw.py) に差し替えるので、ラズパイ不要。
+制御クラスのモジュールの time はセンサー列の時刻を返す時計に差し替える（状態の持続時間などが記録どおりに進む）。
+MLPredictor は scikit-learn とモデルがないと読み込めないので、その場合は error を記録して飛ばす。
+
+使い方:
+    python benchmarks/controller_bench.py
+    python benchmarks/controller_bench.py state hybrid --repeat 50
+    python benchmarks/controller_bench.py --logs joystick_control/data/record_data_*.csv
+    python benchmarks/controller_bench.py --compare benchmarks/results/controller_bench_<前のコミット>.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import glob
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from common.controller_loader import CONTROLLERS, import_isolated, load_controller
+from common.replay import load_log
+
+# 制御クラスごとの測るメソッド（CONTROLLERS の呼び出し方で引数の形が決まる）
+METHODS = {"update": "update", "distances": "compute_control", "ml": "predict"}
+# 既定で読む記録済みログ
+DEFAULT_LOGS = os.path.join(REPO_ROOT, "joystick_control", "data", "record_data_*.csv")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+# 合成センサー列の周期 (秒、25Hz) と無効値・最大測定距離 (mm)
+SYNTHETIC_INTERVAL = 0.04
+SENSOR_INVALID_VALUE = 9999
+SENSOR_MAX_RANGE = 1300
+# --compare でこの倍率より遅くなったものに印を付ける
+REGRESSION_RATIO = 1.2
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+class StreamClock:
+    """制御クラスのモジュールの time の代わり（今のフレームの時刻を返す）"""
+
+    def __init__(self, start=1000.0):
+        self.now = start
+
+    def monotonic(self):
+        return self.now
+
+    time = perf_counter = monotonic
+
+    def monotonic_ns(self):
+        return int(self.now * 1e9)
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class _NullWriter:
+    """制御クラスの print を捨てる"""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def synthetic_stream(frames, seed=0):
+    """
+    周回コースを模した合成センサー列
+
+    直線・左右のコーナー・正面の障害物・壁への接近・測定エラー（無効値）の場面を順に繰り返す。
+
+    Returns:
+        list: (時刻 秒, [L2, L1, C, R1, R2] mm) のリスト
+    """
+    rng = np.random.default_rng(seed)
+    # 場面ごとの距離（始め → 終わり）
+    scenes = [
+        ([400, 600, 1300, 600, 400], [400, 600, 1300, 600, 400]),     # 直線
+        ([300, 500, 1200, 900, 1300], [200, 300, 350, 1300, 1300]),   # 右コーナー
+        ([1300, 900, 1200, 500, 300], [1300, 1300, 350, 300, 200]),   # 左コーナー
+        ([500, 700, 1000, 700, 500], [450, 300, 120, 300, 450]),      # 正面の障害物
+        ([250, 350, 1300, 900, 700], [80, 120, 1300, 1100, 900]),     # 左の壁に接近
+    ]
+    scene_frames = 50
+    stream = []
+    for i in range(frames):
+        scene, k = divmod(i, scene_frames)
+        start, end = scenes[scene % len(scenes)]
+        w = k / (scene_frames - 1)
+        distances = (1 - w) * np.array(start) + w * np.array(end) + rng.normal(0, 15, 5)
+        distances = np.clip(np.round(distances), 0, SENSOR_MAX_RANGE).astype(int).tolist()
+        # 測定エラーの場面では一部のセンサーを無効値にする
+        if scene % (len(scenes) + 1) == len(scenes):
+            distances = [SENSOR_INVALID_VALUE if rng.random() < 0.3 else d for d in distances]
+        stream.append((i * SYNTHETIC_INTERVAL, distances))
+    return stream
+
+
+def recorded_stream(path):
+    """記録済みログのセンサー列（時刻は先頭を 0 にする）"""
+    frames = load_log(path)
+    t0 = frames[0].timestamp
+    return [(frame.timestamp - t0, list(frame.distances)) for frame in frames]
+
+
+def measure_import(name, runs):
+    """
+    新しいプロセスで import とインスタンス生成の時間を測る（runs 回の中央値）
+
+    Returns:
+        dict: import_s, build_s（読み込めなければ error）
+    """
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--import-only", name],
+                              capture_output=True, text=True)
+        try:
+            sample = json.loads(proc.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            return {"error": (proc.stderr.strip().splitlines() or ["不明なエラー"])[-1]}
+        if "error" in sample:
+            return sample
+        samples.append(sample)
+    return {key: float(np.median([s[key] for s in samples])) for key in ("import_s", "build_s")}
+
+
+def _ensure_hardware_modules():
+    """実機のライブラリがない環境では board / adafruit_* を擬似ハードウェアに差し替える"""
+    try:
+        import board  # noqa: F401
+    except Exception:
+        from common.fake_hw import install_fake_hardware
+        install_fake_hardware()
+
+
+def import_only(name):
+    """--import-only: このプロセスで制御クラスを読み込み、かかった時間を JSON で1行出力する"""
+    _ensure_hardware_modules()
+    try:
+        with contextlib.redirect_stdout(_NullWriter()):
+            handle = load_controller(name)
+    except Exception as e:
+        print(json.dumps({"error": f"{type(e).__name__}: {e}"}))
+        return
+    print(json.dumps({"import_s": handle.import_time, "build_s": handle.build_time}))
+
+
+class Target:
+    """測る制御クラスのメソッドと、センサー列をその引数の形にしたもの"""
+
+    def __init__(self, name):
+        self.name = name
+        project, _, _, kind, _ = CONTROLLERS[name]
+        self.kind = kind
+        self.method_name = METHODS[kind]
+        self.sensor_data = None
+        if kind == "update":
+            self.sensor_data = import_isolated(project, "modules.sensor")[0].SensorData
+
+    def new(self):
+        """新しいインスタンス（状態は初期化される。MLPredictor は使い回し）"""
+        handle = load_controller(self.name)
+        return handle, getattr(handle.controller, self.method_name)
+
+    def calls(self, stream, repeat):
+        """
+        Returns:
+            list: (時刻, 引数のタプル)。repeat 回分を時刻が続くように並べる
+        """
+        span = stream[-1][0] - stream[0][0] + SYNTHETIC_INTERVAL
+        calls = []
+        sequence = 0
+        for r in range(repeat):
+            for t, distances in stream:
+                now = 1000.0 + r * span + t
+                sequence += 1
+                if self.kind == "update":
+                    args = (self.sensor_data(list(distances), (now,) * 5, (sequence,) * 5),)
+                elif self.kind == "distances":
+                    args = (list(distances),)
+                else:
+                    args = tuple(distances)
+                calls.append((now, args))
+        return calls
+
+
+def run_stream(target, stream, repeat, warmup, allocations):
+    """
+    1つのセンサー列で測る（時間とメモリ確保は別のインスタンスで、同じ列を同じ順に与える）
+
+    Returns:
+        dict: updates, ns (mean / p50 / p90 / p99 / max), retained_blocks_per_update, gc_collections,
+              alloc_peak_bytes (p50 / p99 / max)
+    """
+    calls = target.calls(stream, repeat)
+    clock = StreamClock()
+
+    # 時間: 1回ごとに perf_counter_ns で挟む（挟む分の数十 ns を含む）
+    handle, method = target.new()
+    patched = getattr(handle.module, "time", None) is time
+    if patched:
+        handle.module.time = clock
+    try:
+        for now, args in calls[:warmup]:
+            clock.now = now
+            method(*args)
+        handle, method = target.new()
+        samples = []
+        gc_before = sum(s["collections"] for s in gc.get_stats())
+        blocks_before = sys.getallocatedblocks()
+        for now, args in calls:
+            clock.now = now
+            start = time.perf_counter_ns()
+            method(*args)
+            samples.append(time.perf_counter_ns() - start)
+        blocks_after = sys.getallocatedblocks()
+        gc_collections = sum(s["collections"] for s in gc.get_stats()) - gc_before
+        # samples のリスト自体が増やしたブロックを除く
+        retained = blocks_after - blocks_before - len(samples)
+
+        result = {
+            "updates": len(samples),
+            "ns": {
+                "mean": float(np.mean(samples)),
+                "p50": percentile(samples, 0.5),
+                "p90": percentile(samples, 0.9),
+                "p99": percentile(samples, 0.99),
+                "max": max(samples),
+            },
+            "retained_blocks_per_update": retained / len(samples),
+            "gc_collections": gc_collections,
+        }
+
+        # メモリ確保: 1回ごとに tracemalloc のピークを戻し、呼ぶ前からの増分を取る（遅くなるので別に回す）
+        if allocations:
+            handle, method = target.new()
+            peaks = []
+            tracemalloc.start()
+            try:
+                for now, args in calls:
+                    clock.now = now
+                    before = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+                    method(*args)
+                    peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            finally:
+                tracemalloc.stop()
+            result["alloc_peak_bytes"] = {
+                "p50": percentile(peaks, 0.5),
+                "p99": percentile(peaks, 0.99),
+                "max": max(peaks),
+            }
+    finally:
+        if patched:
+            handle.module.time = time
+    return result
+
+
+def git_revision():
+    """
+    Returns:
+        tuple: (短いコミットハッシュ, 作業ツリーに変更があるか)（git がなければ ("nogit", False)）
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "nogit", False
+    return commit, bool(status)
+
+
+def print_report(report):
+    """結果の表"""
+    print(f"{'制御クラス':<14}{'センサー列':<28}{'回数':>7}{'p50 ns':>10}{'p90 ns':>10}{'p99 ns':>10}"
+          f"{'max ns':>11}{'確保 p50 B':>11}{'残るブロック/回':>16}")
+    for name, entry in report["controllers"].items():
+        if "error" in entry:
+            print(f"{name:<14}読み込めません: {entry['error']}")
+            continue
+        for stream, r in entry["streams"].items():
+            alloc = r.get("alloc_peak_bytes", {}).get("p50")
+            print(f"{name:<14}{stream:<28}{r['updates']:>7}{r['ns']['p50']:>10}{r['ns']['p90']:>10}"
+                  f"{r['ns']['p99']:>10}{r['ns']['max']:>11}{'-' if alloc is None else alloc:>11}"
+                  f"{r['retained_blocks_per_update']:>16.2f}")
+        print(f"{'':<14}import {entry['import_s'] * 1000:.1f}ms / インスタンス生成 {entry['build_s'] * 1000:.2f}ms"
+              if "import_s" in entry else f"{'':<14}import: {entry['import']['error']}")
+
+
+def print_comparison(report, baseline):
+    """前の結果との p50 / p99 の比（REGRESSION_RATIO より遅くなったものに印）"""
+    print(f"\n{baseline['meta']['commit']} との比較（今 / 前。{REGRESSION_RATIO:.1f}倍より遅いものに *）")
+    for name, entry in report["controllers"].items():
+        old = baseline["controllers"].get(name, {})
+        for stream, r in entry.get("streams", {}).items():
+            o = old.get("streams", {}).get(stream)
+            if o is None:
+                continue
+            ratios = [r["ns"][q] / o["ns"][q] if o["ns"][q] else math.inf for q in ("p50", "p99")]
+            mark = " *" if ratios[0] > REGRESSION_RATIO else ""
+            print(f"  {name:<14}{stream:<28}p50 {ratios[0]:5.2f}x  p99 {ratios[1]:5.2f}x{mark}")
+        if "import_s" in entry and "import_s" in old:
+            print(f"  {name:<14}{'import':<28}{entry['import_s'] / old['import_s']:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("controllers", nargs="*", default=list(CONTROLLERS),
+                        help=f"測る制御クラス（{', '.join(CONTROLLERS)}）")
+    parser.add_argument("--frames", type=int, default=1000, help="合成センサー列のフレーム数")
+    parser.add_argument("--seed", type=int, default=0, help="合成センサー列の乱数の種")
+    parser.add_argument("--logs", nargs="*", default=None,
+                        help="記録済みログ（driving_log_*.csv / record_data_*.csv。既定は joystick_control/data）")
+    parser.add_argument("--repeat", type=int, default=20, help="センサー列を繰り返す回数")
+    parser.add_argument("--warmup", type=int, default=200, help="測る前に捨てる回数")
+    parser.add_argument("--import-runs", type=int, default=3, help="import の時間を測るプロセス数")
+    parser.add_argument("--no-alloc", action="store_true", help="メモリ確保を測らない")
+    parser.add_argument("--output", "-o", help="結果の JSON（既定: benchmarks/results/controller_bench_<コミット>.json）")
+    parser.add_argument("--compare", metavar="JSON", help="比べる前の結果")
+    parser.add_argument("--import-only", metavar="NAME", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.import_only:
+        import_only(args.import_only)
+        return 0
+    for name in args.controllers:
+        if name not in CONTROLLERS:
+            parser.error(f"未知の制御クラス: {name}")
+
+    streams = {"synthetic": synthetic_stream(args.frames, args.seed)}
+    log_paths = args.logs if args.logs is not None else sorted(glob.glob(DEFAULT_LOGS))
+    for path in log_paths:
+        streams[os.path.splitext(os.path.basename(path))[0]] = recorded_stream(path)
+
+    _ensure_hardware_modules()
+    commit, dirty = git_revision()
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "repeat": args.repeat,
+        },
+        "streams": {name: len(stream) for name, stream in streams.items()},
+        "controllers": {},
+    }
+    for name in args.controllers:
+        print(f"{name} ...", file=sys.stderr)
+        entry = {}
+        imported = measure_import(name, args.import_runs)
+        if "error" in imported:
+            entry["import"] = imported
+        else:
+            entry.update(imported)
+        try:
+            with contextlib.redirect_stdout(_NullWriter()):
+                target = Target(name)
+                entry["streams"] = {stream_name: run_stream(target, stream, args.repeat, args.warmup,
+                                                            not args.no_alloc)
+                                    for stream_name, stream in streams.items()}
+        except Exception as e:
+            entry = {"error": f"{type(e).__name__}: {e}"}
+        report["controllers"][name] = entry
+
+    print_report(report)
+    output = args.output or os.path.join(RESULTS_DIR, f"controller_bench_{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n結果を保存しました: {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+制御ループのベンチマーク: 直列ループ vs パイプライン (common/pipeline.py)
+
+擬似ハードウェア (common/fake_hw.py) 上で state_machine_fast の SensorManager / StateController /
+MotorController / DataLogger を実際に動かし、スループットとセンサー取得から PWM 書き込みまでの遅延を比較する。
+モーターは同期モード（drive() が PCA9685 への書き込みまで終わってから戻る）で測る。
+取得時刻はフレーム内で最後に読み終えたチャンネルの時刻（チャンネルごとの古さは CSV の age_* で見る）。ラズパイ不要。
+
+使い方:
+    python benchmarks/pipeline_bench.py
+    python benchmarks/pipeline_bench.py --seconds 5 --interval 0.04
+    python benchmarks/pipeline_bench.py --compute-ms 5 --record-ms 10   # ラズパイ相当の計算・ログ負荷を足す
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from common.fake_hw import FakeSensorRig, install_fake_hardware
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+class Rig:
+    """ベンチマーク用に組み立てたセンサー・制御・モーター・ロガー"""
+
+    def __init__(self, bus, log_dir, background, compute_ms=0.0, record_ms=0.0):
+        from modules.sensor import SensorManager
+        from modules.motor import MotorController
+        from modules.state_controller import StateController
+        from modules.data_logger import DataLogger
+
+        self.sensor = SensorManager(bus, background=background, interrupts=False)
+        self.motor = MotorController(bus, async_mode=False)
+        self.controller = StateController()
+        self.logger = DataLogger(output_dir=log_dir)
+        self.compute_s = compute_ms / 1000
+        self.record_s = record_ms / 1000
+        self.sensor.initialize()
+        self.motor.initialize()
+        self.logger.start()
+        # 全チャンネルが1回測定し終えるまで読み捨てる
+        while 0 in self.sensor.read().sequences:
+            time.sleep(0.005)
+
+    def compute(self, data):
+        steering, throttle = self.controller.update(data)
+        self.sensor.set_profile(self.controller.sensor_profile())
+        # 計算負荷の上乗せはGILを握ったまま回す
+        end = time.perf_counter() + self.compute_s
+        while time.perf_counter() < end:
+            pass
+        return steering, throttle, self.controller.state.name, self.controller.format_debug()
+
+    def actuate(self, command):
+        self.motor.drive(command[0], command[1])
+
+    def record(self, data, command):
+        steering, throttle, state, debug = command
+        self.logger.log(steering, throttle, data, state)
+        print(debug)
+        # ログ・表示の上乗せはI/O待ち（GILを離す）として扱う
+        if self.record_s:
+            time.sleep(self.record_s)
+
+    def close(self):
+        self.logger.stop()
+        self.motor.cleanup()
+        self.sensor.cleanup()
+
+
+def run_serial(rig, seconds, interval):
+    """main.py の直列ループと同じ順序で回す"""
+    from common.loop_runner import FixedRateLoop
+
+    rate = FixedRateLoop(interval)
+    latencies = []
+    cycles = 0
+    rate.start()
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        data = rig.sensor.read()
+        command = rig.compute(data)
+        rig.actuate(command)
+        latencies.append(time.monotonic() - max(data.capture_times))
+        rig.record(data, command)
+        cycles += 1
+        rate.wait()
+    elapsed = time.monotonic() - start
+    return {"throughput": cycles / elapsed, "latencies": latencies, "dropped": 0}
+
+
+def run_pipeline(rig, seconds, interval):
+    """PipelinedLoop で回し、seconds 経ったらセンサー段から止める"""
+    from common.loop_runner import FixedRateLoop
+    from common.pipeline import PipelinedLoop
+
+    class _Done(Exception):
+        pass
+
+    start = time.monotonic()
+
+    def sense():
+        if time.monotonic() - start >= seconds:
+            raise _Done()
+        return rig.sensor.read()
+
+    loop = PipelinedLoop(sense, rig.compute, rig.actuate, rig.record,
+                         rate=FixedRateLoop(interval), capture_time=lambda d: max(d.capture_times))
+    try:
+        loop.run()
+    except _Done:
+        pass
+    s = loop.stats()
+    count = min(loop.cycles, len(loop._latencies))
+    return {"throughput": s["throughput"], "latencies": loop._latencies[:count], "dropped": s["dropped"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0, help="各モードの計測時間 (秒)")
+    parser.add_argument("--interval", type=float, default=0.0,
+                        help="周期 (秒)。0 なら待たずに回してスループットを測る")
+    parser.add_argument("--background", action="store_true",
+                        help="SensorManager の背景測距スレッドを使う")
+    parser.add_argument("--compute-ms", type=float, default=0.0, help="1周期の計算に上乗せする時間 (ms)")
+    parser.add_argument("--record-ms", type=float, default=0.0, help="1周期のログ・表示に上乗せする時間 (ms)")
+    args = parser.parse_args()
+
+    project_dir = os.path.join(REPO_ROOT, "state_machine_fast")
+    sys.path.insert(0, project_dir)
+    from config import settings
+    interval = args.interval
+    if args.background and interval <= 0:
+        # 背景測距の read() は待たないので、周期なしだとセンサー段が空回りする
+        interval = settings.CONTROL_INTERVAL
+
+    rig = FakeSensorRig(settings.XSHUT_PINS, distances=[300, 450, 800, 450, 300], noise_mm=5.0)
+    bus, _, _ = install_fake_hardware(rig)
+    rig.start()
+
+    results = []
+    try:
+        for name, runner in (("serial", run_serial), ("pipeline", run_pipeline)):
+            with tempfile.TemporaryDirectory() as log_dir:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    car = Rig(bus, log_dir, args.background, args.compute_ms, args.record_ms)
+                    try:
+                        results.append((name, runner(car, args.seconds, interval)))
+                    finally:
+                        car.close()
+    finally:
+        rig.stop()
+
+    print()
+    print(f"{'mode':<10}{'Hz':>10}{'e2e mean ms':>14}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'dropped':>9}")
+    for name, r in results:
+        lat = r["latencies"] or [0.0]
+        print(f"{name:<10}{r['throughput']:>10.1f}{sum(lat) / len(lat) * 1000:>14.2f}"
+              f"{percentile(lat, 0.5) * 1000:>10.2f}{percentile(lat, 0.99) * 1000:>10.2f}"
+              f"{max(lat) * 1000:>10.2f}{r['dropped']:>9}")
+
+
+if __name__ == "__main__":
+    main()
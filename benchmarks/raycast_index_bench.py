@@ -0,0 +1,135 @@
+"""
+シミュレーターのレイキャスト: 総当たりと一様グリッド (SegmentGrid) の比較
+
+外壁の角を丸め、S字の壁・島・障害物を細かい線分で作ったコースで、線分の数と光線の数を変えて
+1回のレイキャストの時間を測り、グリッドの方が速くなる線分数（分岐点）を表示する。
+両方の結果が完全に一致するかも確かめる（一致しなければ終了コード 1）。
+
+使い方:
+    python benchmarks/raycast_index_bench.py
+    python benchmarks/raycast_index_bench.py --rays 5 5000 50000 --range 1300
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "simulator"))
+
+from modules.rangefinder import cast_rays
+from modules.track import Track
+
+
+def rounded_rect(x0, y0, x1, y1, radius, points):
+    """角を半径 radius の円弧 (points 分割) にした長方形（反時計回り）"""
+    corners = [(x1 - radius, y0 + radius, -90), (x1 - radius, y1 - radius, 0),
+               (x0 + radius, y1 - radius, 90), (x0 + radius, y0 + radius, 180)]
+    vertices = []
+    for cx, cy, start in corners:
+        for k in range(points + 1):
+            angle = math.radians(start + 90 * k / points)
+            vertices.append((cx + radius * math.cos(angle), cy + radius * math.sin(angle)))
+    return vertices
+
+
+def make_course(detail, obstacles=12, seed=0):
+    """
+    10m×5.5m の周回コース（detail が大きいほど曲線を細かい線分にする）
+
+    外壁は角の丸い長方形で、上辺は S字にうねる。中央に角の丸い島、通路に小さな多角形の障害物。
+    """
+    rng = np.random.default_rng(seed)
+    outer = rounded_rect(0, 0, 10000, 5500, 1200, detail)
+    # 上辺 (y=5500) の直線部分を S字にする
+    top = [(x, 5500 - 250 * (1 - math.cos(2 * math.pi * (x - 1200) / 3800)))
+           for x in np.linspace(8800, 1200, 4 * detail + 2)[1:-1]]
+    split = next(i for i, (x, y) in enumerate(outer) if y >= 5500 - 1e-6 and x < 8800 + 1e-6)
+    outer = outer[:split] + top + outer[split:]
+    island = rounded_rect(2500, 2000, 7500, 3500, 600, detail)
+    polygons = [outer, island]
+    sides = max(3, detail)
+    for _ in range(obstacles):
+        cx = rng.uniform(1500, 8500)
+        cy = rng.choice([rng.uniform(500, 1500), rng.uniform(4000, 4800)])
+        r = rng.uniform(60, 150)
+        polygons.append([(cx + r * math.cos(2 * math.pi * k / sides), cy + r * math.sin(2 * math.pi * k / sides))
+                         for k in range(sides)])
+    return polygons
+
+
+def random_rays(n, seed=1):
+    """コースの範囲内のランダムな始点と向き"""
+    rng = np.random.default_rng(seed)
+    origins = np.column_stack((rng.uniform(200, 9800, n), rng.uniform(200, 5300, n)))
+    angles = rng.uniform(0, 2 * math.pi, n)
+    return origins, np.column_stack((np.cos(angles), np.sin(angles)))
+
+
+def timed(func, repeat):
+    """func() の1回あたりの秒数（最短）と結果"""
+    best = math.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--details", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64, 128],
+                        help="曲線の細かさ（線分の数がほぼ比例する）")
+    parser.add_argument("--rays", type=int, nargs="+", default=[5, 5000, 50000],
+                        help="光線の数（1台 = 5本）")
+    parser.add_argument("--range", type=float, default=1300.0, help="光線の最大距離 (mm、センサーの測定範囲)")
+    parser.add_argument("--cell", type=float, default=None, help="セルの一辺 (mm、既定は自動)")
+    args = parser.parse_args()
+
+    courses = []
+    for detail in args.details:
+        polygons = make_course(detail)
+        brute = Track(polygons, cell_size=0)
+        start = time.perf_counter()
+        indexed = Track(polygons, cell_size=args.cell or brute.auto_cell_size())
+        build = time.perf_counter() - start
+        courses.append((brute, indexed, build))
+
+    mismatches = 0
+    print(f"{'線分':>7}{'セル(mm)':>10}{'最大/セル':>10}{'構築 ms':>9}", end="")
+    for n in args.rays:
+        print(f"{f'{n}本 総当たり':>16}{'グリッド':>10}{'倍率':>7}", end="")
+    print()
+    crossover = {n: None for n in args.rays}
+    for brute, indexed, build in courses:
+        m = len(brute.starts)
+        grid = indexed.index
+        print(f"{m:>7}{grid.cell_size:>10.0f}{grid.max_per_cell:>10}{build * 1000:>9.1f}", end="")
+        for n in args.rays:
+            origins, directions = random_rays(n)
+            repeat = 200 if n <= 50 else 3
+            t_brute, expected = timed(lambda: cast_rays(origins, directions, brute.starts, brute.vectors,
+                                                        args.range), repeat)
+            t_grid, actual = timed(lambda: grid.cast(origins, directions, args.range), repeat)
+            if not np.array_equal(expected, actual):
+                mismatches += 1
+            if t_grid < t_brute and crossover[n] is None:
+                crossover[n] = m
+            unit, scale = ("us", 1e6) if n <= 50 else ("ms", 1e3)
+            print(f"{t_brute * scale:>13.1f}{unit}{t_grid * scale:>8.1f}{unit}{t_brute / t_grid:>6.1f}x", end="")
+        print()
+
+    print()
+    for n, m in crossover.items():
+        print(f"{n:>6}本: " + (f"線分 {m} 本からグリッドの方が速い" if m else "この範囲では総当たりの方が速い"))
+    print(f"結果の一致: {'OK' if mismatches == 0 else f'{mismatches} 件不一致'}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
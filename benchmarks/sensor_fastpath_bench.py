@@ -0,0 +1,148 @@
+"""
+VL53L4CD 高速読み取りパスの検証とベンチマーク
+
+1. 擬似レジスタマップ上で FastRangingReader と adafruit 互換ドライバの結果が一致するか確認
+2. レンジステータスごとに、SensorManager が高速パスあり/なしで同じ距離(mm)を返すか確認
+3. SensorManager を高速パスあり/なしで動かし、1フレームあたりのI2Cトランザクション数を比較
+
+使い方:
+    python benchmarks/sensor_fastpath_bench.py
+    python benchmarks/sensor_fastpath_bench.py --project rule_based --frames 50
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from common.fake_hw import (
+    FakeI2CBus, FakeSensorRig, FakeVL53L4CD, FakeVL53L4CDDriver, install_fake_hardware,
+)
+from common.vl53l4cd_fast import FastRangingReader
+from sensor_irq_bench import measure
+
+# 確認する生レンジステータス
+# 正常 / シグマ超過 / 信号不足 / 最小距離より近い / 位相範囲外 / ラップアラウンド未確認
+STATUS_CASES = (0x09, 0x06, 0x04, 0x08, 0x05, 0x13)
+
+
+def check_parity(samples=500):
+    """ドライバと高速リーダーが同じ測定結果を返すか確認する"""
+    bus = FakeI2CBus()
+    # アクセスのたびに1ms進む時計（実時間を待たずに測定周期を回す）
+    ticks = itertools.count()
+    device = FakeVL53L4CD(bus, clock=lambda: next(ticks) * 0.001)
+    driver = FakeVL53L4CDDriver(bus)
+    driver.set_address(0x30)
+    driver.timing_budget = 10
+    driver.inter_measurement = 0
+    driver.start_ranging()
+    reader = FastRangingReader(bus, 0x30)
+
+    rng = random.Random(0)
+    mismatches = 0
+    for _ in range(samples):
+        device.distance_mm = None if rng.random() < 0.1 else rng.randint(1, 4000)
+        while not device.data_ready:
+            device.tick()
+
+        ready = (driver.data_ready, reader.data_ready)
+        expected = (driver.range_status, int(driver.distance * 10))
+        actual = reader.fetch()
+        if ready != (True, True) or actual != expected or reader.data_ready:
+            mismatches += 1
+            print(f"  不一致: ready={ready} driver={expected} fast={actual}")
+    return mismatches
+
+
+def check_paths(manager_cls, rig, distances=(25, 300, 800, 1500, 2900)):
+    """
+    高速パスとドライバのパスで SensorManager が同じ距離を返すか確認する
+
+    read() は測定の準備状況で結果が揺れるので、チャンネルごとに準備完了を待って
+    _fetch_distance()（ステータスの扱いと mm 変換を含む）を直接比べる。
+    """
+    original = [device.distance_mm for device in rig.devices]
+    readings = {}
+    for fast_path in (False, True):
+        manager = manager_cls(background=False, fast_path=fast_path)
+        manager.initialize()
+        rows = []
+        try:
+            rig.set_distances(distances)
+            for raw_status in STATUS_CASES:
+                for device in rig.devices:
+                    device.raw_status = raw_status
+                row = []
+                for idx, sensor in enumerate(manager.sensors):
+                    # 切り替え前の測定を1回捨ててから読む
+                    for _ in range(2):
+                        while not manager._data_ready(idx, sensor):
+                            time.sleep(0.0005)
+                        dist_mm = manager._fetch_distance(idx, sensor)
+                    row.append(dist_mm)
+                rows.append(row)
+        finally:
+            manager.cleanup()
+            for device in rig.devices:
+                device.raw_status = None
+            rig.set_distances(original)
+        readings[fast_path] = rows
+
+    mismatches = 0
+    for raw_status, slow, fast in zip(STATUS_CASES, readings[False], readings[True]):
+        if slow != fast:
+            mismatches += 1
+            print(f"  不一致: 生ステータス 0x{raw_status:02X} adafruit={slow} fast={fast}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--project", default="state_machine_fast",
+                        help="SensorManager を読み込むプロジェクト")
+    parser.add_argument("--frames", type=int, default=30, help="計測フレーム数")
+    args = parser.parse_args()
+
+    mismatches = check_parity()
+    print(f"レジスタマップ検証: {'OK' if mismatches == 0 else f'{mismatches} 件不一致'}")
+
+    sys.path.insert(0, os.path.join(REPO_ROOT, args.project))
+    from config import settings
+
+    rig = FakeSensorRig(settings.XSHUT_PINS, distances=[300, 450, 800, 450, 300])
+    bus, _, _ = install_fake_hardware(rig)
+    rig.start()
+
+    from modules.sensor import SensorManager
+
+    path_mismatches = check_paths(SensorManager, rig)
+    print(f"高速パス/ドライバの距離比較: {'OK' if path_mismatches == 0 else f'{path_mismatches} 件不一致'}")
+
+    cases = [
+        ("adafruit", dict(background=False, fast_path=False)),
+        ("fast", dict(background=False, fast_path=True)),
+        ("adafruit+background", dict(background=True, fast_path=False)),
+        ("fast+background", dict(background=True, fast_path=True)),
+    ]
+    results = []
+    try:
+        for name, kwargs in cases:
+            results.append((name, measure(SensorManager, bus, args.frames, **kwargs)))
+    finally:
+        rig.stop()
+
+    print()
+    print(f"{'mode':<22}{'I2C tx/frame':>14}{'read ms':>10}{'max ms':>10}")
+    for name, r in results:
+        print(f"{name:<22}{r['transactions']:>14.1f}{r['latency_ms']:>10.2f}{r['latency_max_ms']:>10.2f}")
+    sys.exit(1 if mismatches or path_mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
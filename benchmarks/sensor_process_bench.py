@@ -0,0 +1,172 @@
+"""
+センサー取得ベンチマーク: 同じプロセスの測距スレッド vs 子プロセス + 共有メモリリング
+
+擬似ハードウェア (common/fake_hw.py) 上で state_machine_fast の SensorManager を動かし、
+制御ループが GIL を握って計算している間に、センサーの更新がどれだけ遅れるかを比べる。
+制御ループは周期ごとに --compute-ms だけ Python で計算し、read() した時点のフレームの古さ
+（最後に読み終えたチャンネルからの時間）と、実際に届いた新しいフレームの頻度を記録する。
+ラズパイ不要。子プロセス側が別コアで動けないと差は出ないので、複数コアの環境で測ること
+（1コアでは fork した分だけ process が不利になる）。
+
+測る前に、joystick_control のように cm の小数を返すセンサーの値がリングを通して
+そのまま（丸めずに、int は int のまま）届くかを確かめる（届かなければ終了コード 1）。
+
+使い方:
+    python benchmarks/sensor_process_bench.py
+    python benchmarks/sensor_process_bench.py --compute-ms 30 --seconds 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from common.fake_hw import FakeSensorRig, install_fake_hardware
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+class FloatCmSensor:
+    """joystick_control の SensorManager のように cm の小数（無効値は int）を返す擬似センサー"""
+
+    FRAMES = [
+        [12.3, 45.6, 78.9, 10.1, 0.5],
+        [12.25, 999, 130.0, 33.3, 7.75],
+        [0.1, 0.2, 0.30000000000000004, 999, 128.125],
+    ]
+
+    def __init__(self):
+        self.index = 0
+
+    def initialize(self):
+        pass
+
+    def read_distances(self):
+        frame = self.FRAMES[self.index % len(self.FRAMES)]
+        self.index += 1
+        time.sleep(0.001)
+        return list(frame)
+
+    def cleanup(self):
+        pass
+
+
+def check_roundtrip():
+    """
+    FloatCmSensor の値が ProcessSensorManager を通して値も型もそのまま届くか
+
+    Returns:
+        bool: 全フレームが一致したか
+    """
+    from common.sensor_process import ProcessSensorManager
+
+    sensor = ProcessSensorManager(FloatCmSensor)
+    sensor.initialize()
+    try:
+        seen = set()
+        deadline = time.monotonic() + 5.0
+        while len(seen) < len(FloatCmSensor.FRAMES) and time.monotonic() < deadline:
+            distances = sensor.wait_frame(1.0)
+            expected = next((f for f in FloatCmSensor.FRAMES if f == distances), None)
+            if expected is None or [type(d) for d in distances] != [type(d) for d in expected]:
+                print(f"往復チェック: 不一致 {distances!r}")
+                return False
+            seen.add(FloatCmSensor.FRAMES.index(expected))
+    finally:
+        sensor.cleanup()
+    if len(seen) < len(FloatCmSensor.FRAMES):
+        print("往復チェック: フレームが届きません")
+        return False
+    print("往復チェック: OK（cm の小数が丸めずに届く）")
+    return True
+
+
+def run_loop(sensor, seconds, interval, compute_ms):
+    """制御ループを模擬して、read() の時間・フレームの古さ・新フレーム数を測る"""
+    from common.loop_runner import FixedRateLoop
+
+    rate = FixedRateLoop(interval)
+    read_times = []
+    ages = []
+    last_sequences = None
+    new_frames = 0
+    rate.start()
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        t0 = time.perf_counter()
+        data = sensor.read()
+        read_times.append(time.perf_counter() - t0)
+        ages.append(time.monotonic() - max(data.capture_times))
+        if data.sequences != last_sequences:
+            new_frames += 1
+            last_sequences = data.sequences
+        # GILを握ったままの計算
+        end = time.perf_counter() + compute_ms / 1000
+        while time.perf_counter() < end:
+            pass
+        rate.wait()
+    elapsed = time.monotonic() - start
+    return {"read_times": read_times, "ages": ages, "frame_rate": new_frames / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0, help="各モードの計測時間 (秒)")
+    parser.add_argument("--interval", type=float, default=0.04, help="制御周期 (秒)")
+    parser.add_argument("--compute-ms", type=float, default=25.0, help="1周期の計算時間 (ms)")
+    args = parser.parse_args()
+
+    if not check_roundtrip():
+        sys.exit(1)
+
+    sys.path.insert(0, os.path.join(REPO_ROOT, "state_machine_fast"))
+    from config import settings
+
+    rig = FakeSensorRig(settings.XSHUT_PINS, distances=[300, 450, 800, 450, 300])
+    bus, _, _ = install_fake_hardware(rig)
+    rig.start()
+
+    import board
+    import busio
+    from modules.sensor import SensorManager, SensorData
+    from common.sensor_process import ProcessSensorManager
+
+    cases = [
+        ("thread", lambda: SensorManager(bus, background=True, interrupts=False)),
+        ("process", lambda: ProcessSensorManager(
+            lambda: SensorManager(busio.I2C(board.SCL, board.SDA), background=False, interrupts=False),
+            SensorData)),
+    ]
+    results = []
+    try:
+        for name, make in cases:
+            sensor = make()
+            sensor.initialize()
+            try:
+                results.append((name, run_loop(sensor, args.seconds, args.interval, args.compute_ms), sensor))
+            finally:
+                sensor.cleanup()
+    finally:
+        rig.stop()
+
+    print()
+    print(f"{'mode':<10}{'frames/s':>10}{'read us':>10}{'age p50 ms':>12}{'age p99 ms':>12}{'age max ms':>12}")
+    for name, r, sensor in results:
+        read_us = sum(r["read_times"]) / len(r["read_times"]) * 1e6
+        print(f"{name:<10}{r['frame_rate']:>10.1f}{read_us:>10.1f}"
+              f"{percentile(r['ages'], 0.5) * 1000:>12.2f}{percentile(r['ages'], 0.99) * 1000:>12.2f}"
+              f"{max(r['ages']) * 1000:>12.2f}")
+    for name, _, sensor in results:
+        if hasattr(sensor, "latency_stats"):
+            s = sensor.latency_stats()
+            print(f"{name}: 公開→読み取り p50 {s['p50'] * 1000:.2f}ms / p99 {s['p99'] * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
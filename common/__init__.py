@@ -0,0 +1,6 @@
+"""
+各走行プロジェクトで共有するモジュール群
+
+ハードウェア依存のライブラリ (board / adafruit_*) はここでは import しない。
+センサーやI2Cバスのオブジェクトは各プロジェクトの modules/ から受け取る。
+"""
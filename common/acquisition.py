@@ -0,0 +1,103 @@
+"""
+バックグラウンド測距エンジン
+専用スレッドで全センサーを連続測距し、各チャンネルの最新値をスロットに保持する
+
+制御ループ側の read() はスロットを参照するだけなので、
+data_ready 待ちで制御周期が止まることはない。
+"""
+
+import threading
+import time
+
+
+class AcquisitionThread:
+    """
+    全チャンネルを巡回し、準備できた測定値を最新値スロットに格納するスレッド
+
+    スロットには (距離, 取得時刻, シーケンス番号) のタプルを丸ごと代入する。
+    リスト要素への代入はGILの下でアトミックなので、読み手はロックなしで
+    常に整合したサンプルを受け取れる。
+    """
+
+    def __init__(self, poll_fn, channel_count, poll_interval=0.002, name="sensor-acquisition",
+                 wake_event=None, on_start=None):
+        """
+        Args:
+            poll_fn: poll_fn(index) -> 新しい測定値、未準備ならNone（待たずに返すこと）
+            channel_count: チャンネル数
+            poll_interval: 1巡ごとの待ち時間 (秒)。I2Cバスを占有しないための間隔
+            name: スレッド名
+            wake_event: セットされたら待ちを打ち切って次の巡回に入るイベント
+                        （GPIO割り込み使用時。poll_interval は最大待ち時間になる）
+            on_start: スレッドの開始時にそのスレッドで呼ぶ関数（RealtimeRuntime.apply_to_current_thread など）
+        """
+        self.poll_fn = poll_fn
+        self.channel_count = channel_count
+        self.poll_interval = poll_interval
+        self.name = name
+        self.wake_event = wake_event
+        self.on_start = on_start
+
+        self._slots = [None] * channel_count
+        self._sequence = [0] * channel_count
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """測距スレッドを開始"""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """測距スレッドを停止"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def snapshot(self):
+        """
+        全チャンネルの最新サンプルを取得
+
+        Returns:
+            list: 各チャンネルの (距離, 取得時刻, シーケンス番号)。未取得はNone
+        """
+        return list(self._slots)
+
+    @property
+    def sample_counts(self):
+        """チャンネルごとの取得サンプル数"""
+        return list(self._sequence)
+
+    def _run(self):
+        """測距ループ本体"""
+        if self.on_start is not None:
+            self.on_start()
+        slots = self._slots
+        sequence = self._sequence
+        poll_fn = self.poll_fn
+        channels = range(self.channel_count)
+        wake_event = self.wake_event
+
+        while not self._stop_event.is_set():
+            if wake_event is not None:
+                # 巡回前に下ろしておけば、巡回中に来たエッジで次の待ちがすぐ抜ける
+                wake_event.clear()
+            for idx in channels:
+                value = poll_fn(idx)
+                if value is None:
+                    continue
+                sequence[idx] += 1
+                slots[idx] = (value, time.monotonic(), sequence[idx])
+
+            if wake_event is not None:
+                wake_event.wait(self.poll_interval)
+            else:
+                self._stop_event.wait(self.poll_interval)
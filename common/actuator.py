@@ -0,0 +1,161 @@
+"""
+非同期アクチュエータースレッド
+
+制御ループは post() で指令を置いてすぐ戻り、PCA9685 への書き込みは専用スレッドが行う。
+スレッドは常に最新の指令だけを適用する（書き込み中に来た古い指令は捨てる）。
+一定時間指令が来なければフェイルセーフ（ステアリング中央・スロットル停止）を出力する。
+"""
+
+import threading
+import time
+
+
+class ActuatorThread:
+    """
+    最新指令だけを適用するアクチュエータースレッド
+
+    指令は (ステアリング, スロットル, 投入時刻, 通し番号) のタプルを丸ごとスロットに代入する。
+    代入はGILの下でアトミックなので、制御ループ側はロックなしで post() できる。
+    スレッドは通し番号で新しい指令かどうかを判定する（スロットを空にしないので取りこぼしがない）。
+    """
+
+    def __init__(self, apply_fn, failsafe_fn, deadline, name="actuator", latency_samples=1000,
+                 next_update_fn=None, on_start=None):
+        """
+        Args:
+            apply_fn: apply_fn(steering, throttle) で実際に書き込む
+            failsafe_fn: 指令が途絶えたときに呼ぶ（中央・停止を書き込む）
+            deadline: この時間 (秒) 新しい指令がなければフェイルセーフ
+            name: スレッド名
+            latency_samples: 保持する遅延サンプル数（古いものから上書き）
+            next_update_fn: 最新指令を再適用すべきまでの秒数（不要ならNone）を返す関数。
+                            ESCの後退切り替えのように、新しい指令がなくても時間で出力が変わる場合に使う
+            on_start: スレッドの開始時にそのスレッドで呼ぶ関数（RealtimeRuntime.apply_to_current_thread など）
+        """
+        self.apply_fn = apply_fn
+        self.failsafe_fn = failsafe_fn
+        self.deadline = deadline
+        self.name = name
+        self.next_update_fn = next_update_fn
+        self.on_start = on_start
+
+        self.posted = 0         # post() された指令数
+        self.applied = 0        # 書き込んだ指令数（差は上書きで捨てた数）
+        self.failsafe_count = 0
+        self.errors = 0
+
+        self._slot = None
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._latencies = [0.0] * latency_samples
+        self._latency_index = 0
+
+    def start(self):
+        """スレッドを開始"""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """スレッドを停止（未適用の指令は捨てる）"""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def post(self, steering, throttle):
+        """指令を置いてすぐ戻る"""
+        self.posted += 1
+        self._slot = (steering, throttle, time.monotonic(), self.posted)
+        self._wake.set()
+
+    def latency_stats(self):
+        """
+        投入から書き込み完了までの遅延
+
+        Returns:
+            dict: count, mean, p50, p99, max (秒)
+        """
+        count = min(self.applied, len(self._latencies))
+        if count == 0:
+            return {"count": 0, "mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+        samples = sorted(self._latencies[:count])
+        return {
+            "count": count,
+            "mean": sum(samples) / count,
+            "p50": samples[count // 2],
+            "p99": samples[min(count - 1, int(count * 0.99))],
+            "max": samples[-1],
+        }
+
+    def _run(self):
+        """書き込みループ本体"""
+        if self.on_start is not None:
+            self.on_start()
+        latencies = self._latencies
+        size = len(latencies)
+        last_command = None     # 最初の指令が来るまで期限は数えない
+        last_number = 0
+        current = None          # 最後に適用した (ステアリング, スロットル)
+        failsafe_active = False
+
+        while not self._stop_event.is_set():
+            timeout = None
+            if last_command is not None and not failsafe_active:
+                timeout = max(0.0, self.deadline - (time.monotonic() - last_command))
+            pending = self._pending(current)
+            if pending is not None:
+                timeout = pending if timeout is None else min(timeout, pending)
+            if self._wake.wait(timeout):
+                self._wake.clear()
+            if self._stop_event.is_set():
+                break
+
+            command = self._slot
+            if command is not None and command[3] != last_number:
+                steering, throttle, posted_at, last_number = command
+                if self._call(self.apply_fn, steering, throttle):
+                    latencies[self._latency_index] = time.monotonic() - posted_at
+                    self._latency_index = (self._latency_index + 1) % size
+                    self.applied += 1
+                last_command = posted_at
+                current = (steering, throttle)
+                failsafe_active = False
+                continue
+
+            # 新しい指令なし → 期限切れか、時間で進む段階（ESCの切り替えなど）の再適用
+            if last_command is None or failsafe_active:
+                continue
+            if time.monotonic() - last_command >= self.deadline:
+                self._call(self.failsafe_fn)
+                self.failsafe_count += 1
+                failsafe_active = True
+                current = None
+                print(f"アクチュエーター: {self.deadline * 1000:.0f}ms 指令なし → フェイルセーフ")
+            elif pending is not None and self._pending(current) == 0:
+                self._call(self.apply_fn, *current)
+
+    def _pending(self, current):
+        """最新指令の再適用が必要になるまでの秒数（不要ならNone）"""
+        if current is None or self.next_update_fn is None:
+            return None
+        return self.next_update_fn()
+
+    def _call(self, fn, *args):
+        try:
+            fn(*args)
+            return True
+        except Exception as e:
+            # I2Cエラーでスレッドを落とさない（次の指令で書き直す）
+            self.errors += 1
+            if self.errors <= 3:
+                print(f"アクチュエーター書き込みエラー: {e}")
+            return False
@@ -0,0 +1,161 @@
+"""
+各プロジェクトの制御クラスを1つのプロセスに読み込む
+
+state_machine / hybrid_follow / rule_based / ml_training などはそれぞれ自分の
+config.settings と modules パッケージを持ち、同じ名前で import している。
+ここではプロジェクトごとに sys.modules の config / modules を入れ替えて import し、
+読み込んだモジュールは自分の設定を保持したまま、互いに干渉せずに共存させる。
+
+読み込んだ制御クラスは ControllerHandle で包み、どれも step(センサーデータ) →
+(ステアリング角度, スロットル, 状態名) の同じ形で呼べるようにする。
+
+    handle = load_controller("hybrid")
+    steering, throttle, state = handle.step(sensor_data)
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# プロジェクトごとに同じ名前で import されるパッケージ・モジュール
+_SHADOWED = ("config", "modules", "predict")
+
+# 名前: (プロジェクト, モジュール, クラス, 呼び出し方, 追加の検索パス)
+CONTROLLERS = {
+    "state": ("state_machine_fast", "modules.state_controller", "StateController", "update", ()),
+    "state_classic": ("state_machine", "modules.state_controller", "StateController", "update", ()),
+    "hybrid": ("hybrid_follow", "modules.hybrid_controller", "HybridController", "update", ()),
+    "potential": ("potential_field", "modules.potential_controller", "PotentialController", "update", ()),
+    "rule": ("rule_based", "modules.controller", "DrivingController", "distances", ()),
+    "ml": ("ml_training", "predict", "MLPredictor", "ml", ("scripts",)),
+}
+
+# 状態を持たない制御クラス（インスタンスを使い回す。MLPredictor はモデルの読み込みが重い）
+_STATELESS = ("ml",)
+
+_import_lock = threading.Lock()
+_module_cache = {}
+_instance_cache = {}
+
+
+def _has_shadowed(path):
+    """検索パスのエントリが config / modules パッケージを持つか"""
+    return any(os.path.isdir(os.path.join(path or ".", name)) for name in ("config", "modules"))
+
+
+def import_isolated(project, module_name, extra_paths=()):
+    """
+    プロジェクトのディレクトリを検索パスの先頭にしてモジュールを import する
+
+    他のプロジェクトの config / modules は import の間だけ sys.modules から外し、
+    終わったら元に戻す（読み込んだモジュールは自分の設定を参照し続ける）。
+
+    Returns:
+        tuple: (モジュール, そのプロジェクトの config.settings)
+    """
+    key = (project, module_name)
+    with _import_lock:
+        if key in _module_cache:
+            return _module_cache[key]
+        project_dir = os.path.join(REPO_ROOT, project)
+        paths = [project_dir] + [os.path.join(project_dir, p) for p in extra_paths]
+        saved = {name: mod for name, mod in sys.modules.items() if name.split(".")[0] in _SHADOWED}
+        for name in saved:
+            del sys.modules[name]
+        # 他のプロジェクト（呼び出し元を含む）のディレクトリも検索パスから外す。
+        # ml_training/config は __init__.py のない名前空間パッケージなので、
+        # パスのどこかに通常の config パッケージがあるとそちらが優先されてしまう
+        saved_path = list(sys.path)
+        sys.path[:] = paths + [p for p in saved_path if not _has_shadowed(p)]
+        try:
+            module = importlib.import_module(module_name)
+            settings = importlib.import_module("config.settings")
+        finally:
+            sys.path[:] = saved_path
+            for name in [n for n in sys.modules if n.split(".")[0] in _SHADOWED]:
+                del sys.modules[name]
+            sys.modules.update(saved)
+        _module_cache[key] = (module, settings)
+        return module, settings
+
+
+class ControllerHandle:
+    """
+    読み込んだ制御クラスのインスタンスを共通の step() で呼ぶための包み
+
+    Attributes:
+        name: CONTROLLERS のキー
+        controller: 制御クラスのインスタンス
+        settings: そのプロジェクトの config.settings
+        module: 制御クラスを定義しているモジュール
+        import_time / build_time: import・インスタンス生成にかかった時間 (秒)
+    """
+
+    def __init__(self, name, controller, settings, kind, import_time=0.0, build_time=0.0, module=None):
+        self.name = name
+        self.controller = controller
+        self.settings = settings
+        self.module = module
+        self.kind = kind
+        self.import_time = import_time
+        self.build_time = build_time
+        self.step = getattr(self, f"_step_{kind}")
+        # センサー測定プロファイルを切り替えられる制御クラスだけ
+        self.sensor_profile = getattr(controller, "sensor_profile", None)
+
+    def _step_update(self, sensor_data):
+        """update(SensorData) → (ステアリング, スロットル) の制御クラス"""
+        steering, throttle = self.controller.update(sensor_data)
+        # StateController は state、HybridController は mode に現在の状態を持つ
+        state = getattr(self.controller, "state", None) or getattr(self.controller, "mode", None)
+        return steering, throttle, getattr(state, "name", "")
+
+    def _step_distances(self, sensor_data):
+        """compute_control(距離のリスト) → (ステアリング, スロットル, 状態) の制御クラス"""
+        distances = sensor_data.as_list() if hasattr(sensor_data, "as_list") else sensor_data
+        steering, throttle, state = self.controller.compute_control(distances)
+        return steering, throttle, getattr(state, "name", state)
+
+    def _step_ml(self, sensor_data):
+        """MLPredictor: run_ml.py と同じく -1〜1 のステアリングをサーボ角度に変換し、スロットルを決める"""
+        cfg = self.settings
+        l2, l1, c, r1, r2 = sensor_data.as_list() if hasattr(sensor_data, "as_list") else sensor_data
+        if c >= cfg.SENSOR_INVALID_VALUE or c < cfg.EMERGENCY_STOP_DISTANCE:
+            return cfg.SERVO_CENTER, 0.0, "stop"
+        steering, class_name = self.controller.predict(l2, l1, c, r1, r2)
+        if steering < 0:
+            angle = cfg.SERVO_CENTER + steering * (cfg.SERVO_CENTER - cfg.SERVO_LEFT)
+        else:
+            angle = cfg.SERVO_CENTER + steering * (cfg.SERVO_RIGHT - cfg.SERVO_CENTER)
+        angle = max(cfg.SERVO_LEFT, min(cfg.SERVO_RIGHT, angle))
+        throttle = cfg.THROTTLE_SLOW if c < cfg.SLOW_DOWN_DISTANCE else cfg.THROTTLE_NORMAL
+        return angle, throttle, class_name
+
+
+def load_controller(name):
+    """
+    制御クラスを読み込んで新しいインスタンスを作る（2回目以降は import 済みなのでインスタンス生成だけ。
+    状態を持たない MLPredictor は最初に作ったものを使い回す）
+
+    Returns:
+        ControllerHandle
+    """
+    if name not in CONTROLLERS:
+        raise KeyError(f"未知の制御クラス: {name}（{', '.join(CONTROLLERS)}）")
+    project, module_name, class_name, kind, extra_paths = CONTROLLERS[name]
+    start = time.perf_counter()
+    module, settings = import_isolated(project, module_name, extra_paths)
+    imported = time.perf_counter()
+    if name in _STATELESS:
+        controller = _instance_cache.get(name)
+        if controller is None:
+            controller = _instance_cache[name] = getattr(module, class_name)()
+    else:
+        controller = getattr(module, class_name)()
+    built = time.perf_counter()
+    return ControllerHandle(name, controller, settings, kind,
+                            import_time=imported - start, build_time=built - imported, module=module)
@@ -0,0 +1,81 @@
+"""
+デバッグ表示スレッド
+
+制御ループの中で毎周期 f-string を組み立てて print すると、遅い SSH 端末では
+print が詰まって制御周期ごと止まる。ここでは制御側はスナップショットを置くだけにして、
+専用スレッドが決まった頻度で最新のスナップショットを整形・表示する。
+表示が追いつかない周期のスナップショットは表示せずに捨てる。
+
+    console = DebugConsole(controller.debug_snapshot, controller.format_debug, rate=5.0)
+    console.start()
+    ...
+    console.stop()
+"""
+
+import threading
+import time
+
+
+class DebugConsole:
+    """
+    最新のスナップショットだけを一定頻度で表示するスレッド
+
+    source() の戻り値が前回と同じオブジェクトなら新しい周期はないとみなして表示しない。
+    スナップショットは制御側で毎周期作り直す（書き換えない）こと。
+    """
+
+    def __init__(self, source, formatter, rate=5.0, profiler=None, name="debug-console"):
+        """
+        Args:
+            source: source() → 最新のスナップショット（まだなければNone）
+            formatter: formatter(スナップショット) → 表示する文字列
+            rate: 表示頻度 (Hz)。0以下なら新しいスナップショットが来るたびに表示
+            profiler: 整形・表示の時間を "print" 段に記録する StageProfiler（不要ならNone）
+            name: スレッド名
+        """
+        self.source = source
+        self.formatter = formatter
+        self.rate = rate
+        self.profiler = profiler
+        self.name = name
+
+        self.printed = 0
+        self.errors = 0
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """スレッドを開始"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """スレッドを停止"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        period = 1.0 / self.rate if self.rate > 0 else 0.001
+        last = None
+        while not self._stop_event.wait(period):
+            snapshot = self.source()
+            if snapshot is None or snapshot is last:
+                continue
+            last = snapshot
+            start = time.monotonic_ns()
+            try:
+                print(self.formatter(snapshot))
+            except Exception as e:
+                self.errors += 1
+                if self.errors <= 3:
+                    print(f"デバッグ表示エラー: {e}")
+                continue
+            self.printed += 1
+            if self.profiler is not None:
+                self.profiler.record("print", time.monotonic_ns() - start)
@@ -0,0 +1,107 @@
+"""
+角度・スロットル → PCA9685 duty の参照テーブル
+
+ステアリングの可動域は 50° 程度、スロットルも -1.0〜1.0 の狭い範囲なので、
+initialize() で等間隔の duty 表を作っておけば、毎回のパルス幅計算は
+辞書引き1回（格子点の間の値はインデックス計算と線形補間）で済む。
+表の格子点は元の計算式そのものの値なので、整数角度や 0.01 刻みのスロットルは従来と同じ duty になる。
+"""
+
+from common.pwm_writer import pulse_to_duty, servo_angle_to_duty
+
+
+class DutyTable:
+    """
+    等間隔の duty 表（範囲外はクリップ、格子点の間は線形補間）
+
+        table = DutyTable(lambda a: servo_angle_to_duty(a, 50, 500, 2500), 85, 140, step=1.0)
+        duty = table(114.5)
+    """
+
+    def __init__(self, duty_fn, lo, hi, step):
+        """
+        Args:
+            duty_fn: 値 → 16bit duty の元の計算式
+            lo, hi: 表の範囲（この外はクリップ）
+            step: 格子点の間隔
+        """
+        if hi <= lo or step <= 0:
+            raise ValueError(f"invalid table range: {lo}..{hi} step {step}")
+        count = int(round((hi - lo) / step))
+        self.lo = lo
+        self.hi = lo + count * step
+        self.step = step
+        self._inv_step = 1.0 / step
+        self._last = count
+        # 格子点は誤差が積もらないよう lo + i*step を丸めてから計算する
+        points = [round(lo + i * step, 9) for i in range(count + 1)]
+        self._duty = [int(duty_fn(point)) for point in points]
+        # 格子点ちょうどの値（SERVO_CENTER や THROTTLE_* の定数）は辞書1回で引く
+        self._exact = dict(zip(points, self._duty))
+
+    def __call__(self, value):
+        """値を duty に変換"""
+        duty = self._exact.get(value)
+        if duty is not None:
+            return duty
+        x = (value - self.lo) * self._inv_step
+        if x <= 0:
+            return self._duty[0]
+        last = self._last
+        if x >= last:
+            return self._duty[last]
+        i = int(x)
+        low = self._duty[i]
+        return low + int((self._duty[i + 1] - low) * (x - i) + 0.5)
+
+    def __len__(self):
+        return self._last + 1
+
+
+def steering_table(frequency, min_pulse, max_pulse, lo, hi, step=1.0, actuation_range=180):
+    """
+    サーボ角度の duty 表（adafruit_motor.servo.Servo と同じ計算）
+
+    Args:
+        frequency: PWM周波数 (Hz)
+        min_pulse, max_pulse: サーボのパルス幅範囲 (us)
+        lo, hi: 使う角度範囲（SERVO_LEFT〜SERVO_RIGHT など）
+        step: 格子点の間隔 (度)
+    """
+    return DutyTable(
+        lambda angle: servo_angle_to_duty(angle, frequency, min_pulse=min_pulse,
+                                          max_pulse=max_pulse, actuation_range=actuation_range),
+        lo, hi, step
+    )
+
+
+def esc_table(frequency, min_pulse, max_pulse, step=0.01):
+    """
+    スロットル (-1.0〜1.0) の duty 表
+
+    中間パルスをニュートラルとして、正負それぞれ最大/最小パルスまで線形に振る。
+    """
+    neutral_pulse = (min_pulse + max_pulse) / 2
+
+    def duty(value):
+        if value > 0:
+            pulse_us = neutral_pulse + (value * (max_pulse - neutral_pulse))
+        elif value < 0:
+            pulse_us = neutral_pulse + (value * (neutral_pulse - min_pulse))
+        else:
+            pulse_us = neutral_pulse
+        pulse_us = max(min_pulse, min(max_pulse, pulse_us))
+        return pulse_to_duty(pulse_us, frequency)
+
+    return DutyTable(duty, -1.0, 1.0, step)
+
+
+def continuous_servo_table(frequency, min_pulse, max_pulse, step=0.01):
+    """
+    スロットル (-1.0〜1.0) の duty 表（adafruit_motor.servo.ContinuousServo と同じ計算）
+    """
+    return DutyTable(
+        lambda value: servo_angle_to_duty((value + 1.0) / 2.0, frequency, min_pulse=min_pulse,
+                                          max_pulse=max_pulse, actuation_range=1.0),
+        -1.0, 1.0, step
+    )
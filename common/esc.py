@@ -0,0 +1,138 @@
+"""
+ESC のアーミングと前進/後退切り替えの状態機械（待ちなし）
+
+一般的な車用 ESC は、電源投入後しばらくニュートラルを受け取らないとアーミングされず、
+前進中に後退を送るとまずブレーキになる。後退に入るには
+「後退（ブレーキ）→ ニュートラル → 後退」の順に送る必要がある。
+
+以前はこれを time.sleep で待っていたが、ここでは各段階の終了時刻だけを覚えておき、
+update() が呼ばれるたびに時刻を見て次の段階に進める。制御ループは一切待たない。
+"""
+
+import time
+
+# 状態
+DISARMED = "DISARMED"   # arm() 前
+ARMING = "ARMING"       # ニュートラルを送ってアーミング待ち
+NEUTRAL = "NEUTRAL"
+FORWARD = "FORWARD"
+BRAKE = "BRAKE"         # 後退要求の1回目（ESCはブレーキとして受け取る）
+GAP = "GAP"             # ブレーキ後のニュートラル
+REVERSE = "REVERSE"
+
+
+class ESCStateMachine:
+    """
+    要求スロットルを、ESC に実際に送るべきスロットルに変換する
+
+        esc = ESCStateMachine(arming_time=0.5, brake_time=0.04, neutral_time=0.04)
+        esc.arm()
+        output = esc.update(requested)   # 毎周期
+    """
+
+    def __init__(self, arming_time=0.5, brake_time=0.04, neutral_time=0.04, latency_samples=100):
+        """
+        Args:
+            arming_time: アーミングでニュートラルを送り続ける時間 (秒)
+            brake_time: 後退切り替えで最初の後退（ブレーキ）を送る時間 (秒)
+            neutral_time: ブレーキ後にニュートラルを送る時間 (秒)
+            latency_samples: 保持する後退切り替え時間のサンプル数
+        """
+        self.arming_time = arming_time
+        self.brake_time = brake_time
+        self.neutral_time = neutral_time
+
+        self.state = DISARMED
+        self.reverse_count = 0
+        self._phase_end = 0.0
+        self._reverse_requested_at = None
+        self._latencies = [0.0] * latency_samples
+
+    def arm(self, now=None):
+        """アーミングを開始（ニュートラルを arming_time 送ったら完了）"""
+        now = time.monotonic() if now is None else now
+        self.state = ARMING
+        self._phase_end = now + self.arming_time
+
+    @property
+    def armed(self):
+        return self.state not in (DISARMED, ARMING)
+
+    def update(self, requested, now=None):
+        """
+        要求スロットルから出力スロットルを決める
+
+        Args:
+            requested: 要求スロットル (-1.0〜1.0)
+            now: 現在時刻 (time.monotonic)
+
+        Returns:
+            float: ESC に送るスロットル
+        """
+        now = time.monotonic() if now is None else now
+        state = self.state
+
+        if state == ARMING:
+            if now < self._phase_end:
+                return 0.0
+            state = self.state = NEUTRAL
+        elif state == DISARMED:
+            return 0.0
+
+        if requested >= 0:
+            # 前進・停止はそのまま（後退切り替え中なら中断）
+            self._reverse_requested_at = None
+            self.state = FORWARD if requested > 0 else NEUTRAL
+            return requested
+
+        if state == REVERSE:
+            return requested
+        if state == BRAKE:
+            if now < self._phase_end:
+                return requested
+            self.state = GAP
+            self._phase_end = now + self.neutral_time
+            return 0.0
+        if state == GAP:
+            if now < self._phase_end:
+                return 0.0
+            self.state = REVERSE
+            self._record_reverse(now)
+            return requested
+
+        # NEUTRAL / FORWARD からの後退要求 → ブレーキから始める
+        self.state = BRAKE
+        self._phase_end = now + self.brake_time
+        self._reverse_requested_at = now
+        return requested
+
+    def pending(self, now=None):
+        """
+        次の段階に進むまでの時間
+
+        Returns:
+            float: 秒（時間で進む段階にいなければNone）
+        """
+        if self.state not in (ARMING, BRAKE, GAP):
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._phase_end - now)
+
+    def reverse_latency_stats(self):
+        """
+        後退要求から後退に入るまでの時間
+
+        Returns:
+            dict: count, mean, max (秒)
+        """
+        count = min(self.reverse_count, len(self._latencies))
+        if count == 0:
+            return {"count": 0, "mean": 0.0, "max": 0.0}
+        samples = self._latencies[:count]
+        return {"count": count, "mean": sum(samples) / count, "max": max(samples)}
+
+    def _record_reverse(self, now):
+        if self._reverse_requested_at is not None:
+            self._latencies[self.reverse_count % len(self._latencies)] = now - self._reverse_requested_at
+            self.reverse_count += 1
+        self._reverse_requested_at = None
@@ -0,0 +1,777 @@
+"""
+擬似ハードウェア（I2Cバス / GPIO / VL53L4CD / PCA9685）
+
+ラズパイなしで SensorManager や MotorController を動かすためのバックエンド。
+VL53L4CD はレジスタマップ単位で模擬しているので、I2Cトランザクション数の比較や
+高速読み取りパスの検証にも使える。
+
+使い方:
+    rig = FakeSensorRig(XSHUT_PINS, irq_pins=SENSOR_INTERRUPT_PINS)
+    install_fake_hardware(rig)      # board / digitalio / adafruit_* を差し替える
+    rig.start()                     # GPIO1割り込みを発生させるティッカーを開始
+    from modules.sensor import SensorManager
+"""
+
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import types
+import weakref
+
+
+# fork した子プロセス (common/sensor_process.py) でも使えるよう、
+# ロックとティッカースレッドを子で作り直す対象
+_fork_targets = weakref.WeakSet()
+_fork_rigs = weakref.WeakSet()
+
+
+def _reinit_after_fork():
+    # ロックを作り直してからティッカーを起動する
+    for target in list(_fork_targets):
+        target._after_fork()
+    for rig in list(_fork_rigs):
+        rig._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+# ===========================================
+# VL53L4CD レジスタ
+# ===========================================
+VL53L4CD_DEFAULT_ADDRESS = 0x29
+REG_I2C_SLAVE_DEVICE_ADDRESS = 0x0001
+REG_GPIO_HV_MUX_CTRL = 0x0030
+REG_GPIO_TIO_HV_STATUS = 0x0031
+REG_RANGE_CONFIG_A = 0x005E
+REG_INTERMEASUREMENT_MS = 0x006C
+REG_SYSTEM_INTERRUPT_CLEAR = 0x0086
+REG_SYSTEM_START = 0x0087
+REG_RESULT_RANGE_STATUS = 0x0089
+REG_RESULT_DISTANCE = 0x0096
+REG_IDENTIFICATION_MODEL_ID = 0x010F
+
+RANGE_STATUS_VALID = 0x09      # 変換後のステータス0（正常）
+RANGE_STATUS_NO_TARGET = 0x04  # 変換後のステータス2（信号不足）
+
+# adafruit_vl53l4cd と同じ生ステータス→ステータス変換表
+RANGE_STATUS_TABLE = [
+    255, 255, 255, 5, 2, 4, 1, 7, 3, 0, 255, 255,
+    9, 13, 255, 255, 255, 255, 10, 6, 255, 255, 11, 12,
+]
+
+# ===========================================
+# PCA9685 レジスタ
+# ===========================================
+PCA9685_DEFAULT_ADDRESS = 0x40
+REG_PCA9685_MODE1 = 0x00
+REG_PCA9685_LED0_ON_L = 0x06
+REG_PCA9685_PRESCALE = 0xFE
+
+
+class FakeI2CBus:
+    """
+    busio.I2C 互換の擬似I2Cバス
+
+    transactions は開始条件の数（writeto_then_readfrom は1回と数える）。
+    """
+
+    def __init__(self):
+        self.devices = {}
+        self.transactions = 0
+        self.bytes_transferred = 0
+        self._lock = threading.Lock()
+        self._devices_lock = threading.Lock()
+        _fork_targets.add(self)
+
+    def _after_fork(self):
+        # fork 時に他スレッドが持っていたロックは子では解放されないので作り直す
+        self._lock = threading.Lock()
+        self._devices_lock = threading.Lock()
+
+    # --- 配線 ---
+    def attach(self, address, device):
+        with self._devices_lock:
+            self.devices[address] = device
+
+    def detach(self, address, device=None):
+        with self._devices_lock:
+            if device is None or self.devices.get(address) is device:
+                self.devices.pop(address, None)
+
+    def reset_counters(self):
+        self.transactions = 0
+        self.bytes_transferred = 0
+
+    # --- busio.I2C API ---
+    def try_lock(self):
+        return self._lock.acquire(blocking=False)
+
+    def unlock(self):
+        self._lock.release()
+
+    def scan(self):
+        self.transactions += 1
+        with self._devices_lock:
+            return sorted(self.devices)
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        data = bytes(buffer[start:end])
+        self._transfer(address, len(data)).i2c_write(data)
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        data = self._transfer(address, end - start).i2c_read(end - start)
+        buffer[start:end] = data
+
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, *,
+                              out_start=0, out_end=None, in_start=0, in_end=None):
+        out = bytes(buffer_out[out_start:out_end])
+        in_end = len(buffer_in) if in_end is None else in_end
+        device = self._transfer(address, len(out) + in_end - in_start)
+        device.i2c_write(out)
+        buffer_in[in_start:in_end] = device.i2c_read(in_end - in_start)
+
+    def deinit(self):
+        pass
+
+    def _transfer(self, address, nbytes):
+        self.transactions += 1
+        self.bytes_transferred += nbytes
+        with self._devices_lock:
+            device = self.devices.get(address)
+        if device is None:
+            raise OSError(121, f"Remote I/O error (0x{address:02X})")
+        return device
+
+
+class FakeGPIO:
+    """
+    GPIOの代替
+
+    ホストからの出力（XSHUT）はリスナーへ通知し、デバイスが駆動する入力（GPIO1）は
+    立ち下がりエッジで watch_falling_edge のコールバックを呼ぶ。
+    """
+
+    def __init__(self):
+        self._levels = {}
+        self._edge_callbacks = {}
+        self._output_listeners = {}
+        self._lock = threading.Lock()
+        _fork_targets.add(self)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    # --- DataReadyInterrupts 用バックエンドAPI ---
+    def watch_falling_edge(self, pin, callback):
+        with self._lock:
+            self._edge_callbacks[pin] = callback
+
+    def unwatch(self, pin):
+        with self._lock:
+            self._edge_callbacks.pop(pin, None)
+
+    # --- 配線 ---
+    def on_output(self, pin, listener):
+        """ホスト出力ピンの変化を listener(level) で受け取る"""
+        self._output_listeners.setdefault(pin, []).append(listener)
+
+    def write(self, pin, level):
+        """ホストからピンを出力する（digitalio の value 設定）"""
+        self._levels[pin] = bool(level)
+        for listener in self._output_listeners.get(pin, []):
+            listener(bool(level))
+
+    def drive(self, pin, level):
+        """デバイス側から入力ピンを駆動する"""
+        level = bool(level)
+        with self._lock:
+            prev = self._levels.get(pin, True)
+            self._levels[pin] = level
+            callback = self._edge_callbacks.get(pin) if prev and not level else None
+        if callback is not None:
+            callback(pin)
+
+    def level(self, pin):
+        return self._levels.get(pin, True)
+
+
+class _RegisterDevice:
+    """16bitインデックスのレジスタマップを持つI2Cデバイス"""
+
+    INDEX_BYTES = 2
+
+    def __init__(self, size):
+        self.regs = bytearray(size)
+        self._pointer = 0
+        self._lock = threading.RLock()
+        _fork_targets.add(self)
+
+    def _after_fork(self):
+        self._lock = threading.RLock()
+
+    def i2c_write(self, data):
+        with self._lock:
+            n = self.INDEX_BYTES
+            self._pointer = int.from_bytes(data[:n], "big")
+            if len(data) > n:
+                self._write(self._pointer, data[n:])
+
+    def i2c_read(self, count):
+        with self._lock:
+            self._before_read(self._pointer, count)
+            return bytes(self.regs[self._pointer:self._pointer + count])
+
+    def _write(self, reg, data):
+        self.regs[reg:reg + len(data)] = data
+
+    def _before_read(self, reg, count):
+        pass
+
+
+class FakeVL53L4CD(_RegisterDevice):
+    """
+    VL53L4CD のレジスタモデル
+
+    測距開始後は測定周期ごとに結果レジスタを更新し、データ準備ビットを立てて
+    GPIO1をLowにする。割り込みクリアで準備ビットを下ろしGPIO1をHighに戻す。
+    タイミングレジスタは簡略化しており、RANGE_CONFIG_A にタイミングバジェット(ms)、
+    INTERMEASUREMENT_MS に測定間隔(ms)をそのまま格納する。
+    """
+
+    def __init__(self, bus, distance_mm=500, gpio=None, irq_pin=None,
+                 powered=True, noise_mm=0.0, clock=time.monotonic):
+        super().__init__(0x0120)
+        self.bus = bus
+        self.gpio = gpio
+        self.irq_pin = irq_pin
+        self.distance_mm = distance_mm
+        self.noise_mm = noise_mm
+        self.clock = clock
+        self.powered = False
+        self.address = None
+        self.fail = False          # Trueで全アクセスがI/Oエラーになる
+        self.raw_status = None     # 生レンジステータスを固定する（Noneなら距離から決める）
+        self.measurements = 0
+        self._ranging = False
+        self._next_time = 0.0
+        if powered:
+            self.set_power(True)
+
+    # --- 電源 (XSHUT) ---
+    def set_power(self, on):
+        """XSHUT High で既定アドレス 0x29 に現れ、Low で消える（アドレスも初期化）"""
+        with self._lock:
+            if on and not self.powered:
+                self._reset_registers()
+                self.powered = True
+                self.address = VL53L4CD_DEFAULT_ADDRESS
+                self.bus.attach(self.address, self)
+            elif not on and self.powered:
+                self.bus.detach(self.address, self)
+                self.powered = False
+                self._ranging = False
+                self.address = None
+                self._set_irq_line(True)
+
+    def _reset_registers(self):
+        self.regs[:] = bytes(len(self.regs))
+        self.regs[REG_IDENTIFICATION_MODEL_ID] = 0xEB
+        self.regs[REG_IDENTIFICATION_MODEL_ID + 1] = 0xAA
+        self.regs[REG_GPIO_HV_MUX_CTRL] = 0x11  # 割り込みはアクティブLow
+        self.regs[REG_GPIO_TIO_HV_STATUS] = 0x01
+        self.regs[REG_I2C_SLAVE_DEVICE_ADDRESS] = VL53L4CD_DEFAULT_ADDRESS
+        struct.pack_into(">H", self.regs, REG_RANGE_CONFIG_A, 50)
+        struct.pack_into(">I", self.regs, REG_INTERMEASUREMENT_MS, 0)
+
+    # --- 測距 ---
+    @property
+    def period(self):
+        """測定周期 (秒)"""
+        budget = struct.unpack_from(">H", self.regs, REG_RANGE_CONFIG_A)[0]
+        inter = struct.unpack_from(">I", self.regs, REG_INTERMEASUREMENT_MS)[0]
+        return max(budget, inter, 1) / 1000.0
+
+    @property
+    def ranging(self):
+        return self._ranging
+
+    @property
+    def data_ready(self):
+        return not (self.regs[REG_GPIO_TIO_HV_STATUS] & 0x01)
+
+    def tick(self, now=None):
+        """時間を進め、測定周期に達していれば新しい測定結果を用意する"""
+        with self._lock:
+            if not (self.powered and self._ranging):
+                return
+            now = self.clock() if now is None else now
+            if now < self._next_time:
+                return
+            periods = int((now - self._next_time) / self.period) + 1
+            self._next_time += periods * self.period
+            self._measure(now)
+
+    def _measure(self, now):
+        target = self.distance_mm(now) if callable(self.distance_mm) else self.distance_mm
+        if target is None:
+            status, dist = RANGE_STATUS_NO_TARGET, 0
+        else:
+            status = RANGE_STATUS_VALID if self.raw_status is None else self.raw_status
+            dist = target + (random.gauss(0.0, self.noise_mm) if self.noise_mm else 0.0)
+            dist = max(0, min(0xFFFF, int(round(dist))))
+        self.regs[REG_RESULT_RANGE_STATUS] = status
+        struct.pack_into(">H", self.regs, REG_RESULT_DISTANCE, dist)
+        self.measurements += 1
+        if not self.data_ready:
+            self.regs[REG_GPIO_TIO_HV_STATUS] = 0x00
+            self._set_irq_line(False)
+
+    def _set_irq_line(self, level):
+        if self.gpio is not None and self.irq_pin is not None:
+            self.gpio.drive(self.irq_pin, level)
+
+    # --- I2C ---
+    def i2c_write(self, data):
+        if self.fail:
+            raise OSError(121, "Remote I/O error")
+        self.tick()
+        super().i2c_write(data)
+
+    def i2c_read(self, count):
+        if self.fail:
+            raise OSError(121, "Remote I/O error")
+        self.tick()
+        return super().i2c_read(count)
+
+    def _write(self, reg, data):
+        super()._write(reg, data)
+        if reg == REG_I2C_SLAVE_DEVICE_ADDRESS:
+            new_address = data[0] & 0x7F
+            self.bus.detach(self.address, self)
+            self.address = new_address
+            self.bus.attach(new_address, self)
+        elif reg == REG_SYSTEM_INTERRUPT_CLEAR and data[0] & 0x01:
+            self.regs[REG_GPIO_TIO_HV_STATUS] = 0x01
+            self._set_irq_line(True)
+        elif reg == REG_SYSTEM_START:
+            if data[0] in (0x21, 0x40):
+                if not self._ranging:
+                    self._ranging = True
+                    self._next_time = self.clock() + self.period
+            elif data[0] in (0x00, 0x80):
+                self._ranging = False
+
+
+class FakeVL53L4CDDriver:
+    """
+    adafruit_vl53l4cd.VL53L4CD と同じAPIで FakeVL53L4CD を操作するドライバ
+
+    data_ready は極性レジスタとステータスの2回、distance は1回、
+    clear_interrupt は1回のトランザクションで、本物のドライバと同じ回数になる。
+    """
+
+    def __init__(self, i2c, address=VL53L4CD_DEFAULT_ADDRESS):
+        self._i2c = i2c
+        self._address = address
+        model_id, module_type = self.model_info
+        if model_id != 0xEB or module_type != 0xAA:
+            raise RuntimeError("Wrong sensor ID or type!")
+        self._ranging = False
+        self._timing_budget = 50
+        self._inter_measurement = 0
+
+    def _read_register(self, reg, length=1):
+        result = bytearray(length)
+        _with_lock(self._i2c, self._i2c.writeto_then_readfrom,
+                   self._address, struct.pack(">H", reg), result)
+        return result
+
+    def _write_register(self, reg, data):
+        _with_lock(self._i2c, self._i2c.writeto, self._address, struct.pack(">H", reg) + bytes(data))
+
+    @property
+    def model_info(self):
+        info = self._read_register(REG_IDENTIFICATION_MODEL_ID, 2)
+        return info[0], info[1]
+
+    def set_address(self, new_address):
+        self._write_register(REG_I2C_SLAVE_DEVICE_ADDRESS, bytes([new_address]))
+        self._address = new_address
+
+    @property
+    def timing_budget(self):
+        return self._timing_budget
+
+    @timing_budget.setter
+    def timing_budget(self, val):
+        if not 10 <= val <= 200:
+            raise ValueError("Timing budget range duration must be 10ms to 200ms.")
+        self._write_register(REG_RANGE_CONFIG_A, struct.pack(">H", int(val)))
+        self._timing_budget = val
+
+    @property
+    def inter_measurement(self):
+        return self._inter_measurement
+
+    @inter_measurement.setter
+    def inter_measurement(self, val):
+        self._write_register(REG_INTERMEASUREMENT_MS, struct.pack(">I", int(val)))
+        self._inter_measurement = val
+
+    def start_ranging(self):
+        self._write_register(REG_SYSTEM_START, b"\x21" if self._inter_measurement == 0 else b"\x40")
+        for _ in range(1000):
+            if self.data_ready:
+                break
+            time.sleep(0.001)
+        else:
+            raise TimeoutError("Time out waiting for data ready.")
+        self.clear_interrupt()
+        self._ranging = True
+
+    def stop_ranging(self):
+        self._write_register(REG_SYSTEM_START, b"\x80")
+        self._ranging = False
+
+    def clear_interrupt(self):
+        self._write_register(REG_SYSTEM_INTERRUPT_CLEAR, b"\x01")
+
+    @property
+    def _interrupt_polarity(self):
+        int_pol = self._read_register(REG_GPIO_HV_MUX_CTRL)[0] & 0x10
+        return 0 if int_pol else 1
+
+    @property
+    def data_ready(self):
+        return self._read_register(REG_GPIO_TIO_HV_STATUS)[0] & 0x01 == self._interrupt_polarity
+
+    @property
+    def distance(self):
+        """距離 (cm)"""
+        dist = self._read_register(REG_RESULT_DISTANCE, 2)
+        return struct.unpack(">H", dist)[0] / 10
+
+    @property
+    def range_status(self):
+        status = self._read_register(REG_RESULT_RANGE_STATUS)[0] & 0x1F
+        return RANGE_STATUS_TABLE[status] if status < 24 else status
+
+
+class FakePCA9685(_RegisterDevice):
+    """PCA9685 のレジスタモデル（8bitインデックス）"""
+
+    INDEX_BYTES = 1
+
+    def __init__(self, bus, address=PCA9685_DEFAULT_ADDRESS):
+        super().__init__(0x100)
+        self.bus = bus
+        self.address = address
+        self.writes = 0
+        bus.attach(address, self)
+
+    def i2c_write(self, data):
+        super().i2c_write(data)
+        if len(data) > 1:
+            self.writes += 1
+
+    def channel_counts(self, channel):
+        """チャンネルのON/OFFカウント"""
+        on, off = struct.unpack_from("<HH", self.regs, REG_PCA9685_LED0_ON_L + 4 * channel)
+        return on, off
+
+
+class FakePCA9685Driver:
+    """adafruit_pca9685.PCA9685 と同じAPIのドライバ"""
+
+    def __init__(self, i2c_bus, *, address=PCA9685_DEFAULT_ADDRESS, reference_clock_speed=25000000):
+        self.i2c_bus = i2c_bus
+        self.address = address
+        self.reference_clock_speed = reference_clock_speed
+        self.channels = [_FakePWMChannel(self, i) for i in range(16)]
+        self._frequency = 200
+        self._write(REG_PCA9685_MODE1, b"\x00")
+
+    def _write(self, reg, data):
+        _with_lock(self.i2c_bus, self.i2c_bus.writeto, self.address, bytes([reg]) + bytes(data))
+
+    @property
+    def frequency(self):
+        return self._frequency
+
+    @frequency.setter
+    def frequency(self, freq):
+        prescale = int(self.reference_clock_speed / 4096.0 / freq + 0.5)
+        if prescale < 3:
+            raise ValueError("PCA9685 cannot output at the given frequency")
+        self._write(REG_PCA9685_PRESCALE, bytes([prescale]))
+        # 実機ドライバと同じくオートインクリメントを有効にする
+        self._write(REG_PCA9685_MODE1, b"\xa0")
+        self._frequency = freq
+
+    def deinit(self):
+        self._write(REG_PCA9685_MODE1, b"\x00")
+
+
+class _FakePWMChannel:
+    """PCA9685 の1チャンネル（duty_cycle 16bit）"""
+
+    def __init__(self, pca, index):
+        self._pca = pca
+        self._index = index
+        self._duty_cycle = 0
+
+    @property
+    def frequency(self):
+        return self._pca.frequency
+
+    @property
+    def duty_cycle(self):
+        return self._duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        if not 0 <= value <= 0xFFFF:
+            raise ValueError(f"Out of range: value {value} not 0 <= value <= 65,535")
+        if value == 0xFFFF:
+            on, off = 0x1000, 0
+        elif value < 0x0010:
+            on, off = 0, 0x1000
+        else:
+            on, off = 0, value >> 4
+        self._pca._write(REG_PCA9685_LED0_ON_L + 4 * self._index, struct.pack("<HH", on, off))
+        self._duty_cycle = value
+
+
+class _FakeServoBase:
+    """adafruit_motor.servo と同じパルス幅計算"""
+
+    def __init__(self, pwm_out, *, min_pulse=750, max_pulse=2250):
+        self._pwm_out = pwm_out
+        self.set_pulse_width_range(min_pulse, max_pulse)
+
+    def set_pulse_width_range(self, min_pulse=750, max_pulse=2250):
+        self._min_duty = int((min_pulse * self._pwm_out.frequency) / 1000000 * 0xFFFF)
+        max_duty = (max_pulse * self._pwm_out.frequency) / 1000000 * 0xFFFF
+        self._duty_range = int(max_duty - self._min_duty)
+
+    @property
+    def fraction(self):
+        if self._pwm_out.duty_cycle == 0:
+            return None
+        return (self._pwm_out.duty_cycle - self._min_duty) / self._duty_range
+
+    @fraction.setter
+    def fraction(self, value):
+        if value is None:
+            self._pwm_out.duty_cycle = 0
+            return
+        if not 0.0 <= value <= 1.0:
+            raise ValueError("Must be 0.0 to 1.0")
+        self._pwm_out.duty_cycle = self._min_duty + int(value * self._duty_range)
+
+
+class FakeServo(_FakeServoBase):
+    def __init__(self, pwm_out, *, actuation_range=180, min_pulse=750, max_pulse=2250):
+        super().__init__(pwm_out, min_pulse=min_pulse, max_pulse=max_pulse)
+        self.actuation_range = actuation_range
+
+    @property
+    def angle(self):
+        if self.fraction is None:
+            return None
+        return self.actuation_range * self.fraction
+
+    @angle.setter
+    def angle(self, new_angle):
+        if new_angle is None:
+            self.fraction = None
+            return
+        if new_angle < 0 or new_angle > self.actuation_range:
+            raise ValueError("Angle out of range")
+        self.fraction = new_angle / self.actuation_range
+
+
+class FakeContinuousServo(_FakeServoBase):
+    @property
+    def throttle(self):
+        return self.fraction * 2 - 1
+
+    @throttle.setter
+    def throttle(self, value):
+        if value > 1.0 or value < -1.0:
+            raise ValueError("Throttle must be between -1.0 and 1.0")
+        if value is None:
+            raise ValueError("Continuous servos cannot spin freely")
+        self.fraction = (value + 1) / 2
+
+
+class _FakeDigitalInOut:
+    """digitalio.DigitalInOut の代替（出力は FakeGPIO へ）"""
+
+    def __init__(self, gpio, pin):
+        self._gpio = gpio
+        self._pin = pin
+        self.direction = None
+        self._value = False
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, level):
+        self._value = bool(level)
+        self._gpio.write(self._pin, self._value)
+
+    def deinit(self):
+        pass
+
+
+class FakeSensorRig:
+    """
+    5連VL53L4CDの擬似環境（XSHUT・GPIO1の配線込み）
+
+    XSHUT ピンを High にしたデバイスだけが 0x29 に現れるので、
+    SensorManager の起動シーケンス（1台ずつ起こしてアドレス変更）がそのまま動く。
+    """
+
+    def __init__(self, xshut_pins, irq_pins=None, distances=500, bus=None, gpio=None,
+                 noise_mm=0.0, clock=time.monotonic):
+        """
+        Args:
+            xshut_pins: XSHUTピン番号のリスト
+            irq_pins: GPIO1を接続するピン番号のリスト（Noneで割り込み線なし）
+            distances: 距離(mm)。数値・関数、またはチャンネルごとのリスト
+            bus: 共有する FakeI2CBus（省略時は新規作成）
+            gpio: 共有する FakeGPIO（省略時は新規作成）
+            noise_mm: 測定ノイズの標準偏差 (mm)
+            clock: 測定周期の基準にする時計
+        """
+        self.bus = bus if bus is not None else FakeI2CBus()
+        self.gpio = gpio if gpio is not None else FakeGPIO()
+        self.xshut_pins = list(xshut_pins)
+        irq_pins = list(irq_pins) if irq_pins is not None else [None] * len(self.xshut_pins)
+        if not isinstance(distances, (list, tuple)):
+            distances = [distances] * len(self.xshut_pins)
+
+        self.devices = []
+        for xshut, irq, dist in zip(self.xshut_pins, irq_pins, distances):
+            device = FakeVL53L4CD(self.bus, distance_mm=dist, gpio=self.gpio, irq_pin=irq,
+                                  powered=False, noise_mm=noise_mm, clock=clock)
+            self.gpio.on_output(xshut, device.set_power)
+            self.devices.append(device)
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def set_distances(self, distances):
+        """各チャンネルの距離(mm)を設定"""
+        for device, dist in zip(self.devices, distances):
+            device.distance_mm = dist
+
+    def tick(self, now=None):
+        for device in self.devices:
+            device.tick(now)
+
+    def start(self, interval=0.0005):
+        """測定完了（GPIO1エッジ）を時間どおりに発生させるティッカーを開始"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.wait(interval):
+                self.tick()
+
+        self._interval = interval
+        self._thread = threading.Thread(target=run, name="fake-sensor-rig", daemon=True)
+        self._thread.start()
+        _fork_rigs.add(self)
+
+    def _after_fork(self):
+        # 子プロセス (common/sensor_process.py) ではティッカースレッドが消えるので起動し直す
+        if self._thread is not None:
+            self._thread = None
+            self._stop_event = threading.Event()
+            self.start(self._interval)
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+
+def install_fake_hardware(rig=None, bus=None, gpio=None):
+    """
+    board / busio / digitalio / adafruit_vl53l4cd / adafruit_pca9685 / adafruit_motor を
+    擬似ハードウェアに差し替える（プロジェクトのモジュールを import する前に呼ぶ）
+
+    Args:
+        rig: FakeSensorRig（バスとGPIOはこれに合わせる）
+        bus: FakeI2CBus（rig を渡さない場合）
+        gpio: FakeGPIO（rig を渡さない場合）
+
+    Returns:
+        tuple: (FakeI2CBus, FakeGPIO, FakePCA9685)
+    """
+    if rig is not None:
+        bus, gpio = rig.bus, rig.gpio
+    bus = bus if bus is not None else FakeI2CBus()
+    gpio = gpio if gpio is not None else FakeGPIO()
+    pca = bus.devices.get(PCA9685_DEFAULT_ADDRESS) or FakePCA9685(bus)
+
+    board = types.ModuleType("board")
+    board.I2C = lambda: bus
+    board.SCL, board.SDA = "SCL", "SDA"
+    board.__getattr__ = lambda name: int(name[1:]) if name.startswith("D") and name[1:].isdigit() else _missing(name)
+
+    busio = types.ModuleType("busio")
+    busio.I2C = lambda scl=None, sda=None, **kwargs: bus
+
+    digitalio = types.ModuleType("digitalio")
+    digitalio.Direction = types.SimpleNamespace(INPUT="INPUT", OUTPUT="OUTPUT")
+    digitalio.DigitalInOut = lambda pin: _FakeDigitalInOut(gpio, pin)
+
+    vl53 = types.ModuleType("adafruit_vl53l4cd")
+    vl53.VL53L4CD = FakeVL53L4CDDriver
+
+    pca_module = types.ModuleType("adafruit_pca9685")
+    pca_module.PCA9685 = FakePCA9685Driver
+
+    motor = types.ModuleType("adafruit_motor")
+    servo = types.ModuleType("adafruit_motor.servo")
+    servo.Servo = FakeServo
+    servo.ContinuousServo = FakeContinuousServo
+    motor.servo = servo
+
+    sys.modules.update({
+        "board": board,
+        "busio": busio,
+        "digitalio": digitalio,
+        "adafruit_vl53l4cd": vl53,
+        "adafruit_pca9685": pca_module,
+        "adafruit_motor": motor,
+        "adafruit_motor.servo": servo,
+    })
+    return bus, gpio, pca
+
+
+def _missing(name):
+    raise AttributeError(f"module 'board' has no attribute {name!r}")
+
+
+def _with_lock(bus, fn, *args):
+    """busio と同じく try_lock でバスを確保してから転送する"""
+    while not bus.try_lock():
+        time.sleep(0)
+    try:
+        return fn(*args)
+    finally:
+        bus.unlock()
@@ -0,0 +1,94 @@
+"""
+VL53L4CD GPIO1割り込みによる測定完了検知
+
+各センサーのGPIO1（測定完了でLowになる）をラズパイの入力ピンにつなぎ、
+立ち下がりエッジのコールバックで「どのセンサーが準備できたか」を知る。
+data_ready をI2Cでポーリングしないので、バスには距離の取得と割り込みクリアだけが流れる。
+"""
+
+import functools
+import threading
+
+
+class RPiGPIOBackend:
+    """RPi.GPIO を使ったエッジ検出バックエンド"""
+
+    def __init__(self):
+        import RPi.GPIO as GPIO
+
+        self._gpio = GPIO
+        GPIO.setmode(GPIO.BCM)
+
+    def watch_falling_edge(self, pin, callback):
+        """ピンを入力にして立ち下がりエッジで callback(pin) を呼ぶ"""
+        self._gpio.setup(pin, self._gpio.IN, pull_up_down=self._gpio.PUD_UP)
+        self._gpio.add_event_detect(pin, self._gpio.FALLING, callback=callback)
+
+    def unwatch(self, pin):
+        """エッジ検出を解除"""
+        self._gpio.remove_event_detect(pin)
+        self._gpio.cleanup(pin)
+
+
+class DataReadyInterrupts:
+    """
+    チャンネルごとの測定完了フラグ
+
+    エッジコールバックでフラグを立て、読み手は take() でフラグを下ろしてから
+    距離の取得と割り込みクリアを行う。クリアするまでGPIO1はLowのままなので、
+    次のエッジは必ずクリア後の測定で発生し、取りこぼしは起きない。
+    """
+
+    def __init__(self, gpio, pins):
+        """
+        Args:
+            gpio: watch_falling_edge / unwatch を持つバックエンド
+            pins: チャンネル順のGPIO番号のリスト（配線なしはNone）
+        """
+        self.gpio = gpio
+        self.pins = list(pins)
+        self.wake_event = threading.Event()
+        self.edge_counts = [0] * len(self.pins)
+        self._ready = [threading.Event() for _ in self.pins]
+        self._watching = []
+
+    def start(self):
+        """エッジ検出を開始"""
+        for idx, pin in enumerate(self.pins):
+            if pin is None:
+                continue
+            self.gpio.watch_falling_edge(pin, functools.partial(self._on_edge, idx))
+            self._watching.append(pin)
+
+    def stop(self):
+        """エッジ検出を解除"""
+        for pin in self._watching:
+            try:
+                self.gpio.unwatch(pin)
+            except Exception:
+                pass
+        self._watching = []
+
+    def wired(self, idx):
+        """チャンネルに割り込み線がつながっているか"""
+        return idx < len(self.pins) and self.pins[idx] is not None
+
+    def take(self, idx, timeout=0):
+        """
+        測定完了フラグが立っていれば下ろしてTrueを返す
+
+        Args:
+            idx: チャンネル番号
+            timeout: フラグを待つ最大時間 (秒)。0なら待たない
+        """
+        ready = self._ready[idx]
+        if ready.is_set() or (timeout > 0 and ready.wait(timeout)):
+            ready.clear()
+            return True
+        return False
+
+    def _on_edge(self, idx, *args):
+        """エッジ検出コールバック（GPIOライブラリのスレッドから呼ばれる）"""
+        self.edge_counts[idx] += 1
+        self._ready[idx].set()
+        self.wake_event.set()
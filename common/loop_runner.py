@@ -0,0 +1,126 @@
+"""
+固定周期ループの周期管理
+
+処理のあとに time.sleep(CONTROL_INTERVAL) すると、実際の周期は
+「CONTROL_INTERVAL + センサー・計算・ログの時間」になり、しかも揺らぐ。
+ここでは各周期の開始時刻を time.monotonic の絶対時刻 (start + n * interval) で決め、
+その時刻まで待つ。処理が周期を超えたら超過として数え、方針に従って追いつく。
+
+    rate = FixedRateLoop(CONTROL_INTERVAL)
+    while True:
+        ...
+        rate.wait()
+"""
+
+import time
+
+SKIP = "skip"           # 間に合わなかった周期は飛ばし、次の格子点に合わせる
+COMPRESS = "compress"   # 待たずに次の周期を始め、遅れを取り戻すまで詰めて回す
+
+
+class FixedRateLoop:
+    """
+    絶対時刻の締め切りで周期を刻むループランナー
+
+    周期（前回の wait() を抜けてから今回抜けるまで）と締め切りからの遅れを
+    固定長のリングに記録し、stats() でパーセンタイルを返す。
+    """
+
+    def __init__(self, interval, overrun=SKIP, max_behind=5, samples=1000, idle=None):
+        """
+        Args:
+            interval: 周期 (秒)。0以下なら待たずに回す（リプレイの最速実行など）
+            overrun: 周期超過時の方針 ("skip" / "compress")
+            max_behind: compress でこの周期数以上遅れたら追いつくのを諦めて今から刻み直す
+            samples: 保持する周期サンプル数
+            idle: 待つ前に idle(残り秒) を呼ぶ（GC など、余裕があるときだけの処理用）
+        """
+        if overrun not in (SKIP, COMPRESS):
+            raise ValueError(f"unknown overrun policy: {overrun}")
+        self.interval = interval
+        self.overrun = overrun
+        self.max_behind = max_behind
+        self.idle = idle
+
+        self.cycles = 0
+        self.overruns = 0   # 締め切りまでに wait() に戻れなかった回数
+        self.skipped = 0    # skip で飛ばした周期数
+
+        self._next = None
+        self._last_start = None
+        self._periods = [0.0] * samples
+        self._lateness = [0.0] * samples
+
+    def start(self, now=None):
+        """周期の基準時刻を今にする（最初の wait() で自動的に呼ばれる）"""
+        now = time.monotonic() if now is None else now
+        self._next = now + self.interval
+        self._last_start = now
+
+    def wait(self):
+        """次の周期の開始時刻まで待つ"""
+        now = time.monotonic()
+        if self._next is None:
+            self.start(now)
+            now = time.monotonic()
+
+        interval = self.interval
+        deadline = self._next
+        if interval <= 0:
+            deadline = now
+        elif now < deadline:
+            if self.idle is not None:
+                self.idle(deadline - now)
+                now = time.monotonic()
+            if now < deadline:
+                time.sleep(deadline - now)
+        else:
+            self.overruns += 1
+            behind = int((now - deadline) // interval)
+            if self.overrun == SKIP:
+                # 過ぎてしまった格子点は飛ばして、直近の格子点をこの周期の開始とみなす
+                self.skipped += behind
+                deadline += behind * interval
+            elif behind >= self.max_behind:
+                deadline = now
+
+        start = time.monotonic()
+        self._record(start - self._last_start, start - deadline)
+        self._last_start = start
+        self._next = deadline + interval
+
+    def _record(self, period, lateness):
+        index = self.cycles % len(self._periods)
+        self._periods[index] = period
+        self._lateness[index] = lateness
+        self.cycles += 1
+
+    def stats(self):
+        """
+        周期の統計
+
+        Returns:
+            dict: cycles, overruns, skipped と、周期 (period_*) ・
+                  締め切りからの遅れ (late_*) の mean / p50 / p90 / p99 / max (秒)
+        """
+        count = min(self.cycles, len(self._periods))
+        result = {"cycles": self.cycles, "overruns": self.overruns, "skipped": self.skipped}
+        for name, values in (("period", self._periods), ("late", self._lateness)):
+            samples = sorted(values[:count])
+            if not samples:
+                samples = [0.0]
+            n = len(samples)
+            result[f"{name}_mean"] = sum(samples) / n
+            result[f"{name}_p50"] = samples[n // 2]
+            result[f"{name}_p90"] = samples[min(n - 1, int(n * 0.90))]
+            result[f"{name}_p99"] = samples[min(n - 1, int(n * 0.99))]
+            result[f"{name}_max"] = samples[-1]
+        return result
+
+    def summary(self):
+        """終了時の表示用の1行"""
+        s = self.stats()
+        return (f"制御周期: 平均 {s['period_mean'] * 1000:.1f}ms "
+                f"(p50 {s['period_p50'] * 1000:.1f} / p99 {s['period_p99'] * 1000:.1f} / "
+                f"最大 {s['period_max'] * 1000:.1f}ms) "
+                f"遅れ p99 {s['late_p99'] * 1000:.2f}ms / 超過 {s['overruns']}回 / 飛ばし {s['skipped']}回")
@@ -0,0 +1,226 @@
+"""
+センサー → 計算 → 出力 のパイプライン実行
+
+直列ループでは1周期が「センサー読み取り + 計算 + 出力 + ログ + 表示」の合計になる。
+ここでは3つの段に分ける:
+
+    センサー段（スレッド）: sense() を周期で回し、最新フレームをスロットに置く
+    制御段（呼び出し元スレッド）: 新しいフレームが来たら compute() → actuate()
+    記録段（スレッド）: record() でCSVログ・デバッグ表示（キューが溢れたら捨てる）
+
+周期Nの計算・出力の間にセンサー段は周期N+1を読み、ログと表示は制御の経路から外れる。
+制御段が遅れたときは古いフレームを飛ばして常に最新フレームを使う（飛ばした数は dropped）。
+リプレイの最速再生のように全フレームを処理したいときは lossless=True で、
+センサー段は前のフレームが取られるまで次を置かずに待つ（読み取り自体はそれでも計算と重なる）。
+
+    loop = PipelinedLoop(sensor.read, compute, actuate, record, rate=FixedRateLoop(CONTROL_INTERVAL))
+    loop.run()   # Ctrl+C か sense() の例外で抜ける
+"""
+
+import queue
+import threading
+import time
+
+from common.loop_runner import FixedRateLoop
+
+
+class PipelinedLoop:
+    """
+    センサー読み取りと計算・出力を重ねて回すループ
+
+    センサー取得から出力 (actuate() の完了) までの時間を固定長のリングに記録し、
+    stats() でスループットとパーセンタイルを返す。
+    """
+
+    def __init__(self, sense, compute, actuate, record=None, rate=None,
+                 capture_time=None, lossless=False, record_queue_size=256, samples=1000,
+                 sense_setup=None, record_setup=None):
+        """
+        Args:
+            sense: sense() → フレーム（SensorManager.read など）
+            compute: compute(フレーム) → 指令
+            actuate: actuate(指令) で出力する
+            record: record(フレーム, 指令) でログ・表示（Noneなら記録段なし）
+            rate: センサー段の周期を刻む FixedRateLoop（Noneなら待たずに回す）
+            capture_time: capture_time(フレーム) → 取得時刻 (time.monotonic)。
+                          Noneなら sense() が戻った時刻を使う
+            lossless: True なら制御段が取るまで次のフレームを置かない（飛ばしなし）
+            record_queue_size: 記録段のキュー長（溢れた分は捨てる）
+            samples: 保持する遅延サンプル数
+            sense_setup: センサー段のスレッドの開始時にそのスレッドで呼ぶ関数
+                         （RealtimeRuntime.apply_to_current_thread など）
+            record_setup: 記録段のスレッドの開始時にそのスレッドで呼ぶ関数
+                          （RealtimeRuntime.release_current_thread など）
+        """
+        self.sense = sense
+        self.compute = compute
+        self.actuate = actuate
+        self.record = record
+        self.rate = rate if rate is not None else FixedRateLoop(0)
+        self.capture_time = capture_time
+        self.lossless = lossless
+        self.sense_setup = sense_setup
+        self.record_setup = record_setup
+
+        self.frames = 0         # センサー段が置いたフレーム数
+        self.cycles = 0         # 制御段が処理したフレーム数
+        self.dropped = 0        # 制御段が間に合わず飛ばしたフレーム数
+        self.record_dropped = 0 # 記録キューが溢れて捨てた数
+        self.record_errors = 0
+
+        self._slot = None       # (通し番号, フレーム, sense() が戻った時刻)
+        self._taken = 0         # 制御段が最後に取ったフレームの通し番号
+        self._cond = threading.Condition()
+        self._error = None
+        self._stop_event = threading.Event()
+        self._sensor_thread = None
+        self._record_thread = None
+        self._records = queue.Queue(maxsize=record_queue_size)
+        self._latencies = [0.0] * samples
+        self._first_done = None
+        self._last_done = None
+
+    def run(self):
+        """
+        制御段を呼び出し元スレッドで回す
+
+        sense() が例外を投げたら（リプレイ終了など）ここで投げ直す。
+        抜けるときはセンサー段を止め、記録段は溜まった分を書き終えてから止める。
+        """
+        self._stop_event.clear()
+        self._error = None
+        self._slot = None
+        self._taken = 0
+        self.frames = 0
+        self._sensor_thread = threading.Thread(target=self._sense_loop, name="pipeline-sense", daemon=True)
+        if self.record is not None:
+            self._record_thread = threading.Thread(target=self._record_loop, name="pipeline-record", daemon=True)
+            self._record_thread.start()
+        self._sensor_thread.start()
+
+        compute = self.compute
+        actuate = self.actuate
+        capture_time = self.capture_time
+        latencies = self._latencies
+        size = len(latencies)
+        cond = self._cond
+        last_number = 0
+        try:
+            while True:
+                with cond:
+                    while (self._slot is None or self._slot[0] == last_number) and self._error is None:
+                        cond.wait(0.1)
+                    # 例外より前に置かれたフレームは処理してから投げ直す
+                    if self._slot is None or self._slot[0] == last_number:
+                        raise self._error
+                    number, frame, sensed_at = self._slot
+                    self._taken = number
+                    cond.notify()
+
+                self.dropped += number - last_number - 1
+                last_number = number
+
+                command = compute(frame)
+                actuate(command)
+                done = time.monotonic()
+
+                captured = sensed_at if capture_time is None else capture_time(frame)
+                latencies[self.cycles % size] = done - captured
+                self.cycles += 1
+                if self._first_done is None:
+                    self._first_done = done
+                self._last_done = done
+
+                if self.record is not None:
+                    try:
+                        self._records.put_nowait((frame, command))
+                    except queue.Full:
+                        self.record_dropped += 1
+        finally:
+            self.stop()
+
+    def stop(self, timeout=1.0):
+        """センサー段と記録段を止める（記録段はキューを書き終えてから）"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._sensor_thread is not None:
+            self._sensor_thread.join(timeout)
+            self._sensor_thread = None
+        if self._record_thread is not None:
+            # 番兵はキューが満杯でも必ず入れる
+            self._records.put(None)
+            self._record_thread.join(timeout)
+            self._record_thread = None
+
+    def _sense_loop(self):
+        """センサー段: 読み取って最新フレームを置き、周期を待つ"""
+        if self.sense_setup is not None:
+            self.sense_setup()
+        rate = self.rate
+        cond = self._cond
+        rate.start()
+        try:
+            while not self._stop_event.is_set():
+                frame = self.sense()
+                sensed_at = time.monotonic()
+                self.frames += 1
+                with cond:
+                    if self.lossless:
+                        while self._taken < self.frames - 1 and not self._stop_event.is_set():
+                            cond.wait(0.1)
+                    self._slot = (self.frames, frame, sensed_at)
+                    cond.notify_all()
+                rate.wait()
+        except BaseException as e:
+            # 例外は制御段（呼び出し元スレッド）で投げ直す
+            with cond:
+                self._error = e
+                cond.notify_all()
+
+    def _record_loop(self):
+        """記録段: キューから取り出してログ・表示"""
+        if self.record_setup is not None:
+            self.record_setup()
+        while True:
+            item = self._records.get()
+            if item is None:
+                return
+            try:
+                self.record(*item)
+            except Exception as e:
+                self.record_errors += 1
+                if self.record_errors <= 3:
+                    print(f"記録エラー: {e}")
+
+    def stats(self):
+        """
+        スループットとセンサー取得から出力までの遅延
+
+        Returns:
+            dict: cycles, frames, dropped, record_dropped, throughput (Hz) と
+                  遅延 (latency_*) の mean / p50 / p99 / max (秒)
+        """
+        count = min(self.cycles, len(self._latencies))
+        samples = sorted(self._latencies[:count]) or [0.0]
+        n = len(samples)
+        elapsed = (self._last_done - self._first_done) if self.cycles > 1 else 0.0
+        return {
+            "cycles": self.cycles,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "record_dropped": self.record_dropped,
+            "throughput": (self.cycles - 1) / elapsed if elapsed > 0 else 0.0,
+            "latency_mean": sum(samples) / n,
+            "latency_p50": samples[n // 2],
+            "latency_p99": samples[min(n - 1, int(n * 0.99))],
+            "latency_max": samples[-1],
+        }
+
+    def summary(self):
+        """終了時の表示用の1行"""
+        s = self.stats()
+        return (f"パイプライン: {s['throughput']:.1f}Hz / 取得→出力 平均 {s['latency_mean'] * 1000:.1f}ms "
+                f"(p50 {s['latency_p50'] * 1000:.1f} / p99 {s['latency_p99'] * 1000:.1f} / "
+                f"最大 {s['latency_max'] * 1000:.1f}ms) "
+                f"飛ばし {s['dropped']}フレーム / ログ破棄 {s['record_dropped']}件")
@@ -0,0 +1,148 @@
+"""
+PCA9685 の duty 書き込みをまとめるライター
+
+adafruit_pca9685 の duty_cycle 代入は値が変わっていなくても毎回 I2C 書き込みになる。
+ここではチャンネルごとに最後に書いた duty を覚えておき、
+変化のないチャンネルは書かず、隣り合うチャンネルはオートインクリメントで1回の書き込みにまとめる。
+同じバスにつながる ToF センサーの読み取りに帯域を回すため。
+
+PCA9685 の MODE1 オートインクリメント (AI) は adafruit_pca9685 の frequency 設定時に有効になるので、
+このクラスは PCA9685(i2c).frequency = ... の後で使うこと。
+"""
+
+import struct
+import threading
+import time
+
+PCA9685_DEFAULT_ADDRESS = 0x40
+_LED0_ON_L = 0x06
+_CHANNEL_COUNT = 16
+
+
+def duty_to_counts(duty):
+    """
+    16bit duty を LEDn_ON / LEDn_OFF のカウントに変換（adafruit_pca9685 と同じ規則）
+
+    Returns:
+        tuple: (ON カウント, OFF カウント)
+    """
+    if not 0 <= duty <= 0xFFFF:
+        raise ValueError(f"Out of range: value {duty} not 0 <= value <= 65,535")
+    if duty == 0xFFFF:
+        return 0x1000, 0      # 常時 High
+    if duty < 0x0010:
+        return 0, 0x1000      # 常時 Low
+    return 0, duty >> 4
+
+
+def pulse_to_duty(pulse_us, frequency):
+    """パルス幅 (us) を 16bit duty に変換"""
+    period_us = 1000000 / frequency
+    return int((pulse_us / period_us) * 65535)
+
+
+def servo_angle_to_duty(angle, frequency, min_pulse=750, max_pulse=2250, actuation_range=180):
+    """サーボ角度を 16bit duty に変換（adafruit_motor.servo.Servo と同じ計算）"""
+    min_duty = int((min_pulse * frequency) / 1000000 * 0xFFFF)
+    max_duty = (max_pulse * frequency) / 1000000 * 0xFFFF
+    duty_range = int(max_duty - min_duty)
+    return min_duty + int(angle / actuation_range * duty_range)
+
+
+class PWMWriter:
+    """
+    チャンネルごとの duty キャッシュ付き PCA9685 ライター
+
+    update({ch: duty, ...}) で変化したチャンネルだけを書き、連続するチャンネルは
+    LEDn_ON_L からのバースト書き込み1回で更新する。
+    saved_writes は「1チャンネル1書き込み」の場合と比べて省けた I2C 書き込みの数。
+    アクチュエータースレッドと制御ループの両方から呼べるよう、更新はロックで直列化する。
+    """
+
+    def __init__(self, i2c, address=PCA9685_DEFAULT_ADDRESS):
+        """
+        Args:
+            i2c: busio.I2C 互換のバス
+            address: PCA9685 の I2C アドレス
+        """
+        self.i2c = i2c
+        self.address = address
+        self._duty = [None] * _CHANNEL_COUNT
+        self.requested = 0     # 要求されたチャンネル更新の数
+        self.writes = 0        # 実際に発行した I2C 書き込みの数
+        self.burst_writes = 0  # そのうち複数チャンネルをまとめた書き込み
+        self._lock = threading.Lock()
+
+    def write(self, channel, duty):
+        """
+        1チャンネルを更新（値が変わらなければ書かない）
+
+        Returns:
+            bool: I2C 書き込みを行ったか
+        """
+        return self.update({channel: duty}) > 0
+
+    def update(self, duties):
+        """
+        複数チャンネルをまとめて更新
+
+        Args:
+            duties: {チャンネル: 16bit duty}
+
+        Returns:
+            int: 発行した I2C 書き込みの数
+        """
+        with self._lock:
+            self.requested += len(duties)
+            changed = sorted(ch for ch, duty in duties.items() if self._duty[ch] != duty)
+            if not changed:
+                return 0
+
+            # 連続するチャンネルごとに1回の書き込みにまとめる
+            issued = 0
+            run = [changed[0]]
+            for ch in changed[1:]:
+                if ch == run[-1] + 1:
+                    run.append(ch)
+                else:
+                    self._write_run(run, duties)
+                    issued += 1
+                    run = [ch]
+            self._write_run(run, duties)
+            return issued + 1
+
+    def invalidate(self, channel=None):
+        """キャッシュを捨てて次回は必ず書く（PCA9685 のリセット後など）"""
+        if channel is None:
+            self._duty = [None] * _CHANNEL_COUNT
+        else:
+            self._duty[channel] = None
+
+    def duty(self, channel):
+        """最後に書いた duty（未書き込みならNone）"""
+        return self._duty[channel]
+
+    @property
+    def saved_writes(self):
+        return self.requested - self.writes
+
+    def _write_run(self, channels, duties):
+        buf = bytearray(1 + 4 * len(channels))
+        buf[0] = _LED0_ON_L + 4 * channels[0]
+        for i, ch in enumerate(channels):
+            struct.pack_into("<HH", buf, 1 + 4 * i, *duty_to_counts(duties[ch]))
+
+        i2c = self.i2c
+        while not i2c.try_lock():
+            time.sleep(0)
+        try:
+            i2c.writeto(self.address, buf)
+        finally:
+            i2c.unlock()
+
+        # 書き込みが成功してからキャッシュを更新する（失敗時は次回書き直す）
+        for ch in channels:
+            self._duty[ch] = duties[ch]
+        self.writes += 1
+        if len(channels) > 1:
+            self.burst_writes += 1
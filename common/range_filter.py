@@ -0,0 +1,135 @@
+"""
+距離センサーのフィルタ段
+
+チャンネルごとに等速度モデルのカルマンフィルタ（状態: 距離・変化率）を持ち、
+5チャンネル分をNumPy配列でまとめて更新する。定常状態では alpha-beta フィルタと同じ
+ゲインになるが、サンプル間隔は SensorData の取得時刻から実測値を使う。
+
+    filt = RangeFilter()
+    ranges = filt.update(sensor_data.as_list(), sensor_data.capture_times, sensor_data.sequences)
+    ranges.distance   # フィルタ後の距離 (mm)
+    ranges.velocity   # 距離の変化率 (mm/s)。負なら接近
+    ranges.variance   # 距離の分散 (mm^2)
+"""
+
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+class FilteredRanges(namedtuple("FilteredRanges", ["distance", "velocity", "variance", "valid"])):
+    """RangeFilter.update() の結果（各要素はチャンネル順のNumPy配列）"""
+
+    __slots__ = ()
+
+    @property
+    def closing_speed(self):
+        """接近速度 (mm/s)。近づいているとき正"""
+        return -self.velocity
+
+
+class RangeFilter:
+    """5チャンネルの距離・変化率を推定するカルマンフィルタ"""
+
+    def __init__(self, channel_count=5, accel_std=2000.0, measurement_std=15.0,
+                 initial_velocity_std=1000.0, max_gap=0.5, invalid_value=9999):
+        """
+        Args:
+            channel_count: チャンネル数
+            accel_std: 距離の変化率の変動（加速度）の標準偏差 (mm/s^2)。大きいほど追従が速い
+            measurement_std: 測定ノイズの標準偏差 (mm)
+            initial_velocity_std: 初期化直後の変化率の標準偏差 (mm/s)
+            max_gap: この時間 (秒) 以上測定が途切れたチャンネルは測定値から初期化し直す
+            invalid_value: これ以上の値は無効値として更新しない
+        """
+        n = channel_count
+        self.channel_count = n
+        self.max_gap = max_gap
+        self.invalid_value = invalid_value
+        self._q = accel_std ** 2
+        self._r = measurement_std ** 2
+        self._v0 = initial_velocity_std ** 2
+
+        self.distance = np.zeros(n)
+        self.velocity = np.zeros(n)
+        # 共分散行列 [[p00, p01], [p01, p11]] の要素
+        self.p00 = np.full(n, self._r)
+        self.p01 = np.zeros(n)
+        self.p11 = np.full(n, self._v0)
+        self.initialized = np.zeros(n, dtype=bool)
+        self._time = np.zeros(n)
+        self._sequence = np.full(n, -1, dtype=np.int64)
+
+    def reset(self):
+        """全チャンネルを未初期化に戻す"""
+        self.initialized[:] = False
+        self._sequence[:] = -1
+
+    def update(self, distances, capture_times=None, sequences=None, now=None):
+        """
+        新しい測定値でフィルタを更新する
+
+        Args:
+            distances: チャンネル順の距離 (mm)
+            capture_times: チャンネルごとの取得時刻（Noneなら全チャンネル now）
+            sequences: チャンネルごとのシーケンス番号。前回と同じチャンネルは
+                       新しい測定がないものとして更新しない（Noneなら全チャンネル新規）
+            now: capture_times 省略時の時刻（Noneなら time.monotonic()）
+
+        Returns:
+            FilteredRanges: フィルタ後の距離・変化率・分散と、推定値があるかのマスク
+        """
+        z = np.asarray(distances, dtype=float)
+        if capture_times is None:
+            t = np.full(self.channel_count, time.monotonic() if now is None else now)
+        else:
+            t = np.asarray(capture_times, dtype=float)
+
+        valid = (z > 0) & (z < self.invalid_value)
+        if sequences is not None:
+            seq = np.asarray(sequences, dtype=np.int64)
+            valid &= seq != self._sequence
+            self._sequence[:] = seq
+
+        dt = t - self._time
+        fresh = valid & (~self.initialized | (dt > self.max_gap))
+        track = valid & ~fresh
+        # track 以外のチャンネルは dt とゲインを0にして、分岐なしで全チャンネルを計算する
+        mask = track.astype(float)
+        dt = np.maximum(dt, 0.0)
+        dt *= mask
+
+        # 予測
+        q = self._q
+        dt2 = dt * dt
+        p11dt = self.p11 * dt
+        self.distance += self.velocity * dt
+        self.p00 += dt * (2.0 * self.p01 + p11dt) + q * dt2 * dt2 * 0.25
+        self.p01 += p11dt + q * dt2 * dt * 0.5
+        self.p11 += q * dt2
+
+        # 更新
+        gain = mask / (self.p00 + self._r)
+        k0 = self.p00 * gain
+        k1 = self.p01 * gain
+        y = z - self.distance
+        y *= mask
+        self.distance += k0 * y
+        self.velocity += k1 * y
+        self.p11 -= k1 * self.p01
+        self.p01 *= 1.0 - k0
+        self.p00 *= 1.0 - k0
+
+        # 初回・長い途切れのあとは測定値から始め直す
+        if fresh.any():
+            self.distance[fresh] = z[fresh]
+            self.velocity[fresh] = 0.0
+            self.p00[fresh] = self._r
+            self.p01[fresh] = 0.0
+            self.p11[fresh] = self._v0
+            self.initialized |= fresh
+
+        self._time = np.where(valid, t, self._time)
+        return FilteredRanges(self.distance.copy(), self.velocity.copy(), self.p00.copy(),
+                              self.initialized.copy())
@@ -0,0 +1,311 @@
+"""
+制御ループのリアルタイム実行モード
+
+25Hz ループの周期の揺らぎは、主に OS のスケジューラ（他のプロセスに CPU を取られる）と
+Python の循環参照 GC の停止から来る。ここでは制御スレッドに対して
+
+    1. CPU の固定 (sched_setaffinity。isolcpus で空けたコアがあればそれを使う)
+    2. SCHED_FIFO の優先度 (sched_setscheduler。root か CAP_SYS_NICE / ulimit -r が必要)
+    3. 初期化で作ったオブジェクトの gc.freeze() と、ループ中の自動 GC の停止
+       （GC は FixedRateLoop の待ち時間に余裕があるときだけ idle() から回す）
+
+を行い、前後で起床の遅れ（ジッタ）を測って表示する。
+権限がない・対応していない項目は警告を出して飛ばし、走行はそのまま続ける。
+
+CPU 固定と優先度はスレッドごとの設定で、enter() は呼んだスレッドにしか効かない。
+PWM を書くアクチュエータースレッドや測距スレッドは、スレッドの開始時に
+apply_to_current_thread() を呼んで同じ CPU・優先度にする。逆に enter() の後に制御スレッドから
+作るスレッドは CPU・優先度を引き継いでしまうので、ログ記録のように制御を遅らせてはいけない
+スレッドは開始時に release_current_thread() で通常の優先度・ほかの CPU に戻す。
+
+    rt = RealtimeRuntime(enabled=REALTIME_MODE, cpu=REALTIME_CPU, priority=REALTIME_PRIORITY)
+    motor = MotorController(i2c, thread_setup=rt.apply_to_current_thread)
+    rate = FixedRateLoop(CONTROL_INTERVAL, idle=rt.idle)
+    ...初期化...
+    rt.enter()      # 制御スレッドから呼ぶ
+    while True:
+        ...
+        rate.wait()
+    rt.leave()
+"""
+
+import gc
+import os
+import threading
+import time
+
+ISOLATED_CPUS_PATH = "/sys/devices/system/cpu/isolated"
+
+
+def _parse_cpu_list(text):
+    """"1-3,5" 形式の CPU リスト"""
+    cpus = set()
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            low, high = part.split("-", 1)
+            cpus.update(range(int(low), int(high) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def isolated_cpus():
+    """isolcpus= で空けてある CPU の集合（なければ空）"""
+    try:
+        with open(ISOLATED_CPUS_PATH) as f:
+            return _parse_cpu_list(f.read())
+    except (OSError, ValueError):
+        return set()
+
+
+def measure_jitter(cycles=200, interval=0.002):
+    """
+    絶対時刻で sleep したときの起床の遅れを測る
+
+    Returns:
+        dict: cycles, mean, p50, p99, max (秒)
+    """
+    lateness = []
+    deadline = time.monotonic()
+    for _ in range(cycles):
+        deadline += interval
+        now = time.monotonic()
+        if deadline > now:
+            time.sleep(deadline - now)
+        lateness.append(time.monotonic() - deadline)
+    lateness.sort()
+    n = len(lateness)
+    return {
+        "cycles": n,
+        "mean": sum(lateness) / n,
+        "p50": lateness[n // 2],
+        "p99": lateness[min(n - 1, int(n * 0.99))],
+        "max": lateness[-1],
+    }
+
+
+class RealtimeRuntime:
+    """
+    制御スレッドの CPU 固定・SCHED_FIFO・GC 制御
+
+    enabled=False なら enter() / leave() / idle() は何もしない（既定の走行と同じ）。
+    """
+
+    def __init__(self, enabled=False, cpu=None, priority=50, gc_min_slack=0.005,
+                 gc_force_factor=10, jitter_check=True):
+        """
+        Args:
+            enabled: リアルタイムモードを使うか
+            cpu: 固定する CPU 番号（None なら isolcpus のコア、なければ使える最後のコア）
+            priority: SCHED_FIFO の優先度 (1-99)。None なら優先度は変えない
+            gc_min_slack: 周期の残りがこの秒数以上あるときだけ GC を回す
+            gc_force_factor: 世代0の数がしきい値のこの倍を超えたら余裕がなくても回す（メモリの上限）
+            jitter_check: enter() の前後で起床の遅れを測って表示するか
+        """
+        self.enabled = enabled
+        self.cpu = cpu
+        self.priority = priority
+        self.gc_min_slack = gc_min_slack
+        self.gc_force_factor = gc_force_factor
+        self.jitter_check = jitter_check
+
+        self.active = False
+        self.applied = []           # 適用できた項目
+        self.skipped = []           # 権限・環境の都合で飛ばした項目と理由
+        self.jitter_before = None
+        self.jitter_after = None
+        self.collections = 0        # idle() で回した GC の回数
+        self.forced = 0             # 余裕がなくても回した回数
+        self.gc_max = 0.0           # 1回の GC の最長時間 (秒)
+
+        self._gc_was_enabled = True
+        self._saved_affinity = None
+        self._saved_policy = None
+        self._threshold = gc.get_threshold()
+        # 起動時に使えた CPU（固定した後の制御スレッドから見ると1つしかないので先に取っておく）
+        self._allowed = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else None
+
+    def enter(self):
+        """制御スレッドをリアルタイム設定にする（初期化が終わってから、制御スレッドで呼ぶ）"""
+        if not self.enabled or self.active:
+            return
+        if self.jitter_check:
+            self.jitter_before = measure_jitter()
+
+        self._pin_cpu()
+        self._set_fifo()
+
+        # 初期化で作ったオブジェクト（モジュール・設定・テーブル）を GC の対象から外し、
+        # ループ中の自動 GC を止める
+        self._gc_was_enabled = gc.isenabled()
+        gc.collect()
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+            self.applied.append("gc.freeze")
+        else:
+            self.skipped.append("gc.freeze (Python 3.7 以上が必要)")
+        gc.disable()
+        self.applied.append("自動GC停止（周期の余裕で回収）")
+        self._threshold = gc.get_threshold()
+        self.active = True
+
+        if self.jitter_check:
+            self.jitter_after = measure_jitter()
+        print(self.summary())
+
+    def idle(self, slack):
+        """
+        周期の待ち時間で呼ぶ（FixedRateLoop の idle フック）。余裕があれば GC を回す
+
+        Args:
+            slack: 次の周期の開始までの残り時間 (秒)
+        """
+        if not self.active:
+            return
+        count0, count1, count2 = gc.get_count()
+        threshold0, threshold1, threshold2 = self._threshold
+        if count0 < threshold0:
+            return
+        if slack < self.gc_min_slack:
+            if count0 < threshold0 * self.gc_force_factor:
+                return
+            self.forced += 1
+        # 自動 GC と同じく、しきい値を超えた一番古い世代まで回収する
+        if count2 >= threshold2 and count1 >= threshold1:
+            generation = 2
+        elif count1 >= threshold1:
+            generation = 1
+        else:
+            generation = 0
+        start = time.perf_counter()
+        gc.collect(generation)
+        elapsed = time.perf_counter() - start
+        self.collections += 1
+        if elapsed > self.gc_max:
+            self.gc_max = elapsed
+
+    def leave(self):
+        """設定を元に戻す（終了処理の前に呼ぶ）"""
+        if not self.active:
+            return
+        self.active = False
+        if self._saved_policy is not None:
+            try:
+                os.sched_setscheduler(0, self._saved_policy[0], os.sched_param(self._saved_policy[1]))
+            except OSError:
+                pass
+        if self._saved_affinity is not None:
+            try:
+                os.sched_setaffinity(0, self._saved_affinity)
+            except OSError:
+                pass
+        if hasattr(gc, "unfreeze"):
+            gc.unfreeze()
+        if self._gc_was_enabled:
+            gc.enable()
+        print(f"リアルタイムモード終了: 周期の余裕で GC {self.collections}回 "
+              f"(余裕なしで強制 {self.forced}回 / 最長 {self.gc_max * 1000:.2f}ms)")
+
+    def summary(self):
+        """適用結果と前後のジッタの表示用の文字列"""
+        lines = ["リアルタイムモード: " + (" / ".join(self.applied) if self.applied else "適用なし")]
+        for item in self.skipped:
+            lines.append(f"  スキップ: {item}")
+        if self.jitter_before is not None and self.jitter_after is not None:
+            lines.append(f"  起床の遅れ(us){'p50':>8}{'p99':>8}{'最大':>7}")
+            for label, s in (("適用前", self.jitter_before), ("適用後", self.jitter_after)):
+                lines.append(f"  {label:<11}{s['p50'] * 1e6:>8.0f}{s['p99'] * 1e6:>8.0f}{s['max'] * 1e6:>8.0f}")
+        return "\n".join(lines)
+
+    def apply_to_current_thread(self):
+        """
+        呼んだスレッドを制御スレッドと同じ CPU・SCHED_FIFO の優先度にする（スレッドの開始時に呼ぶ）
+
+        アクチュエーター・測距スレッド用。enter() の前後どちらで呼んでもよい。
+        """
+        if not self.enabled:
+            return
+        name = threading.current_thread().name
+        results = []
+        cpu = self.target_cpu()
+        if cpu is not None:
+            try:
+                os.sched_setaffinity(0, {cpu})
+                results.append(f"CPU{cpu}")
+            except OSError as e:
+                self.skipped.append(f"{name} の CPU{cpu}固定 ({e})")
+        if self.priority is not None and hasattr(os, "sched_setscheduler"):
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+                results.append(f"SCHED_FIFO 優先度{self.priority}")
+            except OSError as e:
+                self.skipped.append(f"{name} の SCHED_FIFO ({e})")
+        if results:
+            self.applied.append(f"{name}: {' / '.join(results)}")
+            print(f"リアルタイムモード: {name} スレッドを {' / '.join(results)} に設定")
+
+    def release_current_thread(self):
+        """
+        呼んだスレッドを通常の優先度 (SCHED_OTHER) にし、制御スレッドの CPU から外す
+
+        enter() の後に制御スレッドから作られ、CPU・優先度を引き継いだスレッドの開始時に呼ぶ（ログ記録など）。
+        """
+        if not self.enabled:
+            return
+        try:
+            if hasattr(os, "sched_setscheduler") and os.sched_getscheduler(0) != os.SCHED_OTHER:
+                os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+            cpu = self.target_cpu()
+            if self._allowed is not None:
+                others = self._allowed - {cpu}
+                os.sched_setaffinity(0, others or self._allowed)
+        except OSError as e:
+            self.skipped.append(f"{threading.current_thread().name} を通常の優先度に戻す ({e})")
+
+    def target_cpu(self):
+        """
+        制御スレッドを固定する CPU（指定がなければ isolcpus のコア、なければ使える最後のコア）
+
+        Returns:
+            int: CPU 番号（CPU 固定に対応していなければ None）
+        """
+        if self._allowed is None:
+            return None
+        if self.cpu is not None:
+            return self.cpu
+        isolated = isolated_cpus()
+        # isolcpus のコアは既定の affinity に含まれないので、許可集合とは別に選ぶ
+        return max(isolated) if isolated else max(self._allowed)
+
+    def _pin_cpu(self):
+        if not hasattr(os, "sched_setaffinity"):
+            self.skipped.append("CPU固定 (この OS では未対応)")
+            return
+        cpu = self.cpu
+        try:
+            allowed = os.sched_getaffinity(0)
+            cpu = self.target_cpu()
+            os.sched_setaffinity(0, {cpu})
+            self._saved_affinity = allowed
+            self.applied.append(f"CPU{cpu}に固定")
+        except (OSError, ValueError) as e:
+            self.skipped.append(f"CPU{'' if cpu is None else cpu}固定 ({e})")
+
+    def _set_fifo(self):
+        if self.priority is None:
+            return
+        if not hasattr(os, "sched_setscheduler"):
+            self.skipped.append("SCHED_FIFO (この OS では未対応)")
+            return
+        try:
+            policy = os.sched_getscheduler(0)
+            old_priority = os.sched_getparam(0).sched_priority
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+            self._saved_policy = (policy, old_priority)
+            self.applied.append(f"SCHED_FIFO 優先度{self.priority}")
+        except PermissionError:
+            self.skipped.append("SCHED_FIFO (権限なし: sudo か CAP_SYS_NICE / ulimit -r が必要)")
+        except OSError as e:
+            self.skipped.append(f"SCHED_FIFO ({e})")
@@ -0,0 +1,253 @@
+"""
+記録済みログのリプレイ
+
+DataLogger の driving_log_*.csv（mm）と joystick_control の record_data_*.csv（cm）を
+読み込み、SensorManager と同じ read() / read_distances() で1行ずつ返す。
+NullMotor と組み合わせれば、実機なしで各 main.py の制御ループをそのまま回せる。
+
+    sensor = ReplaySensorManager("driving_log_20260101_120000.csv", SensorData)
+    motor = NullMotor()
+"""
+
+import csv
+import time
+
+
+# driving_log_*.csv（DataLogger）の列
+_LOGGER_SENSOR_COLUMNS = ["sensor_l2", "sensor_l1", "sensor_c", "sensor_r1", "sensor_r2"]
+_LOGGER_AGE_COLUMNS = ["age_l2", "age_l1", "age_c", "age_r1", "age_r2"]
+# record_data_*.csv（joystick_control の Recorder）の列
+_RECORDER_SENSOR_COLUMNS = ["L2", "L1", "C", "R1", "R2"]
+
+
+class ReplayFinished(Exception):
+    """ログの最後まで再生した"""
+
+
+class ReplayFrame:
+    """ログ1行分"""
+    __slots__ = ['timestamp', 'distances', 'ages', 'steering', 'throttle', 'state']
+
+    def __init__(self, timestamp, distances, ages=None, steering=None, throttle=None, state=''):
+        self.timestamp = timestamp
+        self.distances = distances
+        self.ages = ages
+        self.steering = steering
+        self.throttle = throttle
+        self.state = state
+
+
+def load_log(path):
+    """
+    ログファイルを読み込む（形式はヘッダーで判別）
+
+    Returns:
+        list: ReplayFrame のリスト（距離は mm）
+    """
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        header = reader.fieldnames or []
+        if all(col in header for col in _LOGGER_SENSOR_COLUMNS):
+            columns, scale = _LOGGER_SENSOR_COLUMNS, 1.0
+        elif all(col in header for col in _RECORDER_SENSOR_COLUMNS):
+            # Recorder はセンサー値を cm で記録している
+            columns, scale = _RECORDER_SENSOR_COLUMNS, 10.0
+        else:
+            raise ValueError(f"センサー列が見つかりません: {path}")
+        has_ages = all(col in header for col in _LOGGER_AGE_COLUMNS)
+
+        frames = []
+        for row in reader:
+            try:
+                distances = [int(round(float(row[col]) * scale)) for col in columns]
+                timestamp = float(row["timestamp"])
+            except (TypeError, ValueError):
+                continue  # 書きかけの行など
+            ages = None
+            if has_ages and all(row[col] for col in _LOGGER_AGE_COLUMNS):
+                ages = [float(row[col]) / 1000.0 for col in _LOGGER_AGE_COLUMNS]
+            frames.append(ReplayFrame(
+                timestamp, distances, ages,
+                steering=_to_float(row.get("steering")),
+                throttle=_to_float(row.get("throttle")),
+                state=row.get("state") or '',
+            ))
+    if not frames:
+        raise ValueError(f"再生できる行がありません: {path}")
+    return frames
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReplaySensorManager:
+    """
+    SensorManager 互換のリプレイバックエンド
+
+    realtime=True なら記録時のタイミングで、False ならできるだけ速く次の行を返す。
+    最後の行のあとは ReplayFinished を投げる（loop=True なら先頭に戻る）。
+    """
+
+    def __init__(self, path, data_factory=None, realtime=True, speed=1.0, loop=False):
+        """
+        Args:
+            path: ログファイルのパス
+            data_factory: data_factory(distances, capture_times, sequences) で read() の戻り値を作る
+                          （各プロジェクトの SensorData。Noneなら距離のリスト）
+            realtime: 記録時のタイミングで再生するか
+            speed: realtime 時の再生速度の倍率
+            loop: 最後まで再生したら先頭に戻るか
+        """
+        self.path = path
+        self.data_factory = data_factory
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+        self.frames = []
+        self.index = 0
+        self.frame_count = 0
+        self.current = None
+        self._last_data = None
+        self._profile = None
+        self._start = None
+        self._first_timestamp = 0.0
+        self._finished_at = None
+
+    def initialize(self):
+        """ログを読み込む"""
+        self.frames = load_log(self.path)
+        self.index = 0
+        print(f"リプレイ: {self.path} ({len(self.frames)} 行, "
+              f"{'記録時のタイミング' if self.realtime else '最速'})")
+        return True
+
+    def read(self):
+        """
+        次の行を返す
+
+        Returns:
+            data_factory の戻り値（未指定なら距離のリスト mm）
+        """
+        frame = self._next_frame()
+        if self.data_factory is None:
+            self._last_data = list(frame.distances)
+            return self._last_data
+
+        now = time.monotonic()
+        if frame.ages is not None:
+            capture_times = tuple(now - age for age in frame.ages)
+        else:
+            capture_times = (now,) * len(frame.distances)
+        sequences = (self.frame_count,) * len(frame.distances)
+        self._last_data = self.data_factory(frame.distances, capture_times, sequences)
+        return self._last_data
+
+    def read_distances(self):
+        """rule_based 互換: 距離のリスト (mm)"""
+        return list(self._next_frame().distances)
+
+    def _next_frame(self):
+        if self.index >= len(self.frames):
+            if not self.loop:
+                if self._finished_at is None:
+                    self._finished_at = time.monotonic()
+                raise ReplayFinished(self.path)
+            self.index = 0
+            self._start = None
+
+        frame = self.frames[self.index]
+        if self._start is None:
+            self._start = time.monotonic()
+            self._first_timestamp = frame.timestamp
+        elif self.realtime:
+            due = self._start + (frame.timestamp - self._first_timestamp) / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.index += 1
+        self.frame_count += 1
+        self.current = frame
+        return frame
+
+    @property
+    def last_data(self):
+        return self._last_data
+
+    def set_profile(self, name):
+        """SensorManager 互換: 要求されたプロファイル名だけ覚えておく"""
+        self._profile = name
+
+    @property
+    def profile(self):
+        return self._profile
+
+    def stats(self):
+        """
+        再生した行数と実時間
+
+        Returns:
+            dict: frames, elapsed (秒), fps
+        """
+        if self._start is None:
+            return {"frames": 0, "elapsed": 0.0, "fps": 0.0}
+        end = self._finished_at if self._finished_at is not None else time.monotonic()
+        elapsed = end - self._start
+        return {
+            "frames": self.frame_count,
+            "elapsed": elapsed,
+            "fps": self.frame_count / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def cleanup(self):
+        stats = self.stats()
+        print(f"リプレイ終了: {stats['frames']} 行 / {stats['elapsed']:.2f} 秒 "
+              f"({stats['fps']:.0f} ループ/秒)")
+
+
+class NullMotor:
+    """
+    何も出力しない MotorController の代替
+
+    各プロジェクトの MotorController のメソッド（drive / steer / throttle /
+    set_steering_angle / set_throttle / stop など）をすべて受け付け、
+    最後の指令値と呼び出し回数だけ記録する。
+    """
+
+    def __init__(self):
+        self.steering = None
+        self.throttle_value = None
+        self.command_count = 0
+
+    def initialize(self, *args, **kwargs):
+        return True
+
+    def drive(self, steering, throttle_value):
+        self.steering = steering
+        self.throttle_value = throttle_value
+        self.command_count += 1
+
+    def steer(self, angle):
+        self.steering = angle
+        self.command_count += 1
+
+    def throttle(self, value):
+        self.throttle_value = value
+        self.command_count += 1
+
+    set_steering_angle = steer
+    set_throttle = throttle
+
+    def __getattr__(self, name):
+        # stop() / cleanup() などプロジェクト固有のメソッドは何もしない
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _noop
+
+
+def _noop(*args, **kwargs):
+    return None
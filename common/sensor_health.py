@@ -0,0 +1,206 @@
+"""
+センサーヘルスモニター
+
+チャンネルごとの成功・エラー・タイムアウトを数え、連続して失敗したチャンネルを
+バックグラウンドで再初期化する。再初期化はI2Cアドレス 0x29 を使う
+（XSHUTで1台だけ起こす）ので、専用スレッド1本で1台ずつ順番に行う。
+制御ループは再初期化中のチャンネルを無効値として扱うだけで止まらない。
+"""
+
+import collections
+import queue
+import threading
+import time
+
+
+class SensorHealthMonitor:
+    """チャンネルの健康状態の記録と再初期化の管理"""
+
+    STATE_OK = "ok"
+    STATE_FAILING = "failing"
+    STATE_REINIT = "reinit"
+
+    def __init__(self, channel_count, reinit_fn, fail_threshold=5, stall_timeout=0.2,
+                 retry_interval=2.0, auto_reinit=True, max_events=50):
+        """
+        Args:
+            channel_count: チャンネル数
+            reinit_fn: reinit_fn(index) でチャンネルを起動し直す。失敗時は例外を投げる
+            fail_threshold: 再初期化を始める連続失敗回数
+            stall_timeout: 新しい測定がこの時間 (秒) 来なければタイムアウト1回と数える
+            retry_interval: 再初期化に失敗したあと次に試すまでの時間 (秒)
+            auto_reinit: Falseなら記録だけ行い再初期化はしない
+            max_events: 保持する再初期化イベントの数
+        """
+        self.channel_count = channel_count
+        self.reinit_fn = reinit_fn
+        self.fail_threshold = fail_threshold
+        self.stall_timeout = stall_timeout
+        self.retry_interval = retry_interval
+        self.auto_reinit = auto_reinit
+
+        now = time.monotonic()
+        self.ok_counts = [0] * channel_count
+        self.error_counts = [0] * channel_count
+        self.timeout_counts = [0] * channel_count
+        self.reinit_attempts = [0] * channel_count
+        self.reinit_successes = [0] * channel_count
+        self.last_recovery = [None] * channel_count   # 直近の復帰にかかった時間 (秒)
+        self.events = collections.deque(maxlen=max_events)
+
+        self._consecutive = [0] * channel_count
+        self._failing_since = [None] * channel_count
+        self._last_activity = [now] * channel_count
+        self._next_retry = [0.0] * channel_count
+        self._state = [self.STATE_OK] * channel_count
+
+        self._queue = queue.Queue()
+        self._thread = None
+
+    # ---------- 読み取り側から呼ぶ ----------
+    def record_ok(self, idx):
+        """測定値を取得できた"""
+        self.ok_counts[idx] += 1
+        self._last_activity[idx] = time.monotonic()
+        if self._consecutive[idx]:
+            self._consecutive[idx] = 0
+            self._failing_since[idx] = None
+            if self._state[idx] == self.STATE_FAILING:
+                self._state[idx] = self.STATE_OK
+
+    def record_error(self, idx):
+        """I2Cエラーなどの例外が出た"""
+        self.error_counts[idx] += 1
+        self._record_failure(idx)
+
+    def record_timeout(self, idx):
+        """測定完了を待ちきれなかった"""
+        self.timeout_counts[idx] += 1
+        self._record_failure(idx)
+
+    def check_stall(self, idx, now=None):
+        """
+        待たずに確認するモード（バックグラウンド測距）用のタイムアウト判定
+
+        最後の測定から stall_timeout を過ぎるたびにタイムアウトを1回記録する。
+        """
+        now = time.monotonic() if now is None else now
+        if now - self._last_activity[idx] > self.stall_timeout:
+            self._last_activity[idx] = now
+            self.record_timeout(idx)
+
+    def mark_down(self, idx):
+        """初期化できなかったチャンネルをすぐ再初期化の対象にする"""
+        if self._failing_since[idx] is None:
+            self._failing_since[idx] = time.monotonic()
+        self._consecutive[idx] = max(self._consecutive[idx], self.fail_threshold)
+        self._state[idx] = self.STATE_FAILING
+        self._schedule(idx)
+
+    def _record_failure(self, idx):
+        now = time.monotonic()
+        if self._failing_since[idx] is None:
+            self._failing_since[idx] = now
+        self._consecutive[idx] += 1
+        if self._state[idx] == self.STATE_OK:
+            self._state[idx] = self.STATE_FAILING
+        if self._consecutive[idx] >= self.fail_threshold:
+            self._schedule(idx)
+
+    # ---------- 再初期化 ----------
+    def _schedule(self, idx):
+        # 再初期化中・再試行待ちのチャンネルは状態が STATE_REINIT のまま
+        if not self.auto_reinit or self._state[idx] == self.STATE_REINIT:
+            return
+        self._state[idx] = self.STATE_REINIT
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="sensor-health", daemon=True)
+            self._thread.start()
+        self._queue.put(idx)
+
+    def _worker(self):
+        """再初期化スレッド（1台ずつ順番に処理し、失敗したチャンネルは時間をおいて再試行）"""
+        retries = {}
+        while True:
+            timeout = None
+            if retries:
+                timeout = max(0.0, min(retries.values()) - time.monotonic())
+            try:
+                idx = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                idx = min(retries, key=retries.get)
+            if idx is None:
+                return
+            retries.pop(idx, None)
+            if not self._reinit(idx):
+                retries[idx] = self._next_retry[idx]
+
+    def _reinit(self, idx):
+        """チャンネルを再初期化してイベントを記録。成功したらTrue"""
+        self.reinit_attempts[idx] += 1
+        started = time.monotonic()
+        error = None
+        try:
+            self.reinit_fn(idx)
+        except Exception as e:
+            error = e
+        finished = time.monotonic()
+
+        event = {
+            "channel": idx,
+            "time": finished,
+            "success": error is None,
+            "duration_ms": (finished - started) * 1000,
+            "recovery_ms": None,
+            "error": None if error is None else str(error),
+        }
+        if error is None:
+            failing_since = self._failing_since[idx]
+            recovery = finished - failing_since if failing_since is not None else 0.0
+            self.last_recovery[idx] = recovery
+            event["recovery_ms"] = recovery * 1000
+            self.reinit_successes[idx] += 1
+            self._consecutive[idx] = 0
+            self._failing_since[idx] = None
+            self._last_activity[idx] = finished
+            self._state[idx] = self.STATE_OK
+        else:
+            self._next_retry[idx] = finished + self.retry_interval
+        self.events.append(event)
+        return error is None
+
+    def stop(self, timeout=2.0):
+        """再初期化スレッドを停止（実行中の再初期化は最後まで待つ）"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ---------- メトリクス ----------
+    def state(self, idx):
+        return self._state[idx]
+
+    def metrics(self):
+        """
+        チャンネルごとの統計と再初期化イベント
+
+        Returns:
+            dict: {"channels": [...], "events": [...]}
+        """
+        channels = []
+        for idx in range(self.channel_count):
+            failures = self.error_counts[idx] + self.timeout_counts[idx]
+            attempts = self.ok_counts[idx] + failures
+            recovery = self.last_recovery[idx]
+            channels.append({
+                "state": self._state[idx],
+                "ok": self.ok_counts[idx],
+                "errors": self.error_counts[idx],
+                "timeouts": self.timeout_counts[idx],
+                "failure_rate": failures / attempts if attempts else 0.0,
+                "consecutive_failures": self._consecutive[idx],
+                "reinit_attempts": self.reinit_attempts[idx],
+                "reinit_successes": self.reinit_successes[idx],
+                "last_recovery_ms": recovery * 1000 if recovery is not None else None,
+            })
+        return {"channels": channels, "events": list(self.events)}
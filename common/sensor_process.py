@@ -0,0 +1,199 @@
+"""
+センサー取得を別プロセスで動かす SensorManager 代替
+
+Python の GIL のため、同じプロセスの測距スレッドは制御計算・ログ・pygame と1コアを取り合う。
+ここでは SensorManager を fork した子プロセスで動かし、フレームを共有メモリのリング
+(common/shm_ring.py) に書かせる。制御プロセスの read() はリングの最新フレームを読むだけ。
+
+    sensor = ProcessSensorManager(lambda: SensorManager(busio.I2C(board.SCL, board.SDA)), SensorData)
+    sensor.initialize()      # 子プロセスを起動し、初期化完了を待つ
+    data = sensor.read()     # 待たずに最新フレーム
+    sensor.cleanup()
+
+子プロセスでは I2C バスを開き直すこと（親の board.I2C() を共有しない）。
+Linux の i2c-dev はトランザクション単位で排他するので、親のモーター書き込みと同じバスを使える。
+"""
+
+import multiprocessing
+import signal
+import time
+
+from common.shm_ring import FrameRing
+
+
+def _sensor_main(factory, ring, conn, stop_event, poll_interval):
+    """子プロセス本体: 初期化して読み続け、フレームをリングに書く"""
+    # Ctrl+C は親が受けて stop_event で止める
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    manager = None
+    try:
+        manager = factory()
+        manager.initialize()
+        conn.send(("ready", None))
+        read = getattr(manager, "read", None) or manager.read_distances
+        while not stop_event.is_set():
+            while conn.poll():
+                command, value = conn.recv()
+                if command == "profile" and hasattr(manager, "set_profile"):
+                    manager.set_profile(value)
+            data = read()
+            if hasattr(data, "as_list"):
+                ring.publish(data.as_list(), data.capture_times, data.sequences)
+            else:
+                now = time.monotonic()
+                ring.publish(list(data), (now,) * 5, (ring.count + 1,) * 5, now)
+            if poll_interval:
+                time.sleep(poll_interval)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        if manager is not None:
+            manager.cleanup()
+
+
+class ProcessSensorManager:
+    """
+    子プロセスの SensorManager をリング経由で読むプロキシ
+
+    read() / read_distances() / set_profile() / cleanup() は SensorManager と同じ使い方。
+    read() は子が公開したフレームを待たずに返し、新しいフレームを初めて読んだときに
+    公開からの経過時間（プロセス間の遅延）を記録する。
+    """
+
+    background = True   # read() は待たない
+
+    def __init__(self, factory, data_factory=None, slots=8, poll_interval=0.0,
+                 start_timeout=15.0, latency_samples=1000):
+        """
+        Args:
+            factory: 子プロセスで呼ぶ SensorManager の生成関数（fork で渡すので lambda でよい）
+            data_factory: data_factory(距離, 取得時刻, シーケンス) で read() の戻り値を作る
+                          （SensorData など。Noneなら距離のリスト）
+            slots: リングのスロット数
+            poll_interval: 子が1フレームごとに休む時間 (秒)。read() が待たない設定のとき用
+            start_timeout: 子の初期化を待つ最長時間 (秒)
+            latency_samples: 保持する遅延サンプル数
+        """
+        self.factory = factory
+        self.data_factory = data_factory
+        self.slots = slots
+        self.poll_interval = poll_interval
+        self.start_timeout = start_timeout
+
+        self.ring = None
+        self.process = None
+        self.frames = 0         # 読んだ新しいフレーム数
+        self._conn = None
+        self._stop_event = None
+        self._last = None
+        self._last_count = 0
+        self._profile = None
+        self._latencies = [0.0] * latency_samples
+
+    def initialize(self):
+        """子プロセスを起動してセンサー初期化の完了を待つ"""
+        context = multiprocessing.get_context("fork")
+        self.ring = FrameRing(slots=self.slots, create=True)
+        parent_conn, child_conn = context.Pipe()
+        self._conn = parent_conn
+        self._stop_event = context.Event()
+        self.process = context.Process(
+            target=_sensor_main, name="sensor-process", daemon=True,
+            args=(self.factory, self.ring, child_conn, self._stop_event, self.poll_interval),
+        )
+        self.process.start()
+
+        if not parent_conn.poll(self.start_timeout):
+            self.cleanup()
+            raise RuntimeError("センサープロセスの初期化がタイムアウトしました")
+        status, detail = parent_conn.recv()
+        if status != "ready":
+            self.cleanup()
+            raise RuntimeError(f"センサープロセスの初期化に失敗: {detail}")
+        # 最初のフレームまで待つ（以降の read() は常にフレームを返せる）
+        self.wait_frame(self.start_timeout)
+        if self._last is None:
+            self.cleanup()
+            raise RuntimeError("センサープロセスからフレームが届きません")
+        print(f"センサープロセス起動: pid {self.process.pid} / 共有メモリ {self.ring.name}")
+
+    def read(self):
+        """最新フレーム（待たない。新しいフレームがなければ前回と同じもの）"""
+        if self.ring.count == self._last_count:
+            return self._last
+        frame = self.ring.latest()
+        if frame is None:
+            return self._last
+        count, published, distances, capture_times, sequences = frame
+        if count != self._last_count:
+            self._latencies[self.frames % len(self._latencies)] = time.monotonic() - published
+            self.frames += 1
+            self._last_count = count
+            self._last = self._make(list(distances), capture_times, sequences)
+        return self._last
+
+    def read_distances(self):
+        """距離のリストで返す（rule_based / joystick_control の SensorManager 互換）"""
+        data = self.read()
+        return data.as_list() if hasattr(data, "as_list") else data
+
+    def wait_frame(self, timeout=1.0):
+        """新しいフレームが公開されるまで待って返す（ベンチマーク・テスト用）"""
+        deadline = time.monotonic() + timeout
+        while self.ring.count == self._last_count and time.monotonic() < deadline:
+            time.sleep(0.0002)
+        return self.read()
+
+    def set_profile(self, name):
+        """測定プロファイルの切り替えを子プロセスに送る（変わったときだけ）"""
+        if name != self._profile and self._conn is not None:
+            self._profile = name
+            self._conn.send(("profile", name))
+
+    @property
+    def profile(self):
+        return self._profile
+
+    def latency_stats(self):
+        """
+        子プロセスがフレームを公開してから制御側が初めて読むまでの時間
+
+        Returns:
+            dict: count, mean, p50, p99, max (秒)
+        """
+        count = min(self.frames, len(self._latencies))
+        if count == 0:
+            return {"count": 0, "mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+        samples = sorted(self._latencies[:count])
+        return {
+            "count": count,
+            "mean": sum(samples) / count,
+            "p50": samples[count // 2],
+            "p99": samples[min(count - 1, int(count * 0.99))],
+            "max": samples[-1],
+        }
+
+    def cleanup(self):
+        """子プロセスを止めて共有メモリを削除"""
+        if self.process is not None:
+            if self.frames:
+                s = self.latency_stats()
+                print(f"センサープロセス: {self.frames} フレーム / 公開→読み取り "
+                      f"p50 {s['p50'] * 1000:.2f}ms / p99 {s['p99'] * 1000:.2f}ms / 最大 {s['max'] * 1000:.2f}ms")
+            self._stop_event.set()
+            self.process.join(3.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(1.0)
+            self.process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def _make(self, distances, capture_times, sequences):
+        if self.data_factory is None:
+            return distances
+        return self.data_factory(distances, capture_times, sequences)
@@ -0,0 +1,101 @@
+"""
+センサー測定スケジューラ
+
+チャンネルごとにタイミングバジェット・測定間隔と「read()で測定完了を待つか」を持つ
+プロファイルを切り替える。プロファイルの要求は制御ループから、センサーへの反映は
+I2Cを担当するスレッド（逐次読み取りなら制御ループ、バックグラウンドなら測距スレッド）
+から行うので、測距中のセンサーに別スレッドから設定を書き込むことはない。
+"""
+
+from collections import namedtuple
+
+
+ChannelConfig = namedtuple("ChannelConfig", ["timing_budget", "inter_measurement", "blocking"])
+ChannelConfig.__doc__ = """\
+1チャンネルの測定設定
+
+    timing_budget: タイミングバジェット (ms)
+    inter_measurement: 測定間隔 (ms)。0で連続測距
+    blocking: Trueなら read() で測定完了を待つ。Falseなら新しい値があるときだけ取り込む
+"""
+
+
+class SensorScheduler:
+    """プロファイルの選択と、チャンネルごとの反映状況を管理する"""
+
+    def __init__(self, profiles, default, channel_count=5):
+        """
+        Args:
+            profiles: {プロファイル名: [(budget, inter, blocking), ...]} チャンネル順
+            default: 起動時のプロファイル名
+            channel_count: チャンネル数
+        """
+        self.profiles = {}
+        for name, channels in profiles.items():
+            if len(channels) != channel_count:
+                raise ValueError(f"プロファイル {name!r} のチャンネル数が {channel_count} ではありません")
+            self.profiles[name] = tuple(ChannelConfig(*c) for c in channels)
+        if default not in self.profiles:
+            raise ValueError(f"未定義のプロファイル: {default!r}")
+
+        self.active = default
+        self.switch_count = 0
+        self._applied = [None] * channel_count
+
+    def request(self, name):
+        """
+        プロファイルを切り替える（センサーへの反映は take_change() 側で行う）
+
+        Returns:
+            bool: 切り替えが発生したらTrue
+        """
+        if name == self.active:
+            return False
+        if name not in self.profiles:
+            raise ValueError(f"未定義のプロファイル: {name!r}")
+        self.active = name
+        self.switch_count += 1
+        return True
+
+    def config(self, idx):
+        """現在のプロファイルでのチャンネル設定"""
+        return self.profiles[self.active][idx]
+
+    def period(self, idx):
+        """現在のプロファイルでの測定周期 (秒)"""
+        config = self.profiles[self.active][idx]
+        return max(config.timing_budget, config.inter_measurement) / 1000.0
+
+    def blocking(self, idx):
+        return self.profiles[self.active][idx].blocking
+
+    def take_change(self, idx):
+        """
+        チャンネルに未反映の設定があれば反映済みにして返す
+
+        request() と別スレッドから呼ばれても、プロファイル名を一度だけ読んで
+        比較するので、途中で切り替わった分は次の呼び出しで必ず拾われる。
+
+        Returns:
+            ChannelConfig: 反映すべき設定。変更がなければNone
+        """
+        name = self.active
+        if self._applied[idx] == name:
+            return None
+        previous = self._applied[idx]
+        self._applied[idx] = name
+        config = self.profiles[name][idx]
+        if previous is not None:
+            old = self.profiles[previous][idx]
+            if old[:2] == config[:2]:
+                # 待つかどうかだけの変更ならセンサーの再設定は不要
+                return None
+        return config
+
+    def mark_applied(self, idx):
+        """初期化時にセンサーへ設定済みのチャンネルを反映済みにする"""
+        self._applied[idx] = self.active
+
+    def invalidate(self, idx):
+        """反映に失敗したチャンネルを未反映に戻す（次の take_change() で全設定をやり直す）"""
+        self._applied[idx] = None
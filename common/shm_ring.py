@@ -0,0 +1,120 @@
+"""
+共有メモリのセンサーフレームリング
+
+センサー取得プロセスが multiprocessing.shared_memory 上のリングにフレームを書き、
+制御プロセスはパイプやpickleを通さずに共有メモリから直接最新フレームを読む。
+
+レイアウト（リトルエンディアン）:
+    ヘッダー: 書き込み済みフレーム数 (uint64)
+    スロット × slots:
+        シーケンス (uint64)  奇数=書き込み中、偶数=確定（フレーム番号 × 2）
+        公開時刻 (float64, time.monotonic。Linux ではプロセス間で共通の時計)
+        距離 × 5 (float64) / 取得時刻 × 5 (float64) / チャンネルのシーケンス番号 × 5 (uint64)
+        距離が int だったチャンネルのビットマスク (uint64)
+
+距離は float64 のまま渡すので、cm の小数（12.3 など）も丸めずに届く。int で書いた距離は int で読める。
+
+書き手は1つだけ。読み手はスロットの前後でシーケンスを読み、一致して偶数なら整合したフレームとみなす
+（書き込み中や周回で上書きされたスロットは読み直す）。
+"""
+
+import struct
+import time
+from multiprocessing import shared_memory
+
+_HEADER = struct.Struct("<Q8x")
+_SEQ = struct.Struct("<Q")
+_BODY = struct.Struct("<d5d5d5QQ")
+_SLOT_SIZE = _SEQ.size + _BODY.size
+
+
+class FrameRing:
+    """
+    1書き手・複数読み手のフレームリング
+
+        ring = FrameRing(create=True)             # 取得プロセス側（または親が作って名前を渡す）
+        ring.publish(distances, capture_times, sequences)
+        reader = FrameRing(name=ring.name)        # 制御プロセス側
+        frame = reader.latest()                   # (番号, 公開時刻, 距離, 取得時刻, シーケンス)
+    """
+
+    def __init__(self, name=None, slots=8, create=False):
+        """
+        Args:
+            name: 共有メモリ名（create=True で None なら自動）
+            slots: スロット数（読み手が slots フレーム遅れると読み直しになる）
+            create: True なら新しく作る
+        """
+        size = _HEADER.size + slots * _SLOT_SIZE
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._shm.buf[:size] = bytes(size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            slots = (self._shm.size - _HEADER.size) // _SLOT_SIZE
+        self.name = self._shm.name
+        self.slots = slots
+        self.owner = create
+        self._buf = self._shm.buf
+        self._count = _HEADER.unpack_from(self._buf, 0)[0]
+
+    def publish(self, distances, capture_times, sequences, now=None):
+        """
+        フレームを書き込む（書き手は1つだけ）
+
+        Returns:
+            int: フレーム番号（1から）
+        """
+        now = time.monotonic() if now is None else now
+        count = self._count + 1
+        offset = _HEADER.size + (count % self.slots) * _SLOT_SIZE
+        buf = self._buf
+        integers = 0
+        for i, d in enumerate(distances[:5]):
+            if isinstance(d, int):
+                integers |= 1 << i
+        _SEQ.pack_into(buf, offset, 2 * count - 1)
+        _BODY.pack_into(buf, offset + _SEQ.size, now, *distances[:5], *capture_times[:5], *sequences[:5],
+                        integers)
+        _SEQ.pack_into(buf, offset, 2 * count)
+        _HEADER.pack_into(buf, 0, count)
+        self._count = count
+        return count
+
+    @property
+    def count(self):
+        """書き込み済みフレーム数"""
+        return _HEADER.unpack_from(self._buf, 0)[0]
+
+    def latest(self, retries=8):
+        """
+        最新フレーム
+
+        Returns:
+            tuple: (フレーム番号, 公開時刻, 距離5, 取得時刻5, シーケンス5)。まだなければNone
+        """
+        buf = self._buf
+        for _ in range(retries):
+            count = _HEADER.unpack_from(buf, 0)[0]
+            if count == 0:
+                return None
+            offset = _HEADER.size + (count % self.slots) * _SLOT_SIZE
+            seq = _SEQ.unpack_from(buf, offset)[0]
+            values = _BODY.unpack_from(buf, offset + _SEQ.size)
+            if seq == 2 * count and _SEQ.unpack_from(buf, offset)[0] == seq:
+                integers = values[16]
+                distances = values[1:6]
+                if integers:
+                    distances = tuple(int(d) if integers >> i & 1 else d for i, d in enumerate(distances))
+                return count, values[0], distances, values[6:11], values[11:16]
+        return None
+
+    def close(self):
+        """切り離す（作った側は共有メモリも削除する）"""
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,172 @@
+"""
+制御ループの段ごとの処理時間ヒストグラム
+
+40ms の周期が I2C 読み取り・制御計算・PCA9685 書き込み・CSV ログ・print のどこに
+使われているかを、走行中ずっと測り続けるための軽量な計測。
+各段の時間は time.monotonic_ns の差で取り、段ごとのリストに生の ns を追加するだけ。
+固定長の対数ヒストグラム（2倍ごとに8分割、相対誤差 12.5% 以内）への振り分けは
+リストが _FLUSH_SIZE 件たまったときと集計を表示するときにまとめて行う。
+
+    prof = StageProfiler(("sensor", "control", "motor", "log", "print"))
+    prof.install_signal()       # kill -USR1 <pid> でその時点の集計を表示
+    while True:
+        prof.begin()
+        data = sensor.read()
+        prof.lap("sensor")
+        ...
+    print(prof.report())
+"""
+
+import json
+import signal
+import time
+
+# 16ns 未満は1nsごと、それ以上は2倍ごとに8分割。2^40 ns (約18分) 以上は最後のビン
+_SUB = 8
+_EXACT = 16
+_MAX_BITS = 40
+_BUCKETS = _EXACT + (_MAX_BITS - 4) * _SUB
+# 生の時間をこの件数ためたらヒストグラムに振り分ける（25Hz なら約40秒に1回）
+_FLUSH_SIZE = 1024
+
+
+def _bucket_index(ns):
+    """ns が入るビンの番号"""
+    bits = ns.bit_length()
+    if bits <= 4:
+        return ns if ns > 0 else 0
+    if bits < _MAX_BITS:
+        # 上位4ビット (8〜15) で2倍ごとの8分割を選ぶ
+        return (ns >> (bits - 4)) + (bits << 3) - 32
+    return _BUCKETS - 1
+
+
+def _bucket_floor(index):
+    """ビンの下限 (ns)"""
+    if index < _EXACT:
+        return index
+    shift, sub = divmod(index - _EXACT, _SUB)
+    return (_SUB + sub) << (shift + 1)
+
+
+class StageProfiler:
+    """
+    段ごとの対数ヒストグラム
+
+    lap() は1スレッドの直列ループ用（前回の begin()/lap() からの時間を記録）。
+    別スレッドの段は record(段, ns) で自分で測った時間を渡す。
+    """
+
+    def __init__(self, stages, enabled=True):
+        """
+        Args:
+            stages: 段の名前のリスト（表示順）
+            enabled: False なら記録しない（begin/lap/record は何もしない）
+        """
+        self.stages = list(stages)
+        # 段ごとに [ビン..., 合計ns, 最大ns] の1本のリスト
+        self._hists = {name: [0] * (_BUCKETS + 2) for name in self.stages}
+        # 段ごとのまだ振り分けていない生の時間 (ns)
+        self._raw = {name: [] for name in self.stages}
+        self._mark = 0
+        self.enabled = enabled
+        if not enabled:
+            self.begin = self.lap = self.record = lambda *args: None
+
+    def begin(self):
+        """周期の始まりの時刻を記録"""
+        self._mark = time.monotonic_ns()
+
+    def lap(self, stage):
+        """前回の begin()/lap() からの時間を stage に記録"""
+        now = time.monotonic_ns()
+        raw = self._raw[stage]
+        raw.append(now - self._mark)
+        self._mark = now
+        if len(raw) >= _FLUSH_SIZE:
+            self._flush(stage)
+
+    def record(self, stage, ns):
+        """stage に ns を1件記録"""
+        raw = self._raw[stage]
+        raw.append(ns)
+        if len(raw) >= _FLUSH_SIZE:
+            self._flush(stage)
+
+    def reset(self):
+        """集計を捨てる"""
+        for name in self.stages:
+            self._hists[name] = [0] * (_BUCKETS + 2)
+            self._raw[name] = []
+
+    def _flush(self, stage):
+        """たまった生の時間を stage のヒストグラムに振り分ける"""
+        raw = self._raw[stage]
+        if not raw:
+            return
+        # 先に差し替えるので、振り分け中の記録は次の回に回る
+        self._raw[stage] = []
+        hist = self._hists[stage]
+        for ns in raw:
+            hist[_bucket_index(ns)] += 1
+        hist[-2] += sum(raw)
+        hist[-1] = max(hist[-1], max(raw))
+
+    def stats(self):
+        """
+        段ごとの集計
+
+        Returns:
+            dict: {段: {count, mean, p50, p90, p99, max}}（時間は ns、パーセンタイルはビンの下限）
+        """
+        result = {}
+        for name in self.stages:
+            self._flush(name)
+            hist = self._hists[name]
+            counts = hist[:_BUCKETS]
+            total = sum(counts)
+            entry = {"count": total, "mean": hist[-2] / total if total else 0.0}
+            for label, q in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99)):
+                entry[label] = self._percentile(counts, total, q)
+            entry["max"] = hist[-1]
+            result[name] = entry
+        return result
+
+    def report(self):
+        """段ごとの集計表（us 単位）"""
+        lines = [f"{'段':<10}{'回数':>8}{'平均us':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'最大':>9}"]
+        for name, s in self.stats().items():
+            lines.append(f"{name:<10}{s['count']:>8}{s['mean'] / 1000:>10.1f}{s['p50'] / 1000:>9.1f}"
+                         f"{s['p90'] / 1000:>9.1f}{s['p99'] / 1000:>9.1f}{s['max'] / 1000:>9.1f}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """集計を JSON で書き出す（時間は ns）"""
+        with open(path, "w") as f:
+            json.dump(self.stats(), f, indent=2)
+
+    def install_signal(self, signum=None):
+        """
+        シグナルを受けたら report() を表示する（既定は SIGUSR1、メインスレッドから呼ぶ）
+
+        Returns:
+            bool: 設定できたか（SIGUSR1 のない環境では False）
+        """
+        if signum is None:
+            signum = getattr(signal, "SIGUSR1", None)
+            if signum is None:
+                return False
+        signal.signal(signum, lambda *_: print("\n" + self.report()))
+        return True
+
+    @staticmethod
+    def _percentile(counts, total, q):
+        if total == 0:
+            return 0
+        target = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= target and count:
+                return _bucket_floor(index)
+        return _bucket_floor(len(counts) - 1)
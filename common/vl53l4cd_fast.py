@@ -0,0 +1,127 @@
+"""
+VL53L4CD 高速読み取りパス
+
+adafruit_vl53l4cd はプロパティごとにI2Cトランザクションを発行する
+（data_ready で2回、distance で1回、clear_interrupt で1回）。
+ここでは結果レジスタ 0x0089〜0x0097 を1回のバースト読みで取得し、
+レンジステータスと距離(mm)を同時に得る。割り込みクリアも1回の書き込みで済ませる。
+
+初期化（アドレス変更・タイミング設定・測距開始）は従来どおり adafruit ドライバで行い、
+測距中の読み取りだけをこのクラスに任せる。
+"""
+
+import struct
+import time
+
+# レジスタアドレス
+_GPIO_HV_MUX_CTRL = 0x0030
+_GPIO_TIO_HV_STATUS = 0x0031
+_SYSTEM_INTERRUPT_CLEAR = 0x0086
+_SYSTEM_START = 0x0087
+_RESULT_RANGE_STATUS = 0x0089
+_RESULT_DISTANCE = 0x0096
+
+# バースト読みの範囲（レンジステータスから距離の下位バイトまで）
+_RESULT_BLOCK_LENGTH = _RESULT_DISTANCE + 2 - _RESULT_RANGE_STATUS
+_DISTANCE_OFFSET = _RESULT_DISTANCE - _RESULT_RANGE_STATUS
+
+# 生ステータス → ステータス変換表（ST ULDドライバと同じ）
+# 0:正常 1:シグマ超過 2:信号不足 3:最小距離より近い 4:位相範囲外 6:ラップアラウンド未確認 255:不明
+# 3 や 6 でも距離は使えるので、ここではステータスを返すだけで測定値は捨てない
+_RANGE_STATUS_TABLE = (
+    255, 255, 255, 5, 2, 4, 1, 7, 3, 0, 255, 255,
+    9, 13, 255, 255, 255, 255, 10, 6, 255, 255, 11, 12,
+)
+
+
+class FastRangingReader:
+    """
+    測距中のVL53L4CDを最小トランザクションで読むリーダー
+
+    1測定あたりのI2Cトランザクション:
+        data_ready : 1回（割り込み極性は生成時に1度だけ読む）
+        fetch()    : 2回（結果バースト読み + 割り込みクリア）
+    """
+
+    def __init__(self, i2c, address):
+        """
+        Args:
+            i2c: busio.I2C 互換のバス
+            address: センサーのI2Cアドレス（set_address 後のもの）
+        """
+        self.i2c = i2c
+        self.address = address
+        self._index = bytearray(2)
+        self._result = bytearray(_RESULT_BLOCK_LENGTH)
+        self._status = bytearray(1)
+        self._clear_cmd = struct.pack(">HB", _SYSTEM_INTERRUPT_CLEAR, 0x01)
+
+        mux = bytearray(1)
+        self._read_into(_GPIO_HV_MUX_CTRL, mux)
+        # GPIO_HV_MUX_CTRL の bit4 が立っていればアクティブLow（準備完了で bit0 == 0）
+        self._ready_level = 0 if mux[0] & 0x10 else 1
+
+    @property
+    def data_ready(self):
+        """新しい測定結果があるか"""
+        self._read_into(_GPIO_TIO_HV_STATUS, self._status)
+        return (self._status[0] & 0x01) == self._ready_level
+
+    def read_result(self):
+        """
+        結果レジスタをバースト読みする（割り込みはクリアしない）
+
+        Returns:
+            tuple: (レンジステータス, 距離 mm)
+        """
+        result = self._result
+        self._read_into(_RESULT_RANGE_STATUS, result)
+        raw_status = result[0] & 0x1F
+        status = _RANGE_STATUS_TABLE[raw_status] if raw_status < len(_RANGE_STATUS_TABLE) else raw_status
+        distance_mm = (result[_DISTANCE_OFFSET] << 8) | result[_DISTANCE_OFFSET + 1]
+        return status, distance_mm
+
+    def clear_interrupt(self):
+        """割り込みをクリアして次の測定を受け付ける"""
+        self._locked(self.i2c.writeto, self.address, self._clear_cmd)
+
+    def start_ranging(self, continuous=True):
+        """
+        測距を開始する
+
+        adafruit の start_ranging() と違って最初の測定完了を待たないので、
+        制御ループを止めずに再設定後の測距を再開できる。
+
+        Args:
+            continuous: Trueで連続測距 (inter_measurement=0)、Falseで自律測距
+        """
+        command = struct.pack(">HB", _SYSTEM_START, 0x21 if continuous else 0x40)
+        self._locked(self.i2c.writeto, self.address, command)
+
+    def fetch(self):
+        """
+        結果を読んでから割り込みをクリアする
+
+        クリアを先にすると、読む前に次の測定で結果レジスタが上書きされうるので
+        読み取り→クリアの順にする。
+
+        Returns:
+            tuple: (レンジステータス, 距離 mm)
+        """
+        result = self.read_result()
+        self.clear_interrupt()
+        return result
+
+    def _read_into(self, register, buffer):
+        struct.pack_into(">H", self._index, 0, register)
+        self._locked(self.i2c.writeto_then_readfrom, self.address, self._index, buffer)
+
+    def _locked(self, fn, *args):
+        """他スレッド（モーター書き込み等）とバスを取り合うので try_lock で確保する"""
+        i2c = self.i2c
+        while not i2c.try_lock():
+            time.sleep(0)
+        try:
+            fn(*args)
+        finally:
+            i2c.unlock()
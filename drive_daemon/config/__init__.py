@@ -0,0 +1,2 @@
+# Drive daemon configuration
+from .settings import *
@@ -0,0 +1,34 @@
+"""
+常駐走行デーモンの設定ファイル
+I2Cバス・センサー・モーターを持ち続け、制御クラスだけをコマンドで入れ替える
+"""
+
+# ===========================================
+# ハードウェア
+# ===========================================
+# SensorManager / MotorController を使うプロジェクト（センサー・モーターの設定もここのものを使う）
+HARDWARE_PROJECT = "state_machine_fast"
+
+# ===========================================
+# 制御クラス
+# ===========================================
+# 起動直後に走らせる制御クラス（None: ニュートラルで待機し、swap コマンドを待つ）
+DEFAULT_CONTROLLER = None
+# 起動時に import だけ済ませておく制御クラス（swap を速くする。読み込めないものは警告して飛ばす）
+PRELOAD_CONTROLLERS = ["state", "state_classic", "hybrid", "potential", "rule", "ml"]
+
+# ===========================================
+# コマンド受付 (Unix ドメインソケット)
+# ===========================================
+SOCKET_PATH = "/tmp/minicar_drive.sock"
+SWAP_TIMEOUT = 1.0  # 切り替えが制御ループに反映されるのを待つ最長時間 (秒)
+
+# ===========================================
+# 制御周期設定
+# ===========================================
+CONTROL_INTERVAL = 0.04  # 40ms (25Hz)
+LOOP_OVERRUN_POLICY = "skip"  # 周期超過時: "skip"=間に合わなかった周期を飛ばす / "compress"=詰めて回して追いつく
+REALTIME_MODE = False  # True: 制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す（--realtime と同じ。権限がなければ飛ばす）
+REALTIME_CPU = None  # 固定するCPU番号（None: isolcpus のコア、なければ最後のコア）
+REALTIME_PRIORITY = 50  # SCHED_FIFO の優先度 (1-99)
+REALTIME_GC_MIN_SLACK = 0.005  # 周期の残りがこの秒数以上のときだけ GC を回す
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+常駐走行デーモンへのコマンド送信
+
+使用方法:
+    python ctl.py list                   # 切り替えられる制御クラス
+    python ctl.py load ml                # import だけ済ませる（重いモデルを先に読む）
+    python ctl.py swap hybrid            # 制御クラスを切り替える
+    python ctl.py stop                   # ニュートラルに戻す
+    python ctl.py status
+    python ctl.py bench state hybrid -n 20   # 交互に切り替えて切り替え時間を測る
+    python ctl.py quit
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import SOCKET_PATH
+
+
+class DaemonClient:
+    """デーモンへの接続（1行1コマンドの JSON）"""
+
+    def __init__(self, socket_path=SOCKET_PATH, timeout=10.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self.rfile = self.sock.makefile("rb")
+
+    def send(self, cmd, name=None):
+        """コマンドを送って応答の dict を返す"""
+        request = {"cmd": cmd}
+        if name is not None:
+            request["name"] = name
+        self.sock.sendall((json.dumps(request) + "\n").encode())
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("デーモンが応答しません")
+        return json.loads(line)
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+
+def bench(client, names, count):
+    """names を順に count 回切り替え、デーモン側で測った切り替え時間とコマンドの往復時間を表示"""
+    totals = []
+    round_trips = []
+    for i in range(count):
+        name = names[i % len(names)]
+        start = time.perf_counter()
+        reply = client.send("swap", name)
+        round_trips.append(time.perf_counter() - start)
+        if not reply.get("ok"):
+            print(f"失敗: {reply.get('error')}")
+            return
+        totals.append(reply["total_ms"])
+    client.send("stop")
+
+    def line(label, values):
+        values = sorted(values)
+        n = len(values)
+        return (f"{label:<12} p50 {values[n // 2]:7.2f}ms / p99 {values[min(n - 1, int(n * 0.99))]:7.2f}ms"
+                f" / 最大 {values[-1]:7.2f}ms")
+
+    print(f"切り替え {count}回 ({' → '.join(names)})")
+    print(line("反映まで", totals))
+    print(line("往復", [t * 1000 for t in round_trips]))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='常駐走行デーモンへのコマンド送信')
+    parser.add_argument('cmd', choices=['list', 'load', 'swap', 'stop', 'status', 'bench', 'quit'])
+    parser.add_argument('names', nargs='*', help='制御クラス（load / swap は1つ、bench は交互に切り替える順）')
+    parser.add_argument('-n', '--count', type=int, default=20, help='bench の切り替え回数')
+    parser.add_argument('--socket', default=SOCKET_PATH, help='デーモンの Unix ドメインソケット')
+    args = parser.parse_args()
+
+    if args.cmd in ('load', 'swap') and len(args.names) != 1:
+        parser.error(f"{args.cmd} には制御クラスを1つ指定してください")
+    if args.cmd == 'bench' and not args.names:
+        parser.error("bench には制御クラスを1つ以上指定してください")
+
+    try:
+        client = DaemonClient(args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"デーモンに接続できません: {args.socket}")
+        sys.exit(1)
+    try:
+        if args.cmd == 'bench':
+            bench(client, args.names, args.count)
+            return
+        reply = client.send(args.cmd, args.names[0] if args.names else None)
+        print(json.dumps(reply, ensure_ascii=False, indent=2))
+        if not reply.get("ok"):
+            sys.exit(1)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
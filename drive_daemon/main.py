@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+常駐走行デーモン
+
+I2Cバス・SensorManager・MotorController を起動時に1回だけ初期化して持ち続け、
+制御クラス（StateController / HybridController / PotentialController /
+DrivingController / MLPredictor）を Unix ドメインソケットのコマンドで読み込み・切り替え・停止する。
+実験のたびに main.py を起動し直して board / adafruit / sklearn の import、
+XSHUT の立ち上げ、Enter 待ちをやり直さなくてよい。
+
+使用方法:
+    python main.py                       # ニュートラルで待機
+    python ctl.py swap hybrid            # 別の端末から制御クラスを切り替える
+    python ctl.py stop                   # ニュートラルに戻す（ハードウェアはそのまま）
+    python ctl.py quit                   # デーモンを終了
+
+停止方法:
+    Ctrl+C / python ctl.py quit
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if "--replay" in sys.argv:
+    # 実機なしでログを再生するときは board / adafruit_* を fake_hw に差し替えてから import する
+    from common.fake_hw import install_fake_hardware
+    install_fake_hardware()
+
+import board
+
+from config.settings import (
+    HARDWARE_PROJECT,
+    DEFAULT_CONTROLLER,
+    PRELOAD_CONTROLLERS,
+    SOCKET_PATH,
+    SWAP_TIMEOUT,
+    CONTROL_INTERVAL,
+    LOOP_OVERRUN_POLICY,
+    REALTIME_MODE,
+    REALTIME_CPU,
+    REALTIME_PRIORITY,
+    REALTIME_GC_MIN_SLACK
+)
+from common.controller_loader import CONTROLLERS, import_isolated, load_controller
+from common.loop_runner import FixedRateLoop
+from common.realtime import RealtimeRuntime
+from common.replay import ReplaySensorManager, ReplayFinished, NullMotor
+
+
+class _SwapRequest:
+    """制御ループへの切り替え依頼（handle が None ならニュートラルで待機）"""
+
+    def __init__(self, handle, requested_at):
+        self.handle = handle
+        self.requested_at = requested_at
+        self.applied_at = None
+        self.done = threading.Event()
+
+
+class DriveDaemon:
+    """ハードウェアを持ち続け、制御クラスだけを入れ替える常駐デーモン"""
+
+    def __init__(self, socket_path=SOCKET_PATH, replay=None, realtime=REALTIME_MODE):
+        print("=" * 50)
+        print("常駐走行デーモン")
+        print(f"ハードウェア: {HARDWARE_PROJECT} / ソケット: {socket_path}")
+        print("=" * 50)
+
+        # センサー・モーターは HARDWARE_PROJECT のモジュールと設定を使う
+        sensor_module, self.hw_settings = import_isolated(HARDWARE_PROJECT, "modules.sensor")
+        motor_module, _ = import_isolated(HARDWARE_PROJECT, "modules.motor")
+        # リアルタイムモード（CPU固定・SCHED_FIFO・GC制御。リプレイでは使わない）
+        # 測距・アクチュエーターのスレッドも開始時に同じ CPU・優先度にする
+        self.realtime = RealtimeRuntime(enabled=realtime and not replay, cpu=REALTIME_CPU,
+                                        priority=REALTIME_PRIORITY, gc_min_slack=REALTIME_GC_MIN_SLACK)
+        if replay:
+            self.i2c = None
+            self.sensor = ReplaySensorManager(replay, sensor_module.SensorData)
+            self.motor = NullMotor()
+        else:
+            # I2Cバスを共有
+            self.i2c = board.I2C()
+            thread_setup = self.realtime.apply_to_current_thread
+            self.sensor = sensor_module.SensorManager(self.i2c, thread_setup=thread_setup)
+            # 非同期出力（アクチュエータースレッド）を持たないプロジェクトのモーターには渡さない
+            if hasattr(motor_module, "ActuatorThread"):
+                self.motor = motor_module.MotorController(self.i2c, thread_setup=thread_setup)
+            else:
+                self.motor = motor_module.MotorController(self.i2c)
+
+        self.socket_path = socket_path
+        self.active = None          # 走行中の ControllerHandle（None: ニュートラル）
+        self.cycles_on_active = 0
+        self.last_command = (self.hw_settings.SERVO_CENTER, 0.0, "idle")
+        self.swap_latencies = []    # コマンド受信 → 新しい制御クラスの出力がモーターに渡るまで (秒)
+        self.errors = 0
+
+        self.rate = FixedRateLoop(0 if replay else CONTROL_INTERVAL, overrun=LOOP_OVERRUN_POLICY,
+                                  idle=self.realtime.idle)
+
+        self._pending = None
+        self._command_lock = threading.Lock()   # コマンドは1つずつ処理する
+        self._running = False
+        self._server = None
+        self._server_thread = None
+
+    def initialize(self):
+        """ハードウェアの初期化と制御クラスの事前 import"""
+        try:
+            self.sensor.initialize()
+            self.motor.initialize()
+        except Exception as e:
+            print(f"初期化エラー: {e}")
+            return False
+
+        for name in PRELOAD_CONTROLLERS:
+            project, module_name, _, _, extra_paths = CONTROLLERS[name]
+            start = time.perf_counter()
+            try:
+                import_isolated(project, module_name, extra_paths)
+                print(f"  {name}: import {(time.perf_counter() - start) * 1000:.1f}ms")
+            except Exception as e:
+                print(f"  {name}: 読み込めません ({type(e).__name__}: {e})")
+
+        try:
+            if DEFAULT_CONTROLLER:
+                self.active = load_controller(DEFAULT_CONTROLLER)
+            self._start_server()
+        except Exception as e:
+            print(f"初期化エラー: {e}")
+            self.motor.cleanup()
+            self.sensor.cleanup()
+            return False
+        print("=" * 50)
+        print("初期化完了！ コマンド待ち")
+        print("=" * 50)
+        return True
+
+    def run(self):
+        """制御ループ（メインスレッド）。quit コマンドか Ctrl+C で抜ける"""
+        self._running = True
+        signal.signal(signal.SIGTERM, lambda *_: self.request_quit())
+        center = self.hw_settings.SERVO_CENTER
+        self.realtime.enter()
+        self.rate.start()
+        try:
+            while self._running:
+                sensor_data = self.sensor.read()
+
+                # 切り替え依頼は周期の境目で反映する
+                request = self._pending
+                if request is not None:
+                    self._pending = None
+                    self.active = request.handle
+                    self.cycles_on_active = 0
+                    if self.active is not None and self.active.sensor_profile is None:
+                        self.sensor.set_profile(self.hw_settings.SENSOR_DEFAULT_PROFILE)
+
+                active = self.active
+                if active is not None:
+                    try:
+                        command = active.step(sensor_data)
+                        if active.sensor_profile is not None:
+                            self.sensor.set_profile(active.sensor_profile())
+                    except Exception as e:
+                        # 制御クラスの例外ではデーモンを止めず、ニュートラルに戻す
+                        self.errors += 1
+                        print(f"制御エラー ({active.name}): {type(e).__name__}: {e} → ニュートラル")
+                        self.active = None
+                        command = (center, 0.0, "error")
+                    self.cycles_on_active += 1
+                else:
+                    command = (center, 0.0, "idle")
+                self.motor.drive(command[0], command[1])
+                self.last_command = command
+
+                if request is not None:
+                    request.applied_at = time.perf_counter()
+                    request.done.set()
+
+                self.rate.wait()
+
+        except (KeyboardInterrupt, ReplayFinished):
+            print("\n" + "-" * 50)
+            print("停止信号を受信")
+
+        finally:
+            self.shutdown()
+
+    def request_quit(self):
+        """制御ループを次の周期で抜ける"""
+        self._running = False
+
+    # ------------------------------------------------------------------
+    # コマンド
+    # ------------------------------------------------------------------
+    def handle_command(self, request):
+        """
+        コマンド1つを処理する
+
+        Args:
+            request: {"cmd": "load" / "swap" / "stop" / "status" / "list" / "quit", "name": 制御クラス}
+        Returns:
+            dict: 応答（"ok" と結果）
+        """
+        cmd = request.get("cmd")
+        name = request.get("name")
+        with self._command_lock:
+            try:
+                if cmd == "swap":
+                    return self._swap(name)
+                if cmd == "stop":
+                    return self._swap(None)
+                if cmd == "load":
+                    return self._load(name)
+                if cmd == "status":
+                    return self._status()
+                if cmd == "list":
+                    return {"ok": True, "controllers": list(CONTROLLERS)}
+                if cmd == "quit":
+                    self.request_quit()
+                    return {"ok": True}
+                return {"ok": False, "error": f"未知のコマンド: {cmd}"}
+            except Exception as e:
+                return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def _load(self, name):
+        """import だけ済ませる（swap の前に重いモデルを読んでおく）"""
+        if name not in CONTROLLERS:
+            return {"ok": False, "error": f"未知の制御クラス: {name}"}
+        project, module_name, _, _, extra_paths = CONTROLLERS[name]
+        start = time.perf_counter()
+        import_isolated(project, module_name, extra_paths)
+        return {"ok": True, "controller": name, "import_ms": (time.perf_counter() - start) * 1000}
+
+    def _swap(self, name):
+        """制御クラスを新しいインスタンスに入れ替え、制御ループに反映されるまで待つ"""
+        received = time.perf_counter()
+        handle = load_controller(name) if name is not None else None
+        loaded = time.perf_counter()
+
+        request = _SwapRequest(handle, received)
+        self._pending = request
+        if not request.done.wait(SWAP_TIMEOUT):
+            if self._pending is request:
+                self._pending = None
+            return {"ok": False, "error": "制御ループに反映されませんでした（ループが止まっています）"}
+
+        total = request.applied_at - received
+        self.swap_latencies.append(total)
+        label = name or "ニュートラル"
+        print(f"切り替え: {label} ({total * 1000:.2f}ms)")
+        return {
+            "ok": True,
+            "controller": name,
+            "load_ms": (loaded - received) * 1000,          # import（済みなら0）とインスタンス生成
+            "handover_ms": (request.applied_at - loaded) * 1000,  # 次の周期の出力まで
+            "total_ms": total * 1000,
+        }
+
+    def _status(self):
+        steering, throttle, state = self.last_command
+        latencies = sorted(self.swap_latencies)
+        n = len(latencies)
+        return {
+            "ok": True,
+            "controller": self.active.name if self.active is not None else None,
+            "state": str(state),
+            "steering": steering,
+            "throttle": throttle,
+            "cycles": self.rate.cycles,
+            "cycles_on_controller": self.cycles_on_active,
+            "overruns": self.rate.overruns,
+            "errors": self.errors,
+            "swaps": n,
+            "swap_p50_ms": latencies[n // 2] * 1000 if n else 0.0,
+            "swap_max_ms": latencies[-1] * 1000 if n else 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # ソケット
+    # ------------------------------------------------------------------
+    def _start_server(self):
+        """Unix ドメインソケットでコマンドを受け付けるスレッドを開始"""
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise RuntimeError(f"デーモンは起動済みです: {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)     # 前回の残り
+            finally:
+                probe.close()
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request = json.loads(line)
+                    except ValueError:
+                        reply = {"ok": False, "error": "JSON ではありません"}
+                    else:
+                        reply = daemon.handle_command(request)
+                    self.wfile.write((json.dumps(reply, ensure_ascii=False) + "\n").encode())
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        self._server = Server(self.socket_path, Handler)
+        self._server_thread = threading.Thread(target=self._server.serve_forever,
+                                               name="drive-daemon-ipc", daemon=True)
+        self._server_thread.start()
+
+    def _stop_server(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def shutdown(self):
+        """終了処理"""
+        print("システム終了処理...")
+        self.realtime.leave()
+        self._stop_server()
+        if self.rate.cycles:
+            print(self.rate.summary())
+        if self.swap_latencies:
+            s = self._status()
+            print(f"切り替え {s['swaps']}回: p50 {s['swap_p50_ms']:.2f}ms / 最大 {s['swap_max_ms']:.2f}ms")
+        self.motor.cleanup()
+        self.sensor.cleanup()
+        print("正常に終了しました")
+
+
+def main():
+    """エントリーポイント"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='常駐走行デーモン')
+    parser.add_argument('--socket', default=SOCKET_PATH,
+                       help='コマンドを受け付ける Unix ドメインソケット')
+    parser.add_argument('--replay', metavar='CSV',
+                       help='実機の代わりに記録ログ（driving_log / record_data）を再生')
+    parser.add_argument('--realtime', action='store_true', default=REALTIME_MODE,
+                       help='制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す')
+    args = parser.parse_args()
+
+    daemon = DriveDaemon(socket_path=args.socket, replay=args.replay, realtime=args.realtime)
+    if not daemon.initialize():
+        print("初期化に失敗しました。終了します。")
+        sys.exit(1)
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,7 @@ from config.settings import (
     THROTTLE_STOP, THROTTLE_SLOW, THROTTLE_NORMAL, THROTTLE_REVERSE,
     WALL_TOO_CLOSE, WALL_VALID_MAX, FRONT_OBSTACLE_DIST,
     TARGET_WALL_DIST, STEERING_P_GAIN, CENTER_P_GAIN,
-    SENSOR_INVALID_VALUE
+    SENSOR_INVALID_VALUE, SENSOR_STALE_TIMEOUT
 )
 
 
@@ -39,17 +39,14 @@ class HybridController:
         self.mode = DriveMode.FREE_ROAM
         self.steering = SERVO_CENTER
         self.throttle = THROTTLE_STOP
+        self.stale = [False] * 5  # チャンネルごとに SENSOR_STALE_TIMEOUT より古いか
         
     def update(self, sensor_data):
         """
         センサーデータから制御値を計算
         """
-        # 無効値を大きな値に置換して扱いやすくする
-        L = sensor_data.left if sensor_data.left < SENSOR_INVALID_VALUE else 2000
-        FL = sensor_data.front_left if sensor_data.front_left < SENSOR_INVALID_VALUE else 2000
-        C = sensor_data.center if sensor_data.center < SENSOR_INVALID_VALUE else 2000
-        FR = sensor_data.front_right if sensor_data.front_right < SENSOR_INVALID_VALUE else 2000
-        R = sensor_data.right if sensor_data.right < SENSOR_INVALID_VALUE else 2000
+        # 無効値を大きな値に置換して扱いやすくする（古いチャンネルは最後の値のまま）
+        L, FL, C, FR, R = self._sensor_values(sensor_data, time.monotonic())
         
         # 壁の有効性判定
         left_valid = (L < WALL_VALID_MAX)
@@ -152,9 +149,22 @@ class HybridController:
             
         # ステアリングリミット
         self.steering = max(SERVO_LEFT, min(SERVO_RIGHT, self.steering))
+
+        # 正面が古いまま（読み取りの停止）なら前が空いているとは限らないので止める
+        if self.stale[2]:
+            self.throttle = THROTTLE_STOP
         
         return self.steering, self.throttle
     
+    def _sensor_values(self, sensor_data, now):
+        """
+        無効値を2000に置き換えた距離を返し、SENSOR_STALE_TIMEOUT より古いチャンネルを self.stale に記録
+
+        古いチャンネルは開けた空間とは見なさず、最後に読めた値をそのまま使う。
+        """
+        self.stale = [age > SENSOR_STALE_TIMEOUT for age in sensor_data.ages(now)]
+        return [value if value < SENSOR_INVALID_VALUE else 2000 for value in sensor_data.as_list()]
+
     def format_debug(self, sensor_data):
         """デバッグ表示"""
         return (
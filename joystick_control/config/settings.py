@@ -19,6 +19,11 @@ SENSOR_INTER_MEASUREMENT = 60
 # センサー無効値
 SENSOR_INVALID_VALUE = 999
 
+# バックグラウンド測距（専用スレッドで連続測距し、read_distances()は最新値を即座に返す）
+SENSOR_BACKGROUND_ACQUISITION = False
+SENSOR_POLL_INTERVAL = 0.002  # 測距スレッドの巡回間隔 (秒)
+SENSOR_PROCESS = False  # True: センサー取得を子プロセスで動かし、共有メモリのリングから最新フレームを読む（GILを分ける）
+
 # ===========================================
 # サーボ設定 (ステアリング)
 # ===========================================
@@ -70,6 +75,12 @@ BUTTON_EMERGENCY_STOP = 2  # Xボタン: 緊急停止
 # 録画設定
 # ===========================================
 RECORD_INTERVAL = 0.05  # 50ms（20Hz）
+LOOP_OVERRUN_POLICY = "skip"  # 周期超過時: "skip"=間に合わなかった周期を飛ばす / "compress"=詰めて回して追いつく
+STAGE_PROFILING = True  # 段ごとの処理時間ヒストグラム（終了時に表示、kill -USR1 <pid> で途中表示）
+REALTIME_MODE = False  # True: 制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す（--realtime と同じ。権限がなければ飛ばす）
+REALTIME_CPU = None  # 固定するCPU番号（None: isolcpus のコア、なければ最後のコア）
+REALTIME_PRIORITY = 50  # SCHED_FIFO の優先度 (1-99)
+REALTIME_GC_MIN_SLACK = 0.005  # 周期の残りがこの秒数以上のときだけ GC を回す
 DATA_SAVE_PATH = "data/record_data.csv"
 
 # CSVヘッダー
@@ -13,21 +13,36 @@
     - Bボタン: 録画停止・保存
     - Xボタン: 緊急停止
     - Ctrl+C: プログラム終了
+
+    python main.py --realtime   # 制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す
 """
 
 import sys
 import os
-import time
 import board
+import busio
 
 # パスを追加
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from config.settings import RECORD_INTERVAL
+from config.settings import (
+    RECORD_INTERVAL,
+    LOOP_OVERRUN_POLICY,
+    STAGE_PROFILING,
+    SENSOR_PROCESS,
+    REALTIME_MODE,
+    REALTIME_CPU,
+    REALTIME_PRIORITY,
+    REALTIME_GC_MIN_SLACK
+)
 from modules.sensor import SensorManager
 from modules.motor import MotorController
 from modules.joystick import JoystickController
 from modules.recorder import DataRecorder
+from common.loop_runner import FixedRateLoop
+from common.realtime import RealtimeRuntime
+from common.sensor_process import ProcessSensorManager
+from common.stage_profiler import StageProfiler
 
 
 def main():
@@ -46,15 +61,28 @@ def main():
     print("=" * 50)
     print()
     
+    # リアルタイムモード（CPU固定・SCHED_FIFO・GC制御）
+    # 測距スレッドも開始時に同じ CPU・優先度にする
+    realtime = RealtimeRuntime(enabled=REALTIME_MODE or "--realtime" in sys.argv, cpu=REALTIME_CPU,
+                               priority=REALTIME_PRIORITY, gc_min_slack=REALTIME_GC_MIN_SLACK)
+
     # I2Cバスを共有
     i2c = board.I2C()
     
     # 各モジュールの初期化
-    sensor_manager = SensorManager(i2c)
+    if SENSOR_PROCESS:
+        # センサーは子プロセスで取得し、pygame と GIL を取り合わないようにする
+        sensor_manager = ProcessSensorManager(
+            lambda: SensorManager(busio.I2C(board.SCL, board.SDA), background=False)
+        )
+    else:
+        sensor_manager = SensorManager(i2c, thread_setup=realtime.apply_to_current_thread)
     motor_controller = MotorController(i2c)
     joystick_controller = JoystickController()
     data_recorder = DataRecorder()
-    
+    # 段ごとの処理時間（kill -USR1 <pid> で途中表示）
+    profiler = StageProfiler(("input", "sensor", "motor", "record", "print", "wait"),
+                             enabled=STAGE_PROFILING)
     try:
         # センサー初期化
         print("[1/3] センサーを初期化中...")
@@ -78,18 +106,23 @@ def main():
         prev_record_stop = False
         prev_emergency = False
         
-        # メインループ
+        # メインループ（絶対時刻で RECORD_INTERVAL ごとに回す）
+        rate = FixedRateLoop(RECORD_INTERVAL, overrun=LOOP_OVERRUN_POLICY, idle=realtime.idle)
+        profiler.install_signal()
+        realtime.enter()
+        rate.start()
+        profiler.begin()
         while True:
-            loop_start = time.time()
-            
             # ジョイスティック入力を取得
             inputs = joystick_controller.get_all_inputs()
             steering = inputs['steering']
             throttle = inputs['throttle']
+            profiler.lap("input")
             
             # センサーデータを取得
             distances = sensor_manager.read_distances()
             L2, L1, C, R1, R2 = distances
+            profiler.lap("sensor")
             
             # ボタン処理（立ち上がりエッジで検出）
             # 録画開始ボタン
@@ -115,12 +148,14 @@ def main():
                 actual_angle = motor_controller.set_steering(steering)
                 actual_throttle = motor_controller.set_throttle(throttle)
             else:
-                actual_angle = motor_controller.steering_servo.angle
+                actual_angle = motor_controller.current_steering
                 actual_throttle = 0
+            profiler.lap("motor")
             
             # 録画中ならデータを記録
             if data_recorder.is_recording():
                 data_recorder.record(steering, throttle, distances)
+            profiler.lap("record")
             
             # ステータス表示
             rec_status = "●REC" if data_recorder.is_recording() else "    "
@@ -128,21 +163,23 @@ def main():
             print(f"{rec_status} | Steer:{steering:+.2f} Throttle:{throttle:+.2f} | "
                   f"Dist[L2={L2:3.0f} L1={L1:3.0f} C={C:3.0f} R1={R1:3.0f} R2={R2:3.0f}] | "
                   f"Count:{rec_count}")
+            profiler.lap("print")
             
             # ループ間隔を調整
-            elapsed = time.time() - loop_start
-            sleep_time = RECORD_INTERVAL - elapsed
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+            rate.wait()
+            profiler.lap("wait")
     
     except KeyboardInterrupt:
         print("\n\nCtrl+C が押されました。終了します...")
     
     finally:
+        realtime.leave()
         # 録画中なら保存
         if data_recorder.is_recording():
             print("録画データを保存中...")
             data_recorder.stop_recording()
+        if profiler.enabled:
+            print(profiler.report())
         
         # クリーンアップ
         print("クリーンアップ中...")
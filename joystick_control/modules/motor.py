@@ -1,12 +1,17 @@
 """
 モーター制御モジュール (PCA9685 + サーボ/ESC)
 test_sensor.py の設定を参考に作成
+
+角度・スロットルは initialize() で作る duty 表で変換し、PWMWriter で書き込む。
+（adafruit_motor の Servo / ContinuousServo と同じ duty になる）
 """
 
 import board
 import time
 from adafruit_pca9685 import PCA9685
-from adafruit_motor import servo
+
+from common.duty_table import continuous_servo_table, steering_table
+from common.pwm_writer import PWMWriter
 
 import sys
 sys.path.append('..')
@@ -33,8 +38,10 @@ class MotorController:
         """
         self.i2c = i2c if i2c else board.I2C()
         self.pca = None
-        self.steering_servo = None
-        self.motor_esc = None
+        self.pwm = None
+        self._steering_duty = None
+        self._throttle_duty = None
+        self._current_steering = SERVO_CENTER
         
     def initialize(self):
         """モーター/サーボの初期化処理"""
@@ -42,23 +49,17 @@ class MotorController:
         self.pca = PCA9685(self.i2c)
         self.pca.frequency = PCA9685_FREQUENCY
         
-        # サーボ設定（ステアリング）
-        self.steering_servo = servo.Servo(
-            self.pca.channels[SERVO_CHANNEL],
-            min_pulse=SERVO_MIN_PULSE,
-            max_pulse=SERVO_MAX_PULSE
-        )
+        self.pwm = PWMWriter(self.i2c)
         
-        # ESC設定（モーター）
-        self.motor_esc = servo.ContinuousServo(
-            self.pca.channels[ESC_CHANNEL],
-            min_pulse=ESC_MIN_PULSE,
-            max_pulse=ESC_MAX_PULSE
+        # サーボ（ステアリング）と ESC（ContinuousServo 相当）の duty 表
+        self._steering_duty = steering_table(
+            PCA9685_FREQUENCY, SERVO_MIN_PULSE, SERVO_MAX_PULSE, SERVO_LEFT, SERVO_RIGHT
         )
+        self._throttle_duty = continuous_servo_table(PCA9685_FREQUENCY, ESC_MIN_PULSE, ESC_MAX_PULSE)
         
         # 初期位置に設定
-        self.steering_servo.angle = SERVO_CENTER
-        self.motor_esc.throttle = THROTTLE_NEUTRAL
+        self._write_steering(SERVO_CENTER)
+        self._write_throttle(THROTTLE_NEUTRAL)
         time.sleep(0.5)
         
         print("モーターコントローラーが初期化されました")
@@ -84,7 +85,7 @@ class MotorController:
         
         # 範囲制限
         angle = max(SERVO_LEFT, min(SERVO_RIGHT, angle))
-        self.steering_servo.angle = angle
+        self._write_steering(angle)
         
         return angle
     
@@ -110,19 +111,32 @@ class MotorController:
             # 何も押していない → 停止
             throttle = THROTTLE_NEUTRAL
         
-        self.motor_esc.throttle = throttle
+        self._write_throttle(throttle)
         
         return throttle
     
+    def _write_steering(self, angle):
+        self.pwm.write(SERVO_CHANNEL, self._steering_duty(angle))
+        self._current_steering = angle
+    
+    def _write_throttle(self, throttle):
+        self.pwm.write(ESC_CHANNEL, self._throttle_duty(throttle))
+    
+    @property
+    def current_steering(self):
+        """最後に設定したステアリング角度"""
+        return self._current_steering
+    
     def stop(self):
         """緊急停止"""
-        self.motor_esc.throttle = THROTTLE_NEUTRAL
-        self.steering_servo.angle = SERVO_CENTER
+        self._write_throttle(THROTTLE_NEUTRAL)
+        self._write_steering(SERVO_CENTER)
         print("緊急停止しました")
     
     def cleanup(self):
         """モーターコントローラーのクリーンアップ"""
-        self.stop()
+        if self.pwm:
+            self.stop()
         if self.pca:
             self.pca.deinit()
         print("モーターコントローラーをクリーンアップしました")
@@ -10,26 +10,33 @@ import adafruit_vl53l4cd
 
 import sys
 sys.path.append('..')
+from common.acquisition import AcquisitionThread
 from config.settings import (
     XSHUT_PINS, SENSOR_BASE_ADDRESS, 
     SENSOR_TIMING_BUDGET, SENSOR_INTER_MEASUREMENT,
-    SENSOR_INVALID_VALUE
+    SENSOR_INVALID_VALUE,
+    SENSOR_BACKGROUND_ACQUISITION, SENSOR_POLL_INTERVAL
 )
 
 
 class SensorManager:
     """VL53L4CDセンサーを管理するクラス"""
     
-    def __init__(self, i2c=None):
+    def __init__(self, i2c=None, background=None, thread_setup=None):
         """
         センサーマネージャーの初期化
         
         Args:
             i2c: I2Cバスインスタンス（Noneの場合は自動作成）
+            background: Trueで専用スレッドによる連続測距（Noneは設定値に従う）
+            thread_setup: 測距スレッドの開始時にそのスレッドで呼ぶ関数（RealtimeRuntime.apply_to_current_thread など）
         """
         self.i2c = i2c if i2c else board.I2C()
         self.sensors = []
         self.xshuts = []
+        self.background = SENSOR_BACKGROUND_ACQUISITION if background is None else background
+        self._acquisition = None
+        self.thread_setup = thread_setup
         
     def initialize(self):
         """センサーの初期化処理"""
@@ -72,6 +79,14 @@ class SensorManager:
             raise RuntimeError("エラー: センサーが1つも初期化できませんでした")
         
         print(f"{len(self.sensors)}個のセンサーが初期化されました")
+
+        if self.background:
+            self._acquisition = AcquisitionThread(
+                self._poll_channel, len(self.sensors), poll_interval=SENSOR_POLL_INTERVAL,
+                on_start=self.thread_setup
+            )
+            self._acquisition.start()
+            print("バックグラウンド測距を開始しました")
         return True
     
     def read_distances(self):
@@ -81,6 +96,9 @@ class SensorManager:
         Returns:
             list: [L2, L1, C, R1, R2] の距離リスト (cm)
         """
+        if self._acquisition is not None:
+            return self._read_latest()
+
         distances = []
         
         for idx, sensor in enumerate(self.sensors):
@@ -95,12 +113,7 @@ class SensorManager:
                         distances.append(SENSOR_INVALID_VALUE)
                         break
                 else:
-                    sensor.clear_interrupt()
-                    dist = sensor.distance
-                    # 無効な値は大きな値に置き換え
-                    if dist == 0 or dist is None:
-                        dist = SENSOR_INVALID_VALUE
-                    distances.append(dist)
+                    distances.append(self._fetch_distance(sensor))
             except Exception as e:
                 print(f"Error reading sensor {idx}: {e}")
                 distances.append(SENSOR_INVALID_VALUE)
@@ -110,9 +123,46 @@ class SensorManager:
             distances.append(SENSOR_INVALID_VALUE)
         
         return distances[:5]  # [L2, L1, C, R1, R2]
+
+    def _read_latest(self):
+        """バックグラウンド測距の最新値を返す（待ちなし）"""
+        distances = [SENSOR_INVALID_VALUE] * 5
+        for idx, sample in enumerate(self._acquisition.snapshot()[:5]):
+            if sample is not None:
+                distances[idx] = sample[0]
+        return distances
+
+    def _poll_channel(self, idx):
+        """
+        1チャンネルを待たずに確認する（測距スレッドから呼ばれる）
+
+        Returns:
+            新しい測定値があれば距離(cm)、未準備ならNone
+        """
+        sensor = self.sensors[idx]
+        try:
+            if not sensor.data_ready:
+                return None
+            return self._fetch_distance(sensor)
+        except Exception as e:
+            print(f"Error reading sensor {idx}: {e}")
+            return SENSOR_INVALID_VALUE
+
+    def _fetch_distance(self, sensor):
+        """割り込みをクリアして距離(cm)を取得"""
+        sensor.clear_interrupt()
+        dist = sensor.distance
+        # 無効な値は大きな値に置き換え
+        if dist == 0 or dist is None:
+            dist = SENSOR_INVALID_VALUE
+        return dist
     
     def cleanup(self):
         """センサーのクリーンアップ"""
+        if self._acquisition is not None:
+            self._acquisition.stop()
+            self._acquisition = None
+
         for xshut in self.xshuts:
             xshut.value = False
         print("センサーをクリーンアップしました")
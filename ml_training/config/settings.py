@@ -100,6 +100,8 @@ SENSOR_TIMING_BUDGET = 20  # 高速化のため20ms
 SENSOR_INTER_MEASUREMENT = 0
 SENSOR_INVALID_VALUE = 9999
 SENSOR_MAX_RANGE = 1300  # mm
+SENSOR_BACKGROUND_ACQUISITION = False  # 専用スレッドで連続測距
+SENSOR_POLL_INTERVAL = 0.002  # 測距スレッドの巡回間隔 (秒)
 
 # --- サーボ設定 (ステアリング) ---
 SERVO_CHANNEL = 0
@@ -115,6 +117,9 @@ SERVO_RIGHT = 140
 ESC_CHANNEL = 1
 ESC_MIN_PULSE = 1100
 ESC_MAX_PULSE = 2000
+ESC_ARMING_TIME = 3.0           # 起動時にニュートラルを送り続ける時間 (秒)
+ESC_REVERSE_BRAKE_TIME = 0.04   # 後退切り替え: 最初の後退（ESCはブレーキ扱い）を送る時間 (秒)
+ESC_REVERSE_NEUTRAL_TIME = 0.04 # 後退切り替え: その後ニュートラルを送る時間 (秒)
 
 # スロットル値
 THROTTLE_STOP = 0.0
@@ -130,6 +135,12 @@ PCA9685_FREQUENCY = 50
 EMERGENCY_STOP_DISTANCE = 0    # 100 → 0（無効化）
 SLOW_DOWN_DISTANCE = 150       # 300 → 150
 CONTROL_INTERVAL = 0.04        # 制御周期 (25Hz)
+LOOP_OVERRUN_POLICY = "skip"  # 周期超過時: "skip"=間に合わなかった周期を飛ばす / "compress"=詰めて回して追いつく
+STAGE_PROFILING = True  # 段ごとの処理時間ヒストグラム（終了時に表示、kill -USR1 <pid> で途中表示）
+REALTIME_MODE = False  # True: 制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す（--realtime と同じ。権限がなければ飛ばす）
+REALTIME_CPU = None  # 固定するCPU番号（None: isolcpus のコア、なければ最後のコア）
+REALTIME_PRIORITY = 50  # SCHED_FIFO の優先度 (1-99)
+REALTIME_GC_MIN_SLACK = 0.005  # 周期の残りがこの秒数以上のときだけ GC を回す
 DEBUG_PRINT_INTERVAL = 5       # デバッグ表示間隔
 
 # ===========================================
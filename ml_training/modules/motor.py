@@ -1,11 +1,18 @@
 """
 モーター制御モジュール（PCA9685）
+
+角度・スロットルは initialize() で作る duty 表で変換し、PWMWriter で書き込む。
+（adafruit_motor の Servo / ContinuousServo と同じ duty になる）
+スロットルは ESCStateMachine を通して出力する（アーミングと後退切り替えを待ちなしで行う）。
 """
 
 import board
 import busio
 from adafruit_pca9685 import PCA9685
-from adafruit_motor import servo
+
+from common.duty_table import continuous_servo_table, steering_table
+from common.esc import ESCStateMachine
+from common.pwm_writer import PWMWriter
 
 
 class MLMotorController:
@@ -15,13 +22,18 @@ class MLMotorController:
         # 設定は外部から受け取る（settings.pyから）
         self.i2c = busio.I2C(board.SCL, board.SDA)
         self.pca = None
-        self.steering_servo = None
+        self.pwm = None
+        self.servo_channel = 0
+        self.esc_channel = 1
+        self._steering_duty = None
+        self._throttle_duty = None
         self.esc = None
     
     def initialize(self, pca_address=0x40, pca_freq=50,
                    servo_channel=0, servo_min_pulse=500, servo_max_pulse=2500,
                    esc_channel=1, esc_min_pulse=1000, esc_max_pulse=2000,
-                   servo_center=114):
+                   servo_center=114, esc_arming_time=3.0,
+                   esc_brake_time=0.04, esc_neutral_time=0.04):
         """
         初期化
         
@@ -35,41 +47,51 @@ class MLMotorController:
             esc_min_pulse: ESCの最小パルス幅
             esc_max_pulse: ESCの最大パルス幅
             servo_center: サーボの中央角度
+            esc_arming_time: ESCアーミングでニュートラルを送る時間 (秒)
+            esc_brake_time: 後退切り替えで最初の後退（ブレーキ）を送る時間 (秒)
+            esc_neutral_time: ブレーキ後にニュートラルを送る時間 (秒)
         """
         print("モーター初期化中...")
         
         self.pca = PCA9685(self.i2c, address=pca_address)
         self.pca.frequency = pca_freq
         
-        # ステアリングサーボ
-        self.steering_servo = servo.Servo(
-            self.pca.channels[servo_channel],
-            min_pulse=servo_min_pulse,
-            max_pulse=servo_max_pulse
-        )
+        self.pwm = PWMWriter(self.i2c, address=pca_address)
+        self.servo_channel = servo_channel
+        self.esc_channel = esc_channel
         
-        # ESC
-        self.esc = servo.ContinuousServo(
-            self.pca.channels[esc_channel],
-            min_pulse=esc_min_pulse,
-            max_pulse=esc_max_pulse
+        # ステアリングサーボ（0〜180°）と ESC（-1.0〜1.0）の duty 表
+        self._steering_duty = steering_table(pca_freq, servo_min_pulse, servo_max_pulse, 0, 180)
+        self._throttle_duty = continuous_servo_table(pca_freq, esc_min_pulse, esc_max_pulse)
+        
+        # ESC（アーミングはニュートラルを送りながら時間経過で完了する）
+        self.esc = ESCStateMachine(
+            arming_time=esc_arming_time,
+            brake_time=esc_brake_time,
+            neutral_time=esc_neutral_time
         )
+        self.esc.arm()
         
         # 初期位置
-        self.steering_servo.angle = servo_center
-        self.esc.throttle = 0.0
+        self.drive(servo_center, 0.0)
         
         print("✓ モーター初期化完了")
     
     def drive(self, servo_angle, throttle):
         """駆動"""
-        self.steering_servo.angle = servo_angle
-        self.esc.throttle = throttle
+        self.pwm.update({
+            self.servo_channel: self._steering_duty(servo_angle),
+            self.esc_channel: self._throttle_duty(self.esc.update(throttle)),
+        })
+    
+    @property
+    def armed(self):
+        """ESCのアーミングが完了したか"""
+        return self.esc is not None and self.esc.armed
     
     def stop(self, servo_center=114):
         """停止"""
-        self.esc.throttle = 0.0
-        self.steering_servo.angle = servo_center
+        self.drive(servo_center, 0.0)
     
     def cleanup(self):
         """クリーンアップ"""
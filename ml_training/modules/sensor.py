@@ -8,6 +8,8 @@ import busio
 import digitalio
 import adafruit_vl53l4cd
 
+from common.acquisition import AcquisitionThread
+
 
 class MLSensorManager:
     """センサー管理（VL53L4CD × 5）"""
@@ -15,10 +17,11 @@ class MLSensorManager:
     def __init__(self):
         self.i2c = busio.I2C(board.SCL, board.SDA)
         self.sensors = []
+        self._acquisition = None
     
     def initialize(self, xshut_pins, base_address=0x30, 
                    timing_budget=20, inter_measurement=0,
-                   invalid_value=9999):
+                   invalid_value=9999, background=False, poll_interval=0.002, thread_setup=None):
         """
         センサー初期化
         
@@ -28,6 +31,9 @@ class MLSensorManager:
             timing_budget: タイミングバジェット (ms)
             inter_measurement: 測定間隔 (ms)
             invalid_value: 無効値
+            background: Trueで専用スレッドによる連続測距
+            poll_interval: 測距スレッドの巡回間隔 (秒)
+            thread_setup: 測距スレッドの開始時にそのスレッドで呼ぶ関数（RealtimeRuntime.apply_to_current_thread など）
         """
         print("センサー初期化中...")
         
@@ -61,20 +67,57 @@ class MLSensorManager:
             print(f"  センサー {i+1}/{len(xshut_pins)} 初期化完了 (0x{addr:02X})")
         
         print("✓ 全センサー初期化完了")
+
+        if background:
+            self._acquisition = AcquisitionThread(
+                self._poll_channel, len(self.sensors), poll_interval=poll_interval,
+                on_start=thread_setup
+            )
+            self._acquisition.start()
+            print("✓ バックグラウンド測距開始")
     
     def read(self):
         """全センサー読み取り (mm単位)"""
+        if self._acquisition is not None:
+            return self._read_latest()
+
         distances = []
         for sensor in self.sensors:
             while not sensor.data_ready:
                 pass
-            sensor.clear_interrupt()
-            distance = sensor.distance if sensor.distance is not None else self.invalid_value
-            distances.append(distance)
+            distances.append(self._fetch_distance(sensor))
         
         return distances  # [L2, L1, C, R1, R2]
+
+    def _read_latest(self):
+        """バックグラウンド測距の最新値を返す（待ちなし）"""
+        distances = [self.invalid_value] * len(self.sensors)
+        for idx, sample in enumerate(self._acquisition.snapshot()):
+            if sample is not None:
+                distances[idx] = sample[0]
+        return distances
+
+    def _poll_channel(self, idx):
+        """1チャンネルを待たずに確認する（未準備ならNone）"""
+        sensor = self.sensors[idx]
+        try:
+            if not sensor.data_ready:
+                return None
+            return self._fetch_distance(sensor)
+        except Exception:
+            return self.invalid_value
+
+    def _fetch_distance(self, sensor):
+        """割り込みをクリアして距離を取得"""
+        sensor.clear_interrupt()
+        distance = sensor.distance
+        return distance if distance is not None else self.invalid_value
     
     def cleanup(self):
         """クリーンアップ"""
+        if self._acquisition is not None:
+            self._acquisition.stop()
+            self._acquisition = None
+
         for sensor in self.sensors:
             sensor.stop_ranging()
\ No newline at end of file
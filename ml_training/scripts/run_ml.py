@@ -15,13 +15,16 @@ sys.path.append(project_root)
 
 from predict import MLPredictor
 from modules import MLSensorManager, MLMotorController, DataLogger
+from common.loop_runner import FixedRateLoop
+from common.realtime import RealtimeRuntime
+from common.stage_profiler import StageProfiler
 from config import settings
 
 
 class MLDriver:
     """機械学習による自動運転クラス"""
 
-    def __init__(self, throttle=None, enable_logging=True):
+    def __init__(self, throttle=None, enable_logging=True, realtime=settings.REALTIME_MODE):
         self.base_throttle = throttle if throttle is not None else settings.THROTTLE_NORMAL
         self.running = False
 
@@ -29,6 +32,10 @@ class MLDriver:
         self.sensors = None
         self.motor = None
         self.logger = DataLogger(enabled=enable_logging)
+        # リアルタイムモード（CPU固定・SCHED_FIFO・GC制御）
+        self.realtime = RealtimeRuntime(enabled=realtime, cpu=settings.REALTIME_CPU,
+                                        priority=settings.REALTIME_PRIORITY,
+                                        gc_min_slack=settings.REALTIME_GC_MIN_SLACK)
 
         print("=" * 50)
         print("機械学習自動運転システム")
@@ -50,7 +57,10 @@ class MLDriver:
             base_address=settings.SENSOR_BASE_ADDRESS,
             timing_budget=settings.SENSOR_TIMING_BUDGET,
             inter_measurement=settings.SENSOR_INTER_MEASUREMENT,
-            invalid_value=settings.SENSOR_INVALID_VALUE
+            invalid_value=settings.SENSOR_INVALID_VALUE,
+            background=settings.SENSOR_BACKGROUND_ACQUISITION,
+            poll_interval=settings.SENSOR_POLL_INTERVAL,
+            thread_setup=self.realtime.apply_to_current_thread
         )
         
         print("\n[3/3] モーター初期化...")
@@ -64,14 +74,14 @@ class MLDriver:
             esc_channel=settings.ESC_CHANNEL,
             esc_min_pulse=settings.ESC_MIN_PULSE,
             esc_max_pulse=settings.ESC_MAX_PULSE,
-            servo_center=settings.SERVO_CENTER
+            servo_center=settings.SERVO_CENTER,
+            esc_arming_time=settings.ESC_ARMING_TIME,
+            esc_brake_time=settings.ESC_REVERSE_BRAKE_TIME,
+            esc_neutral_time=settings.ESC_REVERSE_NEUTRAL_TIME
         )
         
-        # ESCアーミング
-        print("\nESCアーミング中...")
-        self.motor.drive(settings.SERVO_CENTER, 0.0)
-        time.sleep(3)
-        print("✓ アーミング完了")
+        # ESCアーミングはモーター側で進む（完了までスロットルはニュートラルのまま）
+        print(f"\nESCアーミング開始（{settings.ESC_ARMING_TIME}秒後に完了）")
         
         print("\n--- 初期化完了 ---")
         return True
@@ -90,6 +100,12 @@ class MLDriver:
         self.running = True
         start_time = time.time()
         loop_count = 0
+        rate = FixedRateLoop(settings.CONTROL_INTERVAL, overrun=settings.LOOP_OVERRUN_POLICY,
+                             idle=self.realtime.idle)
+        # 段ごとの処理時間（kill -USR1 <pid> で途中表示）
+        profiler = StageProfiler(("sensor", "predict", "motor", "log", "print", "wait"),
+                                 enabled=settings.STAGE_PROFILING)
+        profiler.install_signal()
 
         # ログ記録開始
         self.logger.start()
@@ -99,10 +115,11 @@ class MLDriver:
         print("終了するには Ctrl+C を押してください")
         print("=" * 50 + "\n")
         
+        self.realtime.enter()
+        rate.start()
+        profiler.begin()
         try:
             while self.running:
-                loop_start = time.time()
-                
                 # 時間制限チェック
                 if duration is not None:
                     elapsed = time.time() - start_time
@@ -113,13 +130,16 @@ class MLDriver:
                 # センサー読み取り (mm単位)
                 distances = self.sensors.read()
                 l2, l1, c, r1, r2 = distances
+                profiler.lap("sensor")
                 
                 # 緊急停止チェック
                 if c >= settings.SENSOR_INVALID_VALUE or c < settings.EMERGENCY_STOP_DISTANCE:
                     if c < settings.EMERGENCY_STOP_DISTANCE:
                         print(f"⚠ 前方障害物検出 ({c}mm)、停止")
                     self.motor.stop(servo_center=settings.SERVO_CENTER)
-                    time.sleep(0.1)
+                    profiler.lap("motor")
+                    rate.wait()
+                    profiler.lap("wait")
                     continue
                 
                 # 機械学習で予測 (mm単位で渡す)
@@ -133,12 +153,15 @@ class MLDriver:
                     throttle = settings.THROTTLE_SLOW
                 else:
                     throttle = self.base_throttle
+                profiler.lap("predict")
                 
                 # モーター制御
                 self.motor.drive(servo_angle, throttle)
+                profiler.lap("motor")
 
                 # データログ記録
                 self.logger.log(servo_angle, throttle, distances, class_name)
+                profiler.lap("log")
 
                 # デバッグ出力
                 loop_count += 1
@@ -146,18 +169,24 @@ class MLDriver:
                     print(f"[{class_name:11}] "
                           f"L:{l2:4.0f} FL:{l1:4.0f} C:{c:4.0f} FR:{r1:4.0f} R:{r2:4.0f} | "
                           f"St:{servo_angle:5.1f}° Th:{throttle:+.2f}")
+                profiler.lap("print")
                 
                 # 制御周期
-                elapsed_loop = time.time() - loop_start
-                sleep_time = settings.CONTROL_INTERVAL - elapsed_loop
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
+                rate.wait()
+                profiler.lap("wait")
         
         except KeyboardInterrupt:
             print("\n\n中断されました")
         
         finally:
+            self.realtime.leave()
+            if rate.cycles:
+                print(rate.summary())
             self.stop()
+            if profiler.enabled:
+                print(profiler.report())
+                if self.logger.file_path is not None:
+                    profiler.dump(os.path.splitext(str(self.logger.file_path))[0] + "_profile.json")
     
     def stop(self):
         """停止"""
@@ -185,10 +214,12 @@ def main():
                        help='実行時間（秒）')
     parser.add_argument('--no-log', action='store_true',
                        help='データログ記録を無効化')
+    parser.add_argument('--realtime', action='store_true', default=settings.REALTIME_MODE,
+                       help='制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す')
 
     args = parser.parse_args()
 
-    driver = MLDriver(throttle=args.throttle, enable_logging=not args.no_log)
+    driver = MLDriver(throttle=args.throttle, enable_logging=not args.no_log, realtime=args.realtime)
     
     try:
         driver.initialize()
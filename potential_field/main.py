@@ -7,35 +7,79 @@
     python main.py
 """
 
-import time
-import board
+import os
 import sys
 
+if "--replay" in sys.argv:
+    # 実機なしでログを再生するときは board / adafruit_* を fake_hw に差し替えてから import する
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from common.fake_hw import install_fake_hardware
+    install_fake_hardware()
+
+import board
+import busio
+
 from config.settings import (
     CONTROL_INTERVAL,
     DEBUG_PRINT_INTERVAL,
-    ENABLE_DEBUG_LOG
+    ENABLE_DEBUG_LOG,
+    LOOP_OVERRUN_POLICY,
+    STAGE_PROFILING,
+    SENSOR_PROCESS,
+    REALTIME_MODE,
+    REALTIME_CPU,
+    REALTIME_PRIORITY,
+    REALTIME_GC_MIN_SLACK
 )
-from modules.sensor import SensorManager
+from modules.sensor import SensorManager, SensorData
 from modules.motor import MotorController
 from modules.potential_controller import PotentialController
+from common.loop_runner import FixedRateLoop
+from common.realtime import RealtimeRuntime
+from common.stage_profiler import StageProfiler
+from common.sensor_process import ProcessSensorManager
+from common.replay import ReplaySensorManager, ReplayFinished, NullMotor
 
 
 class MiniCarPotential:
     """ポテンシャル法走行のメインクラス"""
     
-    def __init__(self):
+    def __init__(self, replay=None, fast=False, realtime=REALTIME_MODE, async_motor=None):
         print("=" * 50)
         print("仮想ポテンシャル法走行システム")
         print("障害物からの反発力で走行")
         print("=" * 50)
         
-        self.i2c = board.I2C()
-        self.sensor = SensorManager(self.i2c)
-        self.motor = MotorController(self.i2c)
+        # リアルタイムモード（CPU固定・SCHED_FIFO・GC制御。リプレイでは使わない）
+        # 測距・アクチュエーターのスレッドも開始時に同じ CPU・優先度にする
+        self.realtime = RealtimeRuntime(enabled=realtime and not replay, cpu=REALTIME_CPU,
+                                        priority=REALTIME_PRIORITY, gc_min_slack=REALTIME_GC_MIN_SLACK)
+
+        if replay:
+            # 記録ログを再生して制御だけ回す（モーター出力なし）
+            self.i2c = None
+            self.sensor = ReplaySensorManager(replay, SensorData, realtime=not fast)
+            self.motor = NullMotor()
+        else:
+            self.i2c = board.I2C()
+            if SENSOR_PROCESS:
+                # センサーは子プロセスで取得（子ではI2Cバスを開き直す）
+                self.sensor = ProcessSensorManager(
+                    lambda: SensorManager(busio.I2C(board.SCL, board.SDA), background=False), SensorData
+                )
+            else:
+                self.sensor = SensorManager(self.i2c, thread_setup=self.realtime.apply_to_current_thread)
+            self.motor = MotorController(self.i2c, async_mode=async_motor,
+                                         thread_setup=self.realtime.apply_to_current_thread)
         self.controller = PotentialController()
         
         self.loop_count = 0
+        # 絶対時刻で周期を刻む（リプレイ中は再生側が記録時のタイミングで待つ）
+        self.rate = FixedRateLoop(0 if replay else CONTROL_INTERVAL, overrun=LOOP_OVERRUN_POLICY,
+                                  idle=self.realtime.idle)
+        # 段ごとの処理時間（I2C読み取り・制御計算・PWM出力・表示・周期待ち）
+        self.profiler = StageProfiler(("sensor", "control", "motor", "print", "wait"),
+                                      enabled=STAGE_PROFILING)
     
     def initialize(self):
         try:
@@ -49,36 +93,66 @@ class MiniCarPotential:
     
     def run(self):
         print("\n走行開始！ (Ctrl+C で停止)")
+        self.profiler.install_signal()
+        profiler = self.profiler
+        self.realtime.enter()
+        self.rate.start()
+        profiler.begin()
         try:
             while True:
                 sensor_data = self.sensor.read()
+                profiler.lap("sensor")
                 steering, throttle = self.controller.update(sensor_data)
+                profiler.lap("control")
                 self.motor.drive(steering, throttle)
+                profiler.lap("motor")
                 
                 self.loop_count += 1
                 if ENABLE_DEBUG_LOG and self.loop_count % DEBUG_PRINT_INTERVAL == 0:
                     print(self.controller.format_debug(sensor_data))
+                profiler.lap("print")
                 
-                time.sleep(CONTROL_INTERVAL)
+                self.rate.wait()
+                profiler.lap("wait")
                 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, ReplayFinished):
             print("\n停止信号を受信")
         finally:
             self.shutdown()
     
     def shutdown(self):
+        self.realtime.leave()
+        if self.rate.cycles:
+            print(self.rate.summary())
+        if self.profiler.enabled:
+            print(self.profiler.report())
         self.motor.cleanup()
         self.sensor.cleanup()
         print("終了しました")
 
 
 def main():
-    car = MiniCarPotential()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='仮想ポテンシャル法走行システム')
+    parser.add_argument('--replay', metavar='CSV',
+                       help='実機の代わりに記録ログ（driving_log / record_data）を再生')
+    parser.add_argument('--fast', action='store_true',
+                       help='リプレイを記録時のタイミングを無視して最速で回す')
+    parser.add_argument('--realtime', action='store_true', default=REALTIME_MODE,
+                       help='制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す')
+    parser.add_argument('--async-motor', action='store_true', default=None,
+                       help='モーター出力をアクチュエータースレッドで非同期に行う（既定は settings の MOTOR_ASYNC）')
+    args = parser.parse_args()
+
+    car = MiniCarPotential(replay=args.replay, fast=args.fast, realtime=args.realtime,
+                           async_motor=args.async_motor)
     if not car.initialize():
         sys.exit(1)
     
-    print("\nEnterキーを押すと走行を開始します...")
-    input()
+    if not args.replay:
+        print("\nEnterキーを押すと走行を開始します...")
+        input()
     car.run()
 
 
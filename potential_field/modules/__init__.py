@@ -0,0 +1,7 @@
+import os
+import sys
+
+# リポジトリ直下の common/ を import できるようにする
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
@@ -21,6 +21,20 @@ SENSOR_INTER_MEASUREMENT = 60
 # センサー無効値 (mm)
 SENSOR_INVALID_VALUE = 9999
 
+# バックグラウンド測距（専用スレッドで連続測距し、read_distances()は最新値を即座に返す）
+SENSOR_BACKGROUND_ACQUISITION = False
+SENSOR_POLL_INTERVAL = 0.002  # 測距スレッドの巡回間隔 (秒)
+SENSOR_PROCESS = False  # True: センサー取得を子プロセスで動かし、共有メモリのリングから最新フレームを読む（GILを分ける）
+
+# 結果レジスタのバースト読みによる高速読み取り（Falseで adafruit ドライバのプロパティを使う）
+# 実機で確認するまでは既定で無効
+SENSOR_FAST_PATH = False
+
+# 距離フィルタ（カルマンフィルタで距離と変化率を推定し、変化率の計算に使う。numpyが必要）
+RANGE_FILTER_ENABLED = False
+RANGE_FILTER_ACCEL_STD = 2000.0      # 変化率の変動の標準偏差 (mm/s^2)。大きいほど追従が速い
+RANGE_FILTER_MEASUREMENT_STD = 15.0  # 測定ノイズの標準偏差 (mm)
+
 # ===========================================
 # サーボ設定 (ステアリング)
 # ===========================================
@@ -52,6 +66,11 @@ THROTTLE_NEUTRAL = 0.0        # 停止
 # ===========================================
 PCA9685_FREQUENCY = 50
 
+# ESCのアーミングと後退切り替え（待たずに時間経過で段階を進める）
+ESC_ARMING_TIME = 0.5           # 起動時にニュートラルを送り続ける時間 (秒)
+ESC_REVERSE_BRAKE_TIME = 0.04   # 後退切り替え: 最初の後退（ESCはブレーキ扱い）を送る時間 (秒)
+ESC_REVERSE_NEUTRAL_TIME = 0.04 # 後退切り替え: その後ニュートラルを送る時間 (秒)
+
 # ===========================================
 # 走行制御パラメータ
 # ===========================================
@@ -86,6 +105,12 @@ SPEED_FAST = 0.40    # 高速 (直線)
 # 制御周期設定
 # ===========================================
 CONTROL_INTERVAL = 0.05  # 50ms (20Hz)
+LOOP_OVERRUN_POLICY = "skip"  # 周期超過時: "skip"=間に合わなかった周期を飛ばす / "compress"=詰めて回して追いつく
+STAGE_PROFILING = True  # 段ごとの処理時間ヒストグラム（終了時に表示、kill -USR1 <pid> で途中表示）
+REALTIME_MODE = False  # True: 制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す（--realtime と同じ。権限がなければ飛ばす）
+REALTIME_CPU = None  # 固定するCPU番号（None: isolcpus のコア、なければ最後のコア）
+REALTIME_PRIORITY = 50  # SCHED_FIFO の優先度 (1-99)
+REALTIME_GC_MIN_SLACK = 0.005  # 周期の残りがこの秒数以上のときだけ GC を回す
 
 # ===========================================
 # デバッグ設定
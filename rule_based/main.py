@@ -10,36 +10,73 @@
     Ctrl+C
 """
 
-import time
-import board
+import os
 import sys
 
+if "--replay" in sys.argv:
+    # 実機なしでログを再生するときは board / adafruit_* を fake_hw に差し替えてから import する
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from common.fake_hw import install_fake_hardware
+    install_fake_hardware()
+
+import board
+import busio
+
 from config.settings import (
     CONTROL_INTERVAL,
     DEBUG_PRINT_INTERVAL,
-    ENABLE_DEBUG_LOG
+    ENABLE_DEBUG_LOG,
+    LOOP_OVERRUN_POLICY,
+    STAGE_PROFILING,
+    SENSOR_PROCESS,
+    REALTIME_MODE,
+    REALTIME_CPU,
+    REALTIME_PRIORITY,
+    REALTIME_GC_MIN_SLACK
 )
 from modules.sensor import SensorManager
 from modules.motor import MotorController
 from modules.controller import DrivingController
 from modules.data_logger import DataLogger
+from common.loop_runner import FixedRateLoop
+from common.realtime import RealtimeRuntime
+from common.stage_profiler import StageProfiler
+from common.sensor_process import ProcessSensorManager
+from common.replay import ReplaySensorManager, ReplayFinished, NullMotor
 
 
 class MiniCarRuleBased:
     """ルールベース走行のメインクラス"""
 
-    def __init__(self, enable_logging=True):
+    def __init__(self, enable_logging=True, replay=None, fast=False, realtime=REALTIME_MODE):
         """初期化"""
         print("=" * 50)
         print("ルールベース走行システム 初期化")
         print("=" * 50)
 
-        # I2Cバスを共有
-        self.i2c = board.I2C()
-
-        # 各モジュールの初期化
-        self.sensor = SensorManager(self.i2c)
-        self.motor = MotorController(self.i2c)
+        # リアルタイムモード（CPU固定・SCHED_FIFO・GC制御。リプレイでは使わない）
+        # 測距・アクチュエーターのスレッドも開始時に同じ CPU・優先度にする
+        self.realtime = RealtimeRuntime(enabled=realtime and not replay, cpu=REALTIME_CPU,
+                                        priority=REALTIME_PRIORITY, gc_min_slack=REALTIME_GC_MIN_SLACK)
+
+        if replay:
+            # 記録ログを再生して制御だけ回す（モーター出力なし）
+            self.i2c = None
+            self.sensor = ReplaySensorManager(replay, realtime=not fast)
+            self.motor = NullMotor()
+        else:
+            # I2Cバスを共有
+            self.i2c = board.I2C()
+
+            # 各モジュールの初期化
+            if SENSOR_PROCESS:
+                # センサーは子プロセスで取得（子ではI2Cバスを開き直す）
+                self.sensor = ProcessSensorManager(
+                    lambda: SensorManager(busio.I2C(board.SCL, board.SDA), background=False)
+                )
+            else:
+                self.sensor = SensorManager(self.i2c, thread_setup=self.realtime.apply_to_current_thread)
+            self.motor = MotorController(self.i2c)
         self.controller = DrivingController()
 
         # データロガー
@@ -47,6 +84,12 @@ class MiniCarRuleBased:
 
         # ループカウンター
         self.loop_count = 0
+        # 絶対時刻で周期を刻む（リプレイ中は再生側が記録時のタイミングで待つ）
+        self.rate = FixedRateLoop(0 if replay else CONTROL_INTERVAL, overrun=LOOP_OVERRUN_POLICY,
+                                  idle=self.realtime.idle)
+        # 段ごとの処理時間（I2C読み取り・制御計算・PWM出力・CSVログ・表示・周期待ち）
+        self.profiler = StageProfiler(("sensor", "control", "motor", "log", "print", "wait"),
+                                      enabled=STAGE_PROFILING)
     
     def initialize(self):
         """システムの初期化"""
@@ -68,32 +111,42 @@ class MiniCarRuleBased:
 
         # ログ記録開始
         self.logger.start()
+        self.profiler.install_signal()
 
+        profiler = self.profiler
+        self.realtime.enter()
+        self.rate.start()
+        profiler.begin()
         try:
             while True:
                 # 1. センサー読み取り
                 distances = self.sensor.read_distances()
+                profiler.lap("sensor")
 
                 # 2. 制御値の計算
                 steering, throttle, state = self.controller.compute_control(distances)
+                profiler.lap("control")
 
                 # 3. モーター出力
-                self.motor.set_steering_angle(steering)
-                self.motor.set_throttle(throttle)
+                self.motor.drive(steering, throttle)
+                profiler.lap("motor")
 
                 # 4. データログ記録
                 self.logger.log(steering, throttle, distances, state)
+                profiler.lap("log")
 
                 # 5. デバッグ表示
                 self.loop_count += 1
                 if ENABLE_DEBUG_LOG and self.loop_count % DEBUG_PRINT_INTERVAL == 0:
                     debug_msg = self.controller.format_debug_info(distances, steering, throttle)
                     print(debug_msg)
+                profiler.lap("print")
 
                 # 6. 周期待ち
-                time.sleep(CONTROL_INTERVAL)
+                self.rate.wait()
+                profiler.lap("wait")
 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, ReplayFinished):
             print("\n" + "-" * 50)
             print("停止信号を受信しました")
 
@@ -103,11 +156,23 @@ class MiniCarRuleBased:
     def shutdown(self):
         """終了処理"""
         print("システム終了処理...")
+        self.realtime.leave()
         self.logger.stop()
+        if self.rate.cycles:
+            print(self.rate.summary())
+        self._export_profile()
         self.motor.cleanup()
         self.sensor.cleanup()
         print("正常に終了しました")
 
+    def _export_profile(self):
+        """段ごとの処理時間を表示し、ログ記録中ならCSVの隣にJSONで保存"""
+        if not self.profiler.enabled:
+            return
+        print(self.profiler.report())
+        if self.logger.file_path is not None:
+            self.profiler.dump(os.path.splitext(str(self.logger.file_path))[0] + "_profile.json")
+
 
 def main():
     """エントリーポイント"""
@@ -116,17 +181,25 @@ def main():
     parser = argparse.ArgumentParser(description='ルールベース走行システム')
     parser.add_argument('--no-log', action='store_true',
                        help='データログ記録を無効化')
+    parser.add_argument('--replay', metavar='CSV',
+                       help='実機の代わりに記録ログ（driving_log / record_data）を再生')
+    parser.add_argument('--fast', action='store_true',
+                       help='リプレイを記録時のタイミングを無視して最速で回す')
+    parser.add_argument('--realtime', action='store_true', default=REALTIME_MODE,
+                       help='制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す')
     args = parser.parse_args()
 
-    car = MiniCarRuleBased(enable_logging=not args.no_log)
+    car = MiniCarRuleBased(enable_logging=not args.no_log,
+                           replay=args.replay, fast=args.fast, realtime=args.realtime)
 
     if not car.initialize():
         print("初期化に失敗しました。終了します。")
         sys.exit(1)
 
     # 開始前の確認
-    print("\nEnterキーを押すと走行を開始します...")
-    input()
+    if not args.replay:
+        print("\nEnterキーを押すと走行を開始します...")
+        input()
 
     car.run()
 
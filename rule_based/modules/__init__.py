@@ -1,4 +1,12 @@
 # Rule-based driving modules
+import os
+import sys
+
+# リポジトリ直下の common/ を import できるようにする
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
 from .sensor import SensorManager
 from .motor import MotorController
 from .controller import DrivingController
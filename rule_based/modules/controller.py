@@ -20,7 +20,9 @@ from config.settings import (
     SPEED_SLOW, SPEED_MEDIUM, SPEED_FAST,
     THROTTLE_NEUTRAL,
     SENSOR_INVALID_VALUE,
-    ENABLE_DEBUG_LOG
+    ENABLE_DEBUG_LOG,
+    CONTROL_INTERVAL,
+    RANGE_FILTER_ENABLED, RANGE_FILTER_ACCEL_STD, RANGE_FILTER_MEASUREMENT_STD
 )
 
 
@@ -46,6 +48,20 @@ class DrivingController:
         self.prev_error = 0.0
         self.integral_error = 0.0
         
+        # 距離フィルタ（有効時のみ numpy を読み込む）
+        self.range_filter = None
+        if RANGE_FILTER_ENABLED:
+            from common.range_filter import RangeFilter
+            self.range_filter = RangeFilter(
+                accel_std=RANGE_FILTER_ACCEL_STD,
+                measurement_std=RANGE_FILTER_MEASUREMENT_STD,
+                invalid_value=SENSOR_INVALID_VALUE,
+            )
+        self.ranges = None
+        # フィルタに渡す時刻。実時間ではなく1周期ごとに CONTROL_INTERVAL 進める
+        # （リプレイの最速再生やシミュレーターでは呼び出し間隔が実際の周期と違うため）
+        self._filter_time = 0.0
+        
         # 現在の走行状態
         self.current_state = DrivingState.WALL_FOLLOW
         
@@ -62,6 +78,10 @@ class DrivingController:
         Returns:
             tuple: (steering_angle, throttle_value, state)
         """
+        if self.range_filter is not None:
+            self._filter_time += CONTROL_INTERVAL
+            self.ranges = self.range_filter.update(distances, now=self._filter_time)
+        
         # センサー値を展開（実際の配置に合わせた名前）
         Left, FrontLeft, Center, FrontRight, Right = distances
         
@@ -120,14 +140,21 @@ class DrivingController:
             # 真左のセンサーで壁との距離を維持
             # 斜め左前も参考にして、壁に近づきすぎを早期検出
             wall_distance = Left
+            wall_channel, wall_scale = 0, 1.0
             
             # 斜め左前が近い場合は、壁に寄りすぎている可能性
             if FrontLeft < Left * 0.8 and FrontLeft < TARGET_WALL_DISTANCE:
                 # 斜め左前の値を重視（壁に向かっている）
                 wall_distance = FrontLeft * 0.9
+                wall_channel, wall_scale = 1, 0.9
+            
+            # フィルタ有効時は推定した変化率を微分項に使う
+            wall_rate = None
+            if self.ranges is not None and self.ranges.valid[wall_channel]:
+                wall_rate = float(self.ranges.velocity[wall_channel]) * wall_scale
             
             # PD制御の計算
-            steering, error = self._compute_pid(wall_distance)
+            steering, error = self._compute_pid(wall_distance, wall_rate)
             
             # 誤差が小さく、前方が開けていれば直進モードで速度アップ
             if abs(error) < STRAIGHT_ERROR_THRESHOLD and Center > CORNER_FRONT_DISTANCE * 1.5:
@@ -140,12 +167,13 @@ class DrivingController:
         self.current_state = state
         return steering, throttle, state
     
-    def _compute_pid(self, wall_distance):
+    def _compute_pid(self, wall_distance, wall_rate=None):
         """
         PD制御によるステアリング計算
         
         Args:
             wall_distance: 左壁との距離 (mm)
+            wall_rate: 左壁との距離の変化率 (mm/s)。Noneなら前回誤差との差分を使う
         
         Returns:
             tuple: (steering_angle, error)
@@ -154,7 +182,11 @@ class DrivingController:
         error = TARGET_WALL_DISTANCE - wall_distance
         
         # 微分項（誤差の変化率）
-        derivative = error - self.prev_error
+        if wall_rate is not None:
+            # 誤差の変化率は壁距離の変化率の符号反転。KDの単位に合わせて1周期あたりに換算
+            derivative = -wall_rate * CONTROL_INTERVAL
+        else:
+            derivative = error - self.prev_error
         
         # 積分項（通常は使用しない）
         self.integral_error += error
@@ -1,18 +1,24 @@
 """
 モーター制御モジュール (PCA9685 + サーボ/ESC)
 ステアリングとスロットルを制御
+
+duty は PWMWriter 経由で書き込む。前回と同じ値なら I2C に出さず、
+drive() でステアリングとスロットルが両方変わったときは1回のバースト書き込みで更新する。
+スロットルは ESCStateMachine を通して出力する（アーミングと後退切り替えを待ちなしで行う）。
 """
 
 import board
-import time
 from adafruit_pca9685 import PCA9685
-from adafruit_motor import servo
 
+from common.duty_table import esc_table, steering_table
+from common.esc import ESCStateMachine
+from common.pwm_writer import PWMWriter
 from config.settings import (
     PCA9685_FREQUENCY,
     SERVO_CHANNEL, SERVO_MIN_PULSE, SERVO_MAX_PULSE,
     SERVO_CENTER, SERVO_LEFT, SERVO_RIGHT,
     ESC_CHANNEL, ESC_MIN_PULSE, ESC_MAX_PULSE,
+    ESC_ARMING_TIME, ESC_REVERSE_BRAKE_TIME, ESC_REVERSE_NEUTRAL_TIME,
     THROTTLE_NEUTRAL
 )
 
@@ -29,8 +35,14 @@ class MotorController:
         """
         self.i2c = i2c if i2c else board.I2C()
         self.pca = None
-        self.steering_servo = None
-        self.esc_channel = None
+        self.pwm = None
+        self._steering_duty = None
+        self._throttle_duty = None
+        self.esc = ESCStateMachine(
+            arming_time=ESC_ARMING_TIME,
+            brake_time=ESC_REVERSE_BRAKE_TIME,
+            neutral_time=ESC_REVERSE_NEUTRAL_TIME
+        )
         
     def initialize(self):
         """
@@ -41,24 +53,20 @@ class MotorController:
         """
         print("モーターコントローラー初期化開始...")
         
-        # PCA9685の設定
+        # PCA9685の設定（frequency の設定でオートインクリメントも有効になる）
         self.pca = PCA9685(self.i2c)
         self.pca.frequency = PCA9685_FREQUENCY
+        self.pwm = PWMWriter(self.i2c)
         
-        # サーボ設定（ステアリング）
-        self.steering_servo = servo.Servo(
-            self.pca.channels[SERVO_CHANNEL],
-            min_pulse=SERVO_MIN_PULSE,
-            max_pulse=SERVO_MAX_PULSE
+        # 角度・スロットル → duty の参照テーブル（毎回のパルス幅計算を省く）
+        self._steering_duty = steering_table(
+            PCA9685_FREQUENCY, SERVO_MIN_PULSE, SERVO_MAX_PULSE, SERVO_LEFT, SERVO_RIGHT
         )
+        self._throttle_duty = esc_table(PCA9685_FREQUENCY, ESC_MIN_PULSE, ESC_MAX_PULSE)
         
-        # ESC設定（モーター）- duty_cycleで直接制御
-        self.esc_channel = self.pca.channels[ESC_CHANNEL]
-        
-        # 初期位置に設定
-        self.set_steering_angle(SERVO_CENTER)
-        self.set_throttle(THROTTLE_NEUTRAL)
-        time.sleep(0.5)
+        # 初期位置に設定（アーミングはニュートラルを送りながら時間経過で完了する）
+        self.esc.arm()
+        self.drive(SERVO_CENTER, THROTTLE_NEUTRAL)
         
         print(f"  ステアリング: 左={SERVO_LEFT}° 中央={SERVO_CENTER}° 右={SERVO_RIGHT}°")
         print(f"  ESCパルス: {ESC_MIN_PULSE}us ~ {ESC_MAX_PULSE}us")
@@ -77,7 +85,7 @@ class MotorController:
         """
         # 範囲制限
         angle = max(SERVO_LEFT, min(SERVO_RIGHT, angle))
-        self.steering_servo.angle = angle
+        self.pwm.write(SERVO_CHANNEL, self._steering_duty(angle))
         return angle
     
     def set_steering_normalized(self, value):
@@ -107,35 +115,41 @@ class MotorController:
         Returns:
             float: 設定した値
         """
-        # ESCのニュートラルは中間パルス幅
-        neutral_pulse = (ESC_MIN_PULSE + ESC_MAX_PULSE) / 2  # 1550us
-        
-        if value > 0:  # 前進
-            pulse_us = neutral_pulse + (value * (ESC_MAX_PULSE - neutral_pulse))
-        elif value < 0:  # 後退
-            pulse_us = neutral_pulse + (value * (neutral_pulse - ESC_MIN_PULSE))
-        else:  # 停止
-            pulse_us = neutral_pulse
-        
-        # パルス幅を範囲内にクリップ
-        pulse_us = max(ESC_MIN_PULSE, min(ESC_MAX_PULSE, pulse_us))
-        
-        # Duty Cycle計算 (16-bit: 0-65535)
-        # duty_cycle = (pulse_us / 周期us) * 65535
-        period_us = 1000000 / PCA9685_FREQUENCY  # 50Hz = 20000us
-        duty = int((pulse_us / period_us) * 65535)
-        self.esc_channel.duty_cycle = duty
-        
+        self.pwm.write(ESC_CHANNEL, self._throttle_duty(self.esc.update(value)))
         return value
     
+    def drive(self, steering, throttle_value):
+        """
+        ステアリングとスロットルを同時に設定（両方変わったときは1回の書き込み）
+        
+        Args:
+            steering: ステアリング角度
+            throttle_value: スロットル値 (-1.0〜1.0)
+        """
+        angle = max(SERVO_LEFT, min(SERVO_RIGHT, steering))
+        self.pwm.update({
+            SERVO_CHANNEL: self._steering_duty(angle),
+            ESC_CHANNEL: self._throttle_duty(self.esc.update(throttle_value)),
+        })
+    
     def stop(self):
         """緊急停止（モーター停止 + ステアリング中央）"""
-        self.set_throttle(THROTTLE_NEUTRAL)
-        self.set_steering_angle(SERVO_CENTER)
+        self.drive(SERVO_CENTER, THROTTLE_NEUTRAL)
+    
+    @property
+    def saved_writes(self):
+        """キャッシュとバースト書き込みで省いたI2C書き込みの数"""
+        return self.pwm.saved_writes if self.pwm else 0
     
     def cleanup(self):
         """モーターコントローラーのクリーンアップ"""
-        self.stop()
+        if self.esc.reverse_count:
+            reverse = self.esc.reverse_latency_stats()
+            print(f"  後退切り替え: {reverse['count']}回 (平均 {reverse['mean'] * 1000:.0f}ms / "
+                  f"最大 {reverse['max'] * 1000:.0f}ms)")
+        if self.pwm:
+            self.stop()
+            print(f"  PCA9685書き込み: {self.pwm.writes}回 (省略 {self.pwm.saved_writes}回)")
         if self.pca:
             self.pca.deinit()
         print("モーターコントローラーをクリーンアップしました")
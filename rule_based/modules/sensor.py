@@ -8,26 +8,38 @@ import time
 from digitalio import DigitalInOut, Direction
 import adafruit_vl53l4cd
 
+from common.acquisition import AcquisitionThread
+from common.vl53l4cd_fast import FastRangingReader
 from config.settings import (
     XSHUT_PINS, SENSOR_BASE_ADDRESS,
     SENSOR_TIMING_BUDGET, SENSOR_INTER_MEASUREMENT,
-    SENSOR_INVALID_VALUE
+    SENSOR_INVALID_VALUE,
+    SENSOR_BACKGROUND_ACQUISITION, SENSOR_POLL_INTERVAL,
+    SENSOR_FAST_PATH
 )
 
 
 class SensorManager:
     """VL53L4CDセンサーを管理するクラス"""
     
-    def __init__(self, i2c=None):
+    def __init__(self, i2c=None, background=None, fast_path=None, thread_setup=None):
         """
         センサーマネージャーの初期化
         
         Args:
             i2c: I2Cバスインスタンス（Noneの場合は自動作成）
+            background: Trueで専用スレッドによる連続測距（Noneは設定値に従う）
+            fast_path: Trueで結果レジスタのバースト読みを使う（Noneは設定値に従う）
+            thread_setup: 測距スレッドの開始時にそのスレッドで呼ぶ関数（RealtimeRuntime.apply_to_current_thread など）
         """
         self.i2c = i2c if i2c else board.I2C()
         self.sensors = []
+        self.readers = []
         self.xshuts = []
+        self.background = SENSOR_BACKGROUND_ACQUISITION if background is None else background
+        self._acquisition = None
+        self.thread_setup = thread_setup
+        self.fast_path = SENSOR_FAST_PATH if fast_path is None else fast_path
         
     def initialize(self):
         """
@@ -67,6 +79,9 @@ class SensorManager:
                 # 距離測定を開始
                 sensor.start_ranging()
                 self.sensors.append(sensor)
+                self.readers.append(
+                    FastRangingReader(self.i2c, new_address) if self.fast_path else None
+                )
                 
                 labels = ["左外", "左内", "正面", "右内", "右外"]
                 print(f"  センサー{i} ({labels[i]}): 0x{new_address:02X} で初期化完了")
@@ -74,12 +89,21 @@ class SensorManager:
             except Exception as e:
                 print(f"  センサー{i} 初期化エラー: {e}")
                 self.sensors.append(None)
+                self.readers.append(None)
         
         active_count = sum(1 for s in self.sensors if s is not None)
         if active_count == 0:
             raise RuntimeError("エラー: センサーが1つも初期化できませんでした")
         
         print(f"センサー初期化完了: {active_count}/5 個が有効")
+
+        if self.background:
+            self._acquisition = AcquisitionThread(
+                self._poll_channel, len(self.sensors), poll_interval=SENSOR_POLL_INTERVAL,
+                on_start=self.thread_setup
+            )
+            self._acquisition.start()
+            print("バックグラウンド測距を開始しました")
         return True
     
     def read_distances(self):
@@ -89,6 +113,9 @@ class SensorManager:
         Returns:
             list: [L_out, L_in, Center, R_in, R_out] の距離リスト (mm)
         """
+        if self._acquisition is not None:
+            return self._read_latest()
+
         distances = []
         
         for idx, sensor in enumerate(self.sensors):
@@ -99,21 +126,14 @@ class SensorManager:
             try:
                 # タイムアウト付きでデータ待ち
                 timeout = 0
-                while not sensor.data_ready:
+                while not self._data_ready(idx, sensor):
                     time.sleep(0.001)
                     timeout += 1
                     if timeout > 50:  # 50ms タイムアウト
                         distances.append(SENSOR_INVALID_VALUE)
                         break
                 else:
-                    sensor.clear_interrupt()
-                    # VL53L4CDライブラリはcmで返すのでmmに変換
-                    dist_mm = sensor.distance * 10
-                    
-                    # 無効な値のチェック
-                    if dist_mm <= 0 or dist_mm > 3000:
-                        dist_mm = SENSOR_INVALID_VALUE
-                    distances.append(dist_mm)
+                    distances.append(self._fetch_distance(idx, sensor))
                     
             except Exception as e:
                 distances.append(SENSOR_INVALID_VALUE)
@@ -123,9 +143,60 @@ class SensorManager:
             distances.append(SENSOR_INVALID_VALUE)
         
         return distances[:5]
+
+    def _read_latest(self):
+        """バックグラウンド測距の最新値を返す（待ちなし）"""
+        distances = [SENSOR_INVALID_VALUE] * 5
+        for idx, sample in enumerate(self._acquisition.snapshot()[:5]):
+            if sample is not None:
+                distances[idx] = sample[0]
+        return distances
+
+    def _poll_channel(self, idx):
+        """
+        1チャンネルを待たずに確認する（測距スレッドから呼ばれる）
+
+        Returns:
+            新しい測定値があれば距離(mm)、未準備ならNone
+        """
+        sensor = self.sensors[idx]
+        if sensor is None:
+            return None
+        try:
+            if not self._data_ready(idx, sensor):
+                return None
+            return self._fetch_distance(idx, sensor)
+        except Exception:
+            return SENSOR_INVALID_VALUE
+
+    def _data_ready(self, idx, sensor):
+        """新しい測定結果があるか"""
+        reader = self.readers[idx]
+        return reader.data_ready if reader is not None else sensor.data_ready
+
+    def _fetch_distance(self, idx, sensor):
+        """割り込みをクリアして距離(mm)を取得"""
+        reader = self.readers[idx]
+        if reader is not None:
+            # 距離(mm)を1回で読み、クリアも1回の書き込みで済ませる
+            # （adafruit の distance と同じくレンジステータスでは捨てない）
+            _, dist_mm = reader.fetch()
+        else:
+            sensor.clear_interrupt()
+            # VL53L4CDライブラリはcmで返すのでmmに変換
+            dist_mm = sensor.distance * 10
+
+        # 無効な値のチェック
+        if dist_mm <= 0 or dist_mm > 3000:
+            dist_mm = SENSOR_INVALID_VALUE
+        return dist_mm
     
     def cleanup(self):
         """センサーのクリーンアップ"""
+        if self._acquisition is not None:
+            self._acquisition.stop()
+            self._acquisition = None
+
         for sensor in self.sensors:
             if sensor is not None:
                 try:
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+一括シミュレーション (modules/batch.py) と元の制御クラスの整合確認
+
+調整値を車ごとにばらつかせた N台を一括で走らせ、同じ調整値を設定・クラス定数に上書きした
+元の制御クラスを1台ずつ Simulation で走らせて、周期ごとのステアリング・スロットル・位置を比べる。
+センサーノイズなし（乱数の使い方が違うため）で比べる。一致しなければ終了コード 1。
+
+使用方法:
+    python check_parity.py                      # state と potential を各 64台・30秒
+    python check_parity.py state --cars 20 --duration 60
+"""
+
+import sys
+
+import numpy as np
+
+from config import settings as cfg
+from modules import BatchSimulation, Simulation, BATCH_CONTROLLERS
+
+# 比べる値と許容誤差（同じ計算順なので本来は完全に一致する）
+TOLERANCE = 1e-6
+
+
+def perturbed_params(controller, n, seed, spread=0.2):
+    """0台目は既定値、それ以外は全部の調整値を既定値の ±spread 倍の範囲でばらつかせる"""
+    sim = BatchSimulation(controller, cfg, n)
+    defaults = sim.new_controller(0.0).params
+    rng = np.random.default_rng(seed)
+    params = {}
+    for name, values in defaults.items():
+        scale = rng.uniform(1.0 - spread, 1.0 + spread, n)
+        scale[0] = 1.0
+        params[name] = values * scale
+    return params
+
+
+def compare(controller, n, duration, seed):
+    """
+    Returns:
+        bool: 全車一致したか
+    """
+    params = perturbed_params(controller, n, seed)
+    batch = BatchSimulation(controller, cfg, n, params=params, noise_std=0.0, record=True)
+    batch_result = batch.run(duration)
+    param_sets = batch.new_controller(0.0)
+
+    ok = True
+    for i in range(n):
+        single = Simulation(controller, cfg, noise_std=0.0, record=True, params=param_sets.param_set(i))
+        result = single.run(duration)
+        worst = 0.0
+        mismatch = None
+        if len(single.trace) > len(batch.trace):
+            mismatch = f"一括側が {len(batch.trace)} 周期で終了（1台側は {len(single.trace)} 周期）"
+        for step, row in enumerate(single.trace):
+            if mismatch is not None:
+                break
+            now, x, y, heading, speed, steering, throttle = row[:7]
+            b_now, b_x, b_y, b_heading, b_speed, b_steering, b_throttle, _ = batch.trace[step]
+            diff = max(abs(x - b_x[i]), abs(y - b_y[i]), abs(heading - b_heading[i]),
+                       abs(steering - b_steering[i]), abs(throttle - b_throttle[i]))
+            worst = max(worst, diff)
+            if diff > TOLERANCE:
+                mismatch = (f"{step}周期目 ({now - 1000:.2f}s, {row[7]}) で不一致: "
+                            f"ステアリング {steering:.3f} / {b_steering[i]:.3f}, "
+                            f"スロットル {throttle:.3f} / {b_throttle[i]:.3f}, "
+                            f"位置 ({x:.1f}, {y:.1f}) / ({b_x[i]:.1f}, {b_y[i]:.1f})")
+        if mismatch is None and (result["crashed"] != batch_result["crashed"][i]
+                                 or abs(result["laps"] - batch_result["laps"][i]) > TOLERANCE):
+            mismatch = (f"結果が不一致: 周回 {result['laps']:.3f} / {batch_result['laps'][i]:.3f}, "
+                        f"衝突 {result['crashed']} / {batch_result['crashed'][i]}")
+        status = "OK " if mismatch is None else "NG "
+        print(f"  {status}{i:3d}台目 {len(single.trace):5d}周期 周回 {result['laps']:+.2f} "
+              f"{'衝突' if result['crashed'] else '衝突なし'} 最大差 {worst:.1e}")
+        if mismatch is not None:
+            print(f"      {mismatch}")
+            ok = False
+    return ok
+
+
+def main():
+    """エントリーポイント"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='一括シミュレーションと元の制御クラスの整合確認')
+    parser.add_argument('controllers', nargs='*', default=list(BATCH_CONTROLLERS),
+                        help=f"確かめる制御クラス（{', '.join(BATCH_CONTROLLERS)}）")
+    parser.add_argument('--cars', '-n', type=int, default=64,
+                        help='台数（0台目は既定の調整値。52台以上で一括側は光線の多いときの計算になる）')
+    parser.add_argument('--duration', '-d', type=float, default=30.0, help='模擬走行時間（秒）')
+    parser.add_argument('--seed', type=int, default=0, help='調整値をばらつかせる乱数の種')
+    args = parser.parse_args()
+
+    ok = True
+    for name in args.controllers:
+        if name not in BATCH_CONTROLLERS:
+            parser.error(f"一括シミュレーションできない制御クラス: {name}")
+        print(f"{name}: {args.cars}台 × {args.duration:.0f}秒")
+        ok &= compare(name, args.cars, args.duration, args.seed)
+    print("一致しました" if ok else "不一致があります")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Course simulator configuration
+from .settings import *
@@ -0,0 +1,91 @@
+"""
+コースシミュレーターの設定ファイル
+実機なしで各制御クラスを 10m×5.5m・中央に島のあるコースで走らせる（距離は mm、角度は度）
+"""
+
+# ===========================================
+# コース
+# ===========================================
+COURSE_WIDTH = 10000    # 外壁の横幅 (mm)
+COURSE_HEIGHT = 5500    # 外壁の縦幅 (mm)
+COURSE_LANE_WIDTH = 2500  # 外壁から中央の島までの通路幅 (mm、島は 5000×500 の仕切り)
+
+# スタート位置（下側の通路で島を左に見て右向き = 左手法で反時計回り）
+START_X = 5000
+START_Y = 2070          # 島まで TARGET_LEFT_DISTANCE (430mm) 程度
+START_HEADING = 0.0     # 0=右向き、反時計回りが正
+
+# ===========================================
+# 車両モデル (キネマティック自転車モデル)
+# ===========================================
+WHEELBASE = 260         # ホイールベース (mm)
+CAR_RADIUS = 130        # 衝突判定の半径 (mm、後輪軸から CAR_CENTER_OFFSET 前の点が中心)
+CAR_CENTER_OFFSET = 130
+
+# サーボ角度 → 前輪の切れ角（サーボ角が小さいほど左）
+SERVO_CENTER = 114
+STEER_GAIN = 0.8        # 前輪の切れ角 / サーボ角の変化
+MAX_WHEEL_ANGLE = 28.0  # 前輪の最大切れ角
+
+# スロットル → 速度（一次遅れで目標速度に近づく）
+MAX_SPEED = 3000        # スロットル 1.0 の速度 (mm/s)
+THROTTLE_DEADBAND = 0.15  # これ以下のスロットルでは進まない
+SPEED_TIME_CONSTANT = 0.25  # 速度の応答の時定数 (秒)
+
+# ===========================================
+# 測距センサー (VL53L4CD × 5)
+# ===========================================
+# 後輪軸中心から見た取り付け位置 (前 mm, 左 mm, 向き 度)
+# [真左, 斜め左前, 正面, 斜め右前, 真右]
+SENSOR_MOUNTS = [
+    (150, 70, 90.0),
+    (230, 50, 45.0),
+    (250, 0, 0.0),
+    (230, -50, -45.0),
+    (150, -70, -90.0),
+]
+SENSOR_NOISE_STD = 0.0  # 測定ノイズの標準偏差 (mm)
+# 最大測定距離・無効値は走らせる制御クラスのプロジェクトの SENSOR_MAX_RANGE / SENSOR_INVALID_VALUE
+# （ないプロジェクトではこの値）
+SENSOR_MAX_RANGE = 1300
+SENSOR_INVALID_VALUE = 9999
+
+# ===========================================
+# シミュレーション
+# ===========================================
+DEFAULT_CONTROLLER = "state"
+SIM_DT = 0.04           # 制御周期 (秒)
+SIM_SUBSTEPS = 4        # 1制御周期あたりの車両モデルの積分回数
+SIM_DURATION = 60.0     # 既定の模擬走行時間 (秒)
+STOP_ON_CRASH = True    # 壁に当たったら終了
+
+# ===========================================
+# 自動調整 (tune.py)
+# ===========================================
+TUNE_CONTROLLER = "state"
+TUNE_DURATION = 60.0        # 1候補を1つの種で走らせる模擬時間 (秒)
+TUNE_SEEDS = (0, 1, 2)      # センサーノイズの乱数の種（候補ごとにこの全部で走らせて平均する）
+TUNE_NOISE_STD = 10.0       # 調整中の測定ノイズの標準偏差 (mm)
+TUNE_WORKERS = None         # 評価するプロセス数（None: CPU の数、0: プロセスを分けない）
+TUNE_BUDGET = 200           # random / cmaes で評価する候補の数
+TUNE_GRID_POINTS = 3        # grid で範囲指定の調整値を何点に分けるか
+TUNE_RESULTS_DIR = "tune_results"  # 評価結果のキャッシュとプロファイルの出力先（simulator/ からの相対）
+
+# 評価値（小さいほど良い）= 周回時間 + 壁への接触回数 × TUNE_CONTACT_WEIGHT + Σ 状態に入った回数 × 重み
+# 周回時間は 走った時間 / 周回数（1周に届かなくても進み具合で比べられる。上限 TUNE_MAX_LAP_TIME）
+TUNE_MAX_LAP_TIME = 120.0
+TUNE_CONTACT_WEIGHT = 100.0
+TUNE_STATE_WEIGHTS = {"EMERGENCY": 5.0, "RECOVER": 10.0}
+
+# 探索範囲: 名前 → (下限, 上限) / (下限, 上限, "int") / [候補の値, ...]
+# 名前は制御クラスのプロジェクトの config/settings.py の定数か、制御クラスのクラス定数
+TUNE_SPACE = {
+    "FRONT_BLOCKED_THRESHOLD": (450, 850),
+    "LEFT_OPENING_DELTA": (80, 200),
+    "TARGET_LEFT_DISTANCE": (350, 550),
+    "WALL_FOLLOW_KP": (0.05, 0.3),
+    "LOOKAHEAD_KP": (0.0, 0.2),
+    "STEER_SMOOTHING": (0.3, 0.8),
+    "MAX_STEER_STEP": (2.0, 10.0),
+    "FRONT_BLOCKED_CONFIRM": (1, 5, "int"),
+}
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+コースシミュレーター メインプログラム
+実機なしで制御クラスを 10m×5.5m・中央に島のあるコースで走らせ、周回数・衝突・速度を表示する
+
+使用方法:
+    python main.py                          # 既定の制御クラス (state) を SIM_DURATION 秒
+    python main.py hybrid potential rule    # 複数の制御クラスを順に
+    python main.py state --duration 120 --trace state.csv
+    python main.py state --batch 10000 --noise 10   # 一括シミュレーションで N台を同時に
+"""
+
+import csv
+
+from config import settings as cfg
+from modules import Simulation, BatchSimulation, BATCH_CONTROLLERS
+from common.controller_loader import CONTROLLERS
+
+
+def format_result(r):
+    """結果の表示用の1行"""
+    crash = f"衝突 {r['crash_time']:.1f}s" if r["crashed"] else "衝突なし"
+    return (f"{r['controller']:<14}{r['laps']:>+7.2f}周 {r['distance_m']:>7.1f}m "
+            f"平均 {r['mean_speed']:.2f}m/s 最小間隔 {r['min_clearance']:.0f}mm {crash} | "
+            f"模擬 {r['sim_time']:.1f}s / 実 {r['wall_time']:.2f}s ({r['speedup']:.0f}倍)")
+
+
+def format_batch_result(r):
+    """一括シミュレーションの結果の表示（周回数の分布と速さ）"""
+    laps = r["laps"]
+    return (f"{r['controller']:<14}{r['n']}台 周回 平均 {laps.mean():+.2f} / 最小 {laps.min():+.2f} / "
+            f"最大 {laps.max():+.2f} 衝突 {r['crashed'].mean() * 100:.1f}% | "
+            f"模擬 {r['sim_time']:.1f}s / 実 {r['wall_time']:.2f}s "
+            f"({r['car_steps_per_s'] / 1e3:.0f}k 台・周期/s)")
+
+
+def main():
+    """エントリーポイント"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='コースシミュレーター')
+    parser.add_argument('controllers', nargs='*', default=[cfg.DEFAULT_CONTROLLER],
+                        help=f"走らせる制御クラス（{', '.join(CONTROLLERS)}）")
+    parser.add_argument('--duration', '-d', type=float, default=cfg.SIM_DURATION,
+                        help='模擬走行時間（秒）')
+    parser.add_argument('--noise', type=float, default=None,
+                        help='センサーの測定ノイズの標準偏差 (mm)')
+    parser.add_argument('--seed', type=int, default=0, help='ノイズの乱数の種')
+    parser.add_argument('--trace', metavar='CSV',
+                        help='周期ごとの位置・指令・センサー値を CSV に保存（制御クラスが1つのとき）')
+    parser.add_argument('--verbose', action='store_true', help='制御クラスの print を表示')
+    parser.add_argument('--batch', type=int, metavar='N',
+                        help=f"N台を一括シミュレーションで同時に走らせる（{', '.join(BATCH_CONTROLLERS)}）")
+    args = parser.parse_args()
+
+    for name in args.controllers:
+        if name not in CONTROLLERS:
+            parser.error(f"未知の制御クラス: {name}")
+    if args.trace and len(args.controllers) != 1:
+        parser.error("--trace は制御クラスが1つのときだけ使えます")
+    if args.batch:
+        for name in args.controllers:
+            if name not in BATCH_CONTROLLERS:
+                parser.error(f"一括シミュレーションできない制御クラス: {name}")
+            sim = BatchSimulation(name, cfg, args.batch, seed=args.seed, noise_std=args.noise)
+            print(format_batch_result(sim.run(args.duration)))
+        return
+
+    for name in args.controllers:
+        sim = Simulation(name, cfg, seed=args.seed, noise_std=args.noise,
+                         record=bool(args.trace), verbose=args.verbose)
+        result = sim.run(args.duration)
+        print(format_result(result))
+        if args.trace:
+            with open(args.trace, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(Simulation.TRACE_HEADER)
+                writer.writerows(sim.trace)
+            print(f"軌跡を保存しました: {args.trace} ({len(sim.trace)} 行)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+# Course simulator modules
+import os
+import sys
+
+# リポジトリ直下の common/ を import できるようにする
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+from .track import Track
+from .vehicle import Vehicle
+from .rangefinder import cast_rays, to_readings
+from .simulation import Simulation, SimClock
+from .batch import BatchSimulation, BATCH_CONTROLLERS
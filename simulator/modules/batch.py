@@ -0,0 +1,567 @@
+"""
+N台の車を同じ周期でまとめて進める一括シミュレーション
+
+位置・センサー値・制御クラスの内部状態を (N,) の配列で持ち、1周期を N台分の NumPy 演算で進める。
+制御則は state_machine_fast の StateController（左壁沿いの状態機械）と potential_field の
+PotentialController（仮想ポテンシャル法）を配列で書き直したもので、調整値は車ごとに変えられる。
+
+    sim = BatchSimulation("state", cfg, 10000, params={"WALL_FOLLOW_KP": np.linspace(0.05, 0.3, 10000)})
+    result = sim.run(15.0)
+    print(result["laps"].max(), result["crashed"].mean())
+
+1台ずつの Simulation（元の制御クラス）と同じ結果になることは simulator/check_parity.py で確かめる。
+"""
+
+import math
+import time
+
+import numpy as np
+
+from common.controller_loader import CONTROLLERS, import_isolated
+
+from .rangefinder import to_readings
+from .simulation import SimClock, _ensure_hardware_modules
+from .track import Track
+
+
+class BatchVehicles:
+    """Vehicle（キネマティック自転車モデル）を N台分の配列で持つ"""
+
+    def __init__(self, cfg, n, x, y, heading):
+        self.n = n
+        self.x = np.full(n, float(x))
+        self.y = np.full(n, float(y))
+        self.heading = np.full(n, float(heading))
+        self.speed = np.zeros(n)
+        self.odometer = np.zeros(n)
+
+        self.wheelbase = cfg.WHEELBASE
+        self.servo_center = cfg.SERVO_CENTER
+        self.steer_gain = math.radians(cfg.STEER_GAIN)
+        self.max_wheel_angle = math.radians(cfg.MAX_WHEEL_ANGLE)
+        self.max_speed = cfg.MAX_SPEED
+        self.deadband = cfg.THROTTLE_DEADBAND
+        self.time_constant = cfg.SPEED_TIME_CONSTANT
+        self.center_offset = cfg.CAR_CENTER_OFFSET
+
+        mounts = np.asarray(cfg.SENSOR_MOUNTS, dtype=float)
+        self._mount_x = mounts[:, 0]
+        self._mount_y = mounts[:, 1]
+        self._mount_angle = np.radians(mounts[:, 2])
+
+    def step(self, servo_angle, throttle, dt, substeps, active):
+        """指令を dt 秒間保持して進める（active が False の車は止めたまま）"""
+        angle = (self.servo_center - servo_angle) * self.steer_gain
+        tan_delta = np.tan(np.clip(angle, -self.max_wheel_angle, self.max_wheel_angle))
+        magnitude = np.abs(throttle)
+        target = (np.minimum(magnitude, 1.0) - self.deadband) / (1.0 - self.deadband) * self.max_speed
+        target = np.where(magnitude <= self.deadband, 0.0, np.where(throttle > 0, target, -target))
+        h = dt / substeps
+        alpha = 1.0 - math.exp(-h / self.time_constant)
+        x, y, heading, speed = self.x, self.y, self.heading, self.speed
+        travelled = np.zeros(self.n)
+        for _ in range(substeps):
+            speed = speed + (target - speed) * alpha
+            x = x + speed * np.cos(heading) * h
+            y = y + speed * np.sin(heading) * h
+            heading = heading + speed / self.wheelbase * tan_delta * h
+            travelled = travelled + np.abs(speed) * h
+        self.x = np.where(active, x, self.x)
+        self.y = np.where(active, y, self.y)
+        self.heading = np.where(active, heading, self.heading)
+        self.speed = np.where(active, speed, self.speed)
+        self.odometer = self.odometer + np.where(active, travelled, 0.0)
+
+    def center(self):
+        """衝突判定の中心 (N, 2)"""
+        return np.column_stack((self.x + self.center_offset * np.cos(self.heading),
+                                self.y + self.center_offset * np.sin(self.heading)))
+
+    def sensor_rays(self):
+        """
+        全車のセンサーの光線
+
+        Returns:
+            tuple: (始点 (N*5, 2), 向きの単位ベクトル (N*5, 2))。車ごとに [真左, 斜め左前, 正面, 斜め右前, 真右] の順
+        """
+        c = np.cos(self.heading)[:, None]
+        s = np.sin(self.heading)[:, None]
+        mx = self._mount_x[None, :]
+        my = self._mount_y[None, :]
+        origins = np.stack((self.x[:, None] + mx * c - my * s, self.y[:, None] + mx * s + my * c), axis=-1)
+        angles = self._mount_angle[None, :] + self.heading[:, None]
+        directions = np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+        return origins.reshape(-1, 2), directions.reshape(-1, 2)
+
+
+class _BatchController:
+    """一括制御クラスの共通部分（車ごとの調整値の配列）"""
+
+    # 車ごとに変えられる調整値（settings の名前とクラス定数の名前）
+    TUNABLE = ()
+
+    def __init__(self, n, module, settings, class_name, params=None):
+        self.n = n
+        cls = getattr(module, class_name)
+        # クラス定数は設定の CONTROLLER_CONSTANTS（自動調整のプロファイル）で上書きされていればその値
+        self.constants = getattr(settings, "CONTROLLER_CONSTANTS", {})
+        self.params = {}
+        for name in self.TUNABLE:
+            if name in self.constants:
+                default = self.constants[name]
+            else:
+                default = getattr(cls, name) if hasattr(cls, name) else getattr(settings, name)
+            self.params[name] = np.full(n, float(default))
+        for name, value in (params or {}).items():
+            if name not in self.params:
+                raise KeyError(f"{class_name} の一括シミュレーションで変えられない調整値です: {name}"
+                               f"（{', '.join(self.TUNABLE)}）")
+            self.params[name] = np.broadcast_to(np.asarray(value, dtype=float), (n,)).copy()
+
+    def param_set(self, i):
+        """i 台目の調整値（1台ずつの Simulation に渡せる dict）"""
+        return {name: float(values[i]) for name, values in self.params.items()}
+
+
+class BatchStateController(_BatchController):
+    """
+    state_machine_fast の StateController を N台分の配列で書き直したもの
+
+    update() の分岐は、車ごとに「まだ決まっていない」マスクを持ち、元のコードの if の順に
+    当てはまった車だけ (次の状態, ステアリング, スロットル) を決めていく。
+    距離フィルタ (RANGE_FILTER_ENABLED) と古いチャンネルの判定は使わない（シミュレーションの
+    センサー値は毎周期新しいので SENSOR_STALE_TIMEOUT に掛からない）。
+    """
+
+    TUNABLE = (
+        "WALL_VERY_CLOSE", "WALL_CLOSE", "WALL_MEDIUM", "WALL_FAR", "WALL_NONE",
+        "TARGET_LEFT_DISTANCE", "WALL_FOLLOW_TOLERANCE",
+        "TURN_MIN_DURATION", "TURN_MAX_DURATION",
+        "FRONT_BLOCKED_THRESHOLD", "LEFT_CORNER_OPEN_THRESHOLD", "RIGHT_WALL_CLOSE_THRESHOLD",
+        "LEFT_OPENING_DELTA", "RIGHT_FRONT_TURN_TRIGGER", "LEFT_FRONT_DOMINANCE_DELTA",
+        "S_CURVE_DETECTION_THRESHOLD",
+        "THROTTLE_SLOW", "THROTTLE_NORMAL", "THROTTLE_FAST", "THROTTLE_REVERSE",
+        "WALL_FOLLOW_KP", "LOOKAHEAD_KP", "STEER_SMOOTHING", "MAX_STEER_STEP",
+        "STARTUP_GRACE_SECONDS", "LAUNCH_DURATION", "LAUNCH_THROTTLE", "CORNER_RECOVERY_WINDOW",
+        "HIGH_SPEED_ERROR_GAIN", "HIGH_SPEED_LOOKAHEAD_GAIN", "FAST_STEER_WINDOW", "NORMAL_STEER_WINDOW",
+        "RECOVER_COOLDOWN", "RECOVER_MAX_DURATION",
+    )
+
+    def __init__(self, n, module, settings, params=None, now=0.0):
+        super().__init__(n, module, settings, "StateController", params)
+        cls = module.StateController
+        if getattr(settings, "RANGE_FILTER_ENABLED", False):
+            print("一括シミュレーションは距離フィルタ (RANGE_FILTER_ENABLED) を使わずに走らせます")
+        s = settings
+        self.invalid_value = s.SENSOR_INVALID_VALUE
+        self.servo_center = s.SERVO_CENTER
+        self.servo_left = s.SERVO_LEFT
+        self.servo_right = s.SERVO_RIGHT
+        self.servo_slight_left = s.SERVO_SLIGHT_LEFT
+        self.servo_slight_right = s.SERVO_SLIGHT_RIGHT
+        self.throttle_stop = s.THROTTLE_STOP
+        # ヒステリシスのサンプル数は整数のまま全車共通
+        constant = lambda name: self.constants.get(name, getattr(cls, name))
+        self.blocked_confirm = constant("FRONT_BLOCKED_CONFIRM")
+        self.blocked_release = constant("FRONT_BLOCKED_RELEASE")
+        self.critical_confirm = constant("FRONT_CRITICAL_CONFIRM")
+        self.critical_release = constant("FRONT_CRITICAL_RELEASE")
+
+        State = module.State
+        self.names = {state.value: state.name for state in State}
+        self.INIT = State.INIT.value
+        self.WALL_FOLLOW = State.WALL_FOLLOW.value
+        self.LEFT_TURN = State.LEFT_TURN.value
+        self.RIGHT_TURN = State.RIGHT_TURN.value
+        self.EMERGENCY = State.EMERGENCY.value
+        self.RECOVER = State.RECOVER.value
+
+        self.state = np.full(n, self.INIT)
+        self.state_start_time = np.full(n, float(now))
+        self.controller_start = None
+        self.steering = np.full(n, float(s.SERVO_CENTER))
+        self.throttle = np.full(n, float(s.THROTTLE_STOP))
+        self.last_left_distance = None
+        self.smoothed_steering = np.full(n, float(s.SERVO_CENTER))
+        self.last_steering = np.full(n, float(s.SERVO_CENTER))
+        self.last_recover_time = np.full(n, -10.0)
+        self.last_corner_time = np.full(n, -10.0)
+        self.front_blocked_conf = np.zeros(n, dtype=int)
+        self.front_critical_conf = np.zeros(n, dtype=int)
+
+    def update(self, distances, now):
+        """
+        Args:
+            distances: (N, 5) [真左, 斜め左前, 正面, 斜め右前, 真右] (mm)
+            now: 現在時刻 (秒、全車共通)
+        Returns:
+            tuple: (ステアリング (N,), スロットル (N,))
+        """
+        p = self.params
+        if self.controller_start is None:
+            self.controller_start = now
+        duration = now - self.state_start_time
+
+        d = np.where(distances < self.invalid_value, distances, 2000)
+        L, FL, C, FR, R = (d[:, i] for i in range(5))
+        if self.last_left_distance is None:
+            self.last_left_distance = L
+
+        # 前方判定のヒステリシス
+        blocked_now = C < p["FRONT_BLOCKED_THRESHOLD"]
+        self.front_blocked_conf = np.where(
+            blocked_now, np.minimum(self.front_blocked_conf + 1, self.blocked_confirm),
+            np.maximum(0, self.front_blocked_conf - self.blocked_release))
+        front_blocked = self.front_blocked_conf >= self.blocked_confirm
+        critical_now = C < p["WALL_VERY_CLOSE"]
+        self.front_critical_conf = np.where(
+            critical_now, np.minimum(self.front_critical_conf + 1, self.critical_confirm),
+            np.maximum(0, self.front_critical_conf - self.critical_release))
+        front_very_close = self.front_critical_conf >= self.critical_confirm
+
+        # センサーパターン
+        is_s_curve = (L < p["S_CURVE_DETECTION_THRESHOLD"]) & (R < p["S_CURVE_DETECTION_THRESHOLD"])
+        right_s_curve = is_s_curve & (R < L - 100)
+        left_s_curve = is_s_curve & (L < R - 100)
+        left_opening = (L - self.last_left_distance) > p["LEFT_OPENING_DELTA"]
+        right_front_close = FR < p["RIGHT_FRONT_TURN_TRIGGER"]
+        left_wall_close = L < p["WALL_CLOSE"]
+        left_corner = (L > p["LEFT_CORNER_OPEN_THRESHOLD"]) & (C < p["FRONT_BLOCKED_THRESHOLD"])
+        right_wall_close = R < p["RIGHT_WALL_CLOSE_THRESHOLD"]
+
+        corner = front_blocked | right_front_close | left_corner
+        self.last_corner_time = np.where(corner, now, self.last_corner_time)
+
+        state = self.state
+        next_state = state.copy()
+        steering = self.steering.copy()
+        throttle = self.throttle.copy()
+        open_ = np.ones(self.n, dtype=bool)   # まだ分岐が決まっていない車
+
+        def decide(mask, new_state, new_steering, new_throttle):
+            nonlocal open_
+            m = mask & open_
+            next_state[m] = new_state if np.isscalar(new_state) else new_state[m]
+            steering[m] = new_steering if np.isscalar(new_steering) else new_steering[m]
+            throttle[m] = new_throttle if np.isscalar(new_throttle) else new_throttle[m]
+            open_ &= ~m
+
+        center, left, right = self.servo_center, self.servo_left, self.servo_right
+        slight_left, slight_right = self.servo_slight_left, self.servo_slight_right
+        slow, stop, reverse = p["THROTTLE_SLOW"], self.throttle_stop, p["THROTTLE_REVERSE"]
+
+        # --- INIT ---
+        init = state == self.INIT
+        next_state[init] = self.WALL_FOLLOW
+        open_ &= ~init
+
+        # --- WALL_FOLLOW ---
+        wf = state == self.WALL_FOLLOW
+        high_speed = self.throttle >= (p["THROTTLE_NORMAL"] - 0.02)
+        decide(wf & front_very_close, self.EMERGENCY, center, stop)
+
+        # 平滑化・舵角変化の制限を通す分岐（起動直後の直進 / S字 / PID）は目標舵角を集めて最後にまとめて処理する
+        grace = wf & open_ & ((now - self.controller_start) < p["STARTUP_GRACE_SECONDS"]) & ~front_blocked
+        open_ &= ~grace
+        s_curve = wf & open_ & is_s_curve
+        open_ &= ~s_curve
+
+        decide(wf & left_s_curve, self.RIGHT_TURN, right, slow)
+        decide(wf & front_blocked & right_front_close, self.RIGHT_TURN, right, slow)
+        decide(wf & front_blocked & (L > p["WALL_FAR"]) & (R > p["WALL_FAR"])
+               & (FL > p["WALL_MEDIUM"]) & (FR > p["WALL_MEDIUM"]), self.RIGHT_TURN, right, slow)
+
+        left_front_gap = np.maximum(0, FL - L)
+        left_front_far = FL > (p["TARGET_LEFT_DISTANCE"] + 220)
+        left_front_dominant = (FL - FR) > p["LEFT_FRONT_DOMINANCE_DELTA"]
+        decide(wf & front_blocked & ((left_front_gap < p["LEFT_OPENING_DELTA"] / 2) | ~left_front_far),
+               self.RIGHT_TURN, right, slow)
+
+        left_opening_ready = (
+            left_corner
+            | (left_opening & (L > p["TARGET_LEFT_DISTANCE"] + 70) & left_front_dominant)
+            | (left_front_far & (L > p["TARGET_LEFT_DISTANCE"] + 40) & left_front_dominant)
+        )
+        decide(wf & left_opening_ready & ~right_wall_close, self.LEFT_TURN, left, slow)
+        decide(wf & (C < p["FRONT_BLOCKED_THRESHOLD"]) & (L < p["WALL_FAR"]), self.RIGHT_TURN, right, slow)
+
+        # PID 制御で壁沿い走行（先読み補正あり）
+        pid = wf & open_
+        open_ &= ~pid
+        error = L - p["TARGET_LEFT_DISTANCE"]
+        lookahead = FL - FR
+        gain = np.where(high_speed, p["HIGH_SPEED_ERROR_GAIN"], 1.0)
+        lookahead_gain = np.where(high_speed, p["HIGH_SPEED_LOOKAHEAD_GAIN"], 1.0)
+        pid_steering = (center - (error * p["WALL_FOLLOW_KP"] * gain)
+                        - (lookahead * p["LOOKAHEAD_KP"] * lookahead_gain))
+        pid_steering = pid_steering - np.where(
+            front_blocked & ~left_wall_close & ~right_front_close, np.where(high_speed, 2, 4), 0)
+        pid_steering = np.where(FL < p["TARGET_LEFT_DISTANCE"] * 0.9,
+                                center + np.where(high_speed, 6, 10), pid_steering)
+        pid_steering = np.clip(pid_steering, left, right)
+
+        elapsed = now - self.controller_start
+        launch = p["LAUNCH_THROTTLE"]
+        ramp = elapsed / p["LAUNCH_DURATION"]
+        launch_throttle = np.maximum(launch * 0.5, np.minimum(slow, launch + (slow - launch) * ramp))
+        corner_recent = (now - self.last_corner_time) < p["CORNER_RECOVERY_WINDOW"]
+        large_error = np.abs(error) > (p["WALL_FOLLOW_TOLERANCE"] + 40)
+        cautious = corner_recent | front_blocked | right_front_close | left_corner | is_s_curve | large_error
+        pid_throttle = np.where(
+            elapsed < p["LAUNCH_DURATION"], launch_throttle,
+            np.where(cautious, np.maximum(launch * 0.7, slow),
+                     np.where((np.abs(error) < 80) & ~right_front_close, p["THROTTLE_FAST"],
+                              np.maximum(launch, p["THROTTLE_NORMAL"]))))
+        pid_throttle = np.where(L < p["WALL_CLOSE"], np.minimum(pid_throttle, slow), pid_throttle)
+
+        smooth = grace | s_curve | pid
+        target = np.where(grace, center,
+                          np.where(s_curve, np.where(L < R, slight_right, slight_left), pid_steering))
+        alpha = p["STEER_SMOOTHING"]
+        smoothed = alpha * self.smoothed_steering + (1 - alpha) * target
+        step = p["MAX_STEER_STEP"]
+        delta = smoothed - self.last_steering
+        limited = np.where(delta > step, self.last_steering + step,
+                           np.where(delta < -step, self.last_steering - step, smoothed))
+        self.smoothed_steering = np.where(smooth, smoothed, self.smoothed_steering)
+        self.last_steering = np.where(smooth, limited, self.last_steering)
+        smooth_throttle = np.where(pid, pid_throttle, slow)
+        window = np.where(smooth_throttle >= p["THROTTLE_NORMAL"], p["FAST_STEER_WINDOW"], p["NORMAL_STEER_WINDOW"])
+        guarded = np.clip(limited, np.maximum(left, center - window), np.minimum(right, center + window))
+        next_state[smooth] = self.WALL_FOLLOW
+        steering[smooth] = guarded[smooth]
+        throttle[smooth] = smooth_throttle[smooth]
+
+        # --- LEFT_TURN ---
+        lt = state == self.LEFT_TURN
+        decide(lt & front_very_close, self.EMERGENCY, center, stop)
+        decide(lt & (duration < p["TURN_MIN_DURATION"]), self.LEFT_TURN, left, slow)
+        decide(lt & (duration > p["TURN_MAX_DURATION"]), self.WALL_FOLLOW, center, slow)
+        decide(lt & (L < p["WALL_FAR"]) & (C > p["FRONT_BLOCKED_THRESHOLD"]), self.WALL_FOLLOW, slight_left, slow)
+        decide(lt, self.LEFT_TURN, left, slow)
+
+        # --- RIGHT_TURN ---
+        rt = state == self.RIGHT_TURN
+        decide(rt & (L > p["WALL_FAR"]), self.RIGHT_TURN, left, slow)
+        decide(rt & (R < 100), self.RIGHT_TURN, center, slow)
+        decide(rt & front_very_close, self.EMERGENCY, right, stop)
+        decide(rt & (duration < p["TURN_MIN_DURATION"]), self.RIGHT_TURN, right, slow)
+        decide(rt & (duration > p["TURN_MAX_DURATION"]), self.WALL_FOLLOW, center, slow)
+        decide(rt & (C > p["FRONT_BLOCKED_THRESHOLD"]), self.WALL_FOLLOW, center, slow)
+        decide(rt & (R > p["WALL_NONE"]), self.WALL_FOLLOW, center, slow)
+        decide(rt, self.RIGHT_TURN, right, slow)
+
+        # --- EMERGENCY ---
+        em = state == self.EMERGENCY
+        decide(em & (duration < 0.3), self.EMERGENCY, center, stop)
+        avoid = np.where(right_s_curve, slight_left, np.where(left_s_curve, slight_right, slight_left))
+        cleared = em & (C > p["WALL_VERY_CLOSE"] * 2)
+        decide(cleared & (L > p["WALL_NONE"]), self.LEFT_TURN, slight_left, slow)
+        decide(cleared, self.WALL_FOLLOW, center, slow)
+        decide(em & ((now - self.last_recover_time) < p["RECOVER_COOLDOWN"]), self.EMERGENCY, avoid, stop)
+        decide(em, self.RECOVER, center, stop)
+
+        # --- RECOVER ---
+        rc = state == self.RECOVER
+        decide(rc & (duration < 0.5), self.RECOVER, center, reverse)
+        decide(rc & (C > p["WALL_MEDIUM"]), self.RIGHT_TURN, right, slow)
+        decide(rc & (duration > p["RECOVER_MAX_DURATION"]), self.RIGHT_TURN, right, slow)
+        decide(rc & (duration > 0.4), self.RECOVER, slight_left, reverse)
+        decide(rc, self.RECOVER, center, reverse)
+
+        # 状態遷移
+        changed = next_state != state
+        self.state_start_time = np.where(changed, now, self.state_start_time)
+        self.last_recover_time = np.where(changed & (next_state == self.RECOVER), now, self.last_recover_time)
+        self.state = next_state
+        self.steering = steering
+        self.throttle = throttle
+        self.last_left_distance = L
+        return steering, throttle
+
+    def state_names(self):
+        """各車の現在の状態名"""
+        return [self.names[v] for v in self.state.tolist()]
+
+
+class BatchPotentialController(_BatchController):
+    """potential_field の PotentialController を N台分の配列で書き直したもの"""
+
+    TUNABLE = (
+        "WEIGHT_LEFT", "WEIGHT_FRONT_LEFT", "WEIGHT_FRONT_RIGHT", "WEIGHT_RIGHT",
+        "POTENTIAL_STEER_GAIN", "POTENTIAL_THROTTLE_BASE", "POTENTIAL_THROTTLE_MIN",
+        "BRAKE_WEIGHT_FRONT", "BRAKE_WEIGHT_SIDE_FRONT", "EMERGENCY_DIST", "THROTTLE_REVERSE",
+    )
+
+    def __init__(self, n, module, settings, params=None, now=0.0):
+        super().__init__(n, module, settings, "PotentialController", params)
+        self.invalid_value = settings.SENSOR_INVALID_VALUE
+        self.servo_center = settings.SERVO_CENTER
+        self.servo_left = settings.SERVO_LEFT
+        self.servo_right = settings.SERVO_RIGHT
+        self.steering = np.full(n, float(settings.SERVO_CENTER))
+        self.throttle = np.full(n, float(settings.THROTTLE_STOP))
+
+    @staticmethod
+    def _repulsive_force(distance, weight):
+        """反発力 F = w / d^2（d は cm、50mm 未満は 50mm）"""
+        dist_cm = np.maximum(distance, 50.0) / 10.0
+        return weight / (dist_cm * dist_cm)
+
+    def update(self, distances, now):
+        """
+        Args:
+            distances: (N, 5) [真左, 斜め左前, 正面, 斜め右前, 真右] (mm)
+            now: 現在時刻 (秒、使わない)
+        Returns:
+            tuple: (ステアリング (N,), スロットル (N,))
+        """
+        p = self.params
+        d = np.where(distances < self.invalid_value, distances, 3000)
+        L, FL, C, FR, R = (d[:, i] for i in range(5))
+        force = self._repulsive_force
+        total_force_x = ((force(L, p["WEIGHT_LEFT"]) + force(FL, p["WEIGHT_FRONT_LEFT"]))
+                         - (force(R, p["WEIGHT_RIGHT"]) + force(FR, p["WEIGHT_FRONT_RIGHT"])))
+        steering = np.clip(self.servo_center + total_force_x * p["POTENTIAL_STEER_GAIN"],
+                           self.servo_left, self.servo_right)
+        brake_force = (force(C, p["BRAKE_WEIGHT_FRONT"]) + force(FL, p["BRAKE_WEIGHT_SIDE_FRONT"])
+                       + force(FR, p["BRAKE_WEIGHT_SIDE_FRONT"]))
+        throttle = np.maximum(p["POTENTIAL_THROTTLE_MIN"], p["POTENTIAL_THROTTLE_BASE"] - (brake_force * 0.1))
+
+        # 近すぎる車はまっすぐ後退
+        emergency = d.min(axis=1) < p["EMERGENCY_DIST"]
+        self.steering = np.where(emergency, self.servo_center, steering)
+        self.throttle = np.where(emergency, p["THROTTLE_REVERSE"], throttle)
+        return self.steering, self.throttle
+
+    def state_names(self):
+        """状態を持たないので空文字"""
+        return [""] * self.n
+
+
+# CONTROLLERS のキー → 一括版の制御クラス
+BATCH_CONTROLLERS = {
+    "state": BatchStateController,
+    "potential": BatchPotentialController,
+}
+
+
+class BatchSimulation:
+    """
+    N台の車を同じコースで同時に走らせる（車どうしはぶつからない）
+
+    車ごとの違いは調整値 params と、noise_std > 0 のときのセンサーノイズだけ。
+    """
+
+    def __init__(self, controller, cfg, n, params=None, track=None, seed=0, noise_std=None, record=False):
+        """
+        Args:
+            controller: BATCH_CONTROLLERS のキー ("state" / "potential")
+            cfg: シミュレーターの設定（simulator/config/settings.py）
+            n: 車の台数
+            params: 調整値 {名前: 値 or (n,) の配列}
+            track: Track（None なら設定のコース）
+            seed: センサーノイズの乱数の種
+            noise_std: 測定ノイズの標準偏差 (mm、None なら設定値)
+            record: True なら周期ごとの位置・指令を trace に残す（整合確認用）
+        """
+        if controller not in BATCH_CONTROLLERS:
+            raise KeyError(f"一括シミュレーションできない制御クラス: {controller}（{', '.join(BATCH_CONTROLLERS)}）")
+        self.controller_name = controller
+        self.cfg = cfg
+        self.n = n
+        self.params = params
+        self.track = track if track is not None else Track.course(
+            cfg.COURSE_WIDTH, cfg.COURSE_HEIGHT, cfg.COURSE_LANE_WIDTH)
+        self.noise_std = cfg.SENSOR_NOISE_STD if noise_std is None else noise_std
+        self.rng = np.random.default_rng(seed)
+        self.record = record
+        self.trace = []
+
+        _ensure_hardware_modules()
+        project, module_name, _, _, extra_paths = CONTROLLERS[controller]
+        self.module, self.settings = import_isolated(project, module_name, extra_paths)
+        self.max_range = getattr(self.settings, "SENSOR_MAX_RANGE", cfg.SENSOR_MAX_RANGE)
+        self.invalid_value = getattr(self.settings, "SENSOR_INVALID_VALUE", cfg.SENSOR_INVALID_VALUE)
+        # 調整値の名前はここで確かめる（run() の前に間違いに気づけるように）
+        self.new_controller(0.0)
+
+    def new_controller(self, now):
+        return BATCH_CONTROLLERS[self.controller_name](self.n, self.module, self.settings, self.params, now=now)
+
+    def run(self, duration=None):
+        """
+        duration 秒（模擬時間）走らせる。衝突した車はその場で止め、全車が衝突したら終わる
+
+        Returns:
+            dict: controller, n, steps, sim_time, wall_time, speedup, car_steps_per_s, params,
+                  laps / distance_m / mean_speed / crashed / crash_time / min_clearance は (n,) の配列
+        """
+        cfg = self.cfg
+        duration = cfg.SIM_DURATION if duration is None else duration
+        dt = cfg.SIM_DT
+        substeps = cfg.SIM_SUBSTEPS
+        steps = int(round(duration / dt))
+        track = self.track
+        center_x, center_y = track.center
+        # 測定範囲より遠い壁は探さない（ノイズで範囲内に入りうる分だけ余裕を持たせる）
+        ray_range = self.max_range + 5 * self.noise_std
+        n = self.n
+        clock = SimClock()
+        controller = self.new_controller(clock.now)
+        vehicles = BatchVehicles(cfg, n, cfg.START_X, cfg.START_Y, math.radians(cfg.START_HEADING))
+        self.trace = []
+
+        swept = np.zeros(n)
+        last_angle = np.arctan2(vehicles.y - center_y, vehicles.x - center_x)
+        min_clearance = np.full(n, np.inf)
+        crash_step = np.zeros(n, dtype=int)
+        active = np.ones(n, dtype=bool)
+        step = 0
+        wall_start = time.perf_counter()
+        for step in range(1, steps + 1):
+            origins, directions = vehicles.sensor_rays()
+            ranges = track.cast(origins, directions, ray_range)
+            distances = to_readings(ranges, self.max_range, self.invalid_value,
+                                    self.noise_std, self.rng).reshape(n, 5)
+            now = clock.now
+            steering, throttle = controller.update(distances, now)
+
+            vehicles.step(steering, throttle, dt, substeps, active)
+            clock.now += dt
+
+            angle = np.arctan2(vehicles.y - center_y, vehicles.x - center_x)
+            swept += np.where(active, (angle - last_angle + math.pi) % (2 * math.pi) - math.pi, 0.0)
+            last_angle = angle
+
+            clearance = track.clearance(vehicles.center())
+            min_clearance = np.where(active, np.minimum(min_clearance, clearance), min_clearance)
+            if self.record:
+                self.trace.append((now, vehicles.x, vehicles.y, vehicles.heading, vehicles.speed,
+                                   steering, throttle, distances))
+            crashed = active & (clearance < cfg.CAR_RADIUS) & (crash_step == 0)
+            crash_step[crashed] = step
+            if cfg.STOP_ON_CRASH:
+                active &= ~crashed
+                if not active.any():
+                    break
+        wall_time = time.perf_counter() - wall_start
+        sim_time = step * dt
+        crashed = crash_step > 0
+        run_time = np.where(crashed, crash_step * dt, sim_time)
+        return {
+            "controller": self.controller_name,
+            "n": n,
+            "steps": step,
+            "sim_time": sim_time,
+            "wall_time": wall_time,
+            "speedup": sim_time / wall_time if wall_time > 0 else math.inf,
+            "car_steps_per_s": n * step / wall_time if wall_time > 0 else math.inf,
+            "params": controller.params,
+            "laps": swept / (2 * math.pi),
+            "distance_m": vehicles.odometer / 1000,
+            "mean_speed": vehicles.odometer / 1000 / np.maximum(run_time, dt),
+            "crashed": crashed,
+            "crash_time": np.where(crashed, crash_step * dt, np.nan),
+            "min_clearance": min_clearance,
+        }
@@ -0,0 +1,85 @@
+"""
+ToF センサーのレイキャスト
+
+全センサーの光線と全部の壁の線分の交差を (光線数 × 線分数) の1回の NumPy 演算で解き、
+光線ごとに一番近い交点までの距離を返す。
+"""
+
+import numpy as np
+
+
+# 光線がこの数以上なら線分ごとに (光線数,) の配列で解く（一括シミュレーション向け）
+SEGMENT_LOOP_MIN_RAYS = 256
+
+
+def cast_rays(origins, directions, starts, vectors, max_distance=np.inf):
+    """
+    光線 origins + t * directions と壁の線分の最初の交点までの距離
+
+    光線が少ないとき（1台分）は (光線数 × 線分数) の1回の演算で、多いとき（N台分）は
+    線分ごとに全光線を連続した配列で解いて最小値を更新する（一時配列がキャッシュに収まるので速い）。
+    どちらも要素ごとの計算は同じなので、結果は完全に一致する。
+
+    Args:
+        origins: 光線の始点 (R, 2)
+        directions: 光線の向きの単位ベクトル (R, 2)
+        starts: 線分の始点 (M, 2)
+        vectors: 線分の始点→終点 (M, 2)
+        max_distance: これより遠い交点は inf にする（空間インデックスの SegmentGrid.cast と揃える）
+    Returns:
+        ndarray: (R,) 距離（どの壁にも当たらなければ inf）
+    """
+    if len(origins) >= SEGMENT_LOOP_MIN_RAYS:
+        nearest = _cast_rays_by_segment(origins, directions, starts, vectors)
+        return np.where(nearest <= max_distance, nearest, np.inf)
+    # 始点の差 a - p と、向き d・線分 e の外積で t（光線上）と u（線分上）を解く
+    ap_x = starts[None, :, 0] - origins[:, None, 0]                            # (R, M)
+    ap_y = starts[None, :, 1] - origins[:, None, 1]
+    d_x = directions[:, 0:1]
+    d_y = directions[:, 1:2]
+    e_x = vectors[None, :, 0]
+    e_y = vectors[None, :, 1]
+    denom = d_x * e_y - d_y * e_x
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (ap_x * e_y - ap_y * e_x) / denom
+        u = (ap_x * d_y - ap_y * d_x) / denom
+    hit = (t >= 0.0) & (u >= 0.0) & (u <= 1.0) & (t <= max_distance)          # 平行 (denom=0) は nan で False
+    return np.where(hit, t, np.inf).min(axis=1)
+
+
+def _cast_rays_by_segment(origins, directions, starts, vectors):
+    """cast_rays の光線が多いとき（線分ごとのループ、計算式は同じ）"""
+    o_x = np.ascontiguousarray(origins[:, 0])
+    o_y = np.ascontiguousarray(origins[:, 1])
+    d_x = np.ascontiguousarray(directions[:, 0])
+    d_y = np.ascontiguousarray(directions[:, 1])
+    nearest = np.full(len(origins), np.inf)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for (a_x, a_y), (e_x, e_y) in zip(starts.tolist(), vectors.tolist()):
+            ap_x = a_x - o_x
+            ap_y = a_y - o_y
+            denom = d_x * e_y - d_y * e_x
+            t = (ap_x * e_y - ap_y * e_x) / denom
+            u = (ap_x * d_y - ap_y * d_x) / denom
+            hit = (t >= 0.0) & (u >= 0.0) & (u <= 1.0) & (t < nearest)
+            nearest = np.where(hit, t, nearest)
+    return nearest
+
+
+def to_readings(distances, max_range, invalid_value, noise_std=0.0, rng=None):
+    """
+    距離を SensorManager と同じ整数 mm の測定値にする（範囲外は invalid_value）
+
+    Args:
+        distances: (R,) 距離 (mm)
+        max_range: 最大測定距離 (mm)
+        invalid_value: 範囲外・当たらないときの値
+        noise_std: 測定ノイズの標準偏差 (mm)
+        rng: ノイズ用の numpy.random.Generator
+    Returns:
+        ndarray: (R,) int
+    """
+    if noise_std > 0.0 and rng is not None:
+        distances = distances + rng.normal(0.0, noise_std, distances.shape)
+    valid = (distances > 0.0) & (distances <= max_range)
+    return np.where(valid, np.rint(np.where(valid, distances, 0.0)), invalid_value).astype(int)
@@ -0,0 +1,263 @@
+"""
+コース上で制御クラスを走らせるヘッドレスシミュレーション
+
+各プロジェクトの制御クラスを common/controller_loader.py で読み込み、手を加えずに
+update() / compute_control() を呼ぶ。制御クラスのモジュールの time をシミュレーション時刻に
+差し替えるので、状態の継続時間やセンサーの経過時間も模擬時間で進み、実時間より速く回せる。
+"""
+
+import contextlib
+import math
+import time
+
+import numpy as np
+
+from common.controller_loader import CONTROLLERS, import_isolated, load_controller
+
+from .rangefinder import to_readings
+from .track import Track
+from .vehicle import Vehicle
+
+
+class SimClock:
+    """制御クラスのモジュールの time の代わり（シミュレーション時刻を返す）"""
+
+    def __init__(self, start=1000.0):
+        self.now = start
+
+    def monotonic(self):
+        return self.now
+
+    time = perf_counter = monotonic
+
+    def monotonic_ns(self):
+        return int(self.now * 1e9)
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class _NullWriter:
+    """制御クラスの print を捨てる"""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+@contextlib.contextmanager
+def simulated_time(module, clock):
+    """module の time を clock に差し替える（抜けると元に戻す）"""
+    original = getattr(module, "time", None)
+    if original is not time:
+        yield
+        return
+    module.time = clock
+    try:
+        yield
+    finally:
+        module.time = original
+
+
+def split_params(module, class_name, params):
+    """
+    調整値を、制御クラスのモジュールが import した設定値とクラス定数に分ける
+
+    Args:
+        module: 制御クラスを定義しているモジュール
+        class_name: 制御クラスの名前
+        params: {名前: 値}（FRONT_BLOCKED_THRESHOLD など settings の名前、WALL_FOLLOW_KP などクラス定数の名前）
+    Returns:
+        tuple: (モジュールの設定値 dict, クラス定数 dict)
+    """
+    cls = getattr(module, class_name)
+    settings_params = {}
+    class_params = {}
+    for name, value in (params or {}).items():
+        if name.isupper() and hasattr(cls, name):
+            class_params[name] = value
+        elif name.isupper() and hasattr(module, name):
+            settings_params[name] = value
+        else:
+            raise KeyError(f"{class_name} の調整値ではありません: {name}")
+    return settings_params, class_params
+
+
+@contextlib.contextmanager
+def overridden_settings(module, values):
+    """module の設定値（from config.settings import で取り込んだ大域変数）を一時的に差し替える"""
+    original = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(module, name, value)
+
+
+def _ensure_hardware_modules():
+    """
+    制御クラスのプロジェクトの modules は import 時に board / adafruit_* を読むので、
+    実機のライブラリがない環境では擬似ハードウェアに差し替える（シミュレーションでは使わない）
+    """
+    try:
+        import board  # noqa: F401
+    except Exception:
+        from common.fake_hw import install_fake_hardware
+        install_fake_hardware()
+
+
+class Simulation:
+    """
+    1台の車をコースで走らせる
+
+        sim = Simulation("hybrid")
+        result = sim.run(60.0)
+        print(result["laps"], result["speedup"])
+    """
+
+    # record=True のときの trace の列
+    TRACE_HEADER = ["time", "x", "y", "heading", "speed", "steering", "throttle", "state",
+                    "sensor_l2", "sensor_l1", "sensor_c", "sensor_r1", "sensor_r2"]
+
+    def __init__(self, controller, cfg, track=None, seed=0, noise_std=None, record=False, verbose=False,
+                 params=None):
+        """
+        Args:
+            controller: CONTROLLERS のキー ("state" / "hybrid" / "potential" / "rule" など)
+            cfg: シミュレーターの設定（simulator/config/settings.py）
+            track: Track（None なら設定のコース）
+            seed: センサーノイズの乱数の種
+            noise_std: 測定ノイズの標準偏差 (mm、None なら設定値)
+            record: True なら周期ごとの軌跡を trace に残す
+            verbose: True なら制御クラスの print を表示する
+            params: 制御クラスの調整値 {名前: 値}（設定値・クラス定数を上書きして走らせる）
+        """
+        if controller not in CONTROLLERS:
+            raise KeyError(f"未知の制御クラス: {controller}（{', '.join(CONTROLLERS)}）")
+        self.controller_name = controller
+        self.cfg = cfg
+        self.track = track if track is not None else Track.course(
+            cfg.COURSE_WIDTH, cfg.COURSE_HEIGHT, cfg.COURSE_LANE_WIDTH)
+        self.noise_std = cfg.SENSOR_NOISE_STD if noise_std is None else noise_std
+        self.rng = np.random.default_rng(seed)
+        self.record = record
+        self.verbose = verbose
+        self.trace = []
+
+        _ensure_hardware_modules()
+        project, module_name, class_name, kind, extra_paths = CONTROLLERS[controller]
+        self.module, settings = import_isolated(project, module_name, extra_paths)
+        self.settings_params, self.class_params = split_params(self.module, class_name, params)
+        # 測定範囲と無効値は制御クラスのプロジェクトに合わせる
+        self.max_range = getattr(settings, "SENSOR_MAX_RANGE", cfg.SENSOR_MAX_RANGE)
+        self.invalid_value = getattr(settings, "SENSOR_INVALID_VALUE", cfg.SENSOR_INVALID_VALUE)
+        # update() に渡す SensorData はそのプロジェクトのもの
+        self.sensor_data = import_isolated(project, "modules.sensor")[0].SensorData if kind == "update" else None
+
+    def new_vehicle(self):
+        cfg = self.cfg
+        return Vehicle(cfg, cfg.START_X, cfg.START_Y, math.radians(cfg.START_HEADING))
+
+    def run(self, duration=None):
+        """
+        duration 秒（模擬時間）走らせる
+
+        Returns:
+            dict: controller, steps, sim_time, wall_time, speedup, laps, lap_times, distance_m, mean_speed,
+                  crashed, crash_time, contacts, min_clearance, state_entries
+                  （lap_times は各周を回り終えた時刻、contacts は壁に触れた回数、
+                  state_entries は状態名ごとの遷移して入った回数）
+        """
+        cfg = self.cfg
+        duration = cfg.SIM_DURATION if duration is None else duration
+        dt = cfg.SIM_DT
+        substeps = cfg.SIM_SUBSTEPS
+        steps = int(round(duration / dt))
+        track = self.track
+        center_x, center_y = track.center
+        # 測定範囲より遠い壁は探さない（ノイズで範囲内に入りうる分だけ余裕を持たせる）
+        ray_range = self.max_range + 5 * self.noise_std
+        sensor_data = self.sensor_data
+        vehicle = self.new_vehicle()
+        clock = SimClock()
+        self.trace = []
+
+        swept = 0.0
+        last_angle = math.atan2(vehicle.y - center_y, vehicle.x - center_x)
+        min_clearance = math.inf
+        crash_time = None
+        contacts = 0
+        touching = False
+        lap_times = []
+        state_entries = {}
+        last_state = None
+        step = 0
+        output = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(_NullWriter())
+        wall_start = time.perf_counter()
+        with simulated_time(self.module, clock), overridden_settings(self.module, self.settings_params), output:
+            handle = load_controller(self.controller_name)
+            for name, value in self.class_params.items():
+                setattr(handle.controller, name, value)
+            for step in range(1, steps + 1):
+                origins, directions = vehicle.sensor_rays()
+                ranges = track.cast(origins, directions, ray_range)
+                distances = to_readings(ranges, self.max_range, self.invalid_value,
+                                        self.noise_std, self.rng).tolist()
+                now = clock.now
+                if sensor_data is not None:
+                    data = sensor_data(distances, (now,) * 5, (step,) * 5)
+                else:
+                    data = distances
+                steering, throttle, state = handle.step(data)
+
+                vehicle.step(steering, throttle, dt, substeps)
+                clock.now += dt
+
+                # 島の中心まわりの回転角で周回数を数える（反時計回りが正）
+                angle = math.atan2(vehicle.y - center_y, vehicle.x - center_x)
+                swept += (angle - last_angle + math.pi) % (2 * math.pi) - math.pi
+                last_angle = angle
+                if swept >= 2 * math.pi * (len(lap_times) + 1):
+                    lap_times.append(step * dt)
+                if state != last_state:
+                    state_entries[state] = state_entries.get(state, 0) + 1
+                    last_state = state
+
+                clearance = track.clearance(vehicle.center()[None, :])[0]
+                if clearance < min_clearance:
+                    min_clearance = clearance
+                if self.record:
+                    self.trace.append((now, vehicle.x, vehicle.y, vehicle.heading, vehicle.speed,
+                                       steering, throttle, str(state), *distances))
+                if clearance < cfg.CAR_RADIUS:
+                    if not touching:
+                        contacts += 1
+                        touching = True
+                    if crash_time is None:
+                        crash_time = step * dt
+                    if cfg.STOP_ON_CRASH:
+                        break
+                else:
+                    touching = False
+        wall_time = time.perf_counter() - wall_start
+        sim_time = step * dt
+        return {
+            "controller": self.controller_name,
+            "steps": step,
+            "sim_time": sim_time,
+            "wall_time": wall_time,
+            "speedup": sim_time / wall_time if wall_time > 0 else math.inf,
+            "laps": swept / (2 * math.pi),
+            "lap_times": lap_times,
+            "distance_m": vehicle.odometer / 1000,
+            "mean_speed": vehicle.odometer / 1000 / sim_time if sim_time else 0.0,
+            "crashed": crash_time is not None,
+            "crash_time": crash_time,
+            "contacts": contacts,
+            "min_clearance": min_clearance,
+            "state_entries": state_entries,
+        }
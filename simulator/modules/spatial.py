@@ -0,0 +1,222 @@
+"""
+壁の線分の一様グリッド（レイキャストと最近傍距離の空間インデックス）
+
+コースを一辺 cell_size の正方形のセルに分け、各セルに重なる線分の番号を持っておく。
+光線はセルを順にたどり (Amanatides-Woo の DDA)、通ったセルの線分とだけ交差を調べる。
+全部の光線を同時に1セルずつ進めるので、1回の反復は (まだ当たっていない光線数 × セルの最大線分数)
+の NumPy 演算になり、手間は線分の総数ではなくたどったセルの数に比例する。
+
+交点の距離は rangefinder.cast_rays と同じ式で求めるので、結果は総当たりと完全に一致する。
+"""
+
+import math
+
+import numpy as np
+
+# セル境界ちょうどの交点を取りこぼさないよう、線分をこの距離 (mm) だけ太らせてセルに登録する
+REGISTER_PAD = 1.0
+# 光線が今のセルの出口よりこの距離 (mm) 先までの交点は今のセルで受け付ける（REGISTER_PAD より小さく）
+EXIT_EPSILON = 1e-6
+
+
+class SegmentGrid:
+    """
+    線分を一様グリッドに登録した空間インデックス
+
+    Attributes:
+        cell_size: セルの一辺 (mm)
+        nx, ny: セルの数
+        max_per_cell: 1セルの線分の最大数
+    """
+
+    def __init__(self, starts, vectors, cell_size):
+        """
+        Args:
+            starts: 線分の始点 (M, 2)
+            vectors: 線分の始点→終点 (M, 2)
+            cell_size: セルの一辺 (mm)
+        """
+        starts = np.asarray(starts, dtype=float)
+        vectors = np.asarray(vectors, dtype=float)
+        ends = starts + vectors
+        self.cell_size = float(cell_size)
+        points = np.concatenate((starts, ends))
+        self.origin = points.min(axis=0) - REGISTER_PAD
+        extent = points.max(axis=0) + REGISTER_PAD - self.origin
+        self.nx = max(1, int(math.ceil(extent[0] / self.cell_size)))
+        self.ny = max(1, int(math.ceil(extent[1] / self.cell_size)))
+        self.upper = self.origin + np.array([self.nx, self.ny]) * self.cell_size
+
+        cells = self._register(starts, vectors)
+        m = len(starts)
+        # 空きは番号 m（座標が nan のダミーの線分）で埋める。nan の交差判定は必ず False
+        self.counts = np.array([len(c) for c in cells], dtype=np.intp)
+        self.max_per_cell = max(1, int(self.counts.max()))
+        self.table = np.full((len(cells), self.max_per_cell), m, dtype=np.intp)
+        for cell, segments in enumerate(cells):
+            self.table[cell, :len(segments)] = segments
+        # 最近傍距離用: 周り 3×3 セルの線分をまとめた表
+        neighbors = []
+        for iy in range(self.ny):
+            for ix in range(self.nx):
+                merged = set()
+                for jy in range(max(0, iy - 1), min(self.ny, iy + 2)):
+                    for jx in range(max(0, ix - 1), min(self.nx, ix + 2)):
+                        merged.update(cells[jy * self.nx + jx])
+                neighbors.append(sorted(merged))
+        self.neighbor_counts = np.array([len(c) for c in neighbors], dtype=np.intp)
+        self.neighbor_table = np.full((len(neighbors), max(1, int(self.neighbor_counts.max()))), m, dtype=np.intp)
+        for cell, segments in enumerate(neighbors):
+            self.neighbor_table[cell, :len(segments)] = segments
+
+        # 線分の座標は成分ごとの連続した配列で持つ（番号で集めるときに速い）
+        self._a_x = np.append(starts[:, 0], np.nan)
+        self._a_y = np.append(starts[:, 1], np.nan)
+        self._e_x = np.append(vectors[:, 0], np.nan)
+        self._e_y = np.append(vectors[:, 1], np.nan)
+        with np.errstate(divide="ignore"):
+            self._inv_length_sq = np.append(1.0 / np.einsum("ij,ij->i", vectors, vectors), np.nan)
+
+    def _register(self, starts, vectors):
+        """各セルに、REGISTER_PAD だけ太らせた線分が重なるものを登録する（多めに登録するのは構わない）"""
+        h = self.cell_size
+        cells = [[] for _ in range(self.nx * self.ny)]
+        # セルの中心から線分までの距離が 半対角 + パッド 以下なら重なりうる
+        reach = h * math.sqrt(0.5) + REGISTER_PAD
+        for i, (a, e) in enumerate(zip(starts, vectors)):
+            b = a + e
+            lo = np.floor((np.minimum(a, b) - REGISTER_PAD - self.origin) / h).astype(int)
+            hi = np.floor((np.maximum(a, b) + REGISTER_PAD - self.origin) / h).astype(int)
+            lo = np.clip(lo, 0, [self.nx - 1, self.ny - 1])
+            hi = np.clip(hi, 0, [self.nx - 1, self.ny - 1])
+            ix, iy = np.meshgrid(np.arange(lo[0], hi[0] + 1), np.arange(lo[1], hi[1] + 1))
+            ix = ix.ravel()
+            iy = iy.ravel()
+            centers = self.origin + (np.column_stack((ix, iy)) + 0.5) * h
+            length_sq = e @ e
+            u = np.clip((centers - a) @ e / length_sq, 0.0, 1.0) if length_sq > 0 else np.zeros(len(ix))
+            distance = np.linalg.norm(centers - (a + u[:, None] * e), axis=1)
+            for x, y in zip(ix[distance <= reach], iy[distance <= reach]):
+                cells[y * self.nx + x].append(i)
+        return cells
+
+    def cast(self, origins, directions, max_distance=np.inf):
+        """
+        光線と線分の最初の交点までの距離（rangefinder.cast_rays と同じ値）
+
+        Args:
+            origins: 光線の始点 (R, 2)
+            directions: 光線の向きの単位ベクトル (R, 2)
+            max_distance: これより遠い交点は探さない（inf を返す）
+        Returns:
+            ndarray: (R,) 距離（max_distance までに当たらなければ inf）
+        """
+        h = self.cell_size
+        o_x = np.ascontiguousarray(origins[:, 0], dtype=float)
+        o_y = np.ascontiguousarray(origins[:, 1], dtype=float)
+        d_x = np.ascontiguousarray(directions[:, 0], dtype=float)
+        d_y = np.ascontiguousarray(directions[:, 1], dtype=float)
+        result = np.full(len(o_x), np.inf)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_x = 1.0 / d_x
+            inv_y = 1.0 / d_y
+            # グリッドの範囲に入る・出る距離（スラブ法。向きの成分が 0 の軸は nan になるので fmin/fmax で無視）
+            t1 = (self.origin[0] - o_x) * inv_x
+            t2 = (self.upper[0] - o_x) * inv_x
+            t3 = (self.origin[1] - o_y) * inv_y
+            t4 = (self.upper[1] - o_y) * inv_y
+            t_enter = np.fmax(np.fmax(np.fmin(t1, t2), np.fmin(t3, t4)), 0.0)
+            t_leave = np.fmin(np.fmax(t1, t2), np.fmax(t3, t4))
+        alive = (t_enter <= t_leave) & (t_enter <= max_distance)
+
+        # 入ったセルと、次に x / y のセル境界を越える距離
+        ix = np.clip(np.floor((o_x + t_enter * d_x - self.origin[0]) / h), 0, self.nx - 1).astype(np.intp)
+        iy = np.clip(np.floor((o_y + t_enter * d_y - self.origin[1]) / h), 0, self.ny - 1).astype(np.intp)
+        step_x = np.where(d_x > 0, 1, -1)
+        step_y = np.where(d_y > 0, 1, -1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            next_x = np.where(d_x != 0, ((ix + (d_x > 0)) * h + self.origin[0] - o_x) * inv_x, np.inf)
+            next_y = np.where(d_y != 0, ((iy + (d_y > 0)) * h + self.origin[1] - o_y) * inv_y, np.inf)
+            delta_x = np.where(d_x != 0, h * np.abs(inv_x), np.inf)
+            delta_y = np.where(d_y != 0, h * np.abs(inv_y), np.inf)
+
+        active = np.flatnonzero(alive)
+        while active.size:
+            cx = ix[active]
+            cy = iy[active]
+            nx_ = next_x[active]
+            ny_ = next_y[active]
+            cell_exit = np.minimum(nx_, ny_)
+            found = np.zeros(active.size, dtype=bool)
+
+            # 線分のあるセルにいる光線だけ調べる（列数はその中の最大の線分数まで）
+            cells = cy * self.nx + cx
+            counts = self.counts[cells]
+            occupied = np.flatnonzero(counts)
+            if occupied.size:
+                rays = active[occupied]
+                candidates = self.table[cells[occupied], :counts[occupied].max()]   # (A, K)
+                ox = o_x[rays, None]
+                oy = o_y[rays, None]
+                dx = d_x[rays, None]
+                dy = d_y[rays, None]
+                e_x = self._e_x[candidates]
+                e_y = self._e_y[candidates]
+                # cast_rays と同じ式
+                ap_x = self._a_x[candidates] - ox
+                ap_y = self._a_y[candidates] - oy
+                denom = dx * e_y - dy * e_x
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    t = (ap_x * e_y - ap_y * e_x) / denom
+                    u = (ap_x * dy - ap_y * dx) / denom
+                hit = (t >= 0.0) & (u >= 0.0) & (u <= 1.0) & (t <= (cell_exit[occupied] + EXIT_EPSILON)[:, None])
+                nearest = np.where(hit, t, np.inf).min(axis=1)
+                hit_any = nearest < np.inf
+                result[rays[hit_any]] = np.where(nearest[hit_any] <= max_distance, nearest[hit_any], np.inf)
+                found[occupied] = hit_any
+
+            # 当たらなかった光線を次のセルへ
+            go_x = nx_ < ny_
+            cx = np.where(go_x, cx + step_x[active], cx)
+            cy = np.where(go_x, cy, cy + step_y[active])
+            ix[active] = cx
+            iy[active] = cy
+            next_x[active] = np.where(go_x, nx_ + delta_x[active], nx_)
+            next_y[active] = np.where(go_x, ny_, ny_ + delta_y[active])
+            inside = (cx >= 0) & (cx < self.nx) & (cy >= 0) & (cy < self.ny) & (cell_exit <= max_distance)
+            active = active[~found & inside]
+        return result
+
+    def clearance(self, points):
+        """
+        各点から一番近い線分までの距離
+
+        点のセルと周り 3×3 セルの線分だけを調べる。cell_size 以内の距離は Track.clearance と同じ値で、
+        それより遠い値は上限（本当の距離以上）になる。
+
+        Args:
+            points: (P, 2)
+        Returns:
+            ndarray: (P,)
+        """
+        h = self.cell_size
+        p_x = np.ascontiguousarray(points[:, 0], dtype=float)
+        p_y = np.ascontiguousarray(points[:, 1], dtype=float)
+        ix = np.clip(np.floor((p_x - self.origin[0]) / h), 0, self.nx - 1).astype(np.intp)
+        iy = np.clip(np.floor((p_y - self.origin[1]) / h), 0, self.ny - 1).astype(np.intp)
+        cells = iy * self.nx + ix
+        candidates = self.neighbor_table[cells, :max(1, self.neighbor_counts[cells].max())]   # (P, K)
+        # Track._clearance_by_segment と同じ式
+        e_x = self._e_x[candidates]
+        e_y = self._e_y[candidates]
+        o_x = p_x[:, None] - self._a_x[candidates]
+        o_y = p_y[:, None] - self._a_y[candidates]
+        u = (o_x * e_x + o_y * e_y) * self._inv_length_sq[candidates]
+        np.clip(u, 0.0, 1.0, out=u)
+        n_x = o_x - u * e_x
+        n_y = o_y - u * e_y
+        distance_sq = n_x * n_x + n_y * n_y
+        # ダミーの線分 (nan) は無視する
+        nearest_sq = np.where(np.isnan(distance_sq), np.inf, distance_sq).min(axis=1)
+        return np.sqrt(nearest_sq)
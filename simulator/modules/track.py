@@ -0,0 +1,129 @@
+"""
+コースの壁（線分の集合）
+"""
+
+import math
+
+import numpy as np
+
+from .rangefinder import cast_rays
+from .spatial import SegmentGrid
+
+# 点がこの数以上なら線分ごとに (点数,) の配列で解く（一括シミュレーション向け）
+SEGMENT_LOOP_MIN_POINTS = 64
+# 線分がこの数以上なら一様グリッドの空間インデックスを作る（cell_size=None のとき）
+INDEX_MIN_SEGMENTS = 128
+# 光線がこの数以上のときだけ空間インデックスを使う（少ないと反復の手間で総当たりより遅い）
+INDEX_MIN_RAYS = 256
+# 自動で決めるセルの一辺の下限 (mm)。最近傍距離はセルの一辺まで正確なので、衝突判定の半径より大きく
+INDEX_MIN_CELL_SIZE = 150.0
+
+
+class Track:
+    """
+    壁を線分の配列で持つコース
+
+    Attributes:
+        starts: 線分の始点 (M, 2)
+        vectors: 線分の始点→終点 (M, 2)
+        center: 周回数を数える中心（中央の島の中心）
+        index: 線分の空間インデックス (SegmentGrid、線分が少なければ None)
+    """
+
+    def __init__(self, polygons, center=(0.0, 0.0), cell_size=None):
+        """
+        Args:
+            polygons: 閉じた多角形（頂点のリスト）のリスト。各辺が壁になる
+            center: 周回数を数える中心
+            cell_size: 空間インデックスのセルの一辺 (mm)。None なら線分が INDEX_MIN_SEGMENTS 以上のとき
+                       自動で決め、0 なら作らない（総当たり）
+        """
+        starts = []
+        ends = []
+        for polygon in polygons:
+            points = np.asarray(polygon, dtype=float)
+            starts.append(points)
+            ends.append(np.roll(points, -1, axis=0))
+        self.starts = np.concatenate(starts)
+        self.vectors = np.concatenate(ends) - self.starts
+        self.polygons = [np.asarray(p, dtype=float) for p in polygons]
+        self.center = np.asarray(center, dtype=float)
+        # 点と線分の距離の計算用（長さ0の線分は除外済みとみなす）
+        self._inv_length_sq = 1.0 / np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+        if cell_size is None and len(self.starts) >= INDEX_MIN_SEGMENTS:
+            cell_size = self.auto_cell_size()
+        self.index = SegmentGrid(self.starts, self.vectors, cell_size) if cell_size else None
+
+    def auto_cell_size(self):
+        """
+        空間インデックスのセルの一辺の目安
+
+        線分の平均の長さの2倍。セルの数が線分の4倍を超えない大きさと INDEX_MIN_CELL_SIZE 以上
+        """
+        points = np.concatenate((self.starts, self.starts + self.vectors))
+        width, height = points.max(axis=0) - points.min(axis=0)
+        m = len(self.starts)
+        mean_length = np.sqrt(np.einsum("ij,ij->i", self.vectors, self.vectors)).mean()
+        return max(INDEX_MIN_CELL_SIZE, 2 * mean_length, math.sqrt(width * height / (4 * m)))
+
+    def cast(self, origins, directions, max_distance=np.inf):
+        """
+        光線と壁の最初の交点までの距離
+
+        空間インデックスがあり、光線が INDEX_MIN_RAYS 以上なら使う（結果はどちらでも同じ）
+
+        Args:
+            origins: 光線の始点 (R, 2)
+            directions: 光線の向きの単位ベクトル (R, 2)
+            max_distance: これより遠い交点は inf にする
+        Returns:
+            ndarray: (R,)
+        """
+        if self.index is not None and len(origins) >= INDEX_MIN_RAYS:
+            return self.index.cast(origins, directions, max_distance)
+        return cast_rays(origins, directions, self.starts, self.vectors, max_distance)
+
+    @classmethod
+    def course(cls, width, height, lane_width):
+        """外壁の長方形と、通路幅 lane_width だけ内側の島の長方形からなる周回コース"""
+        outer = [(0, 0), (width, 0), (width, height), (0, height)]
+        island = [(lane_width, lane_width), (width - lane_width, lane_width),
+                  (width - lane_width, height - lane_width), (lane_width, height - lane_width)]
+        return cls([outer, island], center=(width / 2, height / 2))
+
+    def clearance(self, points):
+        """
+        各点から一番近い壁までの距離
+
+        Args:
+            points: (P, 2)
+        Returns:
+            ndarray: (P,)（点が SEGMENT_LOOP_MIN_POINTS 以上で空間インデックスがあるときは、
+                     セルの一辺より遠い値は上限）
+        """
+        if len(points) >= SEGMENT_LOOP_MIN_POINTS:
+            if self.index is not None:
+                return self.index.clearance(points)
+            return self._clearance_by_segment(points)
+        offset = points[:, None, :] - self.starts[None, :, :]                  # (P, M, 2)
+        u = np.einsum("pmi,mi->pm", offset, self.vectors) * self._inv_length_sq
+        np.clip(u, 0.0, 1.0, out=u)
+        nearest = offset - u[:, :, None] * self.vectors[None, :, :]
+        return np.sqrt(np.einsum("pmi,pmi->pm", nearest, nearest).min(axis=1))
+
+    def _clearance_by_segment(self, points):
+        """clearance の点が多いとき（線分ごとのループ、計算式は同じ）"""
+        p_x = np.ascontiguousarray(points[:, 0])
+        p_y = np.ascontiguousarray(points[:, 1])
+        nearest_sq = np.full(len(points), np.inf)
+        for (a_x, a_y), (e_x, e_y), inv in zip(self.starts.tolist(), self.vectors.tolist(),
+                                                self._inv_length_sq.tolist()):
+            o_x = p_x - a_x
+            o_y = p_y - a_y
+            u = (o_x * e_x + o_y * e_y) * inv
+            np.clip(u, 0.0, 1.0, out=u)
+            n_x = o_x - u * e_x
+            n_y = o_y - u * e_y
+            nearest_sq = np.minimum(nearest_sq, n_x * n_x + n_y * n_y)
+        return np.sqrt(nearest_sq)
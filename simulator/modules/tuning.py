@@ -0,0 +1,424 @@
+"""
+制御クラスの調整値の自動調整
+
+探索範囲の候補をシミュレーション（Simulation、元の制御クラス）で走らせて評価値を付け、
+grid / random / cmaes のどれかで良い調整値を探す。候補の評価はプロセスプールで並列に行い、
+結果は JSON Lines のキャッシュに1件ずつ追記する（途中で止めても同じ条件で再実行すれば
+評価済みの候補はキャッシュから読むので、続きから再開できる）。
+
+    tuner = Tuner("state", cfg, SearchSpace(cfg.TUNE_SPACE), cache_path="tune_results/state.jsonl")
+    with tuner:
+        best = tuner.cmaes(budget=200)
+    write_profile("tuned_profile.py", "state", best)
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from common.controller_loader import CONTROLLERS, import_isolated
+
+from .simulation import Simulation, _ensure_hardware_modules, split_params
+
+
+class SearchSpace:
+    """
+    探索範囲
+
+    各調整値は (下限, 上限)（実数）、(下限, 上限, "int")（整数）、[値, ...]（候補から選ぶ）のどれか。
+    cmaes は全部の次元を [0, 1] に正規化して扱う。
+    """
+
+    def __init__(self, spec):
+        """
+        Args:
+            spec: {名前: (下限, 上限) / (下限, 上限, "int") / [値, ...]}
+        """
+        self.names = list(spec)
+        self.dims = []
+        for name, value in spec.items():
+            if isinstance(value, list):
+                self.dims.append(("choice", None, None, list(value)))
+            elif len(value) == 3 and value[2] == "int":
+                self.dims.append(("int", int(value[0]), int(value[1]), None))
+            elif len(value) == 2:
+                self.dims.append(("float", float(value[0]), float(value[1]), None))
+            else:
+                raise ValueError(f"探索範囲の指定が不正です: {name}={value!r}")
+
+    @classmethod
+    def parse(cls, items):
+        """
+        コマンドラインの指定から作る
+
+        Args:
+            items: ["NAME=下限:上限", "NAME=下限:上限:int", "NAME=値,値,値", ...]
+        """
+        spec = {}
+        for item in items:
+            name, _, text = item.partition("=")
+            if not text:
+                raise ValueError(f"探索範囲は 名前=下限:上限 で指定してください: {item}")
+            if "," in text:
+                spec[name] = [_number(v) for v in text.split(",")]
+            else:
+                parts = text.split(":")
+                if len(parts) == 3 and parts[2] == "int":
+                    spec[name] = (int(parts[0]), int(parts[1]), "int")
+                elif len(parts) == 2:
+                    spec[name] = (float(parts[0]), float(parts[1]))
+                else:
+                    raise ValueError(f"探索範囲の指定が不正です: {item}")
+        return cls(spec)
+
+    def grid(self, points):
+        """各次元を points 点（候補の値はそのまま）に分けた全部の組み合わせ"""
+        axes = []
+        for kind, low, high, values in self.dims:
+            if kind == "choice":
+                axes.append(values)
+            elif kind == "int":
+                axes.append(sorted({int(round(v)) for v in np.linspace(low, high, points)}))
+            else:
+                axes.append([_round(v) for v in np.linspace(low, high, points)])
+        return [dict(zip(self.names, combo)) for combo in itertools.product(*axes)]
+
+    def sample(self, rng):
+        """一様に1点選ぶ"""
+        return self.decode(rng.uniform(0.0, 1.0, len(self.dims)))
+
+    def decode(self, unit):
+        """[0, 1] に正規化した座標（範囲外は切り詰める）→ 調整値の dict"""
+        params = {}
+        for name, (kind, low, high, values), z in zip(self.names, self.dims, np.clip(unit, 0.0, 1.0)):
+            if kind == "choice":
+                params[name] = values[min(int(z * len(values)), len(values) - 1)]
+            elif kind == "int":
+                params[name] = int(round(low + z * (high - low)))
+            else:
+                params[name] = _round(low + z * (high - low))
+        return params
+
+    def encode(self, params):
+        """調整値の dict → [0, 1] に正規化した座標"""
+        unit = []
+        for name, (kind, low, high, values) in zip(self.names, self.dims):
+            value = params[name]
+            if kind == "choice":
+                index = values.index(value) if value in values else 0
+                unit.append((index + 0.5) / len(values))
+            else:
+                unit.append((value - low) / (high - low) if high > low else 0.5)
+        return np.clip(np.asarray(unit, dtype=float), 0.0, 1.0)
+
+
+def _number(text):
+    """"3" → 3, "0.5" → 0.5"""
+    value = float(text)
+    return int(value) if value.is_integer() and "." not in text else value
+
+
+def _round(value):
+    """キャッシュのキーとプロファイルが読みやすいように実数を丸める"""
+    return round(float(value), 4)
+
+
+def current_values(controller, names):
+    """制御クラスの今の調整値（プロジェクトの設定値・クラス定数）"""
+    project, module_name, class_name, _, extra_paths = CONTROLLERS[controller]
+    module, settings = import_isolated(project, module_name, extra_paths)
+    cls = getattr(module, class_name)
+    overrides = getattr(settings, "CONTROLLER_CONSTANTS", {})
+    values = {}
+    for name in names:
+        if name in overrides:
+            values[name] = overrides[name]
+        elif hasattr(cls, name):
+            values[name] = getattr(cls, name)
+        else:
+            values[name] = getattr(module, name)
+    return values
+
+
+def score(result, cfg):
+    """
+    1回の走行の評価値（小さいほど良い）と内訳
+
+    Returns:
+        dict: score, lap_time, laps, contacts, states
+    """
+    run_time = result["sim_time"]
+    laps = result["laps"]
+    lap_time = min(run_time / laps, cfg.TUNE_MAX_LAP_TIME) if laps > 0 else cfg.TUNE_MAX_LAP_TIME
+    states = {name: result["state_entries"].get(name, 0) for name in cfg.TUNE_STATE_WEIGHTS}
+    value = (lap_time + result["contacts"] * cfg.TUNE_CONTACT_WEIGHT
+             + sum(count * cfg.TUNE_STATE_WEIGHTS[name] for name, count in states.items()))
+    return {"score": value, "lap_time": lap_time, "laps": laps, "contacts": result["contacts"], "states": states}
+
+
+# プロセスプールの子プロセスが使うシミュレーターの設定（fork で親から引き継ぐ）
+_worker_cfg = None
+
+
+def _run_one(task):
+    """1候補・1つの種の走行（プロセスプールの子プロセスで呼ぶ）"""
+    controller, params, seed, duration, noise_std = task
+    sim = Simulation(controller, _worker_cfg, seed=seed, noise_std=noise_std, params=params)
+    return score(sim.run(duration), _worker_cfg)
+
+
+class Tuner:
+    """
+    候補の評価（キャッシュとプロセスプール）と探索
+
+    with 文の中で grid() / random() / cmaes() を呼ぶ（プロセスプールを作って片付ける）。
+    """
+
+    def __init__(self, controller, cfg, space, seeds=None, duration=None, noise_std=None,
+                 workers=None, cache_path=None, log=print):
+        """
+        Args:
+            controller: CONTROLLERS のキー
+            cfg: シミュレーターの設定（simulator/config/settings.py）
+            space: SearchSpace
+            seeds: センサーノイズの乱数の種のリスト（None なら TUNE_SEEDS）
+            duration: 1回の模擬走行時間 (秒、None なら TUNE_DURATION)
+            noise_std: 測定ノイズの標準偏差 (mm、None なら TUNE_NOISE_STD)
+            workers: プロセス数（None なら TUNE_WORKERS、0 ならプロセスを分けない）
+            cache_path: 評価結果のキャッシュ (JSON Lines、None ならキャッシュしない)
+            log: 進み具合の表示先
+        """
+        if controller not in CONTROLLERS:
+            raise KeyError(f"未知の制御クラス: {controller}（{', '.join(CONTROLLERS)}）")
+        self.controller = controller
+        self.cfg = cfg
+        self.space = space
+        self.seeds = list(cfg.TUNE_SEEDS if seeds is None else seeds)
+        self.duration = cfg.TUNE_DURATION if duration is None else duration
+        self.noise_std = cfg.TUNE_NOISE_STD if noise_std is None else noise_std
+        workers = cfg.TUNE_WORKERS if workers is None else workers
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.cache_path = cache_path
+        self.log = log
+
+        # 調整値の名前をここで確かめる（子プロセスで失敗しないように）
+        _ensure_hardware_modules()
+        project, module_name, class_name, _, extra_paths = CONTROLLERS[controller]
+        module, _ = import_isolated(project, module_name, extra_paths)
+        split_params(module, class_name, dict.fromkeys(space.names, 0))
+        self.baseline = current_values(controller, space.names)
+
+        self.cache = {}
+        self.history = []           # 評価した順の記録（キャッシュから読んだものを含む）
+        self.best = None
+        self.cache_hits = 0
+        self._pool = None
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        self.cache[record["key"]] = record
+
+    def __enter__(self):
+        global _worker_cfg
+        if self.workers > 0:
+            _worker_cfg = self.cfg
+            self._pool = multiprocessing.get_context("fork").Pool(self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def key(self, params):
+        """候補と評価条件のキャッシュのキー（シミュレーターの設定が変われば別のキーになる）"""
+        cfg = self.cfg
+        conditions = {name: getattr(cfg, name) for name in dir(cfg)
+                      if name.isupper() and not name.startswith("TUNE_")}
+        text = json.dumps({
+            "controller": self.controller,
+            "params": params,
+            "seeds": self.seeds,
+            "duration": self.duration,
+            "noise_std": self.noise_std,
+            "sim": conditions,
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def evaluate(self, candidates):
+        """
+        候補をまとめて評価する（キャッシュにないものだけ走らせる）
+
+        Returns:
+            list: 候補ごとの記録 {key, params, score, lap_time, laps, contacts, states}
+        """
+        keys = [self.key(params) for params in candidates]
+        missing = [(key, params) for key, params in zip(keys, candidates) if key not in self.cache]
+        # 同じ候補が重複していたら1回だけ走らせる
+        missing = list(dict(missing).items())
+        if missing:
+            tasks = [(self.controller, params, seed, self.duration, self.noise_std)
+                     for _, params in missing for seed in self.seeds]
+            global _worker_cfg
+            _worker_cfg = self.cfg
+            runs = self._pool.imap(_run_one, tasks) if self._pool is not None else map(_run_one, tasks)
+            runs = iter(runs)
+            for key, params in missing:
+                record = self._combine(key, params, [next(runs) for _ in self.seeds])
+                self.cache[key] = record
+                if self.cache_path:
+                    with open(self.cache_path, "a") as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.cache_hits += len(candidates) - len(missing)
+
+        records = [self.cache[key] for key in keys]
+        for record in records:
+            self.history.append(record)
+            if self.best is None or record["score"] < self.best["score"]:
+                self.best = record
+                self.log(f"  {len(self.history):4d}件目 最良 {format_record(record)}")
+        return records
+
+    def _combine(self, key, params, runs):
+        """種ごとの評価を平均する"""
+        n = len(runs)
+        return {
+            "key": key,
+            "params": params,
+            "score": sum(r["score"] for r in runs) / n,
+            "lap_time": sum(r["lap_time"] for r in runs) / n,
+            "laps": sum(r["laps"] for r in runs) / n,
+            "contacts": sum(r["contacts"] for r in runs) / n,
+            "states": {name: sum(r["states"][name] for r in runs) / n for name in runs[0]["states"]},
+        }
+
+    def grid(self, points=None):
+        """格子点を全部評価する"""
+        candidates = self.space.grid(points or self.cfg.TUNE_GRID_POINTS)
+        self.log(f"grid: {len(candidates)}候補")
+        self.evaluate(candidates)
+        return self.best
+
+    def random(self, budget=None, seed=0):
+        """一様乱数で budget 個の候補を評価する（今の調整値も1つ目に入れる）"""
+        budget = budget or self.cfg.TUNE_BUDGET
+        rng = np.random.default_rng(seed)
+        candidates = [self.space.decode(self.space.encode(self.baseline))]
+        candidates += [self.space.sample(rng) for _ in range(budget - 1)]
+        self.log(f"random: {len(candidates)}候補")
+        self.evaluate(candidates)
+        return self.best
+
+    def cmaes(self, budget=None, seed=0, sigma=0.3):
+        """
+        CMA-ES（共分散行列適応進化戦略）で budget 個まで評価する
+
+        [0, 1] に正規化した空間で、今の調整値を初期の平均にする。範囲外の点は切り詰めて評価する。
+        budget が1世代の候補数で割り切れないときは、最後の世代を budget に収まる分だけ評価して終える。
+        乱数の種が同じなら同じ候補の列になるので、キャッシュがあれば途中から再開できる。
+        """
+        budget = budget or self.cfg.TUNE_BUDGET
+        rng = np.random.default_rng(seed)
+        d = len(self.space.names)
+        lam = 4 + int(3 * math.log(d))
+        mu = lam // 2
+        weights = math.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        weights /= weights.sum()
+        mueff = 1.0 / np.sum(weights ** 2)
+        cc = (4 + mueff / d) / (d + 4 + 2 * mueff / d)
+        cs = (mueff + 2) / (d + mueff + 5)
+        c1 = 2 / ((d + 1.3) ** 2 + mueff)
+        cmu = min(1 - c1, 2 * (mueff - 2 + 1 / mueff) / ((d + 2) ** 2 + mueff))
+        damps = 1 + 2 * max(0.0, math.sqrt((mueff - 1) / (d + 1)) - 1) + cs
+        chi_n = math.sqrt(d) * (1 - 1 / (4 * d) + 1 / (21 * d * d))
+
+        mean = self.space.encode(self.baseline)
+        cov = np.eye(d)
+        p_c = np.zeros(d)
+        p_s = np.zeros(d)
+        self.log(f"cmaes: {budget}候補まで（1世代 {lam}候補、{d}次元）")
+        evaluated = 0
+        generation = 0
+        while evaluated < budget:
+            eigenvalues, basis = np.linalg.eigh(cov)
+            scale = np.sqrt(np.maximum(eigenvalues, 1e-20))
+            steps = rng.standard_normal((lam, d)) @ (basis * scale).T
+            points = mean + sigma * steps
+            remaining = budget - evaluated
+            if remaining < lam:
+                # 世代の途中までは順位付けに使えないので、評価だけして終える
+                self.evaluate([self.space.decode(x) for x in points[:remaining]])
+                break
+            records = self.evaluate([self.space.decode(x) for x in points])
+            evaluated += lam
+            generation += 1
+
+            order = np.argsort([r["score"] for r in records], kind="stable")
+            selected = steps[order[:mu]]
+            step_w = weights @ selected
+            mean = np.clip(mean + sigma * step_w, 0.0, 1.0)
+            inv_sqrt = basis @ np.diag(1 / scale) @ basis.T
+            p_s = (1 - cs) * p_s + math.sqrt(cs * (2 - cs) * mueff) * (inv_sqrt @ step_w)
+            h_sig = (np.linalg.norm(p_s) / math.sqrt(1 - (1 - cs) ** (2 * generation)) / chi_n
+                     < 1.4 + 2 / (d + 1))
+            p_c = (1 - cc) * p_c + h_sig * math.sqrt(cc * (2 - cc) * mueff) * step_w
+            cov = ((1 - c1 - cmu) * cov
+                   + c1 * (np.outer(p_c, p_c) + (not h_sig) * cc * (2 - cc) * cov)
+                   + cmu * (selected.T * weights) @ selected)
+            sigma *= math.exp((cs / damps) * (np.linalg.norm(p_s) / chi_n - 1))
+            if sigma < 1e-4:
+                self.log(f"  {generation}世代で収束しました")
+                break
+        return self.best
+
+
+def format_record(record):
+    """記録の表示用の1行"""
+    states = " ".join(f"{name} {count:.1f}" for name, count in record["states"].items())
+    return (f"評価 {record['score']:7.2f} (周回時間 {record['lap_time']:5.1f}s / {record['laps']:+.2f}周 "
+            f"接触 {record['contacts']:.2f} {states})")
+
+
+def write_profile(path, controller, record):
+    """
+    調整結果を制御クラスのプロジェクトの config/tuned_profile.py としてそのまま置けるファイルに書く
+
+    設定値は同名の定数、クラス定数は CONTROLLER_CONSTANTS にまとめる（settings.py が読み込んで上書きする）。
+    """
+    project, module_name, class_name, _, extra_paths = CONTROLLERS[controller]
+    module, _ = import_isolated(project, module_name, extra_paths)
+    params = record["params"]
+    settings_params, class_params = split_params(module, class_name, params)
+    current = current_values(controller, params)
+
+    lines = [
+        '"""',
+        f"自動調整のプロファイル ({controller}: {project})",
+        f"{time.strftime('%Y-%m-%d %H:%M:%S')} に simulator/tune.py で作成",
+        f"{format_record(record)}",
+        "",
+        f"{project}/config/tuned_profile.py に置くと config/settings.py の値を上書きする",
+        '"""',
+        "",
+    ]
+    for name, value in settings_params.items():
+        lines.append(f"{name} = {value!r}  # 調整前 {current[name]!r}")
+    if class_params:
+        lines.append("")
+        lines.append(f"# {class_name} のクラス定数")
+        lines.append("CONTROLLER_CONSTANTS = {")
+        for name, value in class_params.items():
+            lines.append(f"    {name!r}: {value!r},  # 調整前 {current[name]!r}")
+        lines.append("}")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
@@ -0,0 +1,93 @@
+"""
+キネマティック自転車モデル
+"""
+
+import math
+
+import numpy as np
+
+
+class Vehicle:
+    """
+    後輪軸中心を基準にした自転車モデル（位置 mm、向き rad、速度 mm/s）
+
+    サーボ角度とスロットルを実機と同じ値で受け取り、前輪の切れ角と目標速度に変換する。
+    """
+
+    def __init__(self, cfg, x, y, heading):
+        """
+        Args:
+            cfg: 車両・センサーの設定（simulator/config/settings.py）
+            x, y: 後輪軸中心の位置 (mm)
+            heading: 向き (rad)
+        """
+        self.x = float(x)
+        self.y = float(y)
+        self.heading = float(heading)
+        self.speed = 0.0
+        self.odometer = 0.0     # 走行距離 (mm)
+
+        self.wheelbase = cfg.WHEELBASE
+        self.servo_center = cfg.SERVO_CENTER
+        self.steer_gain = math.radians(cfg.STEER_GAIN)
+        self.max_wheel_angle = math.radians(cfg.MAX_WHEEL_ANGLE)
+        self.max_speed = cfg.MAX_SPEED
+        self.deadband = cfg.THROTTLE_DEADBAND
+        self.time_constant = cfg.SPEED_TIME_CONSTANT
+        self.center_offset = cfg.CAR_CENTER_OFFSET
+
+        mounts = np.asarray(cfg.SENSOR_MOUNTS, dtype=float)
+        self._mount_xy = mounts[:, :2]
+        self._mount_angle = np.radians(mounts[:, 2])
+
+    def wheel_angle(self, servo_angle):
+        """サーボ角度 → 前輪の切れ角 (rad、左が正)"""
+        angle = (self.servo_center - servo_angle) * self.steer_gain
+        return max(-self.max_wheel_angle, min(self.max_wheel_angle, angle))
+
+    def target_speed(self, throttle):
+        """スロットル → 目標速度 (mm/s)"""
+        magnitude = abs(throttle)
+        if magnitude <= self.deadband:
+            return 0.0
+        speed = (min(magnitude, 1.0) - self.deadband) / (1.0 - self.deadband) * self.max_speed
+        return speed if throttle > 0 else -speed
+
+    def step(self, servo_angle, throttle, dt, substeps=1):
+        """指令を dt 秒間保持して進める"""
+        # 一括シミュレーション (batch.py) と同じ値になるよう numpy の tan を使う（math.tan とは末尾の桁が違う）
+        tan_delta = float(np.tan(self.wheel_angle(servo_angle)))
+        target = self.target_speed(throttle)
+        h = dt / substeps
+        alpha = 1.0 - math.exp(-h / self.time_constant)
+        x, y, heading, speed = self.x, self.y, self.heading, self.speed
+        travelled = 0.0
+        for _ in range(substeps):
+            speed += (target - speed) * alpha
+            x += speed * math.cos(heading) * h
+            y += speed * math.sin(heading) * h
+            heading += speed / self.wheelbase * tan_delta * h
+            travelled += abs(speed) * h
+        self.x, self.y, self.heading, self.speed = x, y, heading, speed
+        self.odometer += travelled
+
+    def center(self):
+        """衝突判定の中心 (2,)"""
+        return np.array([self.x + self.center_offset * math.cos(self.heading),
+                         self.y + self.center_offset * math.sin(self.heading)])
+
+    def sensor_rays(self):
+        """
+        センサーの光線
+
+        Returns:
+            tuple: (始点 (5, 2), 向きの単位ベクトル (5, 2))
+        """
+        c = math.cos(self.heading)
+        s = math.sin(self.heading)
+        mx = self._mount_xy[:, 0]
+        my = self._mount_xy[:, 1]
+        origins = np.column_stack((self.x + mx * c - my * s, self.y + mx * s + my * c))
+        angles = self._mount_angle + self.heading
+        directions = np.column_stack((np.cos(angles), np.sin(angles)))
+        return origins, directions
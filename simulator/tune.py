@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+制御クラスの調整値の自動調整
+
+探索範囲（既定は config/settings.py の TUNE_SPACE）の候補をシミュレーションで走らせ、
+周回時間・壁への接触・EMERGENCY / RECOVER に入った回数から決める評価値が一番良い調整値を探す。
+評価結果は tune_results/<制御クラス>.jsonl にキャッシュし、同じ指定で再実行すると続きから再開する。
+最良の調整値は <プロジェクト>/config/tuned_profile.py としてそのまま置けるプロファイルに書き出す。
+
+使用方法:
+    python tune.py cmaes                              # TUNE_SPACE を CMA-ES で TUNE_BUDGET 候補まで
+    python tune.py random --budget 500 --workers 8
+    python tune.py grid --points 4 --space WALL_FOLLOW_KP=0.05:0.3 FRONT_BLOCKED_CONFIRM=1:5:int
+    python tune.py cmaes --install                    # 結果を state_machine_fast/config/tuned_profile.py に置く
+"""
+
+import os
+import sys
+import time
+
+from config import settings as cfg
+from modules.tuning import SearchSpace, Tuner, format_record, write_profile
+from common.controller_loader import CONTROLLERS, import_isolated
+
+SIMULATOR_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    """エントリーポイント"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='制御クラスの調整値の自動調整')
+    parser.add_argument('strategy', choices=['grid', 'random', 'cmaes'], help='探索の方法')
+    parser.add_argument('--controller', '-c', default=cfg.TUNE_CONTROLLER,
+                        help=f"調整する制御クラス（{', '.join(CONTROLLERS)}）")
+    parser.add_argument('--space', nargs='+', metavar='NAME=範囲',
+                        help='探索範囲（NAME=下限:上限 / NAME=下限:上限:int / NAME=値,値,...。既定は TUNE_SPACE）')
+    parser.add_argument('--budget', '-b', type=int, default=cfg.TUNE_BUDGET, help='random / cmaes の候補数')
+    parser.add_argument('--points', type=int, default=cfg.TUNE_GRID_POINTS, help='grid の1次元あたりの点数')
+    parser.add_argument('--seed', type=int, default=0, help='random / cmaes の乱数の種')
+    parser.add_argument('--workers', '-j', type=int, default=cfg.TUNE_WORKERS,
+                        help='評価するプロセス数（0: プロセスを分けない）')
+    parser.add_argument('--duration', '-d', type=float, default=cfg.TUNE_DURATION, help='1回の模擬走行時間（秒）')
+    parser.add_argument('--cache', help='評価結果のキャッシュ（既定: tune_results/<制御クラス>.jsonl）')
+    parser.add_argument('--profile', help='プロファイルの出力先（既定: tune_results/<制御クラス>_tuned_profile.py）')
+    parser.add_argument('--install', action='store_true',
+                        help='プロファイルを制御クラスのプロジェクトの config/tuned_profile.py に書き出す')
+    args = parser.parse_args()
+
+    if args.controller not in CONTROLLERS:
+        parser.error(f"未知の制御クラス: {args.controller}")
+    try:
+        space = SearchSpace.parse(args.space) if args.space else SearchSpace(cfg.TUNE_SPACE)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results_dir = os.path.join(SIMULATOR_DIR, cfg.TUNE_RESULTS_DIR)
+    os.makedirs(results_dir, exist_ok=True)
+    cache_path = args.cache or os.path.join(results_dir, f"{args.controller}.jsonl")
+    project = CONTROLLERS[args.controller][0]
+    if args.install:
+        profile_path = os.path.join(os.path.dirname(SIMULATOR_DIR), project, "config", "tuned_profile.py")
+    else:
+        profile_path = args.profile or os.path.join(results_dir, f"{args.controller}_tuned_profile.py")
+
+    try:
+        tuner = Tuner(args.controller, cfg, space, duration=args.duration, workers=args.workers,
+                      cache_path=cache_path)
+    except KeyError as e:
+        parser.error(e.args[0])
+    print(f"{args.controller}: {', '.join(space.names)}")
+    print(f"  {len(tuner.seeds)}つの種 × {tuner.duration:.0f}秒 / ノイズ {tuner.noise_std:.0f}mm / "
+          f"{tuner.workers}プロセス / キャッシュ {len(tuner.cache)}件 ({cache_path})")
+
+    start = time.perf_counter()
+    with tuner:
+        # 今の調整値の評価（比較用）
+        baseline = tuner.evaluate([space.decode(space.encode(tuner.baseline))])[0]
+        try:
+            if args.strategy == 'grid':
+                best = tuner.grid(args.points)
+            elif args.strategy == 'random':
+                best = tuner.random(args.budget, seed=args.seed)
+            else:
+                best = tuner.cmaes(args.budget, seed=args.seed)
+        except KeyboardInterrupt:
+            print("\n中断しました（評価済みの候補はキャッシュに残っているので、同じ指定で再開できます）")
+            best = tuner.best
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{len(tuner.history)}候補 (キャッシュから {tuner.cache_hits}件) / {elapsed:.1f}秒")
+    print(f"調整前 {format_record(baseline)}")
+    print(f"最良   {format_record(best)}")
+    for name, value in best["params"].items():
+        print(f"  {name:<28} {tuner.baseline[name]!r:>10} → {value!r}")
+
+    write_profile(profile_path, args.controller, best)
+    print(f"\nプロファイルを書き出しました: {profile_path}")
+    _, settings = import_isolated(*(CONTROLLERS[args.controller][i] for i in (0, 1, 4)))
+    if not hasattr(settings, "CONTROLLER_CONSTANTS"):
+        print(f"  注意: {project}/config/settings.py は tuned_profile.py を読み込まないので、値を手で写してください")
+    elif not args.install:
+        print(f"  {project}/config/tuned_profile.py に置くと settings.py の値を上書きします（--install で直接書き出し）")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,6 +21,63 @@ SENSOR_INTER_MEASUREMENT = 60
 SENSOR_INVALID_VALUE = 9999
 SENSOR_MAX_RANGE = 1300  # VL53L4CDの最大測定距離 (mm)
 
+# バックグラウンド測距（専用スレッドで連続測距し、read()は最新値を即座に返す）
+SENSOR_BACKGROUND_ACQUISITION = False
+SENSOR_POLL_INTERVAL = 0.002  # 測距スレッドの巡回間隔 (秒)
+SENSOR_PROCESS = False  # True: センサー取得を子プロセスで動かし、共有メモリのリングから最新フレームを読む（GILを分ける）
+
+# GPIO1割り込み線による測定完了検知（data_ready をI2Cでポーリングしない）
+SENSOR_USE_INTERRUPTS = False
+SENSOR_INTERRUPT_PINS = [5, 6, 13, 19, 26]  # 各センサーのGPIO1を接続するピン (BCM)
+
+# 結果レジスタのバースト読みによる高速読み取り（Falseで adafruit ドライバのプロパティを使う）
+# 実機で確認するまでは既定で無効
+SENSOR_FAST_PATH = False
+
+# センサーごとの測定プロファイル
+# 各チャンネル (timing_budget ms, inter_measurement ms, read()で測定完了を待つか)
+# 待たないチャンネルは新しい測定がなければ前回値（取得時刻もそのまま）を使う
+SENSOR_PROFILES = {
+    # 全センサー同じ設定
+    "uniform": [(SENSOR_TIMING_BUDGET, SENSOR_INTER_MEASUREMENT, True)] * 5,
+    # 正面を短いバジェットで最速に、側面は長いバジェットでゆっくり
+    "front_priority": [
+        (100, 150, False),  # 真左
+        (50, 100, False),   # 斜め左前
+        (15, 0, True),      # 正面（連続測距）
+        (50, 100, False),   # 斜め右前
+        (100, 150, False),  # 真右
+    ],
+}
+SENSOR_DEFAULT_PROFILE = "uniform"
+
+# センサーヘルスモニター（連続して失敗したセンサーをバックグラウンドで再初期化）
+SENSOR_AUTO_REINIT = True
+SENSOR_HEALTH_FAIL_THRESHOLD = 5     # 再初期化を始める連続失敗回数
+SENSOR_HEALTH_STALL_TIMEOUT = 0.3    # 待たずに読むチャンネルで測定が途絶えたとみなす時間 (秒)
+SENSOR_HEALTH_RETRY_INTERVAL = 2.0   # 再初期化に失敗したときの再試行間隔 (秒)
+
+# ウォームスタート（前回の実行でアドレス変更済みのセンサーは XSHUT シーケンスを省略）
+SENSOR_WARM_RESTART = True
+SENSOR_KEEP_ALIVE_ON_EXIT = True  # 終了時にXSHUTをLowにせず、センサーのアドレスを保持する
+# 全台をXSHUTシーケンスで起動した時間の記録（ウォームスタートの短縮時間を実測の差で表示する）
+SENSOR_COLD_START_RECORD = "/tmp/minicar_sensor_cold_start.txt"
+
+# 走行状態ごとのセンサープロファイル（未指定の状態は SENSOR_DEFAULT_PROFILE）
+SENSOR_STATE_PROFILES = {
+    "LEFT_TURN": "uniform",     # コーナーは側面の更新も必要
+    "RIGHT_TURN": "uniform",
+}
+SENSOR_HIGH_SPEED_PROFILE = "front_priority"  # 高速で WALL_FOLLOW 中のプロファイル
+
+# この時間 (秒) より古いチャンネルは最後の値のまま使い、正面が古ければスロットルを止める
+SENSOR_STALE_TIMEOUT = 0.3
+
+# 距離フィルタ（カルマンフィルタで距離と変化率を推定し、変化率の計算に使う。numpyが必要）
+RANGE_FILTER_ENABLED = False
+RANGE_FILTER_ACCEL_STD = 2000.0      # 変化率の変動の標準偏差 (mm/s^2)。大きいほど追従が速い
+RANGE_FILTER_MEASUREMENT_STD = 15.0  # 測定ノイズの標準偏差 (mm)
+
 # ===========================================
 # サーボ設定 (ステアリング)
 # ===========================================
@@ -56,6 +113,16 @@ THROTTLE_REVERSE = -0.16
 # ===========================================
 PCA9685_FREQUENCY = 50
 
+# ESCのアーミングと後退切り替え（待たずに時間経過で段階を進める）
+ESC_ARMING_TIME = 0.5           # 起動時にニュートラルを送り続ける時間 (秒)
+ESC_REVERSE_BRAKE_TIME = 0.04   # 後退切り替え: 最初の後退（ESCはブレーキ扱い）を送る時間 (秒)
+ESC_REVERSE_NEUTRAL_TIME = 0.04 # 後退切り替え: その後ニュートラルを送る時間 (秒)
+
+# 非同期出力（drive() は指令をアクチュエータースレッドに渡してすぐ戻る）
+# 既定は同期出力。使うときはここを True にするか main.py に --async-motor を付ける
+MOTOR_ASYNC = False
+MOTOR_FAILSAFE_PERIODS = 3  # この制御周期数だけ指令がなければステアリング中央・スロットル停止
+
 # ===========================================
 # 状態機械パラメータ
 # ===========================================
@@ -93,10 +160,16 @@ S_CURVE_DETECTION_THRESHOLD = 700
 # 制御周期設定
 # ===========================================
 CONTROL_INTERVAL = 0.04  # 40ms (25Hz)
+LOOP_OVERRUN_POLICY = "skip"  # 周期超過時: "skip"=間に合わなかった周期を飛ばす / "compress"=詰めて回して追いつく
+STAGE_PROFILING = True  # 段ごとの処理時間ヒストグラム（終了時に表示、kill -USR1 <pid> で途中表示）
+REALTIME_MODE = False  # True: 制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す（--realtime と同じ。権限がなければ飛ばす）
+REALTIME_CPU = None  # 固定するCPU番号（None: isolcpus のコア、なければ最後のコア）
+REALTIME_PRIORITY = 50  # SCHED_FIFO の優先度 (1-99)
+REALTIME_GC_MIN_SLACK = 0.005  # 周期の残りがこの秒数以上のときだけ GC を回す
 
 # ===========================================
 # デバッグ設定
 # ===========================================
-DEBUG_PRINT_INTERVAL = 1  
+DEBUG_PRINT_RATE = 5.0  # デバッグ表示の頻度 (Hz)。表示は別スレッドで最新の状態だけを出す（0以下で毎周期）
 ENABLE_DEBUG_LOG = True
 LOG_STATE_CHANGES = True
@@ -10,9 +10,18 @@
     Ctrl+C
 """
 
+import os
+import sys
 import time
+
+if "--replay" in sys.argv:
+    # 実機なしでログを再生するときは board / adafruit_* を fake_hw に差し替えてから import する
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from common.fake_hw import install_fake_hardware
+    install_fake_hardware()
+
 import board
-import sys
+import busio
 import warnings
 
 from config import settings as cfg
@@ -32,36 +41,92 @@ def _load_setting(name, default):
 
 # Fallback defaults keep the runner alive even if a constant is missing in settings.
 CONTROL_INTERVAL = _load_setting("CONTROL_INTERVAL", 0.04)
-DEBUG_PRINT_INTERVAL = _load_setting("DEBUG_PRINT_INTERVAL", 1)
+DEBUG_PRINT_RATE = _load_setting("DEBUG_PRINT_RATE", 5.0)
 ENABLE_DEBUG_LOG = _load_setting("ENABLE_DEBUG_LOG", True)
-
-from modules.sensor import SensorManager
+LOOP_OVERRUN_POLICY = _load_setting("LOOP_OVERRUN_POLICY", "skip")
+PIPELINE_MODE = _load_setting("PIPELINE_MODE", False)
+STAGE_PROFILING = _load_setting("STAGE_PROFILING", True)
+SENSOR_PROCESS = _load_setting("SENSOR_PROCESS", False)
+REALTIME_MODE = _load_setting("REALTIME_MODE", False)
+REALTIME_CPU = _load_setting("REALTIME_CPU", None)
+REALTIME_PRIORITY = _load_setting("REALTIME_PRIORITY", 50)
+REALTIME_GC_MIN_SLACK = _load_setting("REALTIME_GC_MIN_SLACK", 0.005)
+
+from modules.sensor import SensorManager, SensorData
 from modules.motor import MotorController
 from modules.state_controller import StateController
 from modules.data_logger import DataLogger
+from common.debug_console import DebugConsole
+from common.loop_runner import FixedRateLoop
+from common.realtime import RealtimeRuntime
+from common.pipeline import PipelinedLoop
+from common.stage_profiler import StageProfiler
+from common.sensor_process import ProcessSensorManager
+from common.replay import ReplaySensorManager, ReplayFinished, NullMotor
 
 
 class MiniCarStateMachine:
     """状態機械ベース走行のメインクラス"""
 
-    def __init__(self, enable_logging=True):
+    def __init__(self, enable_logging=True, replay=None, fast=False, pipeline=PIPELINE_MODE,
+                 realtime=REALTIME_MODE, async_motor=None):
         print("=" * 50)
         print("状態機械ベース走行システム")
         print("左手法（左壁沿い）で周回")
         print("=" * 50)
 
-        # I2Cバスを共有
-        self.i2c = board.I2C()
-
-        # 各モジュールの初期化
-        self.sensor = SensorManager(self.i2c)
-        self.motor = MotorController(self.i2c)
+        # リアルタイムモード（CPU固定・SCHED_FIFO・GC制御。リプレイでは使わない）
+        # 測距・アクチュエーターのスレッドも開始時に同じ CPU・優先度にする
+        self.realtime = RealtimeRuntime(enabled=realtime and not replay, cpu=REALTIME_CPU,
+                                        priority=REALTIME_PRIORITY, gc_min_slack=REALTIME_GC_MIN_SLACK)
+
+        if replay:
+            # 記録ログを再生して制御だけ回す（モーター出力なし）
+            self.i2c = None
+            self.sensor = ReplaySensorManager(replay, SensorData, realtime=not fast)
+            self.motor = NullMotor()
+        else:
+            # I2Cバスを共有
+            self.i2c = board.I2C()
+
+            # 各モジュールの初期化
+            if SENSOR_PROCESS:
+                # センサーは子プロセスで取得（子ではI2Cバスを開き直す）
+                self.sensor = ProcessSensorManager(
+                    lambda: SensorManager(busio.I2C(board.SCL, board.SDA), background=False), SensorData
+                )
+            else:
+                self.sensor = SensorManager(self.i2c, thread_setup=self.realtime.apply_to_current_thread)
+            self.motor = MotorController(self.i2c, async_mode=async_motor,
+                                         thread_setup=self.realtime.apply_to_current_thread)
         self.controller = StateController()
 
         # データロガー
         self.logger = DataLogger(enabled=enable_logging)
 
-        self.loop_count = 0
+        # 絶対時刻で周期を刻む（リプレイ中は再生側が記録時のタイミングで待つ）
+        self.rate = FixedRateLoop(0 if replay else CONTROL_INTERVAL, overrun=LOOP_OVERRUN_POLICY,
+                                  idle=self.realtime.idle)
+        # 段ごとの処理時間（I2C読み取り・制御計算・PWM出力・CSVログ・表示・周期待ち）
+        self.profiler = StageProfiler(("sensor", "control", "motor", "log", "print", "wait"),
+                                      enabled=STAGE_PROFILING)
+        # デバッグ表示は別スレッドで制御結果のスナップショットを一定頻度で表示
+        self.console = None
+        if ENABLE_DEBUG_LOG:
+            self.console = DebugConsole(self.controller.debug_snapshot, self.controller.format_debug,
+                                        rate=DEBUG_PRINT_RATE, profiler=self.profiler)
+        # パイプライン実行（センサー読み取りと計算・出力を重ね、ログ・表示は別スレッド）
+        self.pipeline = None
+        if pipeline:
+            self.pipeline = PipelinedLoop(
+                self._sense, self._compute, self._actuate, self._record,
+                rate=self.rate, capture_time=lambda data: max(data.capture_times),
+                lossless=bool(replay),
+                # センサー段は制御スレッドと同じ CPU・優先度、記録段（CSVログ）は
+                # 引き継いだ SCHED_FIFO を外してほかの CPU で回す
+                sense_setup=self.realtime.apply_to_current_thread,
+                record_setup=self.realtime.release_current_thread
+            )
     
     def initialize(self):
         """システムの初期化"""
@@ -83,45 +148,109 @@ class MiniCarStateMachine:
 
         # ログ記録開始
         self.logger.start()
-
+        self.profiler.install_signal()
+        if self.console is not None:
+            self.console.start()
+
+        if self.pipeline is not None:
+            self.realtime.enter()
+            try:
+                self.pipeline.run()
+            except (KeyboardInterrupt, ReplayFinished):
+                print("\n" + "-" * 50)
+                print("停止信号を受信")
+            finally:
+                self.shutdown()
+            return
+
+        profiler = self.profiler
+        self.realtime.enter()
+        self.rate.start()
+        profiler.begin()
         try:
             while True:
                 # 1. センサー読み取り
                 sensor_data = self.sensor.read()
+                profiler.lap("sensor")
 
                 # 2. 状態更新＆制御値計算
                 steering, throttle = self.controller.update(sensor_data)
+                self.sensor.set_profile(self.controller.sensor_profile())
+                profiler.lap("control")
 
                 # 3. モーター出力
                 self.motor.drive(steering, throttle)
+                profiler.lap("motor")
 
                 # 4. データログ記録
                 state = self.controller.state.name if hasattr(self.controller, 'state') else ''
-                self.logger.log(steering, throttle, sensor_data, state)
-
-                # 5. デバッグ表示
-                self.loop_count += 1
-                if ENABLE_DEBUG_LOG and self.loop_count % DEBUG_PRINT_INTERVAL == 0:
-                    print(self.controller.format_debug(sensor_data))
+                self.logger.log(steering, throttle, sensor_data, state, self.controller.stale)
+                profiler.lap("log")
 
-                # 6. 周期待ち
-                time.sleep(CONTROL_INTERVAL)
+                # 5. 周期待ち（デバッグ表示は DebugConsole のスレッドが行う）
+                self.rate.wait()
+                profiler.lap("wait")
 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, ReplayFinished):
             print("\n" + "-" * 50)
             print("停止信号を受信")
 
         finally:
             self.shutdown()
-    
+
+    def _sense(self):
+        """パイプラインのセンサー段"""
+        start = time.monotonic_ns()
+        sensor_data = self.sensor.read()
+        self.profiler.record("sensor", time.monotonic_ns() - start)
+        return sensor_data
+
+    def _compute(self, sensor_data):
+        """パイプラインの制御段: 状態更新＆制御値計算"""
+        start = time.monotonic_ns()
+        steering, throttle = self.controller.update(sensor_data)
+        self.sensor.set_profile(self.controller.sensor_profile())
+        state = self.controller.state.name if hasattr(self.controller, 'state') else ''
+        self.profiler.record("control", time.monotonic_ns() - start)
+        return steering, throttle, state, self.controller.stale
+
+    def _actuate(self, command):
+        """パイプラインの出力段"""
+        start = time.monotonic_ns()
+        self.motor.drive(command[0], command[1])
+        self.profiler.record("motor", time.monotonic_ns() - start)
+
+    def _record(self, sensor_data, command):
+        """パイプラインの記録段: データログ記録"""
+        steering, throttle, state, stale = command
+        start = time.monotonic_ns()
+        self.logger.log(steering, throttle, sensor_data, state, stale)
+        self.profiler.record("log", time.monotonic_ns() - start)
+
     def shutdown(self):
         """終了処理"""
         print("システム終了処理...")
+        self.realtime.leave()
+        if self.console is not None:
+            self.console.stop()
         self.logger.stop()
+        if self.rate.cycles:
+            print(self.rate.summary())
+        if self.pipeline is not None and self.pipeline.cycles:
+            print(self.pipeline.summary())
+        self._export_profile()
         self.motor.cleanup()
         self.sensor.cleanup()
         print("正常に終了しました")
 
+    def _export_profile(self):
+        """段ごとの処理時間を表示し、ログ記録中ならCSVの隣にJSONで保存"""
+        if not self.profiler.enabled:
+            return
+        print(self.profiler.report())
+        if self.logger.file_path is not None:
+            self.profiler.dump(os.path.splitext(str(self.logger.file_path))[0] + "_profile.json")
+
 
 def main():
     """エントリーポイント"""
@@ -130,16 +259,29 @@ def main():
     parser = argparse.ArgumentParser(description='状態機械ベース走行システム')
     parser.add_argument('--no-log', action='store_true',
                        help='データログ記録を無効化')
+    parser.add_argument('--replay', metavar='CSV',
+                       help='実機の代わりに記録ログ（driving_log / record_data）を再生')
+    parser.add_argument('--fast', action='store_true',
+                       help='リプレイを記録時のタイミングを無視して最速で回す')
+    parser.add_argument('--pipeline', action='store_true', default=PIPELINE_MODE,
+                       help='センサー読み取りと計算・出力を重ねるパイプライン実行')
+    parser.add_argument('--realtime', action='store_true', default=REALTIME_MODE,
+                       help='制御スレッドをCPU固定・SCHED_FIFO にし、GC を周期の余裕で回す')
+    parser.add_argument('--async-motor', action='store_true', default=None,
+                       help='モーター出力をアクチュエータースレッドで非同期に行う（既定は settings の MOTOR_ASYNC）')
     args = parser.parse_args()
 
-    car = MiniCarStateMachine(enable_logging=not args.no_log)
+    car = MiniCarStateMachine(enable_logging=not args.no_log,
+                              replay=args.replay, fast=args.fast, pipeline=args.pipeline,
+                              realtime=args.realtime, async_motor=args.async_motor)
 
     if not car.initialize():
         print("初期化に失敗しました。終了します。")
         sys.exit(1)
 
-    print("\nEnterキーを押すと走行を開始します...")
-    input()
+    if not args.replay:
+        print("\nEnterキーを押すと走行を開始します...")
+        input()
 
     car.run()
 
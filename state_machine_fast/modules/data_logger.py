@@ -30,7 +30,13 @@ class DataLogger:
         'sensor_c',       # 正面センサー (mm)
         'sensor_r1',      # 右前センサー (mm)
         'sensor_r2',      # 右センサー (mm)
-        'state'           # 走行状態
+        'state',          # 走行状態
+        'age_l2',         # 左センサーの経過時間 (ms)
+        'age_l1',         # 左前センサーの経過時間 (ms)
+        'age_c',          # 正面センサーの経過時間 (ms)
+        'age_r1',         # 右前センサーの経過時間 (ms)
+        'age_r2',         # 右センサーの経過時間 (ms)
+        'stale',          # SENSOR_STALE_TIMEOUT より古かったチャンネル（ビット0=左 … ビット4=右）
     ]
 
     def __init__(self, output_dir=None, enabled=True):
@@ -72,7 +78,7 @@ class DataLogger:
 
         print(f"[DataLogger] 記録開始: {self.file_path}")
 
-    def log(self, steering, throttle, distances, state=''):
+    def log(self, steering, throttle, distances, state='', stale=None):
         """
         1行分のデータを記録
 
@@ -81,6 +87,7 @@ class DataLogger:
             throttle: スロットル値
             distances: センサー値のリスト [l2, l1, c, r1, r2]
             state: 走行状態の文字列
+            stale: チャンネルごとに古かったかのリスト（コントローラーの判定、省略時は空欄）
         """
         if not self.enabled or self.writer is None:
             return
@@ -88,6 +95,18 @@ class DataLogger:
         # 経過時間を計算
         elapsed = (datetime.now() - self.start_time).total_seconds()
 
+        # チャンネル別の経過時間（SensorDataのみ）
+        if hasattr(distances, "ages"):
+            ages = [f'{age * 1000:.0f}' for age in distances.ages()]
+        else:
+            ages = [''] * 5
+
+        # 古かったチャンネルのビットマスク
+        if stale is not None:
+            stale = str(sum(1 << i for i, flag in enumerate(stale) if flag))
+        else:
+            stale = ''
+
         # センサー値を展開
         if hasattr(distances, "as_list"):
             distances = distances.as_list()
@@ -112,7 +131,9 @@ class DataLogger:
             f'{c:.0f}',
             f'{r1:.0f}',
             f'{r2:.0f}',
-            state
+            state,
+            *ages,
+            stale
         ]
         self.writer.writerow(row)
         self.record_count += 1
@@ -1,18 +1,32 @@
 """
 モーター制御モジュール (PCA9685 + サーボ/ESC)
 ステアリングとスロットルを制御
+
+duty は PWMWriter 経由で書き込む。前回と同じ値なら I2C に出さず、
+ステアリングとスロットルが両方変わったときは1回のバースト書き込みで更新する。
+
+MOTOR_ASYNC が有効なら drive() は指令をアクチュエータースレッドに渡してすぐ戻る。
+書き込み (_apply) はロックで1つずつにする（アクチュエータースレッドと stop() を呼んだスレッドが
+ESCStateMachine と現在値を同時に書き換えないように）。
+スロットルは ESCStateMachine を通して出力する（アーミングと後退切り替えを待ちなしで行う）。
 """
 
+import threading
+
 import board
-import time
 from adafruit_pca9685 import PCA9685
-from adafruit_motor import servo
 
+from common.actuator import ActuatorThread
+from common.duty_table import esc_table, steering_table
+from common.esc import ESCStateMachine
+from common.pwm_writer import PWMWriter
 from config.settings import (
-    PCA9685_FREQUENCY,
+    PCA9685_FREQUENCY, CONTROL_INTERVAL,
+    MOTOR_ASYNC, MOTOR_FAILSAFE_PERIODS,
     SERVO_CHANNEL, SERVO_MIN_PULSE, SERVO_MAX_PULSE,
     SERVO_CENTER, SERVO_LEFT, SERVO_RIGHT,
     ESC_CHANNEL, ESC_MIN_PULSE, ESC_MAX_PULSE,
+    ESC_ARMING_TIME, ESC_REVERSE_BRAKE_TIME, ESC_REVERSE_NEUTRAL_TIME,
     THROTTLE_STOP
 )
 
@@ -20,11 +34,28 @@ from config.settings import (
 class MotorController:
     """モーター制御クラス"""
     
-    def __init__(self, i2c=None):
+    def __init__(self, i2c=None, async_mode=None, thread_setup=None):
+        """
+        Args:
+            i2c: I2Cバスインスタンス（Noneの場合は自動作成）
+            async_mode: drive() をアクチュエータースレッド経由にするか（Noneなら設定値）
+            thread_setup: アクチュエータースレッドの開始時にそのスレッドで呼ぶ関数
+                          （RealtimeRuntime.apply_to_current_thread など）
+        """
         self.i2c = i2c if i2c else board.I2C()
         self.pca = None
-        self.steering_servo = None
-        self.esc_channel = None
+        self.pwm = None
+        self._steering_duty = None
+        self._throttle_duty = None
+        self.async_mode = MOTOR_ASYNC if async_mode is None else async_mode
+        self.actuator = None
+        self.thread_setup = thread_setup
+        self._apply_lock = threading.Lock()
+        self.esc = ESCStateMachine(
+            arming_time=ESC_ARMING_TIME,
+            brake_time=ESC_REVERSE_BRAKE_TIME,
+            neutral_time=ESC_REVERSE_NEUTRAL_TIME
+        )
         self._current_steering = SERVO_CENTER
         self._current_throttle = THROTTLE_STOP
         
@@ -32,23 +63,32 @@ class MotorController:
         """モーター/サーボの初期化"""
         print("モーターコントローラー初期化開始...")
         
+        # frequency の設定でオートインクリメントも有効になる
         self.pca = PCA9685(self.i2c)
         self.pca.frequency = PCA9685_FREQUENCY
+        self.pwm = PWMWriter(self.i2c)
         
-        # サーボ設定（ステアリング）
-        self.steering_servo = servo.Servo(
-            self.pca.channels[SERVO_CHANNEL],
-            min_pulse=SERVO_MIN_PULSE,
-            max_pulse=SERVO_MAX_PULSE
+        # 角度・スロットル → duty の参照テーブル（毎回のパルス幅計算を省く）
+        self._steering_duty = steering_table(
+            PCA9685_FREQUENCY, SERVO_MIN_PULSE, SERVO_MAX_PULSE, SERVO_LEFT, SERVO_RIGHT
         )
+        self._throttle_duty = esc_table(PCA9685_FREQUENCY, ESC_MIN_PULSE, ESC_MAX_PULSE)
         
-        # ESC設定（モーター）
-        self.esc_channel = self.pca.channels[ESC_CHANNEL]
+        # 初期位置（アーミングはニュートラルを送りながら時間経過で完了する）
+        self.esc.arm()
+        self.drive(SERVO_CENTER, THROTTLE_STOP)
         
-        # 初期位置
-        self.steer(SERVO_CENTER)
-        self.throttle(THROTTLE_STOP)
-        time.sleep(0.5)
+        if self.async_mode:
+            # CONTROL_INTERVAL × MOTOR_FAILSAFE_PERIODS 指令がなければ中央・停止
+            self.actuator = ActuatorThread(
+                self._apply, self.stop_now,
+                deadline=CONTROL_INTERVAL * MOTOR_FAILSAFE_PERIODS,
+                name="motor-actuator",
+                next_update_fn=self.esc.pending,
+                on_start=self.thread_setup
+            )
+            self.actuator.start()
+            print(f"  非同期出力: 有効 (フェイルセーフ {CONTROL_INTERVAL * MOTOR_FAILSAFE_PERIODS * 1000:.0f}ms)")
         
         print(f"  ステアリング: {SERVO_LEFT}° ~ {SERVO_CENTER}° ~ {SERVO_RIGHT}°")
         print("モーターコントローラー初期化完了")
@@ -62,8 +102,9 @@ class MotorController:
             angle: サーボ角度 (SERVO_LEFT ~ SERVO_RIGHT)
         """
         angle = max(SERVO_LEFT, min(SERVO_RIGHT, angle))
-        self.steering_servo.angle = angle
-        self._current_steering = angle
+        with self._apply_lock:
+            self.pwm.write(SERVO_CHANNEL, self._steering_duty(angle))
+            self._current_steering = angle
         return angle
     
     def throttle(self, value):
@@ -73,38 +114,48 @@ class MotorController:
         Args:
             value: -1.0（後退）〜 0.0（停止）〜 1.0（前進）
         """
-        neutral_pulse = (ESC_MIN_PULSE + ESC_MAX_PULSE) / 2
-        
-        if value > 0:
-            pulse_us = neutral_pulse + (value * (ESC_MAX_PULSE - neutral_pulse))
-        elif value < 0:
-            pulse_us = neutral_pulse + (value * (neutral_pulse - ESC_MIN_PULSE))
-        else:
-            pulse_us = neutral_pulse
-        
-        pulse_us = max(ESC_MIN_PULSE, min(ESC_MAX_PULSE, pulse_us))
-        
-        period_us = 1000000 / PCA9685_FREQUENCY
-        duty = int((pulse_us / period_us) * 65535)
-        self.esc_channel.duty_cycle = duty
-        self._current_throttle = value
+        with self._apply_lock:
+            self.pwm.write(ESC_CHANNEL, self._throttle_duty(self.esc.update(value)))
+            self._current_throttle = value
         return value
     
     def drive(self, steering, throttle_value):
         """
         ステアリングとスロットルを同時に設定
         
+        非同期モードでは指令をアクチュエータースレッドに渡してすぐ戻る。
+        
         Args:
             steering: ステアリング角度
             throttle_value: スロットル値
         """
-        self.steer(steering)
-        self.throttle(throttle_value)
+        if self.actuator is not None:
+            self.actuator.post(steering, throttle_value)
+            return
+        self._apply(steering, throttle_value)
+    
+    def _apply(self, steering, throttle_value):
+        """ステアリングとスロットルを書き込む（同期。どのスレッドから呼んでも1つずつ）"""
+        angle = max(SERVO_LEFT, min(SERVO_RIGHT, steering))
+        with self._apply_lock:
+            self.pwm.update({
+                SERVO_CHANNEL: self._steering_duty(angle),
+                ESC_CHANNEL: self._throttle_duty(self.esc.update(throttle_value)),
+            })
+            self._current_steering = angle
+            self._current_throttle = throttle_value
     
     def stop(self):
         """緊急停止"""
-        self.throttle(THROTTLE_STOP)
-        self.steer(SERVO_CENTER)
+        if self.actuator is not None:
+            # スレッドが古い指令で上書きしないよう、最新指令も停止にしておく。
+            # スレッドが書き込み中なら stop_now() はロックで待ち、その後に停止を書く
+            self.actuator.post(SERVO_CENTER, THROTTLE_STOP)
+        self.stop_now()
+    
+    def stop_now(self):
+        """中央・停止をその場で書き込む"""
+        self._apply(SERVO_CENTER, THROTTLE_STOP)
     
     @property
     def current_steering(self):
@@ -114,9 +165,46 @@ class MotorController:
     def current_throttle(self):
         return self._current_throttle
     
+    @property
+    def saved_writes(self):
+        """キャッシュとバースト書き込みで省いたI2C書き込みの数"""
+        return self.pwm.saved_writes if self.pwm else 0
+    
+    def actuator_stats(self):
+        """
+        非同期出力の統計
+
+        Returns:
+            dict: posted, applied, failsafe, errors, latency（投入→書き込み完了 秒）。同期モードではNone
+        """
+        if self.actuator is None:
+            return None
+        return {
+            "posted": self.actuator.posted,
+            "applied": self.actuator.applied,
+            "failsafe": self.actuator.failsafe_count,
+            "errors": self.actuator.errors,
+            "latency": self.actuator.latency_stats(),
+        }
+    
     def cleanup(self):
         """クリーンアップ"""
-        self.stop()
+        if self.actuator is not None:
+            self.actuator.stop()
+            stats = self.actuator_stats()
+            latency = stats["latency"]
+            print(f"  非同期出力: 指令 {stats['posted']}回 / 書き込み {stats['applied']}回 / "
+                  f"フェイルセーフ {stats['failsafe']}回")
+            print(f"  出力遅延: 平均 {latency['mean'] * 1000:.2f}ms / p99 {latency['p99'] * 1000:.2f}ms / "
+                  f"最大 {latency['max'] * 1000:.2f}ms")
+            self.actuator = None
+        if self.esc.reverse_count:
+            reverse = self.esc.reverse_latency_stats()
+            print(f"  後退切り替え: {reverse['count']}回 (平均 {reverse['mean'] * 1000:.0f}ms / "
+                  f"最大 {reverse['max'] * 1000:.0f}ms)")
+        if self.pwm:
+            self.stop()
+            print(f"  PCA9685書き込み: {self.pwm.writes}回 (省略 {self.pwm.saved_writes}回)")
         if self.pca:
             self.pca.deinit()
         print("モーターコントローラーをクリーンアップしました")
@@ -15,18 +15,37 @@ import time
 from digitalio import DigitalInOut, Direction
 import adafruit_vl53l4cd
 
+from common.acquisition import AcquisitionThread
+from common.gpio_irq import DataReadyInterrupts, RPiGPIOBackend
+from common.sensor_health import SensorHealthMonitor
+from common.sensor_schedule import SensorScheduler
+from common.vl53l4cd_fast import FastRangingReader
 from config.settings import (
     XSHUT_PINS, SENSOR_BASE_ADDRESS,
-    SENSOR_TIMING_BUDGET, SENSOR_INTER_MEASUREMENT,
-    SENSOR_INVALID_VALUE, SENSOR_MAX_RANGE
+    SENSOR_INVALID_VALUE, SENSOR_MAX_RANGE,
+    SENSOR_BACKGROUND_ACQUISITION, SENSOR_POLL_INTERVAL,
+    SENSOR_USE_INTERRUPTS, SENSOR_INTERRUPT_PINS,
+    SENSOR_FAST_PATH,
+    SENSOR_PROFILES, SENSOR_DEFAULT_PROFILE,
+    SENSOR_AUTO_REINIT, SENSOR_HEALTH_FAIL_THRESHOLD,
+    SENSOR_HEALTH_STALL_TIMEOUT, SENSOR_HEALTH_RETRY_INTERVAL,
+    SENSOR_WARM_RESTART, SENSOR_KEEP_ALIVE_ON_EXIT, SENSOR_COLD_START_RECORD
 )
 
 
 class SensorData:
-    """センサーデータを格納する構造体"""
-    __slots__ = ['left', 'front_left', 'center', 'front_right', 'right', 'timestamp']
+    """
+    センサーデータを格納する構造体
+
+    各チャンネルは取得時刻 (time.monotonic) とシーケンス番号を持つ。
+    逐次読み取りでは先に読んだチャンネルほど古いので、age() で鮮度を確認できる。
+    """
+    __slots__ = [
+        'left', 'front_left', 'center', 'front_right', 'right', 'timestamp',
+        'capture_times', 'sequences',
+    ]
     
-    def __init__(self, distances=None):
+    def __init__(self, distances=None, capture_times=None, sequences=None):
         if distances and len(distances) >= 5:
             self.left = distances[0]
             self.front_left = distances[1]
@@ -40,9 +59,24 @@ class SensorData:
             self.front_right = SENSOR_INVALID_VALUE
             self.right = SENSOR_INVALID_VALUE
         self.timestamp = time.monotonic()
+        # チャンネル別の取得時刻とシーケンス番号（指定なしは構築時刻と0）
+        self.capture_times = capture_times if capture_times is not None else (self.timestamp,) * 5
+        self.sequences = sequences if sequences is not None else (0,) * 5
     
     def as_list(self):
         return [self.left, self.front_left, self.center, self.front_right, self.right]
+
+    def age(self, index, now=None):
+        """チャンネルの測定値が取得されてからの経過時間 (秒)"""
+        if now is None:
+            now = time.monotonic()
+        return now - self.capture_times[index]
+
+    def ages(self, now=None):
+        """全チャンネルの経過時間 (秒) のリスト"""
+        if now is None:
+            now = time.monotonic()
+        return [now - t for t in self.capture_times]
     
     def __repr__(self):
         return f"L:{self.left:4.0f} FL:{self.front_left:4.0f} C:{self.center:4.0f} FR:{self.front_right:4.0f} R:{self.right:4.0f}"
@@ -53,53 +87,269 @@ class SensorManager:
     
     LABELS = ["真左", "斜め左前", "正面", "斜め右前", "真右"]
     
-    def __init__(self, i2c=None):
+    def __init__(self, i2c=None, background=None, interrupts=None, gpio=None, fast_path=None,
+                 thread_setup=None):
+        """
+        Args:
+            i2c: I2Cバスインスタンス（Noneの場合は自動作成）
+            background: Trueで専用スレッドによる連続測距（Noneは設定値に従う）
+            interrupts: TrueでGPIO1割り込みにより測定完了を検知（Noneは設定値に従う）
+            gpio: エッジ検出バックエンド（Noneの場合は RPi.GPIO）
+            fast_path: Trueで結果レジスタのバースト読みを使う（Noneは設定値に従う）
+            thread_setup: 測距スレッドの開始時にそのスレッドで呼ぶ関数（RealtimeRuntime.apply_to_current_thread など）
+        """
         self.i2c = i2c if i2c else board.I2C()
         self.sensors = []
-        self.xshuts = []
+        self.readers = []
+        self.xshuts = [None] * len(XSHUT_PINS)
+        self.startup_time = None
+        self.startup_saved = None  # 記録したコールドスタートとの差 (秒)。比べられなければNone
         self._last_data = SensorData()
+        self._sequence = [0] * 5
+        self.background = SENSOR_BACKGROUND_ACQUISITION if background is None else background
+        self._acquisition = None
+        self.thread_setup = thread_setup
+        self.use_interrupts = SENSOR_USE_INTERRUPTS if interrupts is None else interrupts
+        self._gpio = gpio
+        self._interrupts = None
+        self.fast_path = SENSOR_FAST_PATH if fast_path is None else fast_path
+        self.scheduler = SensorScheduler(SENSOR_PROFILES, SENSOR_DEFAULT_PROFILE)
+        self.health = SensorHealthMonitor(
+            5, self._reinit_sensor,
+            fail_threshold=SENSOR_HEALTH_FAIL_THRESHOLD,
+            stall_timeout=SENSOR_HEALTH_STALL_TIMEOUT,
+            retry_interval=SENSOR_HEALTH_RETRY_INTERVAL,
+            auto_reinit=SENSOR_AUTO_REINIT,
+        )
         
     def initialize(self):
         """センサーの初期化処理"""
         print("センサー初期化開始...")
+        start = time.monotonic()
+        count = len(XSHUT_PINS)
+
+        # 前回の実行でアドレス変更済みのセンサーを探す
+        found = self._probe_addressed() if SENSOR_WARM_RESTART else [None] * count
+        cold = [i for i, sensor in enumerate(found) if sensor is None]
         
-        # XSHUTピンの設定（全センサーをOFFにする）
-        for pin in XSHUT_PINS:
-            gpio = DigitalInOut(getattr(board, f"D{pin}"))
-            gpio.direction = Direction.OUTPUT
-            gpio.value = False
-            self.xshuts.append(gpio)
+        # 見つからなかったセンサーだけOFFにする（見つかったセンサーのXSHUTには触れない）
+        for i in cold:
+            self._xshut(i).value = False
         
-        time.sleep(0.1)
+        if cold:
+            time.sleep(0.1)
         
-        # 1つずつONにしてアドレスを変更
-        for i, xshut in enumerate(self.xshuts):
-            xshut.value = True
-            time.sleep(0.05)
-            
+        self.sensors = [None] * count
+        self.readers = [None] * count
+        for i in range(count):
             try:
-                sensor = adafruit_vl53l4cd.VL53L4CD(self.i2c)
-                new_address = SENSOR_BASE_ADDRESS + i
-                sensor.set_address(new_address)
-                time.sleep(0.01)
-                
-                sensor.timing_budget = SENSOR_TIMING_BUDGET
-                sensor.inter_measurement = SENSOR_INTER_MEASUREMENT
-                sensor.start_ranging()
-                self.sensors.append(sensor)
+                if found[i] is not None:
+                    # アドレスはそのままで設定し直して測距開始
+                    sensor = found[i]
+                    reader = self._configure(i, sensor)
+                    note = "（ウォームスタート）"
+                else:
+                    # 1つずつONにしてアドレスを変更
+                    sensor, reader = self._bring_up(i)
+                    note = ""
+                self.sensors[i] = sensor
+                self.readers[i] = reader
                 
-                print(f"  センサー{i} ({self.LABELS[i]}): 0x{new_address:02X} OK")
+                print(f"  センサー{i} ({self.LABELS[i]}): 0x{SENSOR_BASE_ADDRESS + i:02X} OK{note}")
                 
             except Exception as e:
                 print(f"  センサー{i} ({self.LABELS[i]}): エラー - {e}")
-                self.sensors.append(None)
         
         active_count = sum(1 for s in self.sensors if s is not None)
         if active_count == 0:
             raise RuntimeError("センサーが1つも初期化できませんでした")
         
-        print(f"センサー初期化完了: {active_count}/5 個が有効")
+        self.startup_time = time.monotonic() - start
+        warm_count = count - len(cold)
+        if warm_count:
+            cold_time = self._load_cold_start_time()
+            if cold_time is not None:
+                self.startup_saved = cold_time - self.startup_time
+                print(f"ウォームスタート: {warm_count}/{count} 個のXSHUTシーケンスを省略 "
+                      f"(コールドスタート {cold_time * 1000:.0f}ms との差 {self.startup_saved * 1000:.0f}ms)")
+            else:
+                print(f"ウォームスタート: {warm_count}/{count} 個のXSHUTシーケンスを省略 "
+                      f"(コールドスタートの記録がないので短縮時間は未計測)")
+        elif active_count == count:
+            # 全台をXSHUTシーケンスで起動した時間を、次のウォームスタートと比べるために残す
+            self._save_cold_start_time(self.startup_time)
+        
+        print(f"センサー初期化完了: {active_count}/5 個が有効 ({self.startup_time * 1000:.0f}ms)")
+
+        # 初期化できなかったセンサーはバックグラウンドで起動し直す
+        for i, sensor in enumerate(self.sensors):
+            if sensor is None:
+                self.health.mark_down(i)
+
+        if self.use_interrupts:
+            self._start_interrupts()
+
+        if self.background:
+            self._acquisition = AcquisitionThread(
+                self._poll_channel, len(self.sensors), poll_interval=SENSOR_POLL_INTERVAL,
+                wake_event=self._interrupts.wake_event if self._interrupts else None,
+                on_start=self.thread_setup
+            )
+            self._acquisition.start()
+            print("バックグラウンド測距を開始しました")
         return True
+
+    def _bring_up(self, i):
+        """
+        XSHUTでセンサーを1台だけ起こし、アドレスを変更して測距を開始する
+
+        失敗したときはXSHUTをLowに戻し、0x29 に残ったセンサーが
+        次に起こすセンサーとアドレスを取り合わないようにする。
+
+        Returns:
+            tuple: (センサー, 高速リーダーまたはNone)
+        """
+        xshut = self._xshut(i)
+        xshut.value = True
+        time.sleep(0.05)
+
+        try:
+            sensor = adafruit_vl53l4cd.VL53L4CD(self.i2c)
+            sensor.set_address(SENSOR_BASE_ADDRESS + i)
+            time.sleep(0.01)
+            reader = self._configure(i, sensor)
+        except Exception:
+            xshut.value = False
+            raise
+        return sensor, reader
+
+    def _configure(self, i, sensor):
+        """
+        アドレス変更済みのセンサーにプロファイルの設定を書き込んで測距を開始する
+
+        Returns:
+            FastRangingReader: 高速リーダー（高速パス無効時はNone）
+        """
+        config = self.scheduler.config(i)
+        sensor.timing_budget = config.timing_budget
+        sensor.inter_measurement = config.inter_measurement
+        sensor.start_ranging()
+        self.scheduler.mark_applied(i)
+        return FastRangingReader(self.i2c, SENSOR_BASE_ADDRESS + i) if self.fast_path else None
+
+    def _probe_addressed(self):
+        """
+        0x30〜 に前回の実行でアドレス変更済みのセンサーがいるか確認する
+
+        先にバスをスキャンし、応答したアドレスだけドライバを作る。
+        ドライバの生成はセンサーの初期化シーケンスを含むので、その時間も startup_time に入る。
+
+        Returns:
+            list: チャンネルごとのセンサー。応答がなければNone
+        """
+        present = self._scan()
+        found = []
+        for i in range(len(XSHUT_PINS)):
+            sensor = None
+            if present is None or SENSOR_BASE_ADDRESS + i in present:
+                try:
+                    sensor = adafruit_vl53l4cd.VL53L4CD(self.i2c, address=SENSOR_BASE_ADDRESS + i)
+                except Exception:
+                    sensor = None
+            found.append(sensor)
+        return found
+
+    def _scan(self):
+        """
+        バス上で応答するアドレスの集合
+
+        Returns:
+            set: アドレスの集合（スキャンできなければNone）
+        """
+        try:
+            while not self.i2c.try_lock():
+                time.sleep(0)
+            try:
+                return set(self.i2c.scan())
+            finally:
+                self.i2c.unlock()
+        except Exception:
+            return None
+
+    @staticmethod
+    def _load_cold_start_time():
+        """記録したコールドスタートの所要時間 (秒)。記録がなければNone"""
+        try:
+            with open(SENSOR_COLD_START_RECORD) as f:
+                return float(f.read())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_cold_start_time(seconds):
+        """コールドスタートの所要時間 (秒) を記録する"""
+        try:
+            with open(SENSOR_COLD_START_RECORD, "w") as f:
+                f.write(f"{seconds:.6f}\n")
+        except OSError:
+            pass
+
+    def _xshut(self, i):
+        """
+        XSHUTピンを取得（初回に出力として設定する）
+
+        出力に設定した時点でLowになりセンサーがリセットされるので、
+        ウォームスタートしたセンサーのピンは必要になるまで設定しない。
+        """
+        if self.xshuts[i] is None:
+            gpio = DigitalInOut(getattr(board, f"D{XSHUT_PINS[i]}"))
+            gpio.direction = Direction.OUTPUT
+            gpio.value = False
+            self.xshuts[i] = gpio
+        return self.xshuts[i]
+
+    def _reinit_sensor(self, idx):
+        """
+        故障したセンサーだけを起動し直す（ヘルスモニターのスレッドから呼ばれる）
+
+        他のセンサーは 0x30 以降にいるので、XSHUTで再起動したセンサーだけが 0x29 に現れる。
+        """
+        old = self.sensors[idx]
+        # 読み取り側が先にセンサーを見るので、外すときはセンサー→リーダーの順
+        self.sensors[idx] = None
+        self.readers[idx] = None
+        if old is not None:
+            try:
+                old.stop_ranging()
+            except Exception:
+                pass
+
+        self._xshut(idx).value = False
+        time.sleep(0.01)
+        sensor, reader = self._bring_up(idx)
+
+        if self._interrupts is not None:
+            # 再起動前に立ったフラグを捨て、クリアして次の測定からエッジを発生させる
+            self._interrupts.take(idx)
+            sensor.clear_interrupt()
+        self.readers[idx] = reader
+        self.sensors[idx] = sensor
+        print(f"  センサー{idx} ({self.LABELS[idx]}): 再初期化しました")
+
+    def _start_interrupts(self):
+        """GPIO1のエッジ検出を開始"""
+        gpio = self._gpio if self._gpio is not None else RPiGPIOBackend()
+        self._interrupts = DataReadyInterrupts(gpio, SENSOR_INTERRUPT_PINS)
+        self._interrupts.start()
+        # 検出開始前に完了していた測定はGPIO1がLowのままでエッジが来ないので、
+        # 一度クリアして次の測定からエッジを発生させる
+        for sensor in self.sensors:
+            if sensor is not None:
+                try:
+                    sensor.clear_interrupt()
+                except Exception:
+                    pass
+        print("GPIO割り込みによる測定完了検知を開始しました")
     
     def read(self):
         """
@@ -108,40 +358,165 @@ class SensorManager:
         Returns:
             SensorData: センサーデータオブジェクト
         """
-        distances = []
+        if self._acquisition is not None:
+            return self._read_latest()
+
+        distances = [SENSOR_INVALID_VALUE] * 5
+        capture_times = [time.monotonic()] * 5
+        last = self._last_data
+        last_distances = last.as_list()
         
-        for idx, sensor in enumerate(self.sensors):
+        for idx, sensor in enumerate(self.sensors[:5]):
             if sensor is None:
-                distances.append(SENSOR_INVALID_VALUE)
-                continue
-                
-            try:
+                dist_mm = None
+            elif self.scheduler.blocking(idx):
+                dist_mm = self._wait_for_distance(idx, sensor)
+            else:
+                dist_mm = self._poll_channel(idx)
+                if dist_mm is None:
+                    # 待たないチャンネルは新しい測定がなければ前回値を使う
+                    distances[idx] = last_distances[idx]
+                    capture_times[idx] = last.capture_times[idx]
+                    continue
+            if dist_mm is not None:
+                distances[idx] = dist_mm
+                self._sequence[idx] += 1
+            # チャンネルごとに読み終えた時刻を記録
+            capture_times[idx] = time.monotonic()
+        
+        self._last_data = SensorData(distances, tuple(capture_times), tuple(self._sequence))
+        return self._last_data
+
+    def _wait_for_distance(self, idx, sensor):
+        """データ準備を待って距離(mm)を取得。タイムアウト・エラー時はNone"""
+        try:
+            self._apply_profile(idx, sensor)
+            if self._irq_wired(idx):
+                # エッジを待つ（最長で測定周期の1.5倍）。取りこぼし対策としてタイムアウト時だけI2Cで確認する
+                timeout = max(0.05, 1.5 * self.scheduler.period(idx))
+                ready = self._interrupts.take(idx, timeout) or self._data_ready(idx, sensor)
+            else:
+                ready = True
                 timeout = 0
-                while not sensor.data_ready:
+                while not self._data_ready(idx, sensor):
                     time.sleep(0.001)
                     timeout += 1
                     if timeout > 50:
-                        distances.append(SENSOR_INVALID_VALUE)
+                        ready = False
                         break
-                else:
-                    sensor.clear_interrupt()
-                    # VL53L4CDはcmで返すのでmmに変換
-                    dist_mm = sensor.distance * 10
-                    
-                    # 範囲外チェック
-                    if dist_mm <= 0 or dist_mm > SENSOR_MAX_RANGE:
-                        dist_mm = SENSOR_INVALID_VALUE
-                    distances.append(dist_mm)
-                    
-            except Exception:
-                distances.append(SENSOR_INVALID_VALUE)
-        
-        # 足りない場合は無効値で埋める
-        while len(distances) < 5:
-            distances.append(SENSOR_INVALID_VALUE)
-        
-        self._last_data = SensorData(distances[:5])
+            if not ready:
+                self.health.record_timeout(idx)
+                return None
+            dist_mm = self._fetch_distance(idx, sensor)
+        except Exception:
+            self.health.record_error(idx)
+            return None
+        self.health.record_ok(idx)
+        return dist_mm
+
+    def _read_latest(self):
+        """バックグラウンド測距の最新値からSensorDataを作る（待ちなし）"""
+        distances = [SENSOR_INVALID_VALUE] * 5
+        # 未取得のチャンネルは取得時刻0（=非常に古い）として扱う
+        capture_times = [0.0] * 5
+        sequences = [0] * 5
+        for idx, sample in enumerate(self._acquisition.snapshot()[:5]):
+            if sample is not None:
+                distances[idx], capture_times[idx], sequences[idx] = sample
+
+        self._last_data = SensorData(distances, tuple(capture_times), tuple(sequences))
         return self._last_data
+
+    def _poll_channel(self, idx):
+        """
+        1チャンネルを待たずに確認する（測距スレッドから呼ばれる）
+
+        Returns:
+            新しい測定値があれば距離(mm)、未準備ならNone
+        """
+        sensor = self.sensors[idx]
+        if sensor is None:
+            return None
+        try:
+            self._apply_profile(idx, sensor)
+            if self._irq_wired(idx):
+                ready = self._interrupts.take(idx)
+            else:
+                ready = self._data_ready(idx, sensor)
+            if not ready:
+                self.health.check_stall(idx)
+                return None
+            dist_mm = self._fetch_distance(idx, sensor)
+        except Exception:
+            self.health.record_error(idx)
+            return SENSOR_INVALID_VALUE
+        self.health.record_ok(idx)
+        return dist_mm
+
+    def set_profile(self, name):
+        """
+        測定プロファイルを切り替える（SENSOR_PROFILES のキー）
+
+        センサーの再設定は次にそのチャンネルを読むときに行われる。
+        """
+        self.scheduler.request(name)
+
+    def health_metrics(self):
+        """センサーごとのエラー率・再初期化回数・復帰時間など（SensorHealthMonitor.metrics()）"""
+        return self.health.metrics()
+
+    @property
+    def profile(self):
+        """現在の測定プロファイル名"""
+        return self.scheduler.active
+
+    def _apply_profile(self, idx, sensor):
+        """プロファイルが切り替わっていればチャンネルを再設定する（I2C担当スレッドから呼ぶ）"""
+        config = self.scheduler.take_change(idx)
+        if config is None:
+            return
+        try:
+            sensor.stop_ranging()
+            sensor.timing_budget = config.timing_budget
+            sensor.inter_measurement = config.inter_measurement
+            reader = self.readers[idx]
+            if reader is not None:
+                # 最初の測定完了は待たずに再開する
+                reader.start_ranging(continuous=config.inter_measurement == 0)
+            else:
+                sensor.start_ranging()
+        except Exception:
+            self.scheduler.invalidate(idx)
+            raise
+        if self._interrupts is not None:
+            # 停止前の測定で立ったフラグは捨てる
+            self._interrupts.take(idx)
+
+    def _irq_wired(self, idx):
+        """チャンネルの測定完了をGPIO割り込みで検知するか"""
+        return self._interrupts is not None and self._interrupts.wired(idx)
+
+    def _data_ready(self, idx, sensor):
+        """新しい測定結果があるか"""
+        reader = self.readers[idx]
+        return reader.data_ready if reader is not None else sensor.data_ready
+
+    def _fetch_distance(self, idx, sensor):
+        """割り込みをクリアして距離(mm)を取得"""
+        reader = self.readers[idx]
+        if reader is not None:
+            # 距離(mm)を1回で読み、クリアも1回の書き込みで済ませる
+            # （adafruit の distance と同じくレンジステータスでは捨てない）
+            _, dist_mm = reader.fetch()
+        else:
+            sensor.clear_interrupt()
+            # VL53L4CDはcmで返すのでmmに変換
+            dist_mm = sensor.distance * 10
+
+        # 範囲外チェック
+        if dist_mm <= 0 or dist_mm > SENSOR_MAX_RANGE:
+            dist_mm = SENSOR_INVALID_VALUE
+        return dist_mm
     
     @property
     def last_data(self):
@@ -150,6 +525,15 @@ class SensorManager:
     
     def cleanup(self):
         """センサーのクリーンアップ"""
+        self.health.stop()
+        if self._acquisition is not None:
+            self._acquisition.stop()
+            self._acquisition = None
+
+        if self._interrupts is not None:
+            self._interrupts.stop()
+            self._interrupts = None
+
         for sensor in self.sensors:
             if sensor is not None:
                 try:
@@ -157,7 +541,15 @@ class SensorManager:
                 except:
                     pass
         
-        for xshut in self.xshuts:
-            xshut.value = False
+        if SENSOR_KEEP_ALIVE_ON_EXIT:
+            # XSHUTはHighのまま残し、次回の起動でウォームスタートできるようにする
+            print("センサーのアドレスを保持しました（次回はウォームスタート）")
+        else:
+            for i in range(len(self.xshuts)):
+                self._xshut(i).value = False
+
+        attempts = sum(self.health.reinit_attempts)
+        if attempts:
+            print(f"センサー再初期化: {sum(self.health.reinit_successes)}/{attempts} 回成功")
             
         print("センサーをクリーンアップしました")
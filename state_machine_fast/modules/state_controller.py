@@ -25,9 +25,12 @@ from config.settings import (
     TURN_MIN_DURATION, TURN_MAX_DURATION, CORNER_EXIT_DELAY,
     FRONT_BLOCKED_THRESHOLD, LEFT_CORNER_OPEN_THRESHOLD, RIGHT_WALL_CLOSE_THRESHOLD,
     LEFT_OPENING_DELTA, RIGHT_FRONT_TURN_TRIGGER, LEFT_FRONT_DOMINANCE_DELTA,
-    SENSOR_INVALID_VALUE,
+    SENSOR_INVALID_VALUE, SENSOR_STALE_TIMEOUT,
+    RANGE_FILTER_ENABLED, RANGE_FILTER_ACCEL_STD, RANGE_FILTER_MEASUREMENT_STD,
+    SENSOR_DEFAULT_PROFILE, SENSOR_STATE_PROFILES, SENSOR_HIGH_SPEED_PROFILE,
     LOG_STATE_CHANGES,
-    S_CURVE_DETECTION_THRESHOLD
+    S_CURVE_DETECTION_THRESHOLD,
+    CONTROLLER_CONSTANTS
 )
 
 
@@ -83,6 +86,13 @@ class StateController:
     FRONT_CRITICAL_RELEASE = 1
     
     def __init__(self):
+        # 自動調整のプロファイル (config/tuned_profile.py) で上書きしたクラス定数
+        # （名前の打ち間違いで調整値が黙って無視されないよう、クラス定数にない名前はエラー）
+        for name, value in CONTROLLER_CONSTANTS.items():
+            if not hasattr(type(self), name):
+                raise KeyError(f"CONTROLLER_CONSTANTS の {name} は StateController のクラス定数ではありません")
+            setattr(self, name, value)
+
         self.state = State.INIT
         self.prev_state = State.INIT
         self.state_start_time = time.monotonic()
@@ -93,6 +103,20 @@ class StateController:
         self.steering = SERVO_CENTER
         self.throttle = THROTTLE_STOP
         
+        # 距離フィルタ（有効時のみ numpy を読み込む）
+        self.range_filter = None
+        if RANGE_FILTER_ENABLED:
+            from common.range_filter import RangeFilter
+            self.range_filter = RangeFilter(
+                accel_std=RANGE_FILTER_ACCEL_STD,
+                measurement_std=RANGE_FILTER_MEASUREMENT_STD,
+                invalid_value=SENSOR_INVALID_VALUE,
+            )
+        self.ranges = None
+        self.stale = [False] * 5  # チャンネルごとに SENSOR_STALE_TIMEOUT より古いか
+        self._last_update_time = None
+        self._update_dt = 0.0
+        
         # 壁沿い走行用
         self.last_left_distance = None
         self._smoothed_steering = SERVO_CENTER
@@ -100,6 +124,8 @@ class StateController:
         self.last_recover_time = -10.0
         self._front_blocked_conf = 0
         self._front_critical_conf = 0
+        # 直近の update() の結果（デバッグ表示用、毎周期作り直すタプル）
+        self._debug = None
         self._last_corner_time = -10.0
     
     def update(self, sensor_data):
@@ -116,13 +142,17 @@ class StateController:
         if self._controller_start is None:
             self._controller_start = now
         self.state_duration = now - self.state_start_time
+        if self._last_update_time is not None:
+            self._update_dt = now - self._last_update_time
+        self._last_update_time = now
+
+        if self.range_filter is not None:
+            self.ranges = self.range_filter.update(
+                sensor_data.as_list(), sensor_data.capture_times, sensor_data.sequences
+            )
         
-        # センサー値を取得（無効値は大きな値に）
-        L = sensor_data.left if sensor_data.left < SENSOR_INVALID_VALUE else 2000
-        FL = sensor_data.front_left if sensor_data.front_left < SENSOR_INVALID_VALUE else 2000
-        C = sensor_data.center if sensor_data.center < SENSOR_INVALID_VALUE else 2000
-        FR = sensor_data.front_right if sensor_data.front_right < SENSOR_INVALID_VALUE else 2000
-        R = sensor_data.right if sensor_data.right < SENSOR_INVALID_VALUE else 2000
+        # センサー値を取得（無効値は大きな値に、古いチャンネルは最後の値のまま）
+        L, FL, C, FR, R = self._sensor_values(sensor_data, now)
 
         if self.last_left_distance is None:
             self.last_left_distance = L
@@ -155,13 +185,40 @@ class StateController:
         elif self.state == State.RECOVER:
             next_state, self.steering, self.throttle = self._handle_recover(L, FL, C, FR, R, pattern)
         
+        # 正面が古いまま（読み取りの停止）なら前が空いているとは限らないので止める
+        if self.stale[2]:
+            self.throttle = THROTTLE_STOP
+
         # 状態遷移
         if next_state != self.state:
             self._transition_to(next_state)
         
         self.last_left_distance = L
+        # 表示用に今回の判定結果を公開する（表示側は再計算しない）
+        self._debug = (self.state, sensor_data, pattern, self.steering, self.throttle, self.state_duration)
         return self.steering, self.throttle
     
+    def _sensor_values(self, sensor_data, now):
+        """
+        無効値を2000に置き換えた距離を返し、SENSOR_STALE_TIMEOUT より古いチャンネルを self.stale に記録
+
+        古いチャンネルは開けた空間とは見なさず、最後に読めた値をそのまま使う。
+        """
+        self.stale = [age > SENSOR_STALE_TIMEOUT for age in sensor_data.ages(now)]
+        return [value if value < SENSOR_INVALID_VALUE else 2000 for value in sensor_data.as_list()]
+
+    def _left_delta(self, L):
+        """
+        前回の制御周期からの真左距離の変化 (mm)
+
+        フィルタ有効時は推定した変化率 (mm/s) に実際の経過時間を掛けて求める。
+        無効値（壁が消えた）への変化は差分のまま使う。
+        """
+        raw_delta = L - self.last_left_distance
+        if self.ranges is None or not self.ranges.valid[0] or L >= 2000:
+            return raw_delta
+        return float(self.ranges.velocity[0]) * self._update_dt
+
     def _detect_pattern(self, L, FL, C, FR, R, front_blocked_flag, front_critical_flag):
         """センサーパターンを検出"""
         
@@ -173,7 +230,7 @@ class StateController:
         right_s_curve = is_s_curve and (R < L - 100)  # 右が100mm以上近い
         left_s_curve = is_s_curve and (L < R - 100)   # 左が100mm以上近い
         
-        left_opening = (L - self.last_left_distance) > LEFT_OPENING_DELTA
+        left_opening = self._left_delta(L) > LEFT_OPENING_DELTA
         right_front_close = FR < RIGHT_FRONT_TURN_TRIGGER
 
         return {
@@ -495,21 +552,39 @@ class StateController:
         if new_state == State.RECOVER:
             self.last_recover_time = now
     
+    def sensor_profile(self):
+        """現在の状態に合ったセンサー測定プロファイル名"""
+        if self.state == State.WALL_FOLLOW and self._is_high_speed():
+            # 高速の壁沿い走行では正面の更新を優先する
+            return SENSOR_HIGH_SPEED_PROFILE
+        return SENSOR_STATE_PROFILES.get(self.state.name, SENSOR_DEFAULT_PROFILE)
+
     def get_state_name(self):
         """現在の状態名を取得"""
         return self.STATE_NAMES.get(self.state, "不明")
     
-    def format_debug(self, sensor_data):
-        """デバッグ情報を整形"""
-        # デバッグ表示用にもパターンを計算
-        L = sensor_data.left if sensor_data.left < SENSOR_INVALID_VALUE else 2000
-        FL = sensor_data.front_left if sensor_data.front_left < SENSOR_INVALID_VALUE else 2000
-        C = sensor_data.center if sensor_data.center < SENSOR_INVALID_VALUE else 2000
-        FR = sensor_data.front_right if sensor_data.front_right < SENSOR_INVALID_VALUE else 2000
-        R = sensor_data.right if sensor_data.right < SENSOR_INVALID_VALUE else 2000
-        
-        front_blocked_flag, front_critical_flag = self._update_front_flags(C)
-        pattern = self._detect_pattern(L, FL, C, FR, R, front_blocked_flag, front_critical_flag)
+    def debug_snapshot(self):
+        """
+        直近の update() のスナップショット（まだなければNone）
+
+        Returns:
+            tuple: (状態, SensorData, パターン, ステアリング, スロットル, 状態の経過時間)
+        """
+        return self._debug
+
+    def format_debug(self, snapshot=None):
+        """
+        デバッグ情報を整形
+
+        update() で計算済みのパターンを使うので、ヒステリシスなど制御の状態は変えない。
+        別スレッドから呼ぶときは debug_snapshot() で取ったスナップショットを渡す。
+        """
+        if snapshot is None:
+            snapshot = self._debug
+            if snapshot is None:
+                return ""
+        state, sensor_data, pattern, steering, throttle, duration = snapshot
+
         flags = []
         if pattern['left_s_curve']: flags.append("L-S")
         if pattern['right_s_curve']: flags.append("R-S")
@@ -519,9 +594,9 @@ class StateController:
         flag_str = ",".join(flags) if flags else "-"
         
         return (
-            f"[{self.get_state_name():4}] "
+            f"[{self.STATE_NAMES.get(state, '不明'):4}] "
             f"{sensor_data} | "
-            f"St:{self.steering:5.1f} Th:{self.throttle:+.2f} "
-            f"({self.state_duration:.1f}s) "
+            f"St:{steering:5.1f} Th:{throttle:+.2f} "
+            f"({duration:.1f}s) "
             f"[{flag_str}]"
         )